@@ -0,0 +1,123 @@
+"""
+Single-flight acquisition of OAuth access tokens, refreshed before they expire.
+
+Tokens are cached in all tiers until they expire. Alongside each token, the time at which it is due for a refresh,
+ACCESS_TOKEN_REFRESH_MARGIN seconds before it expires, is kept in the Django cache.
+
+* Once a token is due for a refresh, the first worker to notice it takes a lock in the Django cache, and fetches a
+  new token in a background thread. Every worker keeps serving the cached token until the new one is cached.
+* If no token is cached, only the worker holding the lock fetches one. Other workers poll the cache for it, and
+  fetch a token themselves only if the lock is released or times out without a token being cached.
+"""
+
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from edx_django_utils.cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.05  # Value is in seconds.
+
+
+def _get_refresh_at_cache_key(cache_key):
+    return '{}.refresh_at'.format(cache_key)
+
+
+def _get_lock_cache_key(cache_key):
+    return '{}.lock'.format(cache_key)
+
+
+def _cache_access_token(cache_key, access_token, expires_in):
+    # Refresh the token ahead of its expiry, and halfway through its lifetime if that is shorter than the margin.
+    refresh_in = max(expires_in - settings.ACCESS_TOKEN_REFRESH_MARGIN, expires_in // 2)
+    TieredCache.set_all_tiers(cache_key, access_token, expires_in)
+    django_cache.set(_get_refresh_at_cache_key(cache_key), time.time() + refresh_in, expires_in)
+
+
+def _fetch_and_cache(cache_key, fetch):
+    access_token, expires_in = fetch()
+    _cache_access_token(cache_key, access_token, expires_in)
+    return access_token
+
+
+def _refresh(cache_key, fetch, lock_key):
+    """
+    Fetch and cache a new access token, while the cached one is still served.
+
+    The lock is kept until it times out if the refresh fails, so that workers do not retry the refresh on every
+    request while the OAuth provider is unavailable.
+    """
+    try:
+        _fetch_and_cache(cache_key, fetch)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception('Failed to refresh the access token cached under [%s].', cache_key)
+    else:
+        django_cache.delete(lock_key)
+
+
+def refresh_in_background(cache_key, fetch, lock_key):
+    """
+    Start a daemon thread refreshing the access token cached under the key, and return it.
+    """
+    thread = threading.Thread(target=_refresh, args=(cache_key, fetch, lock_key))
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def _wait_for_access_token(cache_key, lock_key):
+    """
+    Wait for another worker to cache an access token, while it holds the lock.
+    """
+    deadline = time.time() + settings.ACCESS_TOKEN_REFRESH_LOCK_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(POLL_INTERVAL)
+        cached_response = TieredCache.get_cached_response(cache_key)
+        if cached_response.is_found:
+            return cached_response.value
+        if django_cache.get(lock_key) is None:
+            break
+    return None
+
+
+def get_access_token(cache_key, fetch):
+    """
+    Return the access token cached under the key, calling `fetch` to retrieve a new one when it is due.
+
+    Arguments:
+        cache_key (str): Cache key for the access token.
+        fetch (callable): Function without arguments returning a new access token, and the number of seconds
+            it expires in.
+
+    Returns:
+        str: Access token.
+
+    Raises:
+        Any exception raised by `fetch`, if no access token is cached.
+    """
+    lock_key = _get_lock_cache_key(cache_key)
+    cached_response = TieredCache.get_cached_response(cache_key)
+    if cached_response.is_found:
+        refresh_at = django_cache.get(_get_refresh_at_cache_key(cache_key))
+        if refresh_at is not None and time.time() >= refresh_at and django_cache.add(
+                lock_key, True, settings.ACCESS_TOKEN_REFRESH_LOCK_TIMEOUT):
+            refresh_in_background(cache_key, fetch, lock_key)
+        return cached_response.value
+
+    if django_cache.add(lock_key, True, settings.ACCESS_TOKEN_REFRESH_LOCK_TIMEOUT):
+        try:
+            return _fetch_and_cache(cache_key, fetch)
+        finally:
+            django_cache.delete(lock_key)
+
+    access_token = _wait_for_access_token(cache_key, lock_key)
+    if access_token is not None:
+        return access_token
+
+    logger.info('Gave up waiting for another worker to fetch the access token [%s], fetching it again.', cache_key)
+    return _fetch_and_cache(cache_key, fetch)
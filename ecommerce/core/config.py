@@ -14,3 +14,7 @@ class CoreAppConfig(AppConfig):
         # Allows Celery tasks to bind themselves to an initialized instance of the Celery library.
         # noinspection PyUnresolvedReferences
         from ecommerce import celery_app  # pylint: disable=unused-import, import-outside-toplevel
+
+        # Clear the cached reference rows of a model when one of its rows is saved or deleted.
+        from ecommerce.core.reference_data import connect_signals  # pylint: disable=import-outside-toplevel
+        connect_signals()
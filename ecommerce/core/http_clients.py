@@ -0,0 +1,127 @@
+"""
+Process-wide registry of the HTTP sessions and REST API clients used to call other services.
+
+Sessions keep their connections alive in a pool, so that connection setup and TLS handshakes are paid once per
+process rather than once per request. Each service has its own timeout and retry policy, configured by
+API_CLIENT_SERVICES.
+
+REST API clients are shared per site, service and URL. The clients of a site authenticate with the site's access
+token, which is read again on every lookup, so that a client built with an expired token uses the new one.
+"""
+
+
+import threading
+
+import requests
+from django.conf import settings
+from edx_rest_api_client.auth import SuppliedJwtAuth
+from edx_rest_api_client.client import EdxRestApiClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_sessions = {}
+_clients = {}
+_registry_lock = threading.Lock()
+
+
+class ServiceSession(requests.Session):
+    """
+    Session which applies its timeout to the requests which do not set one.
+
+    EdxRestApiClient sets the timeout attribute of its session, which requests.Session ignores.
+    """
+
+    def __init__(self, timeout=None):
+        super(ServiceSession, self).__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, *args, **kwargs):  # pylint: disable=arguments-differ
+        kwargs.setdefault('timeout', self.timeout)
+        return super(ServiceSession, self).request(method, url, *args, **kwargs)
+
+
+def get_service_settings(service):
+    """
+    Return the timeout and retry settings of a service, completed with the defaults.
+    """
+    service_settings = dict(settings.API_CLIENT_SERVICES['default'])
+    service_settings.update(settings.API_CLIENT_SERVICES.get(service, {}))
+    return service_settings
+
+
+def create_session(service):
+    """
+    Return a new session for a service, with a connection pool and the service's timeout and retry policy.
+
+    Only idempotent requests are retried, on connection errors and gateway errors. Read timeouts are not retried,
+    so that they are still raised as requests.exceptions.Timeout.
+    """
+    service_settings = get_service_settings(service)
+    session = ServiceSession(timeout=service_settings['timeout'])
+    retry = Retry(
+        total=service_settings['retries'],
+        read=False,
+        backoff_factor=service_settings['backoff_factor'],
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=settings.API_CLIENT_POOL_MAXSIZE, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(service):
+    """
+    Return the process-wide session of a service, for requests which do not use a REST API client.
+
+    The session is shared by every site and thread, so authentication headers must be passed with each request.
+    """
+    with _registry_lock:
+        session = _sessions.get(service)
+        if session is None:
+            session = _sessions[service] = create_session(service)
+    return session
+
+
+def get_api_client(site_configuration, service, url, **kwargs):
+    """
+    Return the REST API client of a site for a service, authenticated with the site's current access token.
+
+    Arguments:
+        site_configuration (SiteConfiguration): Configuration of the site calling the service.
+        service (str): Name of the service, used to look up its settings in API_CLIENT_SERVICES.
+        url (str): Root URL of the service's API.
+        kwargs: Other arguments of EdxRestApiClient, such as append_slash.
+
+    Returns:
+        EdxRestApiClient
+    """
+    access_token = site_configuration.access_token
+    key = (site_configuration.id, service, url, tuple(sorted(kwargs.items())))
+    with _registry_lock:
+        client = _clients.get(key)
+        if client is None:
+            session = create_session(service)
+            client = _clients[key] = EdxRestApiClient(
+                url, session=session, jwt=access_token, timeout=session.timeout, **kwargs
+            )
+
+    # The client was built with an earlier token, which has expired since.
+    session = client._store['session']  # pylint: disable=protected-access
+    if getattr(session.auth, 'token', None) != access_token:
+        session.auth = SuppliedJwtAuth(access_token)
+    return client
+
+
+def clear_clients():
+    """
+    Close the pooled connections of all sessions, and discard the sessions and clients.
+    """
+    with _registry_lock:
+        for session in _sessions.values():
+            session.close()
+        for client in _clients.values():
+            client._store['session'].close()  # pylint: disable=protected-access
+        _sessions.clear()
+        _clients.clear()
@@ -1,5 +1,10 @@
 """
 Django management command to Sync Product, Orders and Lines to Hubspot server.
+
+Each object type is synced incrementally for each site: only the carts changed since the
+high-water mark of the object type, kept in a HubspotSyncCheckpoint, are synced. Batches are
+uploaded concurrently within the HubSpot rate limit, and the checkpoint records the batches
+uploaded so far, so that an interrupted sync resumes where it stopped.
 """
 
 
@@ -7,20 +12,24 @@ import json
 import logging
 import time
 import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from decimal import Decimal as D
 
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
-from django.db.models import Q
+from django.db.models import Prefetch, Q
+from django.utils import timezone
 from edx_rest_api_client.client import EdxRestApiClient
 from oscar.core.loading import get_class, get_model
 from slumber.exceptions import HttpClientError, HttpServerError
 
+from ecommerce.core.rate_limiting import HostRateLimiter
 from ecommerce.extensions.fulfillment.status import ORDER
 
 Basket = get_model('basket', 'Basket')
 CartLine = get_model('basket', 'Line')
+HubspotSyncCheckpoint = get_model('core', 'HubspotSyncCheckpoint')
 Order = get_model('order', 'Order')
 OrderLine = get_model('order', 'Line')
 OrderNumberGenerator = get_class('order.utils', 'OrderNumberGenerator')
@@ -173,11 +182,17 @@ PRODUCT = "PRODUCT"
 LINE_ITEM = "LINE_ITEM"
 DEAL = "DEAL"
 BATCH_SIZE = 200
+SYNC_OBJECT_TYPES = (CONTACT, PRODUCT, DEAL, LINE_ITEM)
+DEFAULT_WORKERS = 4
+# HubSpot allows 10 requests per second for API key authentication.
+DEFAULT_RATE = 8
 
 
 class Command(BaseCommand):
     help = 'Sync Product, Orders and Lines to Hubspot server.'
     initial_sync_days = None
+    workers = DEFAULT_WORKERS
+    rate_limiter = None
 
     def _get_hubspot_enable_sites(self):
         """
@@ -265,8 +280,8 @@ class Command(BaseCommand):
     def _get_carts_extra_properties(self, cart):
         total_price = D(0.0)
         description = ''
-        lines = cart.all_lines()
-        for line in lines:
+        # The lines are prefetched with the carts, unlike cart.all_lines() which queries them again.
+        for line in cart.lines.all():
             total_price += self._get_cart_line_prices(line, 'price_incl_tax')
             description += self._get_cart_line_information(line)
         return float(total_price), description
@@ -316,7 +331,7 @@ class Command(BaseCommand):
             }
             total_price, description = self._get_carts_extra_properties(cart)
             if cart.status == Basket.SUBMITTED:
-                order = Order.objects.filter(basket=cart).first()
+                order = next(iter(cart.order_set.all()), None)
                 deal['propertyNameToValues'] = {
                     'deal_name': order.number,
                     'total_incl_tax': float(order.total_incl_tax),
@@ -349,10 +364,10 @@ class Command(BaseCommand):
                 'action': 'UPSERT',
                 'changeOccurredTimestamp': self._get_timestamp(),
                 'propertyNameToValues': {
-                    'order_id': str(line.basket.id),
+                    'order_id': str(line.basket_id),
                     'price_currency': str(line.price_currency),
                     'tax': float(line_price_incl_tax - line_price_excl_tax),
-                    'product_id': str(line.product.id),
+                    'product_id': str(line.product_id),
                     'price_incl_tax': float(line_price_incl_tax),
                     'price_excl_tax': float(line_price_excl_tax),
                     'quantity': line.quantity
@@ -381,47 +396,82 @@ class Command(BaseCommand):
             })
         return hubspot_products
 
-    def _upsert_hubspot_objects(self, object_type, objects, site_configuration):
+    def _upsert_hubspot_batch(self, object_type, batch, site_configuration):
         """
-        Calls the sync message endpoint on given objects (PRODUCT, DEAL
-        and LINE_ITEM) and each request can has 200 (BATCH_SIZE) objects.
+        Calls the sync message endpoint on a batch of objects (PRODUCT, DEAL and LINE_ITEM).
+        This runs in the worker threads, so it must not query the database.
         """
-        try:
-            total = len(objects)
-            for start in range(0, total, BATCH_SIZE):
-                batch = objects[start:start + BATCH_SIZE]
+        self.rate_limiter.wait(site_configuration.hubspot_secret_key)
+        self._hubspot_endpoint(
+            object_type,
+            'extensions/ecomm/v1/sync-messages/',
+            'PUT',
+            body=batch,
+            hapikey=site_configuration.hubspot_secret_key
+        )
+
+    def _upsert_hubspot_objects(self, object_type, batches, site_configuration, checkpoint):
+        """
+        Uploads the batches of objects, each of up to 200 (BATCH_SIZE) objects, concurrently.
+
+        Arguments:
+            batches (iterable): (last ID, objects) tuples, ordered by ID.
+            checkpoint (HubspotSyncCheckpoint): Updated with the last ID of the batches
+                uploaded so far, in order.
+
+        Returns:
+            bool: Whether all batches were uploaded.
+        """
+        pending = []
+        failed = False
+
+        def collect(futures):
+            nonlocal failed
+            for future in futures:
+                try:
+                    future.result()
+                except (HttpClientError, HttpServerError) as ex:
+                    if not failed:
+                        self.stderr.write(
+                            'An error occurred while upserting {object_type} for site {site}: {message}'.format(
+                                object_type=object_type, site=site_configuration.site.domain, message=ex
+                            )
+                        )
+                    failed = True
+
+            # Only the batches uploaded in order are checkpointed, so that none is skipped on resume.
+            last_id = None
+            while pending and pending[0][0].done() and not pending[0][0].exception():
+                __, last_id, count = pending.pop(0)
                 self.stdout.write(
-                    'Syncing {object_type}s batch from {start} to {end} of total: {total} for site {site}'.format(
-                        object_type=object_type,
-                        start=start,
-                        end=start + BATCH_SIZE,
-                        total=total,
-                        site=site_configuration.site.domain
+                    'Successfully synced {count} {object_type}s up to id {last_id} for site {site}'.format(
+                        count=count, object_type=object_type, last_id=last_id, site=site_configuration.site.domain
                     )
                 )
-                self._hubspot_endpoint(
-                    object_type,
-                    'extensions/ecomm/v1/sync-messages/',
-                    'PUT',
-                    body=batch,
-                    hapikey=site_configuration.hubspot_secret_key
-                )
+            if last_id is not None:
+                checkpoint.last_synced_id = last_id
+                checkpoint.save(update_fields=['last_synced_id', 'modified'])
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for last_id, batch in batches:
+                if failed:
+                    break
                 self.stdout.write(
-                    'Successfully synced {object_type}s batch from {start} to {end} of total: '
-                    '{total} for site {site}'.format(
-                        object_type=object_type,
-                        start=start,
-                        end=start + BATCH_SIZE,
-                        total=total,
+                    'Syncing {count} {object_type}s up to id {last_id} for site {site}'.format(
+                        count=len(batch), object_type=object_type, last_id=last_id,
                         site=site_configuration.site.domain
                     )
                 )
-        except (HttpClientError, HttpServerError) as ex:
-            self.stderr.write(
-                'An error occurred while upserting {object_type} for site {site}: {message}'.format(
-                    object_type=object_type, site=site_configuration.site.domain, message=ex
-                )
-            )
+                future = executor.submit(self._upsert_hubspot_batch, object_type, batch, site_configuration)
+                pending.append((future, last_id, len(batch)))
+
+                # Keep the number of batches built and waiting to be uploaded bounded.
+                if len(pending) >= self.workers * 2:
+                    collect(wait([item[0] for item in pending], return_when=FIRST_COMPLETED).done)
+
+            collect([item[0] for item in pending])
+
+        return not failed
 
     def _call_sync_errors_messages_endpoint(self, site_configuration):
         """
@@ -450,52 +500,121 @@ class Command(BaseCommand):
                 )
             )
 
-    def _get_unsynced_carts(self, site_configuration):
-        carts = Basket.objects.filter(site=site_configuration.site, lines__isnull=False)
+    def _get_checkpoint(self, site_configuration, object_type):
+        """
+        Returns the checkpoint of the object type for the site, starting a sync run if none is in progress.
+        """
+        checkpoint, __ = HubspotSyncCheckpoint.objects.get_or_create(
+            site=site_configuration.site,
+            object_type=object_type,
+            defaults={'synced_until': self._get_initial_synced_until()}
+        )
+        if checkpoint.run_until:
+            self.stdout.write(
+                'Resuming the sync of {object_type}s after id {last_id} for site {site}'.format(
+                    object_type=object_type, last_id=checkpoint.last_synced_id, site=site_configuration.site.domain
+                )
+            )
+        else:
+            checkpoint.run_until = timezone.now()
+            checkpoint.last_synced_id = None
+            checkpoint.save()
+        return checkpoint
+
+    def _get_initial_synced_until(self):
         start_date = datetime.now().date() - timedelta(self.initial_sync_days)
+        return timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+
+    def _get_unsynced_carts(self, site_configuration, synced_until, run_until):
+        carts = Basket.objects.filter(site=site_configuration.site, lines__isnull=False)
         unsynced_carts = carts.filter(
-            Q(date_created__date=start_date) | Q(date_submitted__date=start_date)
-        )
+            Q(date_created__gt=synced_until, date_created__lte=run_until) |
+            Q(date_submitted__gt=synced_until, date_submitted__lte=run_until)
+        ).distinct()
         self.stdout.write(
             'Pulled unsynced carts for site {site} from {start_date} and total count is total: {count}'.format(
-                site=site_configuration.site.domain, start_date=start_date, count=unsynced_carts.count()
+                site=site_configuration.site.domain, start_date=synced_until, count=unsynced_carts.count()
             )
         )
         return unsynced_carts
 
-    def _sync_data(self, site_configuration):
+    def _get_unsynced_objects(self, object_type, unsynced_carts):
         """
-        Create lists of Order, OrderLine and Product objects and
-        call upsert(PUT) sync-messages endpoint for each objects.
-        """
-        unsynced_carts = self._get_unsynced_carts(site_configuration)
-        if unsynced_carts:
-            # we need to exclude the CartLines without product
-            # because product is required in hubspot for LINE_ITEM.
-            unsynced_cart_lines = CartLine.objects.filter(basket__in=unsynced_carts).exclude(product=None)
-            unsynced_products = Product.objects.filter(basket_lines__in=unsynced_cart_lines)
-            unsynced_users = User.objects.filter(baskets__in=unsynced_carts)
-            self._upsert_hubspot_objects(
-                CONTACT,
-                self._get_hubspot_contact_structure(unsynced_users),
-                site_configuration
-            )
-            self._upsert_hubspot_objects(
-                PRODUCT,
-                self._get_hubspot_product_structure(unsynced_products),
-                site_configuration
-            )
-            self._upsert_hubspot_objects(
-                DEAL,
-                self._get_hubspot_deal_structure(unsynced_carts, site_configuration.partner),
-                site_configuration
+        Returns the queryset of the objects of the given type to sync for the unsynced carts.
+        """
+        # we need to exclude the CartLines without product
+        # because product is required in hubspot for LINE_ITEM.
+        unsynced_cart_lines = CartLine.objects.filter(basket__in=unsynced_carts).exclude(product=None)
+        if object_type == CONTACT:
+            return User.objects.filter(baskets__in=unsynced_carts).distinct()
+        if object_type == PRODUCT:
+            return Product.objects.filter(basket_lines__in=unsynced_cart_lines).select_related('course').distinct()
+        if object_type == DEAL:
+            return unsynced_carts.select_related('owner').prefetch_related(
+                Prefetch('lines', queryset=CartLine.objects.select_related('product__course').order_by('id')),
+                Prefetch('order_set', queryset=Order.objects.select_related('user')),
             )
-            self._upsert_hubspot_objects(
-                LINE_ITEM,
-                self._get_hubspot_line_item_structure(unsynced_cart_lines),
-                site_configuration
+        return unsynced_cart_lines
+
+    def _get_hubspot_structure(self, object_type, objects, site_configuration):
+        if object_type == CONTACT:
+            return self._get_hubspot_contact_structure(objects)
+        if object_type == PRODUCT:
+            return self._get_hubspot_product_structure(objects)
+        if object_type == DEAL:
+            return self._get_hubspot_deal_structure(objects, site_configuration.partner)
+        return self._get_hubspot_line_item_structure(objects)
+
+    def _get_batches(self, object_type, queryset, site_configuration, last_synced_id):
+        """
+        Yields (last ID, objects) tuples for the rows of the queryset after last_synced_id,
+        reading BATCH_SIZE rows at a time in ID order.
+        """
+        queryset = queryset.order_by('id')
+        last_id = last_synced_id or 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id)[:BATCH_SIZE])
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield last_id, self._get_hubspot_structure(object_type, rows, site_configuration)
+
+    def _sync_object_type(self, object_type, site_configuration):
+        """
+        Syncs the objects of the type changed since its checkpoint, and moves the checkpoint forward.
+
+        Returns:
+            bool: Whether there was data to sync.
+        """
+        checkpoint = self._get_checkpoint(site_configuration, object_type)
+        unsynced_carts = self._get_unsynced_carts(site_configuration, checkpoint.synced_until, checkpoint.run_until)
+        has_data = unsynced_carts.exists()
+        if has_data:
+            batches = self._get_batches(
+                object_type,
+                self._get_unsynced_objects(object_type, unsynced_carts),
+                site_configuration,
+                checkpoint.last_synced_id
             )
-        else:
+            if not self._upsert_hubspot_objects(object_type, batches, site_configuration, checkpoint):
+                # The checkpoint keeps the run in progress, to be resumed by the next sync.
+                return has_data
+
+        checkpoint.synced_until = checkpoint.run_until
+        checkpoint.run_until = None
+        checkpoint.last_synced_id = None
+        checkpoint.save()
+        return has_data
+
+    def _sync_data(self, site_configuration):
+        """
+        Sync the CONTACT, PRODUCT, DEAL and LINE_ITEM objects of the carts
+        changed since the checkpoint of each object type.
+        """
+        has_data = False
+        for object_type in SYNC_OBJECT_TYPES:
+            has_data = self._sync_object_type(object_type, site_configuration) or has_data
+        if not has_data:
             self.stdout.write('No data found to sync for site {site}'.format(site=site_configuration.site.domain))
 
     def add_arguments(self, parser):
@@ -506,12 +625,28 @@ class Command(BaseCommand):
             type=int,
             help='Number of days before today to start initial sync',
         )
+        parser.add_argument(
+            '--workers',
+            default=DEFAULT_WORKERS,
+            dest='workers',
+            type=int,
+            help='Number of batches uploaded concurrently',
+        )
+        parser.add_argument(
+            '--rate',
+            default=DEFAULT_RATE,
+            dest='rate',
+            type=float,
+            help='Maximum number of requests per second to HubSpot for each site, 0 to disable',
+        )
 
     def handle(self, *args, **options):
         """
         Main command handler.
         """
         self.initial_sync_days = options['initial_sync_days']
+        self.workers = max(options['workers'], 1)
+        self.rate_limiter = HostRateLimiter(options['rate'])
         try:
             site_configurations = self._get_hubspot_enable_sites()
             if not site_configurations:
@@ -12,6 +12,7 @@ from factory.django import get_model
 from mock import patch
 from slumber.exceptions import HttpClientError
 
+from ecommerce.core.management.commands.sync_hubspot import DEAL, SYNC_OBJECT_TYPES
 from ecommerce.core.management.commands.sync_hubspot import Command as sync_command
 from ecommerce.extensions.test.factories import create_basket, create_order
 from ecommerce.tests.factories import SiteConfigurationFactory, UserFactory
@@ -19,6 +20,7 @@ from ecommerce.tests.testcases import TestCase
 
 SiteConfiguration = get_model('core', 'SiteConfiguration')
 Basket = get_model('basket', 'Basket')
+HubspotSyncCheckpoint = get_model('core', 'HubspotSyncCheckpoint')
 
 DEFAULT_INITIAL_DAYS = 1
 
@@ -116,7 +118,7 @@ class TestSyncHubspotCommand(TestCase):
         2. Define settings
         3. Sync-error
         """
-        with patch.object(sync_command, '_get_unsynced_carts', return_value=None):
+        with patch.object(sync_command, '_get_unsynced_carts', return_value=Basket.objects.none()):
             output = self._get_command_output()
             self.assertIn(
                 'No data found to sync for site {site}'.format(site=self.hubspot_site_configuration.site.domain),
@@ -219,3 +221,56 @@ class TestSyncHubspotCommand(TestCase):
             with self.assertRaises(CommandError):
                 output = self._get_command_output(is_stderr=True)
                 self.assertIn('Command failed with ', output)
+
+    @patch.object(sync_command, '_hubspot_endpoint')
+    def test_incremental_sync(self, mocked_hubspot):  # pylint: disable=unused-argument
+        """
+        Test the checkpoints move forward after a sync, so that the next sync skips the synced carts.
+        """
+        output = self._get_command_output()
+        self.assertNotIn('No data found to sync', output)
+        checkpoints = HubspotSyncCheckpoint.objects.filter(site=self.hubspot_site_configuration.site)
+        self.assertEqual(sorted(checkpoints.values_list('object_type', flat=True)), sorted(SYNC_OBJECT_TYPES))
+        self.assertFalse(checkpoints.filter(run_until__isnull=False).exists())
+
+        output = self._get_command_output()
+        self.assertIn(
+            'No data found to sync for site {site}'.format(site=self.hubspot_site_configuration.site.domain),
+            output
+        )
+
+    def test_resume_interrupted_sync(self):
+        """
+        Test an interrupted sync keeps the batches uploaded so far, and is resumed by the next sync.
+        """
+        site = self.hubspot_site_configuration.site
+        cart_ids = list(Basket.objects.filter(site=site).order_by('id').values_list('id', flat=True))
+        self.assertEqual(len(cart_ids), 2)
+
+        def upsert_batch(object_type, batch, site_configuration):  # pylint: disable=unused-argument
+            if object_type == DEAL and batch[0]['integratorObjectId'] == str(cart_ids[1]):
+                raise HttpClientError
+
+        with patch.object(sync_command, '_install_hubspot_ecommerce_bridge', return_value=True), \
+                patch.object(sync_command, '_define_hubspot_ecommerce_settings', return_value=True), \
+                patch.object(sync_command, '_call_sync_errors_messages_endpoint'), \
+                patch('ecommerce.core.management.commands.sync_hubspot.BATCH_SIZE', 1), \
+                patch.object(sync_command, '_upsert_hubspot_batch', side_effect=upsert_batch) as mocked_upsert:
+            call_command('sync_hubspot', '--workers=1', stdout=StringIO(), stderr=StringIO())
+            checkpoint = HubspotSyncCheckpoint.objects.get(site=site, object_type=DEAL)
+            self.assertIsNotNone(checkpoint.run_until)
+            self.assertEqual(checkpoint.last_synced_id, cart_ids[0])
+
+            mocked_upsert.reset_mock()
+            mocked_upsert.side_effect = None
+            out = StringIO()
+            call_command('sync_hubspot', '--workers=1', stdout=out)
+            self.assertIn('Resuming the sync of DEALs after id {}'.format(cart_ids[0]), out.getvalue())
+            synced_deals = [
+                call[0][1][0]['integratorObjectId'] for call in mocked_upsert.call_args_list if call[0][0] == DEAL
+            ]
+            self.assertEqual(synced_deals, [str(cart_ids[1])])
+
+        checkpoint.refresh_from_db()
+        self.assertIsNone(checkpoint.run_until)
+        self.assertIsNone(checkpoint.last_synced_id)
@@ -4,17 +4,25 @@ Tests for Django management command to verify ecommerce transactions.
 
 
 import datetime
+import json
+import os
+import tempfile
 
 import ddt
 import pytz
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from mock import patch
 from oscar.core.loading import get_class, get_model
 from oscar.test.factories import OrderFactory, OrderLineFactory, ProductFactory
 
 from ecommerce.core.constants import SEAT_PRODUCT_CLASS_NAME
 from ecommerce.core.management.commands.tests.factories import PaymentEventFactory
-from ecommerce.core.management.commands.verify_transactions import DEFAULT_END_DELTA_TIME, DEFAULT_START_DELTA_TIME
+from ecommerce.core.management.commands.verify_transactions import (
+    DEFAULT_END_DELTA_TIME,
+    DEFAULT_START_DELTA_TIME,
+    Command
+)
 from ecommerce.tests.testcases import TestCase
 
 PaymentEventType = get_model('order', 'PaymentEventType')
@@ -22,6 +30,22 @@ PaymentEventTypeName = get_class('order.constants', 'PaymentEventTypeName')
 ProductClass = get_model('catalogue', 'ProductClass')
 
 
+class SerialExecutor:
+    """ Stand-in for ProcessPoolExecutor, running the sub-ranges in the test process and database. """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
+
+
 @ddt.ddt
 class VerifyTransactionsTest(TestCase):
 
@@ -252,3 +276,83 @@ class VerifyTransactionsTest(TestCase):
         self.assertIn(str(refund.id), exception)
         self.assertIn('"amount": 90.0', exception)
         self.assertIn('"amount": 100.0', exception)
+
+    def create_paid_orders(self, count):
+        for i in range(count):
+            order = OrderFactory(total_incl_tax=50 + i, date_placed=self.timestamp)
+            OrderLineFactory(order=order, product=self.product, partner_sku='test_sku')
+            PaymentEventFactory(order=order, amount=50 + i, event_type_id=self.payevent.id, date_created=self.timestamp)
+            # OrderFactory only sets date_placed on the instance.
+            order.save()
+
+    def test_chunked_orders(self):
+        """ Verify all orders of the window are verified when they are read in chunks. """
+        self.create_paid_orders(3)
+        with self.assertRaises(CommandError) as cm:
+            call_command('verify_transactions', '--chunk-size=2', '--threshold=0.2')
+        exception = str(cm.exception)
+        self.assertIn("The following orders are without payments", exception)
+        self.assertIn(str(self.order.id), exception)
+
+        call_command('verify_transactions', '--chunk-size=2', '--threshold=0.25')
+
+    def test_workers(self):
+        """ Verify the sub-ranges of the window verified by workers are merged. """
+        self.create_paid_orders(2)
+        second_order = OrderFactory(total_incl_tax=90, date_placed=self.timestamp - datetime.timedelta(minutes=70))
+        OrderLineFactory(order=second_order, product=self.product, partner_sku='test_sku')
+        second_order.save()
+
+        module = 'ecommerce.core.management.commands.verify_transactions'
+        with patch(module + '.ProcessPoolExecutor', SerialExecutor), patch(module + '.connections') as mock_connections:
+            with self.assertRaises(CommandError) as cm:
+                call_command('verify_transactions', '--workers=2', '--range-minutes=30', '--threshold=1')
+        mock_connections.close_all.assert_called_once_with()
+        errors = json.loads(str(cm.exception).split(': ', 1)[1])
+        self.assertEqual(
+            sorted(error['order']['order_id'] for error in errors['orders_no_payment']['errors']),
+            sorted([self.order.id, second_order.id])
+        )
+
+    def test_report(self):
+        """ Verify errors are written to the report, and only counted in the CommandError. """
+        report_file = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        report_file.close()
+        self.addCleanup(os.remove, report_file.name)
+
+        with self.assertRaises(CommandError) as cm:
+            call_command('verify_transactions', '--report={}'.format(report_file.name))
+        self.assertIn('"orders_no_payment": {"message": "The following orders are without payments", "count": 1}',
+                      str(cm.exception))
+
+        with open(report_file.name) as report:
+            lines = [json.loads(line) for line in report]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['tag'], 'orders_no_payment')
+        self.assertEqual(lines[0]['error']['order']['order_id'], self.order.id)
+
+    def test_report_written_per_chunk(self):
+        """ Verify the errors of each chunk are written to the report before the next chunk is verified. """
+        second_order = OrderFactory(total_incl_tax=90, date_placed=self.timestamp)
+        OrderLineFactory(order=second_order, product=self.product, partner_sku='test_sku')
+        second_order.save()
+
+        report_file = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+        report_file.close()
+        self.addCleanup(os.remove, report_file.name)
+
+        module = 'ecommerce.core.management.commands.verify_transactions'
+        verify_orders = Command.verify_orders
+        reported_order_ids = []
+
+        def read_report_and_verify_orders(command, orders, support):
+            with open(report_file.name) as report:
+                reported_order_ids.append([json.loads(line)['error']['order']['order_id'] for line in report])
+            return verify_orders(command, orders, support)
+
+        with patch(module + '.Command.verify_orders', autospec=True, side_effect=read_report_and_verify_orders):
+            with self.assertRaises(CommandError) as cm:
+                call_command('verify_transactions', '--chunk-size=1', '--report={}'.format(report_file.name))
+
+        self.assertEqual(reported_order_ids, [[], [self.order.id]])
+        self.assertIn('"count": 2', str(cm.exception))
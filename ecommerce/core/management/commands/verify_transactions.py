@@ -25,20 +25,31 @@ Example output:
     'totals_mismatch': "Order totals mismatch with payments received.
     [('Order: 72 Amount: 100.00', 'Payment: 67 Amount: 10000.00'),
     ('Order: 71 Amount: 100.00', 'Payment: 65 Amount: 10.00')]"}
+
+Orders are read in chunks of --chunk-size orders, with their lines and payment
+events prefetched. With --workers greater than 1 the time window is split into
+sub-ranges of --range-minutes, verified by a pool of worker processes. With
+--report the errors are written to the given file as JSON lines as soon as each
+chunk, or each sub-range with workers, is verified, and the CommandError only
+holds the number of errors of each type.
 """
 import datetime
 import json
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 import pytz
 from django.core.management.base import BaseCommand, CommandError
-from django.db.models import Sum
+from django.db import connections
+from django.db.models import Prefetch
 from oscar.core.loading import get_class, get_model
 
 from ecommerce.core.constants import COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME, SEAT_PRODUCT_CLASS_NAME
 from ecommerce.core.utils import use_read_replica_if_available
 
 logger = logging.getLogger(__name__)
+Line = get_model('order', 'Line')
 Order = get_model('order', 'Order')
 PaymentEvent = get_model('order', 'PaymentEvent')
 PaymentEventType = get_model('order', 'PaymentEventType')
@@ -46,9 +57,36 @@ PaymentEventTypeName = get_class('order.constants', 'PaymentEventTypeName')
 
 DEFAULT_START_DELTA_TIME = 240
 DEFAULT_END_DELTA_TIME = 60
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_RANGE_MINUTES = 60
 VALID_PRODUCT_CLASS_NAMES = [SEAT_PRODUCT_CLASS_NAME, COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME]
 
 
+def verify_date_range(date_range, support, chunk_size):
+    """
+    Verify the orders placed in a sub-range of the time window.
+
+    This runs in the worker processes of the pool, and returns the number of orders
+    verified and the errors found, so that they can be merged by the parent process.
+    """
+    command = Command()
+    command.ERRORS_DICT = {}
+    command.load_event_types()
+    start, end = date_range
+    num_orders = command.verify_orders(command.get_orders(start, end, chunk_size), support)
+    return num_orders, command.ERRORS_DICT
+
+
+def split_window(start, end, minutes):
+    """ Split the time window into consecutive sub-ranges of at most the given number of minutes. """
+    step = datetime.timedelta(minutes=max(minutes, 1))
+    date_ranges = []
+    while start < end:
+        date_ranges.append((start, min(start + step, end)))
+        start += step
+    return date_ranges
+
+
 class Command(BaseCommand):
     ERRORS_DICT = None
     PAID_EVENT_TYPE = None
@@ -84,13 +122,39 @@ class Command(BaseCommand):
             action='store_true',
             help='Mismatched orders to go to Support'
         )
+        parser.add_argument(
+            '--chunk-size',
+            action='store',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Number of orders read, with their lines and payments, in each query.'
+        )
+        parser.add_argument(
+            '--workers',
+            action='store',
+            type=int,
+            default=1,
+            help='Number of processes verifying sub-ranges of the time window concurrently.'
+        )
+        parser.add_argument(
+            '--range-minutes',
+            action='store',
+            type=int,
+            default=DEFAULT_RANGE_MINUTES,
+            help='Length in minutes of the sub-ranges of the time window verified by each worker.'
+        )
+        parser.add_argument(
+            '--report',
+            action='store',
+            default=None,
+            help='Path to a file the errors are written to, one JSON object per line.'
+        )
 
     def handle(self, *args, **options):
         logger.info("Verify transactions with options: %r", options)
 
         self.ERRORS_DICT = {}
-        self.PAID_EVENT_TYPE = PaymentEventType.objects.get(name=PaymentEventTypeName.PAID)
-        self.REFUNDED_EVENT_TYPE = PaymentEventType.objects.get(name=PaymentEventTypeName.REFUNDED)
+        self.load_event_types()
 
         support = options['support']
         start_delta = options['start_delta']
@@ -101,35 +165,138 @@ class Command(BaseCommand):
         end = datetime.datetime.now(pytz.utc) - datetime.timedelta(minutes=end_delta)
         logger.info("Start time: %s  --  End time: %s", start, end)
 
-        orders = use_read_replica_if_available(Order.objects.all()
-                                               .filter(date_placed__gte=start, date_placed__lt=end)
-                                               .prefetch_related('payment_events__event_type'))
-        logger.info("Number of orders to verify: %s", orders.count())
-        if orders.count() == 0:
+        num_orders = use_read_replica_if_available(
+            Order.objects.filter(date_placed__gte=start, date_placed__lt=end)
+        ).count()
+        logger.info("Number of orders to verify: %s", num_orders)
+        if num_orders == 0:
             logger.info("No orders, DONE")
             return
 
+        # Validation adds the errors of the orders being verified to ERRORS_DICT, which verify_window
+        # empties after each chunk or sub-range, so the errors of the whole window are collected apart.
+        window_errors = {}
+        report_path = options['report']
+        report = open(report_path, 'w') if report_path else None
+        try:
+            for errors in self.verify_window(start, end, support, options):
+                self.record_errors(window_errors, errors, report)
+        finally:
+            if report:
+                report.close()
+        self.ERRORS_DICT = window_errors
+
+        if report_path:
+            logger.info("Errors written to %s", report_path)
+
         if support:
-            self.handle_support(orders)
+            self.handle_support(num_orders)
         else:
-            self.handle_alert(orders, threshold)
+            self.handle_alert(num_orders, threshold)
+
+    def load_event_types(self):
+        self.PAID_EVENT_TYPE = PaymentEventType.objects.get(name=PaymentEventTypeName.PAID)
+        self.REFUNDED_EVENT_TYPE = PaymentEventType.objects.get(name=PaymentEventTypeName.REFUNDED)
 
-    def process_errors(self, orders):
+    def get_orders(self, start, end, chunk_size):
+        """
+        Yield the orders placed in the time window, reading chunk_size orders at a time.
+        """
+        for chunk in self.get_order_chunks(start, end, chunk_size):
+            for order in chunk:
+                yield order
+
+    def get_order_chunks(self, start, end, chunk_size):
+        """
+        Yield the orders placed in the time window in lists of at most chunk_size orders.
+
+        The lines, their products and the payment events of each chunk are prefetched, so that
+        verifying an order does not query the database.
+        """
+        orders = use_read_replica_if_available(
+            Order.objects.filter(date_placed__gte=start, date_placed__lt=end).order_by('id').prefetch_related(
+                Prefetch('payment_events', queryset=PaymentEvent.objects.select_related('event_type')),
+                Prefetch('lines', queryset=Line.objects.select_related(
+                    'product__product_class', 'product__parent__product_class'
+                )),
+            )
+        )
+        last_id = 0
+        while True:
+            chunk = list(orders.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1].id
+
+    def verify_window(self, start, end, support, options):
+        """
+        Verify the orders of the time window, and yield the errors found in each chunk of orders, or in
+        each sub-range of the window when it is verified by workers.
+        """
+        chunk_size = max(options['chunk_size'], 1)
+        workers = options['workers']
+        if workers <= 1:
+            for chunk in self.get_order_chunks(start, end, chunk_size):
+                self.verify_orders(chunk, support)
+                errors, self.ERRORS_DICT = self.ERRORS_DICT, {}
+                yield errors
+            return
+
+        date_ranges = split_window(start, end, options['range_minutes'])
+        logger.info("Verifying %d sub-ranges with %d workers.", len(date_ranges), workers)
+
+        # Forked workers must open their own database connections instead of sharing ours.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(verify_date_range, date_ranges, repeat(support), repeat(chunk_size))
+            for (range_start, range_end), (num_orders, errors) in zip(date_ranges, results):
+                logger.info("Verified %d orders from %s to %s.", num_orders, range_start, range_end)
+                yield errors
+
+    def verify_orders(self, orders, support):
+        num_orders = 0
+        for order in orders:
+            if support:
+                self.validate_support_order(order)
+            else:
+                self.validate_order(order)
+            num_orders += 1
+        return num_orders
+
+    def record_errors(self, window_errors, errors, report=None):
+        """
+        Add the errors found in a chunk or sub-range of the time window to window_errors.
+
+        When a report is written, the errors are written to it and flushed, and window_errors only counts them.
+        """
+        for tag, tag_errors in errors.items():
+            if report:
+                for error in tag_errors["errors"]:
+                    report.write(json.dumps({"tag": tag, "message": tag_errors["message"], "error": error}) + "\n")
+                if tag not in window_errors:
+                    window_errors[tag] = {"message": tag_errors["message"], "count": 0}
+                window_errors[tag]["count"] += len(tag_errors["errors"])
+            else:
+                if tag not in window_errors:
+                    window_errors[tag] = {"message": tag_errors["message"], "errors": []}
+                window_errors[tag]["errors"].extend(tag_errors["errors"])
+        if report:
+            report.flush()
+
+    def process_errors(self, num_orders):
         # FIXME: it is possible for an order to have more than one error, so this really should
         # count "unique orders with errors", not number of errors
-        error_count = sum([len(v["errors"]) for v in self.ERRORS_DICT.values()])
+        error_count = sum([v["count"] if "count" in v else len(v["errors"]) for v in self.ERRORS_DICT.values()])
         exit_errors = json.dumps(self.ERRORS_DICT)
-        error_rate = float(error_count) / orders.count()
+        error_rate = float(error_count) / num_orders
 
         logger.info("Summary: %d errors, %.1f %%", error_count, error_rate * 100.0)
 
         return error_count, exit_errors, error_rate
 
-    def handle_alert(self, orders, threshold):
-        for order in orders:
-            self.validate_order(order)
-
-        error_count, exit_errors, error_rate = self.process_errors(orders)
+    def handle_alert(self, num_orders, threshold):
+        error_count, exit_errors, error_rate = self.process_errors(num_orders)
 
         if threshold == 0 or threshold >= 1:
             threshold = int(threshold)
@@ -139,48 +306,50 @@ class Command(BaseCommand):
 
         if flunk:
             raise CommandError("Errors in transactions: {errors}".format(errors=exit_errors))
-        if self.ERRORS_DICT:
+        if error_count:
             logger.warning("Errors in transactions within threshold (%r): %s", threshold, exit_errors)
 
-    def handle_support(self, orders):
-        for order in orders:
-            all_payment_events = order.payment_events
-            payments = all_payment_events.filter(event_type=self.PAID_EVENT_TYPE)
-
-            # If the payment total and the order total do not match, flag for review.
-            if payments.count() == 1 and payments[0].amount != order.total_incl_tax:
-                mismatch_total = float(payments[0].amount - order.total_incl_tax)
-                # FIXME: validate_order should be changed to log _all_ errors related to an order
-                # If payment amount > order amount, a refund is required from Support
-                if mismatch_total > 0:
-                    error_dict = {
-                        "order_number": order.number,
-                        "order_id": order.id,
-                        "order_amount": float(order.total_incl_tax),
-                        # Assuming just one payment since we do not support multi-payment
-                        "payment_id": payments[0].id,
-                        "payment_amount": float(payments[0].amount),
-                        "user_email": order.guest_email,
-                        "refund_amount": mismatch_total
-                    }
-                    self.add_error(
-                        "orders_mismatched_totals_support",
-                        "There was a mismatch in the totals in the following order that require a refund",
-                        error_dict=error_dict,
-                    )
-
-        error_count, exit_errors, error_rate = self.process_errors(orders)
+    def handle_support(self, num_orders):
+        error_count, exit_errors, error_rate = self.process_errors(num_orders)
         if error_count and error_rate > 0:
             raise CommandError("Errors in transactions: {errors}".format(errors=exit_errors))
 
+    def get_payment_events(self, order, event_type):
+        return [event for event in order.payment_events.all() if event.event_type_id == event_type.id]
+
+    def validate_support_order(self, order):
+        payments = self.get_payment_events(order, self.PAID_EVENT_TYPE)
+
+        # If the payment total and the order total do not match, flag for review.
+        if len(payments) == 1 and payments[0].amount != order.total_incl_tax:
+            mismatch_total = float(payments[0].amount - order.total_incl_tax)
+            # FIXME: validate_order should be changed to log _all_ errors related to an order
+            # If payment amount > order amount, a refund is required from Support
+            if mismatch_total > 0:
+                error_dict = {
+                    "order_number": order.number,
+                    "order_id": order.id,
+                    "order_amount": float(order.total_incl_tax),
+                    # Assuming just one payment since we do not support multi-payment
+                    "payment_id": payments[0].id,
+                    "payment_amount": float(payments[0].amount),
+                    "user_email": order.guest_email,
+                    "refund_amount": mismatch_total
+                }
+                self.add_error(
+                    "orders_mismatched_totals_support",
+                    "There was a mismatch in the totals in the following order that require a refund",
+                    error_dict=error_dict,
+                )
+
     def validate_order(self, order):
-        all_payment_events = order.payment_events
-        refunds = all_payment_events.filter(event_type=self.REFUNDED_EVENT_TYPE)
-        payments = all_payment_events.filter(event_type=self.PAID_EVENT_TYPE)
+        refunds = self.get_payment_events(order, self.REFUNDED_EVENT_TYPE)
+        payments = self.get_payment_events(order, self.PAID_EVENT_TYPE)
+        payment_total = sum(payment.amount for payment in payments)
 
         # If a coupon is used to purchase a product for the full price, there will be no PaymentEvent
         # so we must also verify that order had a price > 0.
-        if payments.count() == 0:
+        if not payments:
             if self.order_requires_payment(order) and order.total_incl_tax > 0:
                 self.add_error(
                     "orders_no_payment",
@@ -189,7 +358,7 @@ class Command(BaseCommand):
                 )
 
         # We do not support multi-payment today, so flag this for review.
-        elif payments.count() > 1:
+        elif len(payments) > 1:
             self.add_error(
                 "orders_multi_payment",
                 "The following orders had multiple payments",
@@ -198,7 +367,7 @@ class Command(BaseCommand):
             )
 
         # If the payment total and the order total do not match, flag for review.
-        elif payments.aggregate(total=Sum('amount')).get('total') != order.total_incl_tax:
+        elif payment_total != order.total_incl_tax:
             # FIXME: validate_order should be changed to log _all_ errors related to an order
             self.add_error(
                 "orders_mismatched_totals",
@@ -207,9 +376,7 @@ class Command(BaseCommand):
                 payments
             )
 
-        refund_total = refunds.aggregate(total=Sum('amount')).get('total')
-        payment_total = payments.aggregate(total=Sum('amount')).get('total')
-        if refund_total is not None and refund_total > payment_total:
+        if refunds and sum(refund.amount for refund in refunds) > payment_total:
             self.add_error(
                 "orders_refund_exceeded",
                 "The following orders had excessive refunds",
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.28 on 2026-10-17 02:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sites', '0002_alter_domain_unique'),
+        ('core', '0064_user_extended_profile_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HubspotSyncCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=32)),
+                ('synced_until', models.DateTimeField()),
+                ('run_until', models.DateTimeField(blank=True, null=True)),
+                ('last_synced_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hubspot_sync_checkpoints', to='sites.Site')),
+            ],
+            options={
+                'unique_together': {('site', 'object_type')},
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 import datetime
 import hashlib
 import logging
+from collections import OrderedDict
 from urllib.parse import quote, urljoin, urlsplit
 
 import waffle
@@ -24,8 +25,10 @@ from requests.exceptions import Timeout
 from simple_history.models import HistoricalRecords
 from slumber.exceptions import HttpNotFoundError, SlumberBaseException
 
+from ecommerce.core.access_tokens import get_access_token
 from ecommerce.core.constants import ALL_ACCESS_CONTEXT, ALLOW_MISSING_LMS_USER_ID
 from ecommerce.core.exceptions import MissingLmsUserIdException
+from ecommerce.core.http_clients import get_api_client
 from ecommerce.core.utils import log_message_and_raise_validation_error
 from ecommerce.extensions.payment.exceptions import ProcessorNotFoundError
 from ecommerce.extensions.payment.helpers import get_processor_class, get_processor_class_by_name
@@ -417,17 +420,17 @@ class SiteConfiguration(models.Model):
         """ Returns an access token for this site's service user.
 
         The access token is retrieved using the current site's OAuth credentials and the client credentials grant.
-        The token is cached for the lifetime of the token, as specified by the OAuth provider's response. The token
-        type is JWT.
+        The token is cached for the lifetime of the token, as specified by the OAuth provider's response, and
+        refreshed in the background shortly before it expires. The token type is JWT.
 
         Returns:
             str: JWT access token
         """
         key = 'siteconfiguration_access_token_{}'.format(self.id)
-        access_token_cached_response = TieredCache.get_cached_response(key)
-        if access_token_cached_response.is_found:
-            return access_token_cached_response.value
+        return get_access_token(key, self._fetch_access_token)
 
+    def _fetch_access_token(self):
+        """ Returns a new access token for this site's service user, and the number of seconds it expires in. """
         url = '{root}/access_token'.format(root=self.oauth2_provider_url)
         access_token, expiration_datetime = EdxRestApiClient.get_oauth_access_token(
             url,
@@ -437,10 +440,9 @@ class SiteConfiguration(models.Model):
         )
 
         expires = (expiration_datetime - datetime.datetime.utcnow()).seconds
-        TieredCache.set_all_tiers(key, access_token, expires)
-        return access_token
+        return access_token, expires
 
-    @cached_property
+    @property
     def discovery_api_client(self):
         """
         Returns an API client to access the Discovery service.
@@ -449,14 +451,14 @@ class SiteConfiguration(models.Model):
             EdxRestApiClient: The client to access the Discovery service.
         """
 
-        return EdxRestApiClient(self.discovery_api_url, jwt=self.access_token)
+        return get_api_client(self, 'discovery', self.discovery_api_url)
 
-    @cached_property
+    @property
     def embargo_api_client(self):
         """ Returns the URL for the embargo API """
-        return EdxRestApiClient(self.build_lms_url('/api/embargo/v1'), jwt=self.access_token)
+        return get_api_client(self, 'lms', self.build_lms_url('/api/embargo/v1'))
 
-    @cached_property
+    @property
     def enterprise_api_client(self):
         """
         Constructs a Slumber-based REST API client for the provided site.
@@ -468,9 +470,9 @@ class SiteConfiguration(models.Model):
             EdxRestApiClient: The client to access the Enterprise service.
 
         """
-        return EdxRestApiClient(self.enterprise_api_url, jwt=self.access_token)
+        return get_api_client(self, 'enterprise', self.enterprise_api_url)
 
-    @cached_property
+    @property
     def enterprise_catalog_api_client(self):
         """
         Returns a REST API client for the provided enterprise catalog service
@@ -482,13 +484,13 @@ class SiteConfiguration(models.Model):
             EdxRestApiClient: The client to access the Enterprise Catalog service.
 
         """
-        return EdxRestApiClient(self.enterprise_catalog_api_url, jwt=self.access_token)
+        return get_api_client(self, 'enterprise_catalog', self.enterprise_catalog_api_url)
 
-    @cached_property
+    @property
     def consent_api_client(self):
-        return EdxRestApiClient(self.build_lms_url('/consent/api/v1/'), jwt=self.access_token, append_slash=False)
+        return get_api_client(self, 'lms', self.build_lms_url('/consent/api/v1/'), append_slash=False)
 
-    @cached_property
+    @property
     def user_api_client(self):
         """
         Returns the API client to access the user API endpoint on LMS.
@@ -496,23 +498,23 @@ class SiteConfiguration(models.Model):
         Returns:
             EdxRestApiClient: The client to access the LMS user API service.
         """
-        return EdxRestApiClient(self.build_lms_url('/api/user/v1/'), jwt=self.access_token)
+        return get_api_client(self, 'lms', self.build_lms_url('/api/user/v1/'))
 
-    @cached_property
+    @property
     def commerce_api_client(self):
-        return EdxRestApiClient(self.build_lms_url('/api/commerce/v1/'), jwt=self.access_token)
+        return get_api_client(self, 'lms', self.build_lms_url('/api/commerce/v1/'))
 
-    @cached_property
+    @property
     def credit_api_client(self):
-        return EdxRestApiClient(self.build_lms_url('/api/credit/v1/'), jwt=self.access_token)
+        return get_api_client(self, 'lms', self.build_lms_url('/api/credit/v1/'))
 
-    @cached_property
+    @property
     def enrollment_api_client(self):
-        return EdxRestApiClient(self.build_lms_url('/api/enrollment/v1/'), jwt=self.access_token, append_slash=False)
+        return get_api_client(self, 'lms', self.build_lms_url('/api/enrollment/v1/'), append_slash=False)
 
-    @cached_property
+    @property
     def entitlement_api_client(self):
-        return EdxRestApiClient(self.build_lms_url('/api/entitlements/v1/'), jwt=self.access_token)
+        return get_api_client(self, 'lms', self.build_lms_url('/api/entitlements/v1/'))
 
 
 class User(AbstractUser):
@@ -568,10 +570,11 @@ class User(AbstractUser):
         """
         if user_email:
             try:
-                api = EdxRestApiClient(
+                api = get_api_client(
+                    site.siteconfiguration,
+                    'lms',
                     site.siteconfiguration.build_lms_url('/api/user/v1'),
-                    append_slash=False,
-                    jwt=site.siteconfiguration.access_token
+                    append_slash=False
                 )
                 response = api.accounts.get(email=user_email)
                 return response[0][attribute]
@@ -579,6 +582,38 @@ class User(AbstractUser):
                 log.exception('Failed to get lms_user_id for email: [%s]', user_email)
         return None
 
+    @staticmethod
+    def get_lms_user_attributes_using_emails(site, user_emails, attribute='id'):
+        """Returns a lms_user attribute of many users, querying LMS with batches of email addresses.
+
+        Args:
+            site (Site): The site from which the LMS account API endpoint is created.
+            user_emails(list): Email addresses to search from LMS.
+            attribute(str): LMS user attribute to get from LMS Users. default is id (lms_user_id)
+
+        Returns (dict):
+            Required LMS User attribute keyed by email address, or None for the emails not found.
+        """
+        user_emails = list(OrderedDict.fromkeys(email for email in user_emails if email))
+        found = {}
+        batch_size = settings.LMS_ACCOUNTS_EMAIL_BATCH_SIZE
+        for start in range(0, len(user_emails), batch_size):
+            batch = user_emails[start:start + batch_size]
+            try:
+                api = get_api_client(
+                    site.siteconfiguration,
+                    'lms',
+                    site.siteconfiguration.build_lms_url('/api/user/v1'),
+                    append_slash=False
+                )
+                accounts = api.accounts.get(email=','.join(batch))
+            except Exception:  # pylint: disable=broad-except
+                log.exception('Failed to get lms_user_id for emails: [%s]', ', '.join(batch))
+                continue
+            for account in accounts:
+                found[account['email'].lower()] = account[attribute]
+        return {email: found.get(email.lower()) for email in user_emails}
+
     def lms_user_id_with_metric(self, usage=None, allow_missing=False):
         """
         Returns the LMS user_id, or None if not found. Also sets a metric with the result.
@@ -691,10 +726,11 @@ class User(AbstractUser):
             connection with the LMS account API endpoint.
         """
         try:
-            api = EdxRestApiClient(
+            api = get_api_client(
+                request.site.siteconfiguration,
+                'lms',
                 request.site.siteconfiguration.build_lms_url('/api/user/v1'),
-                append_slash=False,
-                jwt=request.site.siteconfiguration.access_token
+                append_slash=False
             )
             response = api.accounts(self.username).get()
             return response
@@ -874,3 +910,29 @@ class EcommerceFeatureRoleAssignment(UserRoleAssignment):
         Return uniquely identifying string representation.
         """
         return self.__str__()
+
+
+class HubspotSyncCheckpoint(models.Model):
+    """
+    High-water mark of the objects of a type synced to HubSpot for a site, used by the sync_hubspot command.
+
+    Objects changed before synced_until have been synced. While a sync is running, run_until is the end of the
+    changes being synced and last_synced_id the ID up to which they have been synced, so that an interrupted
+    sync resumes where it stopped.
+
+    .. no_pii:
+    """
+    site = models.ForeignKey('sites.Site', related_name='hubspot_sync_checkpoints', on_delete=models.CASCADE)
+    object_type = models.CharField(max_length=32)
+    synced_until = models.DateTimeField()
+    run_until = models.DateTimeField(null=True, blank=True)
+    last_synced_id = models.PositiveIntegerField(null=True, blank=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('site', 'object_type')
+
+    def __str__(self):
+        return '{object_type} synced until {synced_until} for site {site}'.format(
+            object_type=self.object_type, synced_until=self.synced_until, site=self.site_id
+        )
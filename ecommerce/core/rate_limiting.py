@@ -0,0 +1,29 @@
+"""
+Client-side rate limiting of the requests made to other services.
+"""
+
+
+import threading
+import time
+
+
+class HostRateLimiter:
+    """ Spaces out requests so that at most `rate` requests per second are made to each host. """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next_request_times = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        """ Block until a request can be made to the host. """
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.time()
+            request_time = max(now, self._next_request_times.get(host, now))
+            self._next_request_times[host] = request_time + self.interval
+
+        if request_time > now:
+            time.sleep(request_time - now)
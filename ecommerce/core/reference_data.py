@@ -0,0 +1,107 @@
+"""
+Process-level cache of small, effectively static reference rows.
+
+Product classes, product options, basket attribute types, payment source types and payment and shipping
+event types are looked up by name or code on every checkout. Each of these lookups is cached in a table
+which lives as long as the process, and which is cleared when a row of its model is saved or deleted.
+
+Rows are only cached once the transaction which read or created them is committed, so that a row created
+by a transaction which is later rolled back is never cached. Cached rows are shared between requests, and
+must not be modified by their callers.
+"""
+
+
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from oscar.core.loading import get_model
+
+
+class ReferenceTable:
+    """
+    Cache of the rows of a reference model, keyed by one of its unique fields.
+    """
+
+    def __init__(self, app_label, model_name, field):
+        self.app_label = app_label
+        self.model_name = model_name
+        self.field = field
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        return get_model(self.app_label, self.model_name)
+
+    def _cache_on_commit(self, value, row):
+        def cache():
+            with self._lock:
+                self._rows[value] = row
+
+        transaction.on_commit(cache)
+
+    def get(self, value):
+        """
+        Return the row whose field has the given value.
+
+        Raises:
+            DoesNotExist: If no such row exists.
+        """
+        row = self._rows.get(value)
+        if row is None:
+            row = self.model.objects.get(**{self.field: value})
+            self._cache_on_commit(value, row)
+        return row
+
+    def get_or_create(self, value):
+        """
+        Return the row whose field has the given value, creating it if it does not exist.
+        """
+        row = self._rows.get(value)
+        if row is None:
+            row, __ = self.model.objects.get_or_create(**{self.field: value})
+            self._cache_on_commit(value, row)
+        return row
+
+    def clear(self, *_args, **_kwargs):
+        with self._lock:
+            self._rows.clear()
+
+    def connect_signals(self):
+        """
+        Clear the table whenever a row of its model is saved or deleted.
+        """
+        dispatch_uid = 'core.reference_data.{}.{}'.format(self.app_label, self.model_name)
+        post_save.connect(self.clear, sender=self.model, weak=False, dispatch_uid=dispatch_uid + '.saved')
+        post_delete.connect(self.clear, sender=self.model, weak=False, dispatch_uid=dispatch_uid + '.deleted')
+
+
+basket_attribute_types = ReferenceTable('basket', 'BasketAttributeType', 'name')
+options = ReferenceTable('catalogue', 'Option', 'code')
+payment_event_types = ReferenceTable('order', 'PaymentEventType', 'name')
+product_classes = ReferenceTable('catalogue', 'ProductClass', 'name')
+shipping_event_types = ReferenceTable('order', 'ShippingEventType', 'name')
+source_types = ReferenceTable('payment', 'SourceType', 'name')
+
+TABLES = (
+    basket_attribute_types,
+    options,
+    payment_event_types,
+    product_classes,
+    shipping_event_types,
+    source_types,
+)
+
+
+def connect_signals():
+    for table in TABLES:
+        table.connect_signals()
+
+
+def clear_reference_data():
+    """
+    Clear all reference tables.
+    """
+    for table in TABLES:
+        table.clear()
@@ -0,0 +1,95 @@
+
+
+import time
+
+import mock
+from django.core.cache import cache as django_cache
+from django.test import override_settings
+from edx_django_utils.cache import RequestCache
+
+from ecommerce.core import access_tokens
+from ecommerce.core.access_tokens import get_access_token
+from ecommerce.tests.testcases import TestCase
+
+CACHE_KEY = 'access-token-test'
+LOCK_KEY = 'access-token-test.lock'
+
+
+@override_settings(ACCESS_TOKEN_REFRESH_MARGIN=300, ACCESS_TOKEN_REFRESH_LOCK_TIMEOUT=1)
+class AccessTokensTests(TestCase):
+    """ Tests for the single-flight access token acquisition. """
+
+    def refresh_at(self, seconds):
+        """ Return a patch of the current time, that many seconds after the token was fetched. """
+        return mock.patch('time.time', return_value=time.time() + seconds)
+
+    def test_access_token_cached(self):
+        """ Verify a token is fetched once and then served from the cache. """
+        fetch = mock.Mock(return_value=('token', 3600))
+
+        self.assertEqual(get_access_token(CACHE_KEY, fetch), 'token')
+        self.assertEqual(get_access_token(CACHE_KEY, fetch), 'token')
+        self.assertEqual(fetch.call_count, 1)
+        self.assertIsNone(django_cache.get(LOCK_KEY))
+
+    def test_access_token_refreshed_in_background(self):
+        """ Verify a token due for a refresh is served while a single background thread refreshes it. """
+        get_access_token(CACHE_KEY, mock.Mock(return_value=('old-token', 3600)))
+        fetch = mock.Mock(return_value=('new-token', 3600))
+        threads = []
+        start_refresh = access_tokens.refresh_in_background
+
+        def refresh_in_background(cache_key, fetch, lock_key):
+            threads.append(start_refresh(cache_key, fetch, lock_key))
+
+        with mock.patch.object(access_tokens, 'refresh_in_background', side_effect=refresh_in_background):
+            with self.refresh_at(3400):
+                self.assertEqual(get_access_token(CACHE_KEY, fetch), 'old-token')
+            self.assertEqual(get_access_token(CACHE_KEY, fetch), 'old-token')
+            with self.refresh_at(3500):
+                self.assertEqual(get_access_token(CACHE_KEY, fetch), 'old-token')
+            self.assertEqual(get_access_token(CACHE_KEY, fetch), 'old-token')
+
+        self.assertEqual(len(threads), 1)
+        threads[0].join()
+        self.assertEqual(fetch.call_count, 1)
+        self.assertIsNone(django_cache.get(LOCK_KEY))
+
+        # The token fetched by the thread is cached in Django cache, not in the cache of the current request.
+        RequestCache.clear_all_namespaces()
+        self.assertEqual(get_access_token(CACHE_KEY, fetch), 'new-token')
+
+    def test_failed_refresh(self):
+        """ Verify the cached token is still served, and the refresh not retried, after a failed refresh. """
+        get_access_token(CACHE_KEY, mock.Mock(return_value=('token', 3600)))
+        fetch = mock.Mock(side_effect=Exception)
+        refresh = access_tokens._refresh  # pylint: disable=protected-access
+
+        with self.refresh_at(3400), \
+                mock.patch.object(access_tokens, 'refresh_in_background', side_effect=refresh) as mock_refresh:
+            for __ in range(2):
+                self.assertEqual(get_access_token(CACHE_KEY, fetch), 'token')
+        self.assertEqual(mock_refresh.call_count, 1)
+        self.assertEqual(fetch.call_count, 1)
+        self.assertTrue(django_cache.get(LOCK_KEY))
+
+    def test_wait_for_access_token(self):
+        """ Verify a worker waits for the token fetched by the worker holding the lock. """
+        django_cache.add(LOCK_KEY, True, 1)
+        fetch = mock.Mock(return_value=('token', 3600))
+
+        def cache_access_token(_seconds):
+            access_tokens._cache_access_token(CACHE_KEY, 'other-token', 3600)  # pylint: disable=protected-access
+
+        with mock.patch('time.sleep', side_effect=cache_access_token):
+            self.assertEqual(get_access_token(CACHE_KEY, fetch), 'other-token')
+        self.assertFalse(fetch.called)
+
+    def test_lock_released_without_access_token(self):
+        """ Verify a worker fetches the token itself if the worker holding the lock fails to fetch it. """
+        django_cache.add(LOCK_KEY, True, 1)
+        fetch = mock.Mock(return_value=('token', 3600))
+
+        with mock.patch('time.sleep', side_effect=lambda _seconds: django_cache.delete(LOCK_KEY)):
+            self.assertEqual(get_access_token(CACHE_KEY, fetch), 'token')
+        self.assertEqual(fetch.call_count, 1)
@@ -0,0 +1,66 @@
+
+
+import httpretty
+import mock
+from django.test import override_settings
+from edx_django_utils.cache import TieredCache
+
+from ecommerce.core.http_clients import clear_clients, get_api_client, get_service_settings, get_session
+from ecommerce.tests.testcases import TestCase
+
+API_URL = 'http://api.testserver.fake/api/v1/'
+
+
+class HttpClientsTests(TestCase):
+    """ Tests for the shared HTTP sessions and REST API clients. """
+
+    def set_access_token(self, access_token):
+        TieredCache.set_all_tiers(
+            'siteconfiguration_access_token_{}'.format(self.site_configuration.id), access_token, 60
+        )
+
+    def get_client(self):
+        return get_api_client(self.site_configuration, 'discovery', API_URL)
+
+    def test_client_reused(self):
+        """ Verify the client of a site, service and URL is built once. """
+        self.set_access_token('token')
+
+        client = self.get_client()
+        self.assertIs(self.get_client(), client)
+        self.assertIsNot(get_api_client(self.site_configuration, 'discovery', API_URL, append_slash=False), client)
+        self.assertIsNot(get_api_client(self.site_configuration, 'lms', API_URL), client)
+
+    @httpretty.activate
+    def test_access_token_refreshed(self):
+        """ Verify a shared client authenticates with the site's current access token. """
+        httpretty.register_uri(httpretty.GET, API_URL + 'courses/', body='{}', content_type='application/json')
+        self.set_access_token('old-token')
+        self.get_client().courses.get()
+        self.assertEqual(httpretty.last_request().headers['Authorization'], 'JWT old-token')
+
+        self.set_access_token('new-token')
+        self.get_client().courses.get()
+        self.assertEqual(httpretty.last_request().headers['Authorization'], 'JWT new-token')
+
+    @override_settings(API_CLIENT_SERVICES={'default': {'timeout': 5, 'retries': 0, 'backoff_factor': 0},
+                                            'discovery': {'timeout': 10}})
+    def test_service_timeout(self):
+        """ Verify requests without a timeout use the timeout of their service. """
+        self.assertEqual(get_service_settings('discovery')['timeout'], 10)
+        self.assertEqual(get_service_settings('lms')['retries'], 0)
+
+        with mock.patch('requests.Session.request') as mock_request:
+            get_session('lms').get(API_URL)
+            get_session('discovery').get(API_URL, timeout=1)
+        self.assertEqual(mock_request.call_args_list[0][1]['timeout'], 5)
+        self.assertEqual(mock_request.call_args_list[1][1]['timeout'], 1)
+
+    def test_session_shared(self):
+        """ Verify the session of a service is shared until the clients are cleared. """
+        session = get_session('sdn')
+        self.assertIs(get_session('sdn'), session)
+        self.assertIsNot(get_session('enrollment'), session)
+
+        clear_clients()
+        self.assertIsNot(get_session('sdn'), session)
@@ -266,6 +266,34 @@ class UserTests(DiscoveryTestMixin, LmsApiMockMixin, TestCase):
                 user.deactivate_account(self.request.site.siteconfiguration)
                 self.assertTrue(mock_logger.called)
 
+    @override_settings(LMS_ACCOUNTS_EMAIL_BATCH_SIZE=2)
+    def test_get_lms_user_attributes_using_emails(self):
+        """Verify LMS user ids are looked up in batches of emails, and missing users are mapped to None."""
+        accounts = {'a@example.com': 1, 'b@example.com': 2, 'c@example.com': 3}
+        requested = []
+
+        def callback(request, _uri, headers):
+            emails = request.querystring['email'][0].split(',')
+            requested.append(emails)
+            body = [
+                {'email': email.lower(), 'id': accounts[email.lower()]} for email in emails if email.lower() in accounts
+            ]
+            return 200, headers, json.dumps(body)
+
+        httpretty.register_uri(
+            httpretty.GET,
+            self.site.siteconfiguration.build_lms_url('/api/user/v1/accounts'),
+            body=callback,
+            content_type='application/json',
+        )
+        emails = ['a@example.com', 'B@example.com', 'a@example.com', 'missing@example.com', 'c@example.com']
+        receiver_ids = User.get_lms_user_attributes_using_emails(self.site, emails)
+
+        self.assertEqual(receiver_ids, {
+            'a@example.com': 1, 'B@example.com': 2, 'missing@example.com': None, 'c@example.com': 3,
+        })
+        self.assertEqual(requested, [['a@example.com', 'B@example.com'], ['missing@example.com', 'c@example.com']])
+
 
 class BusinessClientTests(TestCase):
     def test_str(self):
@@ -0,0 +1,20 @@
+
+
+import mock
+
+from ecommerce.core.rate_limiting import HostRateLimiter
+from ecommerce.tests.testcases import TestCase
+
+
+class HostRateLimiterTests(TestCase):
+    @mock.patch('ecommerce.core.rate_limiting.time')
+    def test_wait(self, mock_time):
+        """ Verify requests to the same host are spaced out, and requests to other hosts are not. """
+        mock_time.time.return_value = 100
+        rate_limiter = HostRateLimiter(rate=4)
+
+        rate_limiter.wait('lms.example.com')
+        rate_limiter.wait('lms.example.com')
+        rate_limiter.wait('other.example.com')
+        rate_limiter.wait('lms.example.com')
+        self.assertEqual(mock_time.sleep.call_args_list, [mock.call(0.25), mock.call(0.5)])
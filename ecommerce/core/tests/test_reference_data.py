@@ -0,0 +1,59 @@
+
+
+import mock
+from oscar.core.loading import get_model
+
+from ecommerce.core import reference_data
+from ecommerce.core.constants import SEAT_PRODUCT_CLASS_NAME
+from ecommerce.core.reference_data import product_classes, source_types
+from ecommerce.tests.testcases import TestCase
+
+ProductClass = get_model('catalogue', 'ProductClass')
+SourceType = get_model('payment', 'SourceType')
+
+
+class ReferenceDataTests(TestCase):
+    """ Tests for the process-level cache of reference rows. """
+
+    def committed(self):
+        """ Return a patch running the callbacks of the current transaction as if it was committed. """
+        return mock.patch.object(reference_data, 'transaction', mock.Mock(on_commit=lambda func: func()))
+
+    def test_get_cached(self):
+        """ Verify a row is read from the database once, and then served from the cache. """
+        with self.committed():
+            with self.assertNumQueries(1):
+                product_class = product_classes.get(SEAT_PRODUCT_CLASS_NAME)
+                self.assertIs(product_classes.get(SEAT_PRODUCT_CLASS_NAME), product_class)
+        self.assertEqual(product_class, ProductClass.objects.get(name=SEAT_PRODUCT_CLASS_NAME))
+
+    def test_not_cached_before_commit(self):
+        """ Verify a row is not cached until the transaction which read it is committed. """
+        with self.assertNumQueries(2):
+            product_classes.get(SEAT_PRODUCT_CLASS_NAME)
+            product_classes.get(SEAT_PRODUCT_CLASS_NAME)
+
+    def test_does_not_exist(self):
+        """ Verify looking up a missing row raises the DoesNotExist of its model. """
+        with self.assertRaises(ProductClass.DoesNotExist):
+            product_classes.get('Nonexistent')
+
+    def test_get_or_create(self):
+        """ Verify a missing row is created, and then served from the cache. """
+        with self.committed():
+            source_type = source_types.get_or_create('new-processor')
+            with self.assertNumQueries(0):
+                self.assertIs(source_types.get_or_create('new-processor'), source_type)
+        self.assertTrue(SourceType.objects.filter(name='new-processor').exists())
+
+    def test_cleared_on_change(self):
+        """ Verify the table of a model is cleared when one of its rows is saved or deleted. """
+        with self.committed():
+            source_type = source_types.get_or_create('new-processor')
+            source_type.save()
+            with self.assertNumQueries(1):
+                source_types.get('new-processor')
+
+            source_type.delete()
+            with self.assertRaises(SourceType.DoesNotExist):
+                source_types.get('new-processor')
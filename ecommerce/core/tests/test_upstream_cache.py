@@ -0,0 +1,88 @@
+
+
+import threading
+import time
+
+import mock
+from django.core.cache import cache as django_cache
+from django.test import override_settings
+from edx_django_utils.cache import TieredCache
+from slumber.exceptions import HttpNotFoundError, HttpServerError
+
+from ecommerce.core import upstream_cache
+from ecommerce.core.upstream_cache import get_upstream_response
+from ecommerce.tests.testcases import TestCase
+
+CACHE_KEY = 'upstream-cache-test'
+
+
+class UpstreamCacheTests(TestCase):
+    """ Tests for the shared upstream fetch layer. """
+
+    def test_response_cached(self):
+        """ Verify the response is fetched once and then served from the cache. """
+        fetch = mock.Mock(return_value={'key': 'value'})
+
+        self.assertEqual(get_upstream_response(CACHE_KEY, fetch, 60), {'key': 'value'})
+        self.assertEqual(get_upstream_response(CACHE_KEY, fetch, 60), {'key': 'value'})
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(TieredCache.get_cached_response(CACHE_KEY).value, {'key': 'value'})
+
+    def test_not_found_cached(self):
+        """ Verify a 404 is remembered and raised again without calling the upstream service. """
+        fetch = mock.Mock(side_effect=HttpNotFoundError(content=b'Not found'))
+
+        for __ in range(2):
+            with self.assertRaises(HttpNotFoundError) as context:
+                get_upstream_response(CACHE_KEY, fetch, 60)
+            self.assertEqual(context.exception.content, b'Not found')
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_errors_not_cached(self):
+        """ Verify other errors are raised and the upstream service is called again next time. """
+        fetch = mock.Mock(side_effect=[HttpServerError(), 'response'])
+
+        with self.assertRaises(HttpServerError):
+            get_upstream_response(CACHE_KEY, fetch, 60)
+        self.assertEqual(get_upstream_response(CACHE_KEY, fetch, 60), 'response')
+
+    def test_stale_response_served_while_refreshing(self):
+        """ Verify the stale response is served while another process refreshes an expired response. """
+        get_upstream_response(CACHE_KEY, mock.Mock(return_value='stale'), 60)
+        TieredCache.delete_all_tiers(CACHE_KEY)
+        django_cache.add('{}.lock'.format(CACHE_KEY), True)
+
+        fetch = mock.Mock(return_value='fresh')
+        self.assertEqual(get_upstream_response(CACHE_KEY, fetch, 60), 'stale')
+        fetch.assert_not_called()
+
+    @override_settings(UPSTREAM_FETCH_LOCK_TIMEOUT=1)
+    def test_fetch_when_other_process_gives_up(self):
+        """ Verify the response is fetched once the lock held by another process is released. """
+        django_cache.add('{}.lock'.format(CACHE_KEY), True)
+        threading.Timer(0.2, django_cache.delete, args=('{}.lock'.format(CACHE_KEY),)).start()
+
+        self.assertEqual(get_upstream_response(CACHE_KEY, mock.Mock(return_value='response'), 60), 'response')
+
+    def test_concurrent_fetches_coalesced(self):
+        """ Verify concurrent misses in the same process result in a single upstream call. """
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'response'
+
+        responses = []
+        threads = [
+            threading.Thread(target=lambda: responses.append(get_upstream_response(CACHE_KEY, fetch, 60)))
+            for __ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(responses, ['response'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(upstream_cache._key_locks, {})  # pylint: disable=protected-access
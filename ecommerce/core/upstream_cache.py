@@ -0,0 +1,179 @@
+"""
+Shared layer for fetching cached responses from upstream services (Discovery, LMS, Enterprise).
+
+Responses are cached in all tiers under the caller's cache key, as before. On a miss:
+
+* Only one thread per process, and one process per cache key, fetches from the upstream
+  service. Other threads wait for that fetch and use its result, and other processes poll
+  the cache for it.
+* A stale copy of every response is kept for UPSTREAM_STALE_CACHE_TIMEOUT seconds after it
+  expires, and served while another thread or process is refreshing the response.
+* 404 responses are remembered for UPSTREAM_NOT_FOUND_CACHE_TIMEOUT seconds, during which
+  HttpNotFoundError is raised without calling the upstream service.
+"""
+
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from edx_django_utils.cache import TieredCache
+from slumber.exceptions import HttpNotFoundError
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.05  # Value is in seconds.
+
+_MISSING = object()
+
+
+class _KeyLock:
+    """
+    Lock for a single cache key, counting the threads that use it so it can be discarded.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+
+
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+
+def _acquire_key_lock(cache_key, blocking):
+    with _key_locks_guard:
+        key_lock = _key_locks.setdefault(cache_key, _KeyLock())
+        key_lock.users += 1
+
+    if key_lock.lock.acquire(blocking):
+        return True
+
+    _discard_key_lock(cache_key, key_lock)
+    return False
+
+
+def _release_key_lock(cache_key):
+    with _key_locks_guard:
+        key_lock = _key_locks[cache_key]
+    key_lock.lock.release()
+    _discard_key_lock(cache_key, key_lock)
+
+
+def _discard_key_lock(cache_key, key_lock):
+    with _key_locks_guard:
+        key_lock.users -= 1
+        if not key_lock.users:
+            del _key_locks[cache_key]
+
+
+def _get_stale_cache_key(cache_key):
+    return '{}.stale'.format(cache_key)
+
+
+def _get_not_found_cache_key(cache_key):
+    return '{}.not_found'.format(cache_key)
+
+
+def _get_lock_cache_key(cache_key):
+    return '{}.lock'.format(cache_key)
+
+
+def _get_cached_response(cache_key):
+    """
+    Return the cached response for the key, or _MISSING.
+
+    Raises:
+        HttpNotFoundError: if the upstream service recently returned a 404 for the key.
+    """
+    cached_response = TieredCache.get_cached_response(cache_key)
+    if cached_response.is_found:
+        return cached_response.value
+
+    not_found_content = django_cache.get(_get_not_found_cache_key(cache_key), _MISSING)
+    if not_found_content is not _MISSING:
+        raise HttpNotFoundError('Upstream resource not found (cached).', content=not_found_content)
+
+    return _MISSING
+
+
+def _wait_for_cached_response(cache_key, lock_key):
+    """
+    Wait for another process to cache a response for the key, while it holds the lock.
+    """
+    deadline = time.time() + settings.UPSTREAM_FETCH_LOCK_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(POLL_INTERVAL)
+        response = _get_cached_response(cache_key)
+        if response is not _MISSING or django_cache.get(lock_key) is None:
+            return response
+    return _MISSING
+
+
+def _fetch_and_cache(cache_key, fetch, timeout):
+    try:
+        response = fetch()
+    except HttpNotFoundError as exc:
+        django_cache.set(
+            _get_not_found_cache_key(cache_key),
+            getattr(exc, 'content', None),
+            settings.UPSTREAM_NOT_FOUND_CACHE_TIMEOUT
+        )
+        raise
+
+    TieredCache.set_all_tiers(cache_key, response, timeout)
+    django_cache.set(_get_stale_cache_key(cache_key), response, timeout + settings.UPSTREAM_STALE_CACHE_TIMEOUT)
+    return response
+
+
+def get_upstream_response(cache_key, fetch, timeout):
+    """
+    Return the cached response for the key, calling `fetch` to retrieve it from the upstream service on a miss.
+
+    Arguments:
+        cache_key (str): Cache key for the response.
+        fetch (callable): Function without arguments returning the response from the upstream service.
+        timeout (int): Number of seconds the response is cached for.
+
+    Returns:
+        The response returned by `fetch`, possibly cached or stale.
+
+    Raises:
+        HttpNotFoundError: if the upstream service returned, or recently returned, a 404.
+        Any other exception raised by `fetch`.
+    """
+    response = _get_cached_response(cache_key)
+    if response is not _MISSING:
+        return response
+
+    stale_response = django_cache.get(_get_stale_cache_key(cache_key), _MISSING)
+
+    # Serve the stale response rather than waiting for another thread that is refreshing it.
+    if not _acquire_key_lock(cache_key, blocking=stale_response is _MISSING):
+        return stale_response
+
+    try:
+        # The thread we waited for may have cached the response.
+        response = _get_cached_response(cache_key)
+        if response is not _MISSING:
+            return response
+
+        lock_key = _get_lock_cache_key(cache_key)
+        if django_cache.add(lock_key, True, settings.UPSTREAM_FETCH_LOCK_TIMEOUT):
+            try:
+                return _fetch_and_cache(cache_key, fetch, timeout)
+            finally:
+                django_cache.delete(lock_key)
+
+        if stale_response is not _MISSING:
+            return stale_response
+
+        response = _wait_for_cached_response(cache_key, lock_key)
+        if response is not _MISSING:
+            return response
+
+        logger.info('Gave up waiting for another process to fetch [%s], fetching it again.', cache_key)
+        return _fetch_and_cache(cache_key, fetch, timeout)
+    finally:
+        _release_key_lock(cache_key)
@@ -1,15 +1,19 @@
 """ This command publish the courses to LMS."""
 
 
+import json
 import logging
 import os
 
 from django.core.management import BaseCommand, CommandError
 
 from ecommerce.courses.models import Course
+from ecommerce.courses.publishers import BulkLMSPublisher
 
 logger = logging.getLogger(__name__)
 
+BULK_PUBLISH_BATCH_SIZE = 500
+
 
 class Command(BaseCommand):
     """Publish the courses to LMS."""
@@ -26,6 +30,35 @@ class Command(BaseCommand):
                             dest='course_ids_file',
                             default=None,
                             help='Path to file to read courses from.')
+        parser.add_argument('--bulk',
+                            action='store_true',
+                            dest='bulk',
+                            default=False,
+                            help='Publish courses concurrently, with rate limiting and retries.')
+        parser.add_argument('--workers',
+                            action='store',
+                            dest='workers',
+                            type=int,
+                            default=8,
+                            help='Number of courses published concurrently in bulk mode.')
+        parser.add_argument('--rate',
+                            action='store',
+                            dest='rate',
+                            type=float,
+                            default=10,
+                            help='Maximum number of requests per second to each LMS in bulk mode. 0 to disable.')
+        parser.add_argument('--max_attempts',
+                            action='store',
+                            dest='max_attempts',
+                            type=int,
+                            default=3,
+                            help='Maximum number of attempts for each request in bulk mode.')
+        parser.add_argument('--progress_file',
+                            action='store',
+                            dest='progress_file',
+                            default=None,
+                            help='Path to a file recording published courses in bulk mode. Courses whose modes '
+                                 'are unchanged since they were recorded are skipped.')
 
     def handle(self, *args, **options):
         failed = 0
@@ -33,6 +66,10 @@ class Command(BaseCommand):
         if not course_ids_file or not os.path.exists(course_ids_file):
             raise CommandError("Pass the correct absolute path to course ids file as --course_ids_file argument.")
 
+        if options['bulk']:
+            self.bulk_publish(course_ids_file, options)
+            return
+
         with open(course_ids_file, 'r') as file_handler:
             course_ids = file_handler.readlines()
             total_courses = len(course_ids)
@@ -58,3 +95,61 @@ class Command(BaseCommand):
             logger.error("Completed publishing courses. %d of %d failed.", failed, total_courses)
         else:
             logger.info("All %d courses successfully published.", total_courses)
+
+    def bulk_publish(self, course_ids_file, options):
+        with open(course_ids_file, 'r') as file_handler:
+            course_ids = [course_id.strip() for course_id in file_handler if course_id.strip()]
+
+        progress_file = options['progress_file']
+        publisher = BulkLMSPublisher(
+            workers=options['workers'],
+            rate=options['rate'],
+            max_attempts=options['max_attempts'],
+            published_hashes=self.read_progress(progress_file),
+        )
+        logger.info("Publishing %d courses with %d workers.", len(course_ids), options['workers'])
+
+        missing_course_ids = set(course_ids)
+
+        def get_courses():
+            for index in range(0, len(course_ids), BULK_PUBLISH_BATCH_SIZE):
+                courses = Course.objects.filter(
+                    id__in=course_ids[index:index + BULK_PUBLISH_BATCH_SIZE]
+                ).select_related('partner__default_site__siteconfiguration')
+                for course in courses:
+                    missing_course_ids.discard(course.id)
+                    yield course
+
+        progress_handler = open(progress_file, 'a') if progress_file else None
+        try:
+            def record_progress(course_id, data_hash):
+                if progress_handler:
+                    progress_handler.write(json.dumps({'course_id': course_id, 'hash': data_hash}) + '\n')
+                    progress_handler.flush()
+
+            report = publisher.publish_courses(get_courses(), on_published=record_progress)
+        finally:
+            if progress_handler:
+                progress_handler.close()
+
+        for course_id in sorted(missing_course_ids):
+            report.failed[course_id] = 'Course does not exist.'
+
+        for course_id, error in sorted(report.failed.items()):
+            logger.error(u"Failed to publish %s: %s", course_id, error)
+        log = logger.error if report.failed else logger.info
+        log(
+            "Completed publishing courses in %.1f seconds. %d published, %d skipped as unchanged, %d failed.",
+            report.elapsed, len(report.published), len(report.skipped), len(report.failed)
+        )
+
+    def read_progress(self, progress_file):
+        """ Returns the hash of the data last published for each course recorded in the progress file. """
+        published_hashes = {}
+        if progress_file and os.path.exists(progress_file):
+            with open(progress_file, 'r') as file_handler:
+                for line in file_handler:
+                    if line.strip():
+                        entry = json.loads(line)
+                        published_hashes[entry['course_id']] = entry['hash']
+        return published_hashes
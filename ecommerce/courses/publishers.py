@@ -1,13 +1,19 @@
 
 
+import hashlib
 import json
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
 
+import requests
 from django.utils.translation import ugettext_lazy as _
 from edx_rest_api_client.exceptions import SlumberHttpBaseException
 from oscar.core.loading import get_model
 
 from ecommerce.core.constants import ENROLLMENT_CODE_SEAT_TYPES
+from ecommerce.core.rate_limiting import HostRateLimiter
 from ecommerce.courses.utils import mode_for_product
 
 logger = logging.getLogger(__name__)
@@ -44,6 +50,15 @@ class LMSPublisher:
             'expires': self.get_seat_expiration(seat),
         }
 
+    def serialize_course_for_commerce_api(self, course):
+        """ Serializes a course and its seats to the data published to the Commerce API. """
+        return {
+            'id': course.id,
+            'name': course.name,
+            'verification_deadline': self.get_course_verification_deadline(course),
+            'modes': [self.serialize_seat_for_commerce_api(seat) for seat in course.seat_products],
+        }
+
     def publish(self, course):
         """ Publish course commerce data to LMS.
 
@@ -56,23 +71,33 @@ class LMSPublisher:
         Returns:
             None, if publish operation succeeded; otherwise, error message.
         """
-        site = course.partner.default_site
-        course_id = course.id
-        error_message = _('Failed to publish commerce data for {course_id} to LMS.').format(course_id=course_id)
+        return self.publish_data(course.partner.default_site, self.serialize_course_for_commerce_api(course))
+
+    def publish_data(self, site, data):
+        """ Publish serialized course commerce data to the LMS of the given site.
+
+        Unlike `publish`, this does not read from the database, so it can be called from
+        worker threads by `BulkLMSPublisher`.
 
-        name = course.name
-        verification_deadline = self.get_course_verification_deadline(course)
-        modes = [self.serialize_seat_for_commerce_api(seat) for seat in course.seat_products]
+        Arguments:
+            site (Site): Site whose LMS the data is published to.
+            data (dict): Data returned by `serialize_course_for_commerce_api`.
+
+        Returns:
+            None, if publish operation succeeded; otherwise, error message.
+        """
+        course_id = data['id']
+        error_message = _('Failed to publish commerce data for {course_id} to LMS.').format(course_id=course_id)
 
-        has_credit = 'credit' in [mode['name'] for mode in modes]
+        has_credit = 'credit' in [mode['name'] for mode in data['modes']]
         if has_credit:
             try:
-                data = {
+                credit_data = {
                     'course_key': course_id,
                     'enabled': True
                 }
                 credit_api_client = site.siteconfiguration.credit_api_client
-                credit_api_client.courses(course_id).put(data)
+                self._put(site, lambda: credit_api_client.courses(course_id).put(credit_data))
                 logger.info('Successfully published CreditCourse for [%s] to LMS.', course_id)
             except SlumberHttpBaseException as e:
                 # Note that %r is used to log the repr() of the response content, which may sometimes
@@ -90,15 +115,8 @@ class LMSPublisher:
                 return error_message
 
         try:
-            data = {
-                'id': course_id,
-                'name': name,
-                'verification_deadline': verification_deadline,
-                'modes': modes,
-            }
-
             commerce_api_client = site.siteconfiguration.commerce_api_client
-            commerce_api_client.courses(course_id).put(data=data)
+            self._put(site, lambda: commerce_api_client.courses(course_id).put(data=data))
             logger.info('Successfully published commerce data for [%s].', course_id)
             return None
         except SlumberHttpBaseException as e:  # pylint: disable=bare-except
@@ -113,6 +131,10 @@ class LMSPublisher:
             logger.exception('Failed to publish commerce data for [%s] to LMS.', course_id)
             return error_message
 
+    def _put(self, site, put):  # pylint: disable=unused-argument
+        """ Make a PUT request to the LMS. Overridden by `BulkLMSPublisher` to rate limit and retry requests. """
+        return put()
+
     def _parse_error(self, response, default_error_message):
         """When validation errors occur during publication, the LMS is expected
          to return an error message.
@@ -143,3 +165,129 @@ class LMSPublisher:
             return ' '.join([default_error_message, message])
 
         return default_error_message
+
+
+class BulkPublishReport:
+    """ Outcome of publishing courses with `BulkLMSPublisher`. """
+
+    def __init__(self):
+        self.published = []
+        self.skipped = []
+        self.failed = {}
+        self.elapsed = 0
+
+    @property
+    def total(self):
+        return len(self.published) + len(self.skipped) + len(self.failed)
+
+
+class BulkLMSPublisher(LMSPublisher):
+    """ Publishes many courses to LMS concurrently.
+
+    Courses are serialized in the calling thread, and their data is published by a bounded pool
+    of worker threads. Requests are rate limited per LMS host, and requests failing with a
+    connection error, a timeout or a retryable status are retried with exponential backoff.
+
+    Courses whose data is unchanged since it was last published, according to `published_hashes`,
+    are skipped, so that an interrupted run can be resumed.
+    """
+    RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(self, workers=8, rate=10, max_attempts=3, retry_backoff=1, published_hashes=None):
+        """
+        Arguments:
+            workers (int): Number of courses published concurrently.
+            rate (float): Maximum number of requests per second made to each LMS host. 0 disables rate limiting.
+            max_attempts (int): Maximum number of attempts for each request.
+            retry_backoff (float): Seconds to wait before the first retry, doubled for every further retry.
+            published_hashes (dict): Hash of the data last published for each course ID.
+        """
+        self.workers = workers
+        self.rate_limiter = HostRateLimiter(rate)
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.published_hashes = published_hashes or {}
+
+    @staticmethod
+    def get_data_hash(data):
+        """ Returns a hash of serialized course commerce data, identifying the published modes and prices. """
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def publish_courses(self, courses, on_published=None):
+        """ Publish the courses to LMS.
+
+        Arguments:
+            courses (iterable): Courses to be published.
+            on_published (callable): Called with the course ID and data hash of each published course,
+                in the calling thread, e.g. to record progress.
+
+        Returns:
+            BulkPublishReport
+        """
+        report = BulkPublishReport()
+        start = time.time()
+        pending = {}
+
+        def collect(futures):
+            for future in futures:
+                course_id, data_hash = pending.pop(future)
+                error = future.result()
+                if error:
+                    report.failed[course_id] = error
+                    continue
+
+                report.published.append(course_id)
+                self.published_hashes[course_id] = data_hash
+                if on_published:
+                    on_published(course_id, data_hash)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for course in courses:
+                data = self.serialize_course_for_commerce_api(course)
+                data_hash = self.get_data_hash(data)
+                if self.published_hashes.get(course.id) == data_hash:
+                    report.skipped.append(course.id)
+                    continue
+
+                site = course.partner.default_site
+                self._prepare_api_clients(site)
+                pending[executor.submit(self.publish_data, site, data)] = (course.id, data_hash)
+
+                # Keep the number of serialized courses waiting to be published bounded.
+                if len(pending) >= self.workers * 2:
+                    collect(wait(pending, return_when=FIRST_COMPLETED).done)
+
+            collect(list(pending))
+
+        report.elapsed = time.time() - start
+        return report
+
+    def _prepare_api_clients(self, site):
+        # Create the API clients, and get the access token they use, before they are shared by the workers.
+        site.siteconfiguration.credit_api_client  # pylint: disable=pointless-statement
+        site.siteconfiguration.commerce_api_client  # pylint: disable=pointless-statement
+
+    def _put(self, site, put):
+        host = urlparse(site.siteconfiguration.lms_url_root).netloc
+        for attempt in range(1, self.max_attempts + 1):
+            self.rate_limiter.wait(host)
+            try:
+                return put()
+            except Exception as exc:  # pylint: disable=broad-except
+                if attempt == self.max_attempts or not self._is_retryable(exc):
+                    raise
+
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                logger.warning(
+                    'Request to [%s] failed with [%r], retrying in %.1f seconds (attempt %d of %d).',
+                    host, exc, delay, attempt, self.max_attempts
+                )
+                time.sleep(delay)
+        return None
+
+    def _is_retryable(self, exc):
+        if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        if isinstance(exc, SlumberHttpBaseException):
+            return getattr(exc.response, 'status_code', None) in self.RETRYABLE_STATUS_CODES
+        return False
@@ -5,11 +5,13 @@ import os
 import tempfile
 
 import ddt
+import httpretty
 import mock
 from django.core.management import CommandError, call_command
 from testfixtures import LogCapture
 
 from ecommerce.courses.models import Course
+from ecommerce.courses.publishers import LMSPublisher
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
 from ecommerce.tests.testcases import TransactionTestCase
@@ -167,3 +169,29 @@ class PublishCoursesToLMSTests(DiscoveryTestMixin, TransactionTestCase):
 
         mock_publish.assert_called_once_with()
         os.remove(unicode_file)
+
+    @httpretty.activate
+    def test_bulk_publish(self):
+        """ Verify courses are published in bulk mode, and skipped when recorded in the progress file. """
+        self.mock_access_token_response()
+        progress_file = os.path.join(tempfile.gettempdir(), "tmp-progress.txt")
+        self.addCleanup(os.remove, progress_file)
+        fake_course_id = "fake_course_id"
+        self.create_course_ids_file(self.tmp_file_path, [self.course.id, fake_course_id])
+
+        with mock.patch.object(LMSPublisher, 'publish_data', return_value=None) as mock_publish_data:
+            with LogCapture(LOGGER_NAME) as lc:
+                call_command(
+                    'publish_to_lms', course_ids_file=self.tmp_file_path, bulk=True, progress_file=progress_file
+                )
+                lc.check_present(
+                    (LOGGER_NAME, "ERROR", u"Failed to publish {}: Course does not exist.".format(fake_course_id)),
+                )
+            self.assertEqual(mock_publish_data.call_count, 1)
+
+            with LogCapture(LOGGER_NAME) as lc:
+                call_command(
+                    'publish_to_lms', course_ids_file=self.tmp_file_path, bulk=True, progress_file=progress_file
+                )
+                self.assertIn('0 published, 1 skipped as unchanged, 1 failed.', lc.records[-1].getMessage())
+            self.assertEqual(mock_publish_data.call_count, 1)
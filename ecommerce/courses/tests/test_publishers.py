@@ -13,7 +13,7 @@ from testfixtures import LogCapture
 
 from ecommerce.core.constants import ENROLLMENT_CODE_PRODUCT_CLASS_NAME
 from ecommerce.core.url_utils import get_lms_url
-from ecommerce.courses.publishers import LMSPublisher
+from ecommerce.courses.publishers import BulkLMSPublisher, LMSPublisher
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
 from ecommerce.tests.testcases import TestCase
@@ -233,3 +233,64 @@ class LMSPublisherTests(DiscoveryTestMixin, TestCase):
         actual = self.attempt_credit_publication(500)
         expected = 'Failed to publish commerce data for {} to LMS.'.format(self.course.id)
         self.assertEqual(actual, expected)
+
+
+@ddt.ddt
+class BulkLMSPublisherTests(DiscoveryTestMixin, TestCase):
+    def setUp(self):
+        super(BulkLMSPublisherTests, self).setUp()
+
+        httpretty.enable()
+        self.mock_access_token_response()
+
+        self.course = CourseFactory(partner=self.partner)
+        self.course.create_or_update_seat('verified', True, 50)
+        self.publisher = BulkLMSPublisher(workers=2, rate=0, retry_backoff=0)
+
+    def tearDown(self):
+        super(BulkLMSPublisherTests, self).tearDown()
+        httpretty.disable()
+        httpretty.reset()
+
+    def _mock_commerce_api(self):
+        url = self.site_configuration.build_lms_url('/api/commerce/v1/courses/{}/'.format(self.course.id))
+        httpretty.register_uri(httpretty.PUT, url, status=200, body='{}', content_type=JSON)
+
+    def get_commerce_api_requests(self):
+        return [request for request in httpretty.latest_requests() if '/api/commerce/' in request.path]
+
+    def test_publish_courses(self):
+        """ Verify courses are published, and skipped when published again unchanged. """
+        self._mock_commerce_api()
+        on_published = mock.Mock()
+
+        report = self.publisher.publish_courses([self.course], on_published=on_published)
+        self.assertEqual(report.published, [self.course.id])
+        data_hash = self.publisher.get_data_hash(self.publisher.serialize_course_for_commerce_api(self.course))
+        on_published.assert_called_once_with(self.course.id, data_hash)
+
+        httpretty.reset()
+        report = self.publisher.publish_courses([self.course])
+        self.assertEqual((report.published, report.skipped), ([], [self.course.id]))
+        self.assertEqual(self.get_commerce_api_requests(), [])
+
+        self.course.name = 'Renamed course'
+        self.course.save()
+        self._mock_commerce_api()
+        report = self.publisher.publish_courses([self.course])
+        self.assertEqual(report.published, [self.course.id])
+
+    @ddt.data((503, 2), (400, 1))
+    @ddt.unpack
+    def test_publish_courses_retries(self, status, expected_requests):
+        """ Verify requests failing with a retryable status are retried. """
+        url = self.site_configuration.build_lms_url('/api/commerce/v1/courses/{}/'.format(self.course.id))
+        httpretty.register_uri(httpretty.PUT, url, responses=[
+            httpretty.Response(body='{}', status=status, content_type=JSON),
+            httpretty.Response(body='{}', status=200, content_type=JSON),
+        ])
+
+        report = self.publisher.publish_courses([self.course])
+        self.assertEqual(len(self.get_commerce_api_requests()), expected_requests)
+        self.assertEqual(bool(report.published), status == 503)
+        self.assertEqual(bool(report.failed), status == 400)
@@ -4,10 +4,10 @@ import hashlib
 from django.conf import settings
 from django.core.cache import cache
 from django.utils.translation import ugettext_lazy as _
-from edx_django_utils.cache import TieredCache
 from edx_rest_api_client.client import EdxRestApiClient
 from opaque_keys.edx.keys import CourseKey
 
+from ecommerce.core.upstream_cache import get_upstream_response
 from ecommerce.core.url_utils import get_lms_url
 from ecommerce.core.utils import deprecated_traverse_pagination, get_cache_key
 
@@ -39,23 +39,20 @@ def _get_discovery_response(site, cache_key, resource, resource_id):
     Returns:
         dict: resource's information for given resource_id received from Discovery API
     """
-    course_cached_response = TieredCache.get_cached_response(cache_key)
-    if course_cached_response.is_found:
-        return course_cached_response.value
+    def fetch():
+        params = {}
+        api = site.siteconfiguration.discovery_api_client
+        endpoint = getattr(api, resource)
 
-    params = {}
-    api = site.siteconfiguration.discovery_api_client
-    endpoint = getattr(api, resource)
+        if resource == 'course_runs':
+            params['partner'] = site.siteconfiguration.partner.short_code
+        response = endpoint(resource_id).get(**params)
 
-    if resource == 'course_runs':
-        params['partner'] = site.siteconfiguration.partner.short_code
-    response = endpoint(resource_id).get(**params)
+        if resource_id is None:
+            response = deprecated_traverse_pagination(response, endpoint)
+        return response
 
-    if resource_id is None:
-        response = deprecated_traverse_pagination(response, endpoint)
-
-    TieredCache.set_all_tiers(cache_key, response, settings.COURSES_API_CACHE_TIMEOUT)
-    return response
+    return get_upstream_response(cache_key, fetch, settings.COURSES_API_CACHE_TIMEOUT)
 
 
 def get_course_detail(site, course_resource_id):
@@ -13,16 +13,15 @@ from requests.exceptions import ConnectionError as ReqConnectionError
 from requests.exceptions import Timeout
 from slumber.exceptions import SlumberHttpBaseException
 
+from ecommerce.core.reference_data import basket_attribute_types
 from ecommerce.courses.utils import get_course_info_from_catalog
 from ecommerce.enterprise.api import catalog_contains_course_runs, get_enterprise_id_for_user
 from ecommerce.enterprise.utils import get_or_create_enterprise_customer_user
 from ecommerce.extensions.basket.utils import ENTERPRISE_CATALOG_ATTRIBUTE_TYPE
-from ecommerce.extensions.fulfillment.status import ORDER
 from ecommerce.extensions.offer.constants import OFFER_ASSIGNMENT_REVOKED, OFFER_REDEEMED
 from ecommerce.extensions.offer.mixins import ConditionWithoutRangeMixin, SingleItemConsumptionConditionMixin
 from ecommerce.extensions.offer.models import OFFER_PRIORITY_ENTERPRISE
 from ecommerce.extensions.offer.utils import get_benefit_type, get_discount_value
-from ecommerce.extensions.refund.status import REFUND
 
 BasketAttribute = get_model('basket', 'BasketAttribute')
 BasketAttributeType = get_model('basket', 'BasketAttributeType')
@@ -30,9 +29,8 @@ Benefit = get_model('offer', 'Benefit')
 Condition = get_model('offer', 'Condition')
 ConditionalOffer = get_model('offer', 'ConditionalOffer')
 OfferAssignment = get_model('offer', 'OfferAssignment')
+OfferUserDiscount = get_model('offer', 'OfferUserDiscount')
 Order = get_model('order', 'Order')
-OrderDiscount = get_model('order', 'OrderDiscount')
-Refund = get_model('refund', 'Refund')
 StockRecord = get_model('partner', 'StockRecord')
 Voucher = get_model('voucher', 'Voucher')
 logger = logging.getLogger(__name__)
@@ -45,15 +43,8 @@ def is_offer_max_user_discount_available(basket, offer):
         return True
     discount_value = _get_basket_discount_value(basket, offer)
 
-    # discard all refunded orders so they are not counted in per user booking limit
-    refunded_order_ids = list(Refund.objects.filter(
-        user_id=basket.owner.id, status=REFUND.COMPLETE
-    ).values_list('order_id', flat=True))
-
-    # check if offer has discount available for user
-    sum_user_discounts_for_this_offer = OrderDiscount.objects.filter(
-        offer_id=offer.id, order__user_id=basket.owner.id, order__status=ORDER.COMPLETE
-    ).exclude(order_id__in=refunded_order_ids).aggregate(Sum('amount'))['amount__sum'] or Decimal(0.00)
+    # check if offer has discount available for user, refunded orders are not counted in the ledger
+    sum_user_discounts_for_this_offer = OfferUserDiscount.get_discount(offer, basket.owner)
 
     new_total_discount = discount_value + sum_user_discounts_for_this_offer
     if new_total_discount <= offer.max_user_discount:
@@ -69,7 +60,7 @@ def is_offer_max_discount_available(basket, offer):
         return True
     discount_value = _get_basket_discount_value(basket, offer)
     # check if offer has discount available
-    new_total_discount = discount_value + offer.total_discount
+    new_total_discount = discount_value + offer.get_usage()['total_discount']
     if new_total_discount <= offer.max_discount:
         return True
 
@@ -96,6 +87,101 @@ def _get_basket_discount_value(basket, offer):
     return discount_value
 
 
+class EnterpriseBasketEvaluation:
+    """
+    Basket data shared by the evaluations of every enterprise condition applied to a basket.
+
+    The course keys and course run IDs in the basket, the learner's enterprise, and the catalog containment
+    results are computed once per basket contents, rather than once per offer. Use `for_basket` to get the
+    evaluation of a basket.
+    """
+
+    def __init__(self, basket):
+        self.basket = basket
+        self.lines_key = self.get_lines_key(basket)
+        self._course_ids = None
+        self._course_ids_failure = None
+        self._user_enterprise = {}
+        self._catalog_contains = {}
+
+    @staticmethod
+    def get_lines_key(basket):
+        return tuple(line.product_id for line in basket.all_lines())
+
+    @classmethod
+    def for_basket(cls, basket):
+        """
+        Returns the evaluation of the basket, computed again if its lines changed since it was last used.
+        """
+        evaluation = getattr(basket, '_enterprise_evaluation', None)
+        if evaluation is None or evaluation.lines_key != cls.get_lines_key(basket):
+            evaluation = cls(basket)
+            basket._enterprise_evaluation = evaluation  # pylint: disable=protected-access
+        return evaluation
+
+    def get_course_ids(self):
+        """
+        Returns the course keys of the entitlements, and the course run IDs of the seats, in the basket.
+
+        Returns:
+            tuple: The list of course IDs, and None; or None and a (product, exception) tuple identifying the
+                first line whose course could not be determined. The exception is None if the product is not
+                related to a course run.
+        """
+        if self._course_ids is None and self._course_ids_failure is None:
+            course_ids = []
+            for line in self.basket.all_lines():
+                if line.product.is_course_entitlement_product:
+                    try:
+                        response = get_course_info_from_catalog(self.basket.site, line.product)
+                    except (ReqConnectionError, KeyError, SlumberHttpBaseException, Timeout) as exc:
+                        self._course_ids_failure = (line.product, exc)
+                        break
+                    course_ids.append(response['key'])
+                    continue
+
+                course = line.product.course
+                if not course:
+                    self._course_ids_failure = (line.product, None)
+                    break
+                course_ids.append(course.id)
+            else:
+                self._course_ids = course_ids
+
+        return self._course_ids, self._course_ids_failure
+
+    def get_user_enterprise(self):
+        """
+        Returns the UUID of the enterprise the basket owner is linked to, if any.
+        """
+        owner_id = self.basket.owner.id
+        if owner_id not in self._user_enterprise:
+            self._user_enterprise[owner_id] = get_enterprise_id_for_user(self.basket.site, self.basket.owner)
+        return self._user_enterprise[owner_id]
+
+    def catalog_contains_course_runs(self, enterprise_customer_uuid, enterprise_customer_catalog_uuid):
+        """
+        Returns whether the catalog contains the courses in the basket, with one request per catalog.
+
+        Raises:
+            The exception raised when the containment of the catalog was first checked, if any.
+        """
+        key = (enterprise_customer_uuid, enterprise_customer_catalog_uuid)
+        if key not in self._catalog_contains:
+            try:
+                self._catalog_contains[key] = (catalog_contains_course_runs(
+                    self.basket.site, self._course_ids, enterprise_customer_uuid,
+                    enterprise_customer_catalog_uuid=enterprise_customer_catalog_uuid
+                ), None)
+            except (ReqConnectionError, KeyError, SlumberHttpBaseException, Timeout) as exc:
+                self._catalog_contains[key] = (None, exc)
+
+        contains, exc = self._catalog_contains[key]
+        if exc is not None:
+            raise exc
+        return contains
+
+
 class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumptionConditionMixin, Condition):
     class Meta:
         app_label = 'enterprise'
@@ -134,51 +220,41 @@ class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumpt
         enterprise_name_in_condition = str(self.enterprise_customer_name)
         username = basket.owner.username
 
-        # This variable will hold both course keys and course run identifiers.
-        course_ids = []
-        for line in basket.all_lines():
-            if line.product.is_course_entitlement_product:
-                try:
-                    response = get_course_info_from_catalog(basket.site, line.product)
-                except (ReqConnectionError, KeyError, SlumberHttpBaseException, Timeout) as exc:
-                    logger.exception(
-                        '[Code Redemption Failure] Unable to apply enterprise offer because basket '
-                        'contains a course entitlement product but we failed to get course info from  '
-                        'course entitlement product.'
-                        'User: %s, Offer: %s, Message: %s, Enterprise: %s, Catalog: %s, Course UUID: %s',
-                        username,
-                        offer.id,
-                        exc,
-                        enterprise_in_condition,
-                        enterprise_catalog,
-                        line.product.attr.UUID
-                    )
-                    return False
-                else:
-                    course_ids.append(response['key'])
+        evaluation = EnterpriseBasketEvaluation.for_basket(basket)
 
-                    # Skip to the next iteration.
-                    continue
-
-            course = line.product.course
-            if not course:
+        # This variable will hold both course keys and course run identifiers.
+        course_ids, failure = evaluation.get_course_ids()
+        if failure:
+            product, exc = failure
+            if exc is not None:
+                logger.error(
+                    '[Code Redemption Failure] Unable to apply enterprise offer because basket '
+                    'contains a course entitlement product but we failed to get course info from  '
+                    'course entitlement product.'
+                    'User: %s, Offer: %s, Message: %s, Enterprise: %s, Catalog: %s, Course UUID: %s',
+                    username,
+                    offer.id,
+                    exc,
+                    enterprise_in_condition,
+                    enterprise_catalog,
+                    product.attr.UUID,
+                    exc_info=exc
+                )
+            elif offer.offer_type != ConditionalOffer.SITE:
                 # Basket contains products not related to a course_run.
                 # Only log for non-site offers to avoid noise.
-                if offer.offer_type != ConditionalOffer.SITE:
-                    logger.warning('[Code Redemption Failure] Unable to apply enterprise offer because '
-                                   'the Basket contains a product not related to a course_run. '
-                                   'User: %s, Offer: %s, Product: %s, Enterprise: %s, Catalog: %s',
-                                   username,
-                                   offer.id,
-                                   line.product.id,
-                                   enterprise_in_condition,
-                                   enterprise_catalog)
-                return False
-
-            course_ids.append(course.id)
+                logger.warning('[Code Redemption Failure] Unable to apply enterprise offer because '
+                               'the Basket contains a product not related to a course_run. '
+                               'User: %s, Offer: %s, Product: %s, Enterprise: %s, Catalog: %s',
+                               username,
+                               offer.id,
+                               product.id,
+                               enterprise_in_condition,
+                               enterprise_catalog)
+            return False
 
         courses_in_basket = ','.join(course_ids)
-        user_enterprise = get_enterprise_id_for_user(basket.site, basket.owner)
+        user_enterprise = evaluation.get_user_enterprise()
         if user_enterprise and enterprise_in_condition != user_enterprise:
             # Learner is not linked to the EnterpriseCustomer associated with this condition.
             if offer.offer_type == ConditionalOffer.VOUCHER:
@@ -226,9 +302,8 @@ class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumpt
                 return False
 
         try:
-            catalog_contains_course = catalog_contains_course_runs(
-                basket.site, course_ids, enterprise_in_condition,
-                enterprise_customer_catalog_uuid=enterprise_catalog
+            catalog_contains_course = evaluation.catalog_contains_course_runs(
+                enterprise_in_condition, enterprise_catalog
             )
         except (ReqConnectionError, KeyError, SlumberHttpBaseException, Timeout) as exc:
             logger.exception('[Code Redemption Failure] Unable to apply enterprise offer because '
@@ -265,7 +340,7 @@ class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumpt
                 enterprise_catalog,
                 courses_in_basket,
                 offer.max_discount,
-                offer.total_discount,
+                offer.get_usage()['total_discount'],
             )
             return False
 
@@ -300,9 +375,7 @@ class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumpt
 
         if not catalog:
             # For actual baskets get `catalog` from basket attribute
-            enterprise_catalog_attribute, __ = BasketAttributeType.objects.get_or_create(
-                name=ENTERPRISE_CATALOG_ATTRIBUTE_TYPE
-            )
+            enterprise_catalog_attribute = basket_attribute_types.get_or_create(ENTERPRISE_CATALOG_ATTRIBUTE_TYPE)
             enterprise_customer_catalog = BasketAttribute.objects.filter(
                 basket=basket,
                 attribute_type=enterprise_catalog_attribute,
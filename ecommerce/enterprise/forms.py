@@ -137,13 +137,14 @@ class EnterpriseOfferForm(forms.ModelForm):
         # validate against when decreasing the existing value
         if self.instance.pk and self.instance.max_global_applications:
             new_max_global_applications = self.cleaned_data.get('max_global_applications') or 0
-            if new_max_global_applications < self.instance.num_applications:
+            num_applications = self.instance.get_usage()['num_applications']
+            if new_max_global_applications < num_applications:
                 self.add_error(
                     'max_global_applications',
                     _(
                         'Ensure new value must be greater than or equal to consumed({offer_enrollments}) value.'
                     ).format(
-                        offer_enrollments=self.instance.num_applications
+                        offer_enrollments=num_applications
                     )
                 )
 
@@ -156,13 +157,14 @@ class EnterpriseOfferForm(forms.ModelForm):
             self.add_error('max_discount', _('Ensure this value is greater than or equal to 0.'))
         elif self.instance.pk and self.instance.max_discount:  # validate against when decrease the existing value
             new_max_discount = max_discount or 0
-            if new_max_discount < self.instance.total_discount:
+            total_discount = self.instance.get_usage()['total_discount']
+            if new_max_discount < total_discount:
                 self.add_error(
                     'max_discount',
                     _(
                         'Ensure new value must be greater than or equal to consumed({consumed_discount:.2f}) value.'
                     ).format(
-                        consumed_discount=self.instance.total_discount
+                        consumed_discount=total_discount
                     )
                 )
 
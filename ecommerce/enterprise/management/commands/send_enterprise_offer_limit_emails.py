@@ -58,8 +58,9 @@ class Command(BaseCommand):
         """
         Return the total limit, percentage usage and current usage of enrollment limit.
         """
-        percentage_usage = int((offer.num_orders / offer.max_global_applications) * 100)
-        return int(offer.max_global_applications), percentage_usage, int(offer.num_orders)
+        num_orders = offer.get_usage()['num_orders']
+        percentage_usage = int((num_orders / offer.max_global_applications) * 100)
+        return int(offer.max_global_applications), percentage_usage, int(num_orders)
 
     @staticmethod
     def get_booking_limits(offer):
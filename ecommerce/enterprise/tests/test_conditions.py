@@ -13,6 +13,8 @@ from requests.exceptions import ConnectionError as ReqConnectionError
 
 from ecommerce.coupons.tests.mixins import CouponMixin, DiscoveryMockMixin
 from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.courses.utils import get_course_info_from_catalog
+from ecommerce.enterprise.api import catalog_contains_course_runs, get_enterprise_id_for_user
 from ecommerce.enterprise.conditions import EnterpriseCustomerCondition
 from ecommerce.enterprise.tests.mixins import EnterpriseServiceMockMixin
 from ecommerce.entitlements.utils import create_or_update_course_entitlement
@@ -34,6 +36,7 @@ from ecommerce.tests.testcases import TestCase
 Benefit = get_model('offer', 'Benefit')
 ConditionalOffer = get_model('offer', 'ConditionalOffer')
 OfferAssignment = get_model('offer', 'OfferAssignment')
+OfferUserDiscount = get_model('offer', 'OfferUserDiscount')
 Product = get_model('catalogue', 'Product')
 Voucher = get_model('voucher', 'Voucher')
 StockRecord = get_model('partner', 'StockRecord')
@@ -102,6 +105,49 @@ class EnterpriseCustomerConditionTests(EnterpriseServiceMockMixin, DiscoveryTest
         )
         assert is_satisfied == self.condition.is_satisfied(offer, basket)
 
+    @httpretty.activate
+    def test_is_satisfied_shares_basket_evaluation(self):
+        """ Ensure the offers applied to a basket share its course IDs, enterprise and catalog containment. """
+        offers = [
+            factories.EnterpriseOfferFactory(partner=self.partner, condition=self.condition) for __ in range(3)
+        ]
+        basket = BasketFactory(site=self.site, owner=self.user)
+        basket.add_product(self.course_run.seat_products[0])
+        basket.add_product(self.entitlement)
+        self.mock_course_detail_endpoint(
+            discovery_api_url=self.site_configuration.discovery_api_url,
+            course=self.entitlement
+        )
+        self.mock_enterprise_learner_api(
+            learner_id=self.user.id,
+            enterprise_customer_uuid=str(self.condition.enterprise_customer_uuid),
+            course_run_id=self.course_run.id,
+        )
+        self.mock_catalog_contains_course_runs(
+            [self.course_run.id, self.entitlement.attr.UUID],
+            self.condition.enterprise_customer_uuid,
+            enterprise_customer_catalog_uuid=self.condition.enterprise_customer_catalog_uuid,
+        )
+
+        with mock.patch('ecommerce.enterprise.conditions.get_course_info_from_catalog',
+                        wraps=get_course_info_from_catalog) as mock_course_info, \
+                mock.patch('ecommerce.enterprise.conditions.get_enterprise_id_for_user',
+                           wraps=get_enterprise_id_for_user) as mock_enterprise_id, \
+                mock.patch('ecommerce.enterprise.conditions.catalog_contains_course_runs',
+                           wraps=catalog_contains_course_runs) as mock_contains:
+            for offer in offers:
+                self.assertTrue(self.condition.is_satisfied(offer, basket))
+            self.assertEqual(mock_course_info.call_count, 1)
+            self.assertEqual(mock_enterprise_id.call_count, 1)
+            self.assertEqual(mock_contains.call_count, 1)
+
+            # The evaluation is computed again once the basket lines change.
+            basket.flush()
+            basket.add_product(self.course_run.seat_products[0])
+            self.assertTrue(self.condition.is_satisfied(offers[0], basket))
+            self.assertEqual(mock_course_info.call_count, 1)
+            self.assertEqual(mock_contains.call_count, 2)
+
     @httpretty.activate
     def test_is_satisfied_true_for_enterprise_catalog_in_get_request(self):
         """
@@ -510,6 +556,7 @@ class EnterpriseCustomerConditionTests(EnterpriseServiceMockMixin, DiscoveryTest
         for _ in range(num_prev_orders):
             order = OrderFactory(user=self.user, status=ORDER.COMPLETE)
             OrderDiscountFactory(order=order, offer_id=offer.id, amount=10)
+        OfferUserDiscount.rebuild()
         basket = BasketFactory(site=self.site, owner=self.user)
         basket.add_product(self.course_run.seat_products[0])
         basket.add_product(self.entitlement)
@@ -592,6 +639,7 @@ class EnterpriseCustomerConditionTests(EnterpriseServiceMockMixin, DiscoveryTest
             if current_refund_count < refund_count:
                 RefundFactory(order=order, user=self.user, status=REFUND.COMPLETE)
                 current_refund_count += 1
+        OfferUserDiscount.rebuild()
 
         basket = BasketFactory(site=self.site, owner=self.user)
         basket.add_product(self.course_run.seat_products[0])
@@ -621,6 +669,7 @@ class EnterpriseCustomerConditionTests(EnterpriseServiceMockMixin, DiscoveryTest
         for _ in range(5):
             order = OrderFactory(user=self.user, status=ORDER.COMPLETE)
             OrderDiscountFactory(order=order, offer_id=offer.id, amount=10)
+        OfferUserDiscount.rebuild()
         basket = BasketFactory(site=self.site, owner=self.user)
         basket.add_product(self.course_run.seat_products[0])
         self.mock_catalog_contains_course_runs(
@@ -777,7 +826,7 @@ class AssignableEnterpriseCustomerConditionTests(EnterpriseServiceMockMixin, Cou
 
     @mock.patch('ecommerce.enterprise.conditions.crum.get_current_request')
     @mock.patch.object(EnterpriseCustomerCondition, 'is_satisfied', mock.Mock(return_value=True))
-    @mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email', mock.Mock())
+    @mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email', mock.MagicMock())
     @ddt.data(
         (
             Voucher.SINGLE_USE,
@@ -958,7 +1007,7 @@ class AssignableEnterpriseCustomerConditionTests(EnterpriseServiceMockMixin, Cou
         assert self.condition.is_satisfied(enterprise_offer, basket) is True
 
     @mock.patch('ecommerce.enterprise.conditions.crum.get_current_request')
-    @mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email', mock.Mock())
+    @mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email', mock.MagicMock())
     @mock.patch.object(EnterpriseCustomerCondition, 'is_satisfied', mock.Mock(return_value=True))
     def test_is_satisfied_when_user_has_no_assignment(self, mock_request):
         """
@@ -2,7 +2,7 @@
 
 
 import logging
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict, deque
 from decimal import Decimal
 from urllib.parse import urljoin
 
@@ -13,7 +13,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Count, Q, Sum, prefetch_related_objects
+from django.db.models import Count, F, Q, prefetch_related_objects
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from oscar.core.loading import get_class, get_model
@@ -29,7 +29,6 @@ from ecommerce.core.constants import (
 )
 from ecommerce.core.url_utils import get_ecommerce_url
 from ecommerce.core.utils import log_message_and_raise_validation_error
-from ecommerce.coupons.utils import is_coupon_available
 from ecommerce.courses.models import Course
 from ecommerce.enterprise.benefits import BENEFIT_MAP as ENTERPRISE_BENEFIT_MAP
 from ecommerce.enterprise.utils import get_enterprise_customer_sender_alias, get_enterprise_customer_uuid_from_voucher
@@ -57,7 +56,7 @@ from ecommerce.extensions.offer.constants import (
 )
 from ecommerce.extensions.offer.utils import (
     get_benefit_type,
-    send_assigned_offer_email,
+    send_assigned_offer_emails,
     send_assigned_offer_reminder_email,
     send_revoked_offer_email
 )
@@ -88,10 +87,12 @@ Selector = get_class('partner.strategy', 'Selector')
 StockRecord = get_model('partner', 'StockRecord')
 Voucher = get_model('voucher', 'Voucher')
 VoucherApplication = get_model('voucher', 'VoucherApplication')
+VoucherUsageShard = get_model('voucher', 'VoucherUsageShard')
 User = get_user_model()
 
 COURSE_DETAIL_VIEW = 'api:v2:course-detail'
 PRODUCT_DETAIL_VIEW = 'api:v2:product-detail'
+OFFER_ASSIGNMENT_BULK_BATCH_SIZE = 500
 
 
 def is_custom_code(obj):
@@ -213,6 +214,41 @@ def create_offer_assignment_email_sent_record(
     )
 
 
+def create_offer_assignment_email_sent_records(
+        site,
+        enterprise_customer_uuid,
+        email_type,
+        code_email_pairs,
+        template=None,
+        sender_id=None,
+):
+    """
+    Helper method to save OfferAssignmentEmailSentRecord entries for many emails sent at once.
+    The lms_user_ids of the learners are looked up in batches of emails and the records are inserted with bulk_create.
+    Arguments:
+        enterprise_customer_uuid (str): UUID of enterprise customer
+        email_type (str): the type of email sent e:g ASSIGN, REMIND, REVOKE
+        code_email_pairs (list): (code, user_email) tuple for each email sent
+        template (OfferAssignmentEmailTemplates): The template used to send the emails
+        sender_id (str): lms_user_id of the admin who sent the emails
+    """
+    sender_category = MANUAL_EMAIL if sender_id else AUTOMATIC_EMAIL
+    receiver_ids = User.get_lms_user_attributes_using_emails(site, [user_email for __, user_email in code_email_pairs])
+    records = []
+    for code, user_email in code_email_pairs:
+        records.append(OfferAssignmentEmailSentRecord(
+            user_email=user_email,
+            code=code,
+            receiver_id=receiver_ids.get(user_email),
+            sender_id=sender_id,
+            sender_category=sender_category,
+            template_content_object=template,
+            enterprise_customer=enterprise_customer_uuid,
+            email_type=email_type
+        ))
+    OfferAssignmentEmailSentRecord.objects.bulk_create(records, batch_size=OFFER_ASSIGNMENT_BULK_BATCH_SIZE)
+
+
 class CouponMixin:
     """ Mixin class used for Coupon Serializers using model Product having COUPON Product Class"""
 
@@ -281,7 +317,7 @@ class ProductAttributeValueSerializer(serializers.ModelSerializer):
     def get_value(self, dictionary):
         if dictionary.attribute.name == 'Coupon vouchers':
             request = self.context.get('request')
-            vouchers = dictionary.value.vouchers.all()
+            vouchers = VoucherUsageShard.annotate_pending_usage(dictionary.value.vouchers.all())
             serializer = VoucherSerializer(vouchers, many=True, context={'request': request})
             return serializer.data
         return dictionary.value
@@ -772,6 +808,14 @@ class VoucherSerializer(serializers.ModelSerializer):
         url = get_ecommerce_url('/coupons/offer/')
         return '{url}?code={code}'.format(url=url, code=obj.code)
 
+    def to_representation(self, instance):
+        representation = super(VoucherSerializer, self).to_representation(instance)
+        # The usage fields of the voucher miss the usage which is not rolled up yet.
+        usage = instance.get_usage()
+        for field in ('num_orders', 'total_discount'):
+            representation[field] = self.fields[field].to_representation(usage[field])
+        return representation
+
     class Meta:
         model = Voucher
         fields = (
@@ -824,9 +868,9 @@ class CodeUsageSerializer(serializers.Serializer):  # pylint: disable=abstract-m
         return obj.get('user_email')
 
     def get_redemptions(self, obj):
-        voucher = Voucher.objects.get(code=self.get_code(obj))
+        voucher = VoucherUsageShard.annotate_pending_usage(Voucher.objects.filter(code=self.get_code(obj))).get()
         offer = voucher.best_offer
-        redemption_count = voucher.num_orders
+        redemption_count = voucher.get_usage()['num_orders']
 
         if voucher.usage == Voucher.SINGLE_USE:
             max_coupon_usage = 1
@@ -1023,22 +1067,77 @@ class OfferAssignmentEmailTemplatesSerializer(serializers.ModelSerializer):
         return settings.OFFER_ASSIGNMEN_EMAIL_TEMPLATE_BODY_MAP[obj.email_type]
 
 
+class EnterpriseCouponOverviewBatchSerializer(serializers.ListSerializer):  # pylint: disable=abstract-method
+    """
+    List serializer for Enterprise Coupons list overview.
+
+    Loads the overview data for every coupon on the page with a fixed number of queries
+    before the coupons are serialized.
+    """
+    def to_representation(self, data):
+        coupons = list(data)
+        self.child.overview_data = self.child.get_overview_data(coupons)
+        return super(EnterpriseCouponOverviewBatchSerializer, self).to_representation(coupons)
+
+
 class EnterpriseCouponOverviewListSerializer(serializers.ModelSerializer):
     """
     Serializer for Enterprise Coupons list overview.
     """
-    def _get_num_unassigned(self, vouchers):
+    overview_data = None
+
+    @staticmethod
+    def get_overview_data(coupons):
         """
-        Return number of available assignments.
+        Return the vouchers, assignment counts and assignment errors of the coupons, keyed by coupon id.
+
+        The vouchers of all coupons are loaded with their pending usage in one query, the offers of
+        the first voucher of each coupon are prefetched, and assignments are counted and bounced
+        assignments loaded with one grouped query each, regardless of the number of coupons.
         """
-        all_slots_available = 0
-        enterprise_offer = vouchers.first().enterprise_offer
+        coupon_ids = [coupon.id for coupon in coupons]
+        overview_data = {
+            coupon_id: {'vouchers': [], 'num_assignments': {}, 'errors': []} for coupon_id in coupon_ids
+        }
+        if not coupon_ids:
+            return overview_data
+
+        vouchers = Voucher.objects.filter(coupon_vouchers__coupon_id__in=coupon_ids)
+        code_coupon_ids = {}
+        coupon_vouchers = VoucherUsageShard.annotate_pending_usage(vouchers).annotate(
+            coupon_id=F('coupon_vouchers__coupon_id')
+        )
+        for voucher in coupon_vouchers.order_by('id'):
+            overview_data[voucher.coupon_id]['vouchers'].append(voucher)
+            code_coupon_ids[voucher.code] = voucher.coupon_id
+
+        prefetch_related_objects(
+            [data['vouchers'][0] for data in overview_data.values() if data['vouchers']],
+            'offers__condition'
+        )
 
-        assignments = OfferAssignment.objects.filter(code__in=vouchers.values_list('code', flat=True)).exclude(
+        codes = vouchers.values('code')
+        assignments = OfferAssignment.objects.filter(code__in=codes).exclude(
             status__in=[OFFER_REDEEMED, OFFER_ASSIGNMENT_REVOKED]
         ).values('code').annotate(num_assignments=Count('code')).order_by('code')
+        for item in assignments:
+            overview_data[code_coupon_ids[item['code']]]['num_assignments'][item['code']] = item['num_assignments']
 
-        vouchers_num_assignments = {item['code']: item['num_assignments'] for item in assignments}
+        offer_assignments_with_error = OfferAssignment.objects.filter(
+            code__in=codes,
+            status=OFFER_ASSIGNMENT_EMAIL_BOUNCED
+        ).order_by('id')
+        for offer_assignment in offer_assignments_with_error:
+            overview_data[code_coupon_ids[offer_assignment.code]]['errors'].append(offer_assignment)
+
+        return overview_data
+
+    def _get_num_unassigned(self, vouchers, vouchers_num_assignments):
+        """
+        Return number of available assignments.
+        """
+        all_slots_available = 0
+        enterprise_offer = vouchers[0].enterprise_offer
 
         for voucher in vouchers:
             num_assignments = vouchers_num_assignments.get(voucher.code, 0)
@@ -1051,15 +1150,10 @@ class EnterpriseCouponOverviewListSerializer(serializers.ModelSerializer):
 
         return all_slots_available
 
-    def _get_errors(self, coupon):
+    def _get_errors(self, offer_assignments_with_error):
         """
         Returns a list of OfferAssignment errors associated with coupon.
         """
-        codes = coupon.attr.coupon_vouchers.vouchers.values_list('code', flat=True)
-        offer_assignments_with_error = OfferAssignment.objects.filter(
-            code__in=codes,
-            status=OFFER_ASSIGNMENT_EMAIL_BOUNCED
-        )
         return OfferAssignmentSerializer(offer_assignments_with_error, many=True).data
 
     # Max number of codes available (Maximum Coupon Usage).
@@ -1079,22 +1173,26 @@ class EnterpriseCouponOverviewListSerializer(serializers.ModelSerializer):
     def to_representation(self, coupon):  # pylint: disable=arguments-differ
         representation = super(EnterpriseCouponOverviewListSerializer, self).to_representation(coupon)
 
-        vouchers = coupon.attr.coupon_vouchers.vouchers.all()
-        voucher = vouchers.first()
+        if self.overview_data is None or coupon.id not in self.overview_data:
+            self.overview_data = self.get_overview_data([coupon])
+        overview_data = self.overview_data[coupon.id]
+
+        vouchers = overview_data['vouchers']
+        voucher = vouchers[0]
         usage = voucher.usage
-        count = vouchers.count()
-        num_orders = vouchers.aggregate(Sum('num_orders'))
+        count = len(vouchers)
+        current_datetime = timezone.now()
 
         data = {
             'start_date': voucher.start_datetime,
             'end_date': voucher.end_datetime,
-            'num_uses': num_orders['num_orders__sum'],
+            'num_uses': sum(coupon_voucher.get_usage()['num_orders'] for coupon_voucher in vouchers),
             'usage_limitation': usage,
             'num_codes': count,
             'max_uses': self._get_max_uses(voucher, usage, count),
-            'num_unassigned': self._get_num_unassigned(vouchers),
-            'errors': self._get_errors(coupon),
-            'available': is_coupon_available(coupon),
+            'num_unassigned': self._get_num_unassigned(vouchers, overview_data['num_assignments']),
+            'errors': self._get_errors(overview_data['errors']),
+            'available': voucher.start_datetime < current_datetime < voucher.end_datetime,
         }
 
         return dict(representation, **data)
@@ -1102,6 +1200,7 @@ class EnterpriseCouponOverviewListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = ('id', 'title')
+        list_serializer_class = EnterpriseCouponOverviewBatchSerializer
 
 
 class EnterpriseCouponSearchSerializer(serializers.Serializer):  # pylint: disable=abstract-method
@@ -1315,7 +1414,7 @@ class CouponSerializer(CouponMixin, ProductPaymentInfoMixin, serializers.ModelSe
 
     def get_num_uses(self, obj):
         offer = retrieve_offer(obj)
-        return offer.num_applications
+        return offer.get_usage()['num_applications']
 
     def get_program_uuid(self, obj):
         """ Get the Program UUID attached to the coupon. """
@@ -1443,8 +1542,7 @@ class CouponCodeAssignmentSerializer(serializers.Serializer):  # pylint: disable
         enable_nudge_emails = validated_data.pop('enable_nudge_emails')
         available_assignments = validated_data.pop('available_assignments')
         email_iterator = iter(emails)
-        offer_assignments = []
-        emails_already_sent = set()
+        new_offer_assignments = []
         current_date_time = timezone.now()
         base_enterprise_url = validated_data.pop('base_enterprise_url', '')
         site = self.context.get('site')
@@ -1454,39 +1552,38 @@ class CouponCodeAssignmentSerializer(serializers.Serializer):  # pylint: disable
             email = next(email_iterator) if voucher_usage_type == Voucher.MULTI_USE_PER_CUSTOMER else None
             for _ in range(available_assignments[code]['num_slots']):
                 user_email = email or next(email_iterator)
-                new_offer_assignment = OfferAssignment.objects.create(
+                new_offer_assignments.append(OfferAssignment(
                     offer=offer,
                     code=code,
                     user_email=user_email,
                     assignment_date=current_date_time,
-                )
-                offer_assignments.append(new_offer_assignment)
-                # Start async email task. For MULTI_USE_PER_CUSTOMER, a single email is sent
-                email_code_pair = frozenset((new_offer_assignment.user_email, new_offer_assignment.code))
-                if email_code_pair not in emails_already_sent:
-                    # subscribe the user for nudge email if enable_nudge_emails flag is on.
-                    if enable_nudge_emails:
-                        CodeAssignmentNudgeEmails.subscribe_nudge_emails(
-                            user_email=user_email,
-                            code=code,
-                            base_enterprise_url=base_enterprise_url,
-                        )
-                    sender_alias = get_enterprise_customer_sender_alias(site, enterprise_customer_uuid)
-                    self._trigger_email_sending_task(
-                        subject, greeting, closing, new_offer_assignment, voucher_usage_type, sender_alias,
-                        base_enterprise_url,
-                    )
-                    # Create a record of the email sent
-                    create_offer_assignment_email_sent_record(
-                        site,
-                        enterprise_customer_uuid,
-                        ASSIGN,
-                        template,
-                        code=code,
-                        user_email=user_email,
-                        sender_id=sender_id
-                    )
-                    emails_already_sent.add(email_code_pair)
+                ))
+        offer_assignments = self._bulk_create_offer_assignments(new_offer_assignments)
+
+        # For MULTI_USE_PER_CUSTOMER, a single email is sent for each (code, user email) pair.
+        assignments_to_email = OrderedDict()
+        for offer_assignment in offer_assignments:
+            assignments_to_email.setdefault((offer_assignment.code, offer_assignment.user_email), offer_assignment)
+        code_email_pairs = list(assignments_to_email)
+
+        # subscribe the users for nudge email if enable_nudge_emails flag is on.
+        if enable_nudge_emails:
+            CodeAssignmentNudgeEmails.bulk_subscribe_nudge_emails(code_email_pairs, base_enterprise_url)
+
+        sender_alias = get_enterprise_customer_sender_alias(site, enterprise_customer_uuid)
+        self._trigger_email_sending_tasks(
+            subject, greeting, closing, list(assignments_to_email.values()), voucher_usage_type, sender_alias,
+            base_enterprise_url,
+        )
+        # Create a record of the emails sent
+        create_offer_assignment_email_sent_records(
+            site,
+            enterprise_customer_uuid,
+            ASSIGN,
+            code_email_pairs,
+            template=template,
+            sender_id=sender_id
+        )
         validated_data['offer_assignments'] = offer_assignments
         return validated_data
 
@@ -1583,39 +1680,60 @@ class CouponCodeAssignmentSerializer(serializers.Serializer):  # pylint: disable
         attrs['enterprise_customer_uuid'] = enterprise_customer_uuid
         return attrs
 
-    def _trigger_email_sending_task(self, subject, greeting, closing, assigned_offer, voucher_usage_type, sender_alias,
-                                    base_enterprise_url=''):
+    def _bulk_create_offer_assignments(self, offer_assignments):
         """
-        Schedule async task to send email to the learner who has been assigned the code.
+        Insert the offer assignments, and their history records, with one query per batch.
+
+        bulk_create only sets primary keys on PostgreSQL, so elsewhere they are read back by code and
+        assignment date, which all assignments created in a single request share.
+        """
+        with transaction.atomic():
+            OfferAssignment.objects.bulk_create(offer_assignments, batch_size=OFFER_ASSIGNMENT_BULK_BATCH_SIZE)
+            if offer_assignments and offer_assignments[0].pk is None:
+                ids_by_code_and_email = defaultdict(deque)
+                codes = sorted({offer_assignment.code for offer_assignment in offer_assignments})
+                for start in range(0, len(codes), OFFER_ASSIGNMENT_BULK_BATCH_SIZE):
+                    created = OfferAssignment.objects.filter(
+                        code__in=codes[start:start + OFFER_ASSIGNMENT_BULK_BATCH_SIZE],
+                        assignment_date=offer_assignments[0].assignment_date,
+                    ).order_by('id').values_list('id', 'code', 'user_email')
+                    for offer_assignment_id, code, user_email in created:
+                        ids_by_code_and_email[(code, user_email)].append(offer_assignment_id)
+                for offer_assignment in offer_assignments:
+                    offer_assignment.id = ids_by_code_and_email[
+                        (offer_assignment.code, offer_assignment.user_email)
+                    ].popleft()
+            OfferAssignment.history.bulk_history_create(offer_assignments, batch_size=OFFER_ASSIGNMENT_BULK_BATCH_SIZE)
+        return offer_assignments
+
+    def _trigger_email_sending_tasks(self, subject, greeting, closing, assigned_offers, voucher_usage_type,
+                                     sender_alias, base_enterprise_url=''):
+        """
+        Schedule async tasks to send emails to the learners who have been assigned the codes.
         """
         coupon = self.context.get('coupon')
         code_expiration_date = retrieve_end_date(coupon)
-        redemptions_remaining = (
-            assigned_offer.offer.max_global_applications if voucher_usage_type == Voucher.MULTI_USE_PER_CUSTOMER else 1
+        assignments = [
+            {
+                'offer_assignment_id': assigned_offer.id,
+                'learner_email': assigned_offer.user_email,
+                'code': assigned_offer.code,
+                'redemptions_remaining': (
+                    assigned_offer.offer.max_global_applications
+                    if voucher_usage_type == Voucher.MULTI_USE_PER_CUSTOMER else 1
+                ),
+            }
+            for assigned_offer in assigned_offers
+        ]
+        send_assigned_offer_emails(
+            subject=subject,
+            greeting=greeting,
+            closing=closing,
+            assignments=assignments,
+            code_expiration_date=code_expiration_date.strftime('%d %B, %Y %H:%M %Z'),
+            sender_alias=sender_alias,
+            base_enterprise_url=base_enterprise_url,
         )
-        try:
-            send_assigned_offer_email(
-                subject=subject,
-                greeting=greeting,
-                closing=closing,
-                offer_assignment_id=assigned_offer.id,
-                learner_email=assigned_offer.user_email,
-                code=assigned_offer.code,
-                redemptions_remaining=redemptions_remaining,
-                code_expiration_date=code_expiration_date.strftime('%d %B, %Y %H:%M %Z'),
-                sender_alias=sender_alias,
-                base_enterprise_url=base_enterprise_url,
-            )
-        except Exception as exc:  # pylint: disable=broad-except
-            logger.exception(
-                '[Offer Assignment] Email for offer_assignment_id: %d with subject %r, '
-                'greeting %r and closing %r raised exception: %r',
-                assigned_offer.id,
-                subject,
-                greeting,
-                closing,
-                exc
-            )
 
 
 class RefundedOrderCreateVoucherSerializer(serializers.Serializer):  # pylint: disable=abstract-method
@@ -2,9 +2,12 @@ import datetime
 from unittest import mock
 from uuid import uuid4
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from oscar.core.loading import get_model
 from testfixtures import LogCapture
 
+from ecommerce.core.models import User
 from ecommerce.coupons.tests.mixins import CouponMixin
 from ecommerce.extensions.api.serializers import (
     CouponCodeAssignmentSerializer,
@@ -14,7 +17,9 @@ from ecommerce.extensions.api.serializers import (
 from ecommerce.extensions.test import factories
 from ecommerce.tests.testcases import TestCase
 
+CodeAssignmentNudgeEmails = get_model('offer', 'CodeAssignmentNudgeEmails')
 OfferAssignment = get_model('offer', 'OfferAssignment')
+OfferAssignmentEmailSentRecord = get_model('offer', 'OfferAssignmentEmailSentRecord')
 Voucher = get_model('voucher', 'Voucher')
 
 
@@ -49,59 +54,107 @@ class CouponCodeSerializerTests(CouponMixin, TestCase):
             user_email=self.email,
         )
 
-    @mock.patch('ecommerce.extensions.api.serializers.send_assigned_offer_email')
-    def test_send_assigned_offer_email_args(self, mock_assign_email):
+    @mock.patch('ecommerce.extensions.api.serializers.send_assigned_offer_emails')
+    def test_send_assigned_offer_email_args(self, mock_assign_emails):
         """ Test that the code_expiration_date passed is equal to coupon batch end date """
         serializer = CouponCodeAssignmentSerializer(data=self.data, context={'coupon': self.coupon})
-        serializer._trigger_email_sending_task(  # pylint: disable=protected-access
+        serializer._trigger_email_sending_tasks(  # pylint: disable=protected-access
             subject=self.SUBJECT,
             greeting=self.GREETING,
             closing=self.CLOSING,
-            assigned_offer=self.offer_assignment,
+            assigned_offers=[self.offer_assignment],
             voucher_usage_type=Voucher.MULTI_USE_PER_CUSTOMER,
             sender_alias=self.SENDER_ALIAS,
         )
         expected_expiration_date = self.coupon.attr.coupon_vouchers.vouchers.first().end_datetime
 
-        assert mock_assign_email.call_count == 1
-        assign_email_args = mock_assign_email.call_args[1]
+        assert mock_assign_emails.call_count == 1
+        assign_email_args = mock_assign_emails.call_args[1]
         assert assign_email_args['subject'] == self.SUBJECT
         assert assign_email_args['greeting'] == self.GREETING
         assert assign_email_args['closing'] == self.CLOSING
-        assert assign_email_args['learner_email'] == self.offer_assignment.user_email
-        assert assign_email_args['offer_assignment_id'] == self.offer_assignment.id
-        assert assign_email_args['code'] == self.offer_assignment.code
+        assert assign_email_args['assignments'] == [{
+            'offer_assignment_id': self.offer_assignment.id,
+            'learner_email': self.offer_assignment.user_email,
+            'code': self.offer_assignment.code,
+            'redemptions_remaining': self.offer_assignment.offer.max_global_applications,
+        }]
         assert assign_email_args['code_expiration_date'] == expected_expiration_date.strftime('%d %B, %Y %H:%M %Z')
         assert assign_email_args['base_enterprise_url'] == ''
         assert assign_email_args['sender_alias'] == self.SENDER_ALIAS
 
-    @mock.patch('ecommerce.extensions.api.serializers.send_assigned_offer_email')
-    def test_send_assigned_offer_email_args_with_enterprise_url(self, mock_assign_email):
+    @mock.patch('ecommerce.extensions.api.serializers.send_assigned_offer_emails')
+    def test_send_assigned_offer_email_args_with_enterprise_url(self, mock_assign_emails):
         """ Test that the code_expiration_date passed is equal to coupon batch end date """
         serializer = CouponCodeAssignmentSerializer(data=self.data, context={'coupon': self.coupon})
-        serializer._trigger_email_sending_task(  # pylint: disable=protected-access
+        serializer._trigger_email_sending_tasks(  # pylint: disable=protected-access
             subject=self.SUBJECT,
             greeting=self.GREETING,
             closing=self.CLOSING,
-            assigned_offer=self.offer_assignment,
+            assigned_offers=[self.offer_assignment],
             voucher_usage_type=Voucher.MULTI_USE_PER_CUSTOMER,
             sender_alias=self.SENDER_ALIAS,
             base_enterprise_url=self.BASE_ENTERPRISE_URL,
         )
         expected_expiration_date = self.coupon.attr.coupon_vouchers.vouchers.first().end_datetime
 
-        assert mock_assign_email.call_count == 1
-        assign_email_args = mock_assign_email.call_args[1]
+        assert mock_assign_emails.call_count == 1
+        assign_email_args = mock_assign_emails.call_args[1]
         assert assign_email_args['subject'] == self.SUBJECT
         assert assign_email_args['greeting'] == self.GREETING
         assert assign_email_args['closing'] == self.CLOSING
-        assert assign_email_args['learner_email'] == self.offer_assignment.user_email
-        assert assign_email_args['offer_assignment_id'] == self.offer_assignment.id
-        assert assign_email_args['code'] == self.offer_assignment.code
+        assert assign_email_args['assignments'] == [{
+            'offer_assignment_id': self.offer_assignment.id,
+            'learner_email': self.offer_assignment.user_email,
+            'code': self.offer_assignment.code,
+            'redemptions_remaining': self.offer_assignment.offer.max_global_applications,
+        }]
         assert assign_email_args['code_expiration_date'] == expected_expiration_date.strftime('%d %B, %Y %H:%M %Z')
         assert assign_email_args['base_enterprise_url'] == self.BASE_ENTERPRISE_URL
         assert assign_email_args['sender_alias'] == self.SENDER_ALIAS
 
+    def assign_codes(self, emails):
+        """ Assign the codes of a new enterprise coupon to the emails and return the executed queries. """
+        coupon = self.create_coupon(
+            enterprise_customer='af4b351f-5f1c-4fc3-af41-48bb38fcb161',
+            enterprise_customer_catalog='8212a8d8-c6b1-4023-8754-4d687c43d72f',
+            quantity=len(emails),
+            title='Coupon for {} emails'.format(len(emails)),
+        )
+        serializer = CouponCodeAssignmentSerializer(
+            data={'emails': emails, 'enable_nudge_emails': True},
+            context={
+                'coupon': coupon, 'subject': self.SUBJECT, 'greeting': self.GREETING, 'closing': self.CLOSING,
+                'site': self.site,
+            }
+        )
+        assert serializer.is_valid(), serializer.errors
+        with mock.patch('ecommerce.extensions.api.serializers.get_enterprise_customer_sender_alias') as mock_alias, \
+                mock.patch.object(User, 'get_lms_user_attributes_using_emails', return_value={}) as mock_lookup, \
+                mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async') as mock_email, \
+                CaptureQueriesContext(connection) as queries:
+            serializer.save()
+
+        assert mock_alias.call_count == 1
+        assert mock_lookup.call_count == 1
+        assert mock_email.call_count == len(emails)
+        return serializer.data, queries
+
+    def test_assign_codes_in_bulk(self):
+        """ Test that the number of queries made to assign codes does not depend on the number of emails. """
+        emails = ['learner{}@example.com'.format(index) for index in range(6)]
+        # The first assignment also loads data that is cached afterwards, e.g. waffle switches.
+        self.assign_codes(['warm-up@example.com'])
+        __, few_queries = self.assign_codes(emails[:2])
+        data, many_queries = self.assign_codes(emails)
+
+        assert len(many_queries) == len(few_queries)
+        assignments = OfferAssignment.objects.filter(user_email__in=emails[2:])
+        assert sorted((item['id'], item['user_email'], item['code']) for item in data['offer_assignments'][2:]) == \
+            sorted((assignment.id, assignment.user_email, assignment.code) for assignment in assignments)
+        assert OfferAssignment.history.filter(user_email__in=emails).count() == len(emails) + 2
+        assert OfferAssignmentEmailSentRecord.objects.filter(user_email__in=emails).count() == len(emails) + 2
+
     @mock.patch('ecommerce.extensions.api.serializers.send_assigned_offer_reminder_email')
     def test_send_assigned_offer_reminder_email_args(self, mock_remind_email):
         """ Test that the code_expiration_date passed is equal to coupon batch end date """
@@ -157,14 +210,14 @@ class CouponCodeSerializerTests(CouponMixin, TestCase):
             base_enterprise_url=self.BASE_ENTERPRISE_URL,
         )
 
-    @mock.patch('ecommerce.extensions.api.serializers.send_assigned_offer_email')
+    @mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async')
     def test_send_assignment_email_error(self, mock_email):
         """ Test that we log an appropriate message if the code assignment email cannot be sent. """
         mock_email.side_effect = Exception('Ignore me - assignment')
         serializer = CouponCodeAssignmentSerializer(data=self.data, context={'coupon': self.coupon})
         expected = [
             (
-                self.LOGGER_NAME,
+                'ecommerce.extensions.offer.utils',
                 'ERROR',
                 '[Offer Assignment] Email for offer_assignment_id: {} with subject \'{}\', greeting \'{}\' and closing '
                 '\'{}\' raised exception: {}'.format(
@@ -177,12 +230,12 @@ class CouponCodeSerializerTests(CouponMixin, TestCase):
             ),
         ]
 
-        with LogCapture(self.LOGGER_NAME) as log:
-            serializer._trigger_email_sending_task(  # pylint: disable=protected-access
+        with LogCapture('ecommerce.extensions.offer.utils') as log:
+            serializer._trigger_email_sending_tasks(  # pylint: disable=protected-access
                 subject=self.SUBJECT,
                 greeting=self.GREETING,
                 closing=self.CLOSING,
-                assigned_offer=self.offer_assignment,
+                assigned_offers=[self.offer_assignment],
                 voucher_usage_type=Voucher.MULTI_USE_PER_CUSTOMER,
                 sender_alias=self.SENDER_ALIAS
             )
@@ -37,7 +37,7 @@ from ecommerce.extensions.test.factories import (
     prepare_voucher
 )
 from ecommerce.programs.tests.mixins import ProgramTestMixin
-from ecommerce.tests.factories import ProductFactory
+from ecommerce.tests.factories import PartnerFactory, ProductFactory, SiteFactory
 from ecommerce.tests.mixins import BasketCreationMixin, ThrottlingMixin
 from ecommerce.tests.testcases import TestCase, TransactionTestCase
 
@@ -397,6 +397,7 @@ class BasketDestroyViewTests(TestCase):
         self.assertFalse(Basket.objects.filter(id=self.basket.id).exists())
 
 
+@ddt.ddt
 class BasketCalculateViewTests(ProgramTestMixin, ThrottlingMixin, TestCase):
     def setUp(self):
         super(BasketCalculateViewTests, self).setUp()
@@ -791,10 +792,10 @@ class BasketCalculateViewTests(ProgramTestMixin, ThrottlingMixin, TestCase):
         self.assertEqual(response.data, expected)
         mock_calculate_basket_atomic.reset_mock()
 
-        # Call BasketCalculate again to test that we do not hit the cache
+        # Call BasketCalculate again to test that we hit the cache of the user's segment
         response = self.client.get(url_with_one_sku_no_anon)
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
+        self.assertFalse(mock_calculate_basket_atomic.called, msg='The cache should be hit.')
         self.assertEqual(response.data, expected)
 
     @httpretty.activate
@@ -830,22 +831,96 @@ class BasketCalculateViewTests(ProgramTestMixin, ThrottlingMixin, TestCase):
 
     @httpretty.activate
     @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket_atomic')
-    def test_basket_calculate_with_anonymous_caching_disabled(self, mock_calculate_basket_atomic):
-        """Verify a request made by a staff user is not cached"""
+    def test_basket_calculate_user_segment_caching(self, mock_calculate_basket_atomic):
+        """Verify a request made by an authenticated user is cached for users of the same segment"""
         expected = {'Test Succeeded': True}
-        mock_calculate_basket_atomic.return_value = {'Test Succeeded': True}
+        mock_calculate_basket_atomic.return_value = expected
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(mock_calculate_basket_atomic.called)
+        self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
         self.assertEqual(response.data, expected)
+        mock_calculate_basket_atomic.reset_mock()
 
+        # Another user with the same email domain gets the cached response.
+        user = self._login_as_user(is_staff=True)
+        self.assertEqual(user.email.rpartition('@')[2], self.user.email.rpartition('@')[2])
+        response = self.client.get(self._generate_sku_url(self.products, username=user.username))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(mock_calculate_basket_atomic.called, msg='The cache should be hit.')
+        self.assertEqual(response.data, expected)
+
+        # A user with a different email domain does not.
+        user.email = 'user@other.example.org'
+        user.save()
+        response = self.client.get(self._generate_sku_url(self.products, username=user.username))
+        self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
         mock_calculate_basket_atomic.reset_mock()
 
+        # Changing an offer invalidates the cached responses.
+        factories.ConditionalOfferFactory(offer_type=ConditionalOffer.SITE)
+        response = self.client.get(self._generate_sku_url(self.products, username=user.username))
+        self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
+
+    @httpretty.activate
+    @ddt.data('max_user_applications', 'max_user_discount')
+    @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket_atomic')
+    def test_basket_calculate_user_specific_not_cached(self, limit, mock_calculate_basket_atomic):
+        """Verify a request is not cached when an offer limits usage per user and the user has orders"""
+        mock_calculate_basket_atomic.return_value = {'Test Succeeded': True}
+        factories.ConditionalOfferFactory(offer_type=ConditionalOffer.SITE, **{limit: 1})
+        factories.create_order(user=self.user)
+
+        for __ in range(2):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
+            mock_calculate_basket_atomic.reset_mock()
+
+    @httpretty.activate
+    @ddt.data('max_global_applications', 'max_discount')
+    @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket_atomic')
+    def test_basket_calculate_global_budget_not_cached(self, limit, mock_calculate_basket_atomic):
+        """Verify a request is not cached while an offer has a global budget which may run out"""
+        mock_calculate_basket_atomic.return_value = {'Test Succeeded': True}
+        factories.ConditionalOfferFactory(offer_type=ConditionalOffer.SITE, **{limit: 10})
+
+        for __ in range(2):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
+            mock_calculate_basket_atomic.reset_mock()
+
+    @httpretty.activate
+    @ddt.data('site', 'partner')
+    @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket_atomic')
+    def test_basket_calculate_other_site_global_budget_cached(self, owner, mock_calculate_basket_atomic):
+        """Verify an offer of another site or partner with a global budget does not prevent caching"""
+        mock_calculate_basket_atomic.return_value = {'Test Succeeded': True}
+        owners = {'site': SiteFactory(), 'partner': PartnerFactory()}
+        factories.ConditionalOfferFactory(offer_type=ConditionalOffer.SITE, max_discount=10, **{owner: owners[owner]})
+
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
         self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
-        self.assertEqual(response.data, expected)
+        mock_calculate_basket_atomic.reset_mock()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(mock_calculate_basket_atomic.called, msg='The cache should be hit.')
+
+    @httpretty.activate
+    @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket_atomic')
+    def test_basket_calculate_voucher_not_cached(self, mock_calculate_basket_atomic):
+        """Verify a request with a voucher code is not cached for authenticated users"""
+        mock_calculate_basket_atomic.return_value = {'Test Succeeded': True}
+        voucher = factories.VoucherFactory(code='CALCULATE')
+
+        for __ in range(2):
+            response = self.client.get(self.url + '&code={code}'.format(code=voucher.code))
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
+            mock_calculate_basket_atomic.reset_mock()
 
     @httpretty.activate
     @mock.patch('ecommerce.programs.conditions.ProgramCourseRunSeatsCondition._get_lms_resource_for_user')
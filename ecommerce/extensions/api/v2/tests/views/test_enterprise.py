@@ -12,7 +12,9 @@ import httpretty
 import mock
 import rules
 from django.conf import settings
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.http import urlencode
@@ -638,7 +640,7 @@ class EnterpriseCouponViewSetRbacTests(
         self.assertEqual(response, expected_response)
 
     def assign_user_to_code(self, coupon_id, emails, codes):
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay'):
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async'):
             self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -805,7 +807,7 @@ class EnterpriseCouponViewSetRbacTests(
             self.assert_code_detail_response(response['results'], expected_response, codes)
 
     def test_coupon_code_creation_with_enterprise_url(self):
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay'):
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async'):
             coupon = self.create_coupon(
                 benefit_type=Benefit.PERCENTAGE,
                 benefit_value=40,
@@ -1575,6 +1577,46 @@ class EnterpriseCouponViewSetRbacTests(
         for actual_result in overview_response['results']:
             self.assertIn(actual_result, expected_results)
 
+    def test_get_enterprise_coupon_overview_data_query_count(self):
+        """
+        Test that the number of queries made for the overview does not depend on the number of coupons.
+        """
+        enterprise_id = '85b08dde-0877-4474-a4e9-8408fe47ce88'
+        EcommerceFeatureRoleAssignment.objects.all().delete()
+        EcommerceFeatureRoleAssignment.objects.get_or_create(
+            role=self.role,
+            user=self.user,
+            enterprise_id=enterprise_id
+        )
+        overview_url = reverse('api:v2:enterprise-coupons-overview', kwargs={'enterprise_id': enterprise_id})
+
+        def create_coupons(titles):
+            for title in titles:
+                data = dict(self.data, title=title, enterprise_customer={'name': 'LOTRx', 'id': enterprise_id})
+                self.get_response('POST', ENTERPRISE_COUPONS_LINK, data)
+
+        create_coupons(['coupon-1'])
+        coupon = Product.objects.get(title='coupon-1')
+        code = self.get_coupon_voucher(coupon).code
+        self.assign_user_to_code(coupon.id, ['user1@example.com'], [code])
+        OfferAssignment.objects.filter(code=code).update(status=OFFER_ASSIGNMENT_EMAIL_BOUNCED)
+        bounced_assignment = OfferAssignment.objects.get(code=code)
+
+        self.get_response('GET', overview_url)
+        with CaptureQueriesContext(connection) as single_coupon_queries:
+            response = self.get_response_json('GET', overview_url)
+        self.assertEqual(
+            response['results'][0]['errors'],
+            [{'id': bounced_assignment.id, 'user_email': 'user1@example.com', 'code': code}]
+        )
+
+        create_coupons(['coupon-2', 'coupon-3', 'coupon-4'])
+        with CaptureQueriesContext(connection) as many_coupons_queries:
+            response = self.get_response_json('GET', overview_url)
+
+        self.assertEqual(response['count'], 4)
+        self.assertEqual(len(many_coupons_queries), len(single_coupon_queries))
+
     @ddt.data(
         (
             '85b08dde-0877-4474-a4e9-8408fe47ce88',
@@ -1860,7 +1902,7 @@ class EnterpriseCouponViewSetRbacTests(
             self._create_nudge_email_templates()
         coupon = coupon.json()
         coupon_id = coupon['coupon_id']
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay') as mock_send_email:
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async') as mock_send_email:
             response = self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -1907,7 +1949,7 @@ class EnterpriseCouponViewSetRbacTests(
         codes_param = codes[3:]
 
         emails = ['t1@example.com', 't2@example.com']
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay') as mock_send_email:
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async') as mock_send_email:
             response = self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -1946,7 +1988,7 @@ class EnterpriseCouponViewSetRbacTests(
             used_codes.append(voucher.code)
         unused_codes = [voucher.code for voucher in vouchers[3:]]
         emails = ['t1@example.com', 't2@example.com']
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay') as mock_send_email:
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async') as mock_send_email:
             response = self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -2018,7 +2060,7 @@ class EnterpriseCouponViewSetRbacTests(
             user_email='t2@example.com',
         )
         emails = ['t1@example.com', 't2@example.com', 't3@example.com']
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay') as mock_send_email:
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async') as mock_send_email:
             response = self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -2050,7 +2092,7 @@ class EnterpriseCouponViewSetRbacTests(
         voucher = vouchers[0]
         email = 't1@example.com'
         # Assign the code to the user.
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay') as mock_send_email:
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async') as mock_send_email:
             response = self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -2079,7 +2121,7 @@ class EnterpriseCouponViewSetRbacTests(
         assert response == [{'code': voucher.code, 'email': email, 'detail': 'success', 'do_not_email': False}]
 
         # Assign the same code to the user again.
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay') as mock_send_email:
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async') as mock_send_email:
             response = self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -2107,7 +2149,7 @@ class EnterpriseCouponViewSetRbacTests(
         coupon = self.get_response('POST', ENTERPRISE_COUPONS_LINK, coupon_post_data)
         coupon = coupon.json()
         coupon_id = coupon['coupon_id']
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay') as mock_send_email:
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async') as mock_send_email:
             response = self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -2138,7 +2180,7 @@ class EnterpriseCouponViewSetRbacTests(
         coupon = coupon.json()
         coupon_id = coupon['coupon_id']
         with mock.patch(
-                'ecommerce.extensions.offer.utils.send_offer_assignment_email.delay',
+                'ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async',
                 side_effect=Exception()) as mock_send_email:
             response = self.get_response(
                 'POST',
@@ -2189,7 +2231,7 @@ class EnterpriseCouponViewSetRbacTests(
         existing_vouchers_count = vouchers.count()
 
         with mock.patch(
-                'ecommerce.extensions.offer.utils.send_offer_assignment_email.delay',
+                'ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async',
                 side_effect=Exception()) as mock_send_email:
             response = self.get_response(
                 'POST',
@@ -2230,7 +2272,7 @@ class EnterpriseCouponViewSetRbacTests(
         # Verify that no record have been created yet
         assert OfferAssignmentEmailSentRecord.objects.count() == 0
         with mock.patch(
-                'ecommerce.extensions.offer.utils.send_offer_assignment_email.delay',
+                'ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async',
                 side_effect=Exception()):
             response = self.get_response(
                 'POST',
@@ -2340,7 +2382,7 @@ class EnterpriseCouponViewSetRbacTests(
         coupon = self.get_response('POST', ENTERPRISE_COUPONS_LINK, coupon_post_data)
         coupon = coupon.json()
         coupon_id = coupon['coupon_id']
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay'):
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async'):
             self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -2404,7 +2446,7 @@ class EnterpriseCouponViewSetRbacTests(
         coupon = self.get_response('POST', ENTERPRISE_COUPONS_LINK, coupon_post_data)
         coupon = coupon.json()
         coupon_id = coupon['coupon_id']
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay'):
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async'):
             self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -2529,7 +2571,7 @@ class EnterpriseCouponViewSetRbacTests(
         coupon = self.get_response('POST', ENTERPRISE_COUPONS_LINK, coupon_post_data)
         coupon = coupon.json()
         coupon_id = coupon['coupon_id']
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay'):
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async'):
             self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -2640,7 +2682,7 @@ class EnterpriseCouponViewSetRbacTests(
         coupon = self.get_response('POST', ENTERPRISE_COUPONS_LINK, coupon_post_data)
         coupon = coupon.json()
         coupon_id = coupon['coupon_id']
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay'):
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async'):
             self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -2734,7 +2776,7 @@ class EnterpriseCouponViewSetRbacTests(
         coupon = self.get_response('POST', ENTERPRISE_COUPONS_LINK, coupon_post_data)
         coupon = coupon.json()
         coupon_id = coupon['coupon_id']
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay'):
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async'):
             self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
@@ -2950,7 +2992,9 @@ class EnterpriseCouponViewSetRbacTests(
         },
     )
     @ddt.unpack
-    @mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay', mock.Mock(return_value=None))
+    @mock.patch(
+        'ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async', mock.Mock(return_value=None)
+    )
     def test_unavailable_coupon_code_actions(self, action, error):
         """
         Test `Assign/Remind/Revoke` codes from an unavailable coupon returns expected error reponse.
@@ -3118,7 +3162,7 @@ class EnterpriseCouponViewSetRbacTests(
         )
 
     @ddt.data(
-        ('assign', 'ecommerce.extensions.offer.utils.send_offer_assignment_email.delay'),
+        ('assign', 'ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async'),
         ('remind', 'ecommerce.extensions.offer.utils.send_offer_update_email.delay'),
         ('revoke', 'ecommerce.extensions.offer.utils.send_offer_update_email.delay'),
     )
@@ -3344,7 +3388,7 @@ class OfferAssignmentSummaryViewSetTests(
         return None
 
     def assign_user_to_code(self, coupon_id, emails, codes):
-        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.delay'):
+        with mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email.apply_async'):
             self.get_response(
                 'POST',
                 '/api/v2/enterprise/coupons/{}/assign/'.format(coupon_id),
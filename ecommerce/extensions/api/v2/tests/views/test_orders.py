@@ -10,6 +10,7 @@ import mock
 import pytz
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.core.management import call_command
 from django.test import RequestFactory, override_settings
 from django.urls import reverse
 from oscar.core.loading import get_class, get_model
@@ -25,12 +26,15 @@ from ecommerce.extensions.api.v2.tests.views import OrderDetailViewTestMixin
 from ecommerce.extensions.checkout.exceptions import BasketNotFreeError
 from ecommerce.extensions.fulfillment.signals import SHIPPING_EVENT_NAME
 from ecommerce.extensions.fulfillment.status import LINE, ORDER
+from ecommerce.extensions.order.manual_enrollment import BulkManualEnrollmentOrderCreator
 from ecommerce.extensions.test.factories import create_order
 from ecommerce.tests.factories import SiteConfigurationFactory
 from ecommerce.tests.mixins import ThrottlingMixin
 from ecommerce.tests.testcases import TestCase
 
 Basket = get_model('basket', 'Basket')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+ManualEnrollmentOrderJob = get_model('order', 'ManualEnrollmentOrderJob')
 Order = get_model('order', 'Order')
 Product = get_model('catalogue', 'Product')
 ShippingEventType = get_model('order', 'ShippingEventType')
@@ -876,7 +880,7 @@ class ManualCourseEnrollmentOrderViewSetTests(TestCase, DiscoveryMockMixin):
                 )
 
     @mock.patch(
-        'ecommerce.extensions.api.v2.views.orders.EdxOrderPlacementMixin.place_free_order',
+        'ecommerce.extensions.api.v2.views.orders.ManualEnrollmentOrderPlacementMixin.place_free_order',
         new_callable=mock.PropertyMock,
         side_effect=BasketNotFreeError
     )
@@ -891,6 +895,178 @@ class ManualCourseEnrollmentOrderViewSetTests(TestCase, DiscoveryMockMixin):
         self.assertEqual(order["status"], "failure")
         self.assertEqual(order["detail"], "Failed to create free order")
 
+    def post_bulk_orders(self, data, user, chunk_size=2):
+        """
+        Submit a bulk job, process it and return the JSON response of its status.
+        """
+        response = self.client.post(
+            reverse('api:v2:manual-course-enrollment-order-bulk-create'),
+            json.dumps(data),
+            content_type='application/json',
+            **self.build_jwt_header(user)
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json()['status'], ManualEnrollmentOrderJob.PENDING)
+
+        call_command('process_manual_enrollment_order_jobs', chunk_size=chunk_size)
+
+        response = self.client.get(
+            reverse('api:v2:manual-course-enrollment-order-bulk-status', kwargs={'job_id': response.json()['id']}),
+            **self.build_jwt_header(user)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_bulk_create_manual_orders(self):
+        """
+        Test that the bulk job creates the same orders as the endpoint creating them one by one.
+        """
+        post_data = self.generate_post_data(5, discount_percentage=50.0)
+        post_data["enrollments"][1]["mode"] = "audit"
+        post_data["enrollments"][2]["course_run_key"] = "course-v1:MAX+ABC+Course"
+        post_data["enrollments"][3]["sales_force_id"] = "dummy-sales_force_id"
+        del post_data["enrollments"][4]["discount_percentage"]
+        # The same learner is enrolled twice, an order is created only for the first enrollment.
+        post_data["enrollments"].append(post_data["enrollments"][0])
+
+        job = self.post_bulk_orders(post_data, self.user)
+        self.assertEqual(job['status'], ManualEnrollmentOrderJob.COMPLETED)
+        self.assertEqual(job['num_processed'], 6)
+
+        orders = job['orders']
+        self.assertEqual(orders[1]['detail'], 'Course mode should be paid')
+        self.assertEqual(orders[2]['detail'], 'Course not found')
+        self.assertEqual(
+            orders[5], dict(post_data["enrollments"][5], status='success', detail=orders[0]['detail'],
+                            new_order_created=False)
+        )
+        self.assertEqual(Order.objects.count(), 3)
+
+        for index in (0, 3, 4):
+            enrollment = post_data["enrollments"][index]
+            self.assertEqual(
+                orders[index],
+                dict(enrollment, status='success', detail=orders[index]['detail'], new_order_created=True)
+            )
+            order = Order.objects.get(number=orders[index]['detail'])
+            self.assertEqual(order.user, User.objects.get(username=enrollment['username'], email=enrollment['email']))
+            self.assertEqual(order.basket.owner, order.user)
+            self.assertEqual(order.basket.status, Basket.SUBMITTED)
+            self.assertEqual(order.status, ORDER.COMPLETE)
+            self.assertEqual(order.total_incl_tax, 0)
+
+            line = order.lines.get()
+            self.assertEqual(line.status, LINE.COMPLETE)
+            self.assertEqual(line.line_price_excl_tax, 0)
+            self.assertEqual(line.line_price_before_discounts_incl_tax, self.course_price)
+            self.assertEqual(line.prices.get().price_excl_tax, 0)
+            if 'discount_percentage' in enrollment:
+                self.assertEqual(line.effective_contract_discount_percentage, Decimal('0.5'))
+                self.assertEqual(line.effective_contract_discounted_price, self.course_price / 2)
+            else:
+                self.assertIsNone(line.effective_contract_discount_percentage)
+
+            discount = order.discounts.get()
+            self.assertEqual(discount.amount, self.course_price)
+            self.assertEqual(discount.offer.sales_force_id, 'dummy-sales_force_id')
+
+        offer = ConditionalOffer.objects.get(sales_force_id='dummy-sales_force_id')
+        self.assertEqual(offer.get_usage()['num_orders'], 3)
+        self.assertEqual(offer.user_discounts.count(), 3)
+
+    def test_bulk_create_manual_orders_with_existing_entitlement(self):
+        """
+        Test that the bulk job does not create an order for a learner who purchased the course entitlement, and
+        fails the enrollments of courses without discovery data.
+        """
+        basket = factories.BasketFactory(owner=self.user, site=self.site)
+        basket.add_product(self.course_entitlement, 1)
+        order = create_order(basket=basket, user=self.user)
+        order.lines.update(status=LINE.COMPLETE)
+        course_without_discovery_data = CourseFactory(id='course-v1:Demo+Demox+Course', partner=self.partner)
+        course_without_discovery_data.create_or_update_seat('verified', True, self.course_price)
+
+        post_data = self.generate_post_data(3)
+        post_data["enrollments"][0].update(
+            lms_user_id=self.user.lms_user_id, username=self.user.username, email=self.user.email
+        )
+        post_data["enrollments"][2]["course_run_key"] = course_without_discovery_data.id
+
+        orders = self.post_bulk_orders(post_data, self.user)['orders']
+        self.assertEqual(orders[0]['detail'], order.number)
+        self.assertFalse(orders[0]['new_order_created'])
+        self.assertTrue(orders[1]['new_order_created'])
+        self.assertEqual(orders[2]['detail'], 'Failed to create free order')
+        self.assertEqual(order.lines.get().effective_contract_discount_percentage, 0)
+
+    def test_bulk_create_manual_orders_with_date_placed(self):
+        """
+        Test that the bulk job creates the orders of old enrollments with the price of the seat at the time.
+        """
+        stock_record = self.course.seat_products.get(attribute_values__value_text='verified').stockrecords.first()
+        date_placed = datetime.now(pytz.utc).isoformat()
+        stock_record.price_excl_tax = 300
+        stock_record.save()
+
+        post_data = self.generate_post_data(1)
+        post_data["enrollments"][0]["date_placed"] = date_placed
+
+        orders = self.post_bulk_orders(post_data, self.user)['orders']
+        order = Order.objects.get(number=orders[0]['detail'])
+        self.assertEqual(order.date_placed.isoformat(), date_placed)
+        self.assertEqual(order.lines.get().unit_price_excl_tax, self.course_price)
+
+    @mock.patch(
+        'ecommerce.extensions.order.manual_enrollment.BulkManualEnrollmentOrderCreator._update_existing_orders',
+        side_effect=Exception
+    )
+    def test_bulk_create_manual_orders_exception(self, __):
+        """
+        Test that the orders of a chunk are rolled back if the chunk fails.
+        """
+        orders = self.post_bulk_orders(self.generate_post_data(2), self.user)['orders']
+        self.assertEqual([order['detail'] for order in orders], ['Failed to create free order'] * 2)
+        self.assertFalse(Order.objects.exists())
+
+    def test_bulk_create_manual_orders_place_order_exception(self):
+        """
+        Test that an order which cannot be placed fails alone, and does not roll back the other orders of its chunk.
+        """
+        place_free_order = BulkManualEnrollmentOrderCreator.place_free_order
+
+        def place_order(creator, basket):
+            if basket.owner.username == 'ma0':
+                raise BasketNotFreeError
+            return place_free_order(creator, basket)
+
+        place_order_patch = mock.patch.object(
+            BulkManualEnrollmentOrderCreator, 'place_free_order', autospec=True, side_effect=place_order
+        )
+        with place_order_patch:
+            orders = self.post_bulk_orders(self.generate_post_data(2), self.user)['orders']
+        self.assertEqual(orders[0]['detail'], 'Failed to create free order')
+        self.assertTrue(orders[1]['new_order_created'])
+        self.assertEqual(Order.objects.get().number, orders[1]['detail'])
+
+    def test_bulk_bad_request(self):
+        """
+        Test that HTTP 400 is returned if `enrollments` key isn't in the bulk request, and HTTP 404 for the status of
+        an unknown job.
+        """
+        response = self.client.post(
+            reverse('api:v2:manual-course-enrollment-order-bulk-create'),
+            json.dumps({}),
+            content_type='application/json',
+            **self.build_jwt_header(self.user)
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(
+            reverse('api:v2:manual-course-enrollment-order-bulk-status', kwargs={'job_id': 1}),
+            **self.build_jwt_header(self.user)
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def generate_post_data(self, enrollment_count, discount_percentage=0.0, mode="verified"):
         return {
             "enrollments": [
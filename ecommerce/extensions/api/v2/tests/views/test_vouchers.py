@@ -8,6 +8,7 @@ import httpretty
 import mock
 import pytz
 from django.http import Http404
+from django.test import override_settings
 from django.urls import reverse
 from django.utils.timezone import now
 from opaque_keys.edx.keys import CourseKey
@@ -22,6 +23,7 @@ from slumber.exceptions import SlumberBaseException
 from ecommerce.coupons.tests.mixins import CouponMixin, DiscoveryMockMixin
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.api import serializers
+from ecommerce.extensions.api.v2.views import vouchers as vouchers_views
 from ecommerce.extensions.api.v2.views.vouchers import VoucherViewSet
 from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
 from ecommerce.extensions.offer.utils import get_benefit_type
@@ -87,18 +89,20 @@ class VoucherViewSetTests(DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockMixi
         self.assertEqual(response.data['count'], 1)
         self.assertEqual(response.data['results'][0]['code'], voucher.code)
 
-    def prepare_get_offers_response(self, quantity=1, seat_type='verified', seats=None):
+    def prepare_get_offers_response(self, quantity=1, seat_type='verified', seats=None,
+                                    next_page='path/to/the/next/page'):
         """Helper method for creating response the voucher offers endpoint.
 
         Args:
             quantity (int): Number of course runs
+            next_page (str): Link to the next page of course runs
 
         Returns:
             The products, request and vouchers created.
         """
         course_run_info = {
             'count': quantity,
-            'next': 'path/to/the/next/page',
+            'next': next_page,
             'results': []
         }
         products = []
@@ -145,6 +149,13 @@ class VoucherViewSetTests(DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockMixi
 
         return products, request, voucher
 
+    def build_offers_request(self, voucher, query=''):
+        request = APIRequestFactory().get('/?code={}{}'.format(voucher.code, query))
+        request.site = self.site
+        request.user = self.user
+        request.strategy = DefaultStrategy()
+        return request
+
     def build_offers_url(self, voucher):
         return '{path}?code={code}'.format(path=reverse('api:v2:vouchers-offers'), code=voucher.code)
 
@@ -211,6 +222,101 @@ class VoucherViewSetTests(DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockMixi
             self.assertTrue(offer['multiple_credit_providers'])
             self.assertIsNone(offer['credit_provider_price'])
 
+    @httpretty.activate
+    def test_offers_cached(self):
+        """ Verify the offers of a catalog page are cached until the offers of the voucher change. """
+        self.mock_access_token_response()
+        __, request, voucher = self.prepare_get_offers_response(quantity=2)
+        offers = VoucherViewSet().get_offers(request=request, voucher=voucher)['results']
+        self.assertEqual(len(offers), 2)
+
+        with mock.patch.object(VoucherViewSet, 'convert_catalog_response_to_offers', return_value=[]) as mock_convert:
+            self.assertEqual(VoucherViewSet().get_offers(request=request, voucher=voucher)['results'], offers)
+            self.assertFalse(mock_convert.called)
+
+            # Another page is not served from the cache of the first one.
+            other_page_request = self.build_offers_request(voucher, '&offset=20')
+            self.assertEqual(VoucherViewSet().get_offers(request=other_page_request, voucher=voucher)['results'], [])
+            self.assertEqual(mock_convert.call_count, 1)
+
+            voucher.best_offer.benefit.range.save()
+            self.assertEqual(VoucherViewSet().get_offers(request=request, voucher=voucher)['results'], [])
+            self.assertEqual(mock_convert.call_count, 2)
+
+    @httpretty.activate
+    def test_offers_cache_invalidated_by_range_products(self):
+        """ Verify adding products to or removing products from the range of a voucher invalidates its offers. """
+        self.mock_access_token_response()
+        __, request, voucher = self.prepare_get_offers_response(quantity=1)
+        VoucherViewSet().get_offers(request=request, voucher=voucher)
+        product_range = voucher.best_offer.benefit.range
+        product = CourseFactory(partner=self.partner).create_or_update_seat('verified', True, 100)
+
+        with mock.patch.object(VoucherViewSet, 'convert_catalog_response_to_offers', return_value=[]) as mock_convert:
+            product_range.included_products.add(product, through_defaults={'display_order': 0})
+            VoucherViewSet().get_offers(request=request, voucher=voucher)
+            self.assertEqual(mock_convert.call_count, 1)
+
+            product_range.remove_product(product)
+            VoucherViewSet().get_offers(request=request, voucher=voucher)
+            self.assertEqual(mock_convert.call_count, 2)
+
+            product_range.add_product(product)
+            VoucherViewSet().get_offers(request=request, voucher=voucher)
+            self.assertEqual(mock_convert.call_count, 3)
+
+    @httpretty.activate
+    def test_credit_offers_not_cached(self):
+        """ Verify the offers of credit seats, which depend on the user, are not cached. """
+        self.mock_access_token_response()
+        __, request, voucher = self.prepare_get_offers_response(quantity=1, seat_type='credit')
+        self.mock_eligibility_api(request, self.user, 'a/b/c', eligible=True)
+        VoucherViewSet().get_offers(request=request, voucher=voucher)
+
+        with mock.patch.object(VoucherViewSet, 'convert_catalog_response_to_offers', return_value=[]) as mock_convert:
+            self.assertEqual(VoucherViewSet().get_offers(request=request, voucher=voucher)['results'], [])
+            self.assertTrue(mock_convert.called)
+
+    @httpretty.activate
+    def test_offers_without_seat_types_cached(self):
+        """ Verify the offers of a range without seat types are cached, apart from those of credit seats. """
+        self.mock_access_token_response()
+        __, request, voucher = self.prepare_get_offers_response(quantity=1)
+        Range.objects.filter(id=voucher.best_offer.benefit.range.id).update(course_seat_types=None)
+        offers = VoucherViewSet().get_offers(request=request, voucher=voucher)['results']
+        self.assertEqual(len(offers), 1)
+
+        with mock.patch.object(VoucherViewSet, 'convert_catalog_response_to_offers', return_value=[]) as mock_convert:
+            self.assertEqual(VoucherViewSet().get_offers(request=request, voucher=voucher)['results'], offers)
+            mock_convert.assert_called_once()
+            self.assertEqual(mock_convert.call_args[1]['course_seat_types'], 'credit')
+
+    @httpretty.activate
+    @override_settings(VOUCHER_OFFERS_PREFETCH_NEXT_PAGE=True)
+    def test_next_page_prefetched(self):
+        """ Verify the offers of the next catalog page are converted and cached in the background. """
+        self.mock_access_token_response()
+        next_page = '{}course_runs/?limit=20&offset=20&q=*:*'.format(self.site_configuration.discovery_api_url)
+        __, request, voucher = self.prepare_get_offers_response(quantity=2, next_page=next_page)
+
+        # Run the prefetch in the test thread, which sees the data of the test transaction.
+        def run_inline(target, args):
+            return mock.Mock(start=lambda: target(*args))
+
+        with mock.patch.object(vouchers_views, 'threading') as mock_threading, \
+                mock.patch.object(vouchers_views, 'connection') as mock_connection:
+            mock_threading.Thread.side_effect = run_inline
+            offers = VoucherViewSet().get_offers(request=request, voucher=voucher)['results']
+        self.assertEqual(mock_threading.Thread.call_count, 1)
+        # The thread outlives the request, so it is only given the ids of the site and the voucher.
+        self.assertEqual(mock_threading.Thread.call_args[1]['args'][:2], (self.site.id, voucher.id))
+        self.assertTrue(mock_connection.close.called)
+
+        next_page_request = self.build_offers_request(voucher, '&offset=20')
+        with mock.patch.object(VoucherViewSet, 'convert_catalog_response_to_offers') as mock_convert:
+            self.assertEqual(VoucherViewSet().get_offers(request=next_page_request, voucher=voucher)['results'], offers)
+        self.assertFalse(mock_convert.called)
+
     def test_omitting_expired_courses(self):
         """Verify professional courses who's enrollment end datetime have passed are omitted."""
         no_enrollment_end_seat = CourseFactory(partner=self.partner).create_or_update_seat('professional', False, 100)
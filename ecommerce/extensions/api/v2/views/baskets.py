@@ -20,6 +20,7 @@ from rest_framework.response import Response
 
 from ecommerce.core.exceptions import MissingLmsUserIdException
 from ecommerce.core.utils import get_cache_key
+from ecommerce.enterprise.api import get_enterprise_id_for_user
 from ecommerce.extensions.analytics.utils import audit_log
 from ecommerce.extensions.api import data as data_api
 from ecommerce.extensions.api import exceptions as api_exceptions
@@ -29,6 +30,12 @@ from ecommerce.extensions.api.throttles import ServiceUserThrottle
 from ecommerce.extensions.basket.constants import TEMPORARY_BASKET_CACHE_KEY
 from ecommerce.extensions.basket.utils import attribute_cookie_data
 from ecommerce.extensions.checkout.mixins import EdxOrderPlacementMixin
+from ecommerce.extensions.offer.index import (
+    get_offer_index,
+    get_offer_index_version,
+    has_global_limits,
+    has_per_user_limits
+)
 from ecommerce.extensions.partner.shortcuts import get_partner_for_site
 from ecommerce.extensions.payment import exceptions as payment_exceptions
 from ecommerce.extensions.payment.helpers import get_default_processor_class, get_processor_class_by_name
@@ -413,6 +420,41 @@ class BasketCalculateView(generics.GenericAPIView):
             raise
         return response
 
+    def _get_user_segment_cache_key(self, request, user, skus, bundle_id):
+        """
+        Return the cache key for the prices calculated for users in the same segment as `user`,
+        or None if the prices depend on data specific to this user.
+
+        Without a voucher, the offers applied to a user's basket are chosen by the user's enterprise
+        customer and email domain, so users sharing both get the same prices. Prices are specific to
+        the user when a bundle is priced against the user's enrollments, or when an offer limits its
+        applications or discount per user and the user has placed orders. Prices are not cached
+        either while an offer has a global budget, since it may run out before the cache expires.
+        Only the offers which may apply to the basket, on this site, are considered.
+        """
+        if bundle_id and request.site.siteconfiguration.enable_partial_program:
+            return None
+
+        enterprise_id = get_enterprise_id_for_user(request.site, user)
+        offers = get_offer_index().get_candidate_offers(
+            request.site, program_uuid=bundle_id, enterprise_customer_uuid=enterprise_id
+        )
+        if has_global_limits(offers):
+            return None
+
+        if has_per_user_limits(offers) and user.orders.exists():
+            return None
+
+        return get_cache_key(
+            site_domain=request.site,
+            resource_name='calculate',
+            skus=skus,
+            bundle_id=bundle_id,
+            enterprise_id=enterprise_id,
+            email_domain=user.email.rpartition('@')[2].lower(),
+            offer_index_version=get_offer_index_version(),
+        )
+
     def get(self, request):  # pylint: disable=too-many-statements
         """ Calculate basket totals given a list of sku's
 
@@ -508,6 +550,7 @@ class BasketCalculateView(generics.GenericAPIView):
             )
 
         cache_key = None
+        cache_timeout = None
         bundle_id = request.GET.get('bundle')
         if use_default_basket:
             # For an anonymous user we can directly get the cached price, because
@@ -519,12 +562,18 @@ class BasketCalculateView(generics.GenericAPIView):
                 skus=skus,
                 bundle_id=bundle_id
             )
+            cache_timeout = settings.ANONYMOUS_BASKET_CALCULATE_CACHE_TIMEOUT
+        elif not voucher:
+            cache_key = self._get_user_segment_cache_key(request, basket_owner, skus, bundle_id)
+            cache_timeout = settings.AUTHENTICATED_BASKET_CALCULATE_CACHE_TIMEOUT
+
+        if cache_key:
             cached_response = TieredCache.get_cached_response(cache_key)
             if cached_response.is_found:
                 return Response(cached_response.value)
 
         response = self._calculate_temporary_basket_atomic(basket_owner, request, products, voucher, skus, code)
-        if response and use_default_basket:
-            TieredCache.set_all_tiers(cache_key, response, settings.ANONYMOUS_BASKET_CALCULATE_CACHE_TIMEOUT)
+        if response and cache_key:
+            TieredCache.set_all_tiers(cache_key, response, cache_timeout)
 
         return Response(response)
@@ -84,6 +84,7 @@ Product = get_model('catalogue', 'Product')
 ProductClass = get_model('catalogue', 'ProductClass')
 Voucher = get_model('voucher', 'Voucher')
 VoucherApplication = get_model('voucher', 'VoucherApplication')
+VoucherUsageShard = get_model('voucher', 'VoucherUsageShard')
 User = get_user_model()
 
 DEPRECATED_COUPON_CATEGORIES = ['Bulk Enrollment']
@@ -377,7 +378,7 @@ class EnterpriseCouponViewSet(CouponViewSet):
         }
         """
         coupon = self.get_object()
-        coupon_vouchers = coupon.attr.coupon_vouchers.vouchers.all()
+        coupon_vouchers = VoucherUsageShard.annotate_pending_usage(coupon.attr.coupon_vouchers.vouchers.all())
         usage_type = coupon_vouchers.first().usage
         code_filter = request.query_params.get('code_filter')
         visibility_filter = request.query_params.get('visibility_filter')
@@ -2,9 +2,7 @@
 
 
 import logging
-from decimal import Decimal
 
-import dateutil
 import django_filters
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
@@ -24,18 +22,16 @@ from slumber.exceptions import HttpServerError, SlumberBaseException
 
 from ecommerce.courses.models import Course
 from ecommerce.courses.utils import get_course_run_detail
-from ecommerce.enterprise.mixins import EnterpriseDiscountMixin
-from ecommerce.extensions.analytics.utils import audit_log
 from ecommerce.extensions.api import serializers
 from ecommerce.extensions.api.filters import OrderFilter
 from ecommerce.extensions.api.permissions import IsStaffOrOwner
 from ecommerce.extensions.api.throttles import ServiceUserThrottle
-from ecommerce.extensions.checkout.mixins import EdxOrderPlacementMixin
-from ecommerce.extensions.fulfillment.status import LINE, ORDER
-from ecommerce.extensions.offer.models import OFFER_PRIORITY_MANUAL_ORDER
-from ecommerce.extensions.order.benefits import ManualEnrollmentOrderDiscountBenefit
-from ecommerce.extensions.order.conditions import ManualEnrollmentOrderDiscountCondition
-from ecommerce.programs.custom import class_path
+from ecommerce.extensions.fulfillment.status import LINE
+from ecommerce.extensions.order.manual_enrollment import (
+    ManualEnrollmentOrderPlacementMixin,
+    get_enrollment_data,
+    get_or_create_discount_offer
+)
 
 logger = logging.getLogger(__name__)
 
@@ -45,9 +41,7 @@ Product = get_model('catalogue', 'Product')
 post_checkout = get_class('checkout.signals', 'post_checkout')
 Basket = get_model('basket', 'Basket')
 Applicator = get_class('offer.applicator', 'Applicator')
-ConditionalOffer = get_model('offer', 'ConditionalOffer')
-Condition = get_model('offer', 'Condition')
-Benefit = get_model('offer', 'Benefit')
+ManualEnrollmentOrderJob = get_model('order', 'ManualEnrollmentOrderJob')
 
 
 @method_decorator(transaction.non_atomic_requests, name='dispatch')
@@ -103,7 +97,7 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
-class ManualCourseEnrollmentOrderViewSet(EdxOrderPlacementMixin, EnterpriseDiscountMixin, ViewSet):
+class ManualCourseEnrollmentOrderViewSet(ManualEnrollmentOrderPlacementMixin, ViewSet):
     """
         **Use Cases**
 
@@ -112,7 +106,7 @@ class ManualCourseEnrollmentOrderViewSet(EdxOrderPlacementMixin, EnterpriseDisco
 
         **Behavior**
 
-            Implements POST action only.
+            Implements POST action, and the bulk actions described below.
 
             POST /api/v2/manual_course_enrollment_order/
             >>> {
@@ -173,11 +167,26 @@ class ManualCourseEnrollmentOrderViewSet(EdxOrderPlacementMixin, EnterpriseDisco
             >>>         },
             >>>     ]
             >>> }
+
+            POST /api/v2/manual_course_enrollment_order/bulk/
+            Accepts the same data as above, and creates a job which places and completes the orders as above,
+            in chunks. The job is processed by the process_manual_enrollment_order_jobs command.
+
+            Response
+            >>> {
+            >>>     "id": 1,
+            >>>     "status": "pending",
+            >>>     "num_enrollments": 2,
+            >>>     "num_processed": 0
+            >>> }
+
+            GET /api/v2/manual_course_enrollment_order/bulk/1/
+            Returns the job as above, and once its status is "completed" the "orders" in the format above.
     """
 
     authentication_classes = (JwtAuthentication,)
     permission_classes = (IsAuthenticated, IsAdminUser)
-    http_method_names = ['post']
+    http_method_names = ['get', 'post']
 
     SUCCESS, FAILURE = "success", "failure"
 
@@ -221,6 +230,58 @@ class ManualCourseEnrollmentOrderViewSet(EdxOrderPlacementMixin, EnterpriseDisco
 
         return Response({"orders": orders}, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def _serialize_job(job):
+        data = {
+            'id': job.id,
+            'status': job.status,
+            'num_enrollments': len(job.enrollments),
+            'num_processed': job.num_processed,
+        }
+        if job.status == ManualEnrollmentOrderJob.COMPLETED:
+            data['orders'] = job.results
+        return data
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Create a job which creates the orders of the enrollments in bulk.
+        """
+        try:
+            enrollments = request.data["enrollments"]
+        except KeyError:
+            return Response(
+                {
+                    "status": "failure",
+                    "detail": "Invalid data. No `enrollments` field."
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        job = ManualEnrollmentOrderJob.objects.create(
+            site=request.site,
+            requested_by=request.user,
+            enrollments=enrollments,
+        )
+        logger.info(
+            '[Manual Order Creation] Bulk job [%d] created with [%d] enrollments. RequestUser: %s',
+            job.id,
+            len(enrollments),
+            request.user.username,
+        )
+        return Response(self._serialize_job(job), status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'bulk/(?P<job_id>[0-9]+)')
+    def bulk_status(self, request, job_id=None):
+        """
+        Return the status of a bulk job, and its results once it is completed.
+        """
+        try:
+            job = ManualEnrollmentOrderJob.objects.get(id=job_id, site=request.site)
+        except ManualEnrollmentOrderJob.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(self._serialize_job(job))
+
     def _create_single_order(self, enrollment, request_user, request_site):
         """
             Creates an order from a single enrollment.
@@ -251,7 +312,7 @@ class ManualCourseEnrollmentOrderViewSet(EdxOrderPlacementMixin, EnterpriseDisco
                 mode,
                 discount_percentage,
                 sales_force_id,
-            ) = self._get_enrollment_data(enrollment)
+            ) = get_enrollment_data(enrollment)
         except ValidationError as ex:
             return dict(enrollment, status=self.FAILURE, detail=ex.message, new_order_created=None)
 
@@ -305,16 +366,14 @@ class ManualCourseEnrollmentOrderViewSet(EdxOrderPlacementMixin, EnterpriseDisco
 
         enterprise_customer_name = enrollment.get('enterprise_customer_name')
         enterprise_customer_uuid = enrollment.get('enterprise_customer_uuid')
-        discount_offer = self._get_or_create_discount_offer(
+        discount_offer = get_or_create_discount_offer(
             enterprise_customer_name,
             enterprise_customer_uuid,
             sales_force_id
         )
         Applicator().apply_offers(basket, [discount_offer])
         try:
-            order = self.place_free_order(basket)
-            self._update_order_according_to_date_place(order, enrollment.get('date_placed'))
-            self._update_all_orderline_with_enterprise_discount(order, discount_percentage)
+            order = self.place_manual_enrollment_order(basket, discount_percentage, enrollment.get('date_placed'))
         except:  # pylint: disable=bare-except
             logger.exception(
                 '[Manual Order Creation Failure] Failed to place the order. User: %s, Course: %s, Basket: %s, '
@@ -336,103 +395,6 @@ class ManualCourseEnrollmentOrderViewSet(EdxOrderPlacementMixin, EnterpriseDisco
         )
         return dict(enrollment, status=self.SUCCESS, detail=order.number, new_order_created=True)
 
-    def _update_all_orderline_with_enterprise_discount(self, order, discount_percentage):
-        """
-        Updates all order's lines with calculated discount metrics if applicable
-        """
-        if discount_percentage is None:
-            return
-
-        # update_orderline_with_enterprise_discount function expects Decimal object
-        discount_percentage = Decimal(discount_percentage)
-        for line in order.lines.all():
-            self.update_orderline_with_enterprise_discount_metadata(
-                order,
-                line,
-                discount_percentage=discount_percentage,
-                is_manual_order=True
-            )
-
-    def _update_order_according_to_date_place(self, order, date_placed):
-        """
-            This is a Single Time use functionality to created order records for old enrollments.
-            We will revert this PR after using it.
-        Args:
-            order: An Order object
-            date_placed: iso format datetime
-
-        Returns:
-            Nothing
-
-        """
-        if not date_placed:
-            return
-
-        date_placed = dateutil.parser.isoparse(date_placed)
-        order.date_placed = date_placed
-        order.save()
-
-        for line in order.lines.all():
-            old_stock = line.stockrecord.history.filter(history_date__lt=date_placed).order_by('-history_date').first()
-            stock_record = old_stock or line.stockrecord
-            price = stock_record.price_excl_tax or Decimal('0')
-            quantity = line.quantity
-            line.line_price_before_discounts_incl_tax = price * quantity
-            line.line_price_before_discounts_excl_tax = price * quantity
-            line.unit_price_incl_tax = price
-            line.unit_price_excl_tax = price
-            line.save()
-
-        logger.info('[Manual Order Back populate] Order completed. Order: %s', order.number,)
-
-    def _get_enrollment_data(self, enrollment):
-        """
-        Return parameters from incoming enrollment.
-
-        Required Parameters:
-            lms_user_id:  User's platform id.
-            learner_username:  User's username.
-            learner_email:  User's email.
-            course_run_key:  Course key.
-            mode: Course mode.
-
-        Optional Parameters:
-            discount_percentage: Discounted percentage for manual enrollment.
-            sales_force_id: Salesforce opportunity id.
-
-        Raises:
-            ValidationError: If any required parameter is not present in enrollment.
-        """
-        paid_modes = ['verified', 'professional']
-        lms_user_id = enrollment.get('lms_user_id')
-        learner_username = enrollment.get('username')
-        learner_email = enrollment.get('email')
-        course_run_key = enrollment.get('course_run_key')
-        discount_percentage = enrollment.get('discount_percentage')
-        sales_force_id = enrollment.get('sales_force_id')
-        mode = enrollment.get('mode')
-        if not (lms_user_id and learner_username and learner_email and course_run_key and mode):
-            enrollment_parameters_state = [
-                ("'lms_user_id'", bool(lms_user_id)),
-                ("'username'", bool(learner_username)),
-                ("'email'", bool(learner_email)),
-                ("'course_run_key'", bool(course_run_key)),
-                ("'mode'", bool(mode)),
-            ]
-            missing_params = ', '.join(name for name, present in enrollment_parameters_state if not present)
-            logger.error(
-                '[Manual Order Creation Failure] Missing required enrollment data. Message: %s', missing_params
-            )
-            raise ValidationError('Missing required enrollment data: {}'.format(missing_params))
-
-        if mode not in paid_modes:
-            raise ValidationError('Course mode should be paid')
-
-        if discount_percentage is not None:
-            if not isinstance(discount_percentage, float) or (discount_percentage < 0.0 or discount_percentage > 100.0):
-                raise ValidationError('Discount percentage should be a float from 0 to 100.')
-        return lms_user_id, learner_username, learner_email, course_run_key, mode, discount_percentage, sales_force_id
-
     def _get_learner_user(self, lms_user_id, learner_username, learner_email):
         """
         Return the ecommerce user with username set to `learner_username` and email set to `learner_email`.
@@ -446,60 +408,3 @@ class ManualCourseEnrollmentOrderViewSet(EdxOrderPlacementMixin, EnterpriseDisco
         })
 
         return learner_user
-
-    def _get_or_create_discount_offer(self, enterprise_customer_name, enterprise_customer_uuid, sales_force_id):
-        """
-        Get or Create 100% discount offer for `Manual Enrollment Order`.
-        """
-        condition, _ = Condition.objects.get_or_create(
-            proxy_class=class_path(ManualEnrollmentOrderDiscountCondition),
-            enterprise_customer_uuid=enterprise_customer_uuid
-        )
-
-        if condition.enterprise_customer_name != enterprise_customer_name:
-            condition.enterprise_customer_name = enterprise_customer_name
-            condition.save()
-
-        benefit, _ = Benefit.objects.get_or_create(
-            proxy_class=class_path(ManualEnrollmentOrderDiscountBenefit),
-            value=100,
-            max_affected_items=1,
-        )
-
-        offer_kwargs = {
-            'offer_type': ConditionalOffer.USER,
-            'condition': condition,
-            'benefit': benefit,
-            'priority': OFFER_PRIORITY_MANUAL_ORDER,
-        }
-
-        offer, __ = ConditionalOffer.objects.get_or_create(
-            name='Manual Course Enrollment Order Offer for enterprise {}'.format(enterprise_customer_uuid),
-            defaults=offer_kwargs
-        )
-        if sales_force_id and offer.sales_force_id != sales_force_id:
-            offer.sales_force_id = sales_force_id
-            offer.save()
-
-        return offer
-
-    def handle_successful_order(self, order, request=None):  # pylint: disable=arguments-differ
-        """
-        Fulfill the order immediately.
-        """
-        for line in order.lines.all():
-            line.set_status(LINE.COMPLETE)
-
-        order.set_status(ORDER.COMPLETE)
-
-        audit_log(
-            'manual_order_fulfilled',
-            amount=order.total_excl_tax,
-            basket_id=order.basket.id,
-            currency=order.currency,
-            order_number=order.number,
-            user_id=order.user.id,
-            contains_coupon=order.contains_coupon
-        )
-
-        return order
@@ -2,16 +2,23 @@
 
 
 import logging
-from urllib.parse import urlparse
+import threading
+from urllib.parse import parse_qs, urlparse
 
 import django_filters
 import pytz
 from dateutil.parser import parse
 from dateutil.utils import default_tzinfo
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.cache import cache as django_cache
+from django.db import connection
+from django.db.models import OuterRef, Subquery
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
+from edx_django_utils.cache import TieredCache
 from opaque_keys.edx.keys import CourseKey
-from oscar.core.loading import get_model
+from oscar.core.loading import get_class, get_model
 from requests.exceptions import ConnectionError as ReqConnectionError
 from requests.exceptions import Timeout
 from rest_framework import status
@@ -27,12 +34,16 @@ from ecommerce.enterprise.utils import get_enterprise_catalog
 from ecommerce.extensions.api import serializers
 from ecommerce.extensions.api.permissions import IsOffersOrIsAuthenticatedAndStaff
 from ecommerce.extensions.api.v2.views import NonDestroyableModelViewSet
+from ecommerce.extensions.voucher.offers_cache import get_voucher_offers_cache_key
 
 logger = logging.getLogger(__name__)
 Order = get_model('order', 'Order')
 Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+Selector = get_class('partner.strategy', 'Selector')
 StockRecord = get_model('partner', 'StockRecord')
 Voucher = get_model('voucher', 'Voucher')
+VoucherUsageShard = get_model('voucher', 'VoucherUsageShard')
 
 
 class VoucherFilter(django_filters.rest_framework.FilterSet):
@@ -55,9 +66,9 @@ class VoucherViewSet(NonDestroyableModelViewSet):
     filterset_class = VoucherFilter
 
     def get_queryset(self):
-        return Voucher.objects.filter(
+        return VoucherUsageShard.annotate_pending_usage(Voucher.objects.filter(
             coupon_vouchers__coupon__stockrecords__partner=self.request.site.siteconfiguration.partner
-        )
+        ))
 
     @action(detail=False)
     def offers(self, request):
@@ -110,7 +121,8 @@ class VoucherViewSet(NonDestroyableModelViewSet):
             course_seat_types(str): Comma-separated list of accepted seat types.
 
         Returns:
-            Querysets of products and stock records retrieved from results.
+            The list of products retrieved from results, a dictionary of their stock records
+            keyed by product ID, and the metadata of the enrollable course runs keyed by course ID.
         """
         course_run_metadata = {}
 
@@ -144,23 +156,50 @@ class VoucherViewSet(NonDestroyableModelViewSet):
             elif is_course_run_enrollable(result):
                 course_run_metadata[result['key']] = result
 
-        products = []
-        for seat_type in course_seat_types.split(','):
-            products.extend(Product.objects.filter(
-                course_id__in=list(course_run_metadata.keys()),
-                attributes__name='certificate_type',
-                attribute_values__value_text=seat_type
-            ))
-        stock_records = StockRecord.objects.filter(product__in=products)
+        # Retrieve the seats of every accepted seat type in one query, and list them by seat type.
+        seat_types = course_seat_types.split(',')
+        products = Product.objects.filter(
+            course_id__in=list(course_run_metadata.keys()),
+        ).annotate(
+            seat_type=Subquery(ProductAttributeValue.objects.filter(
+                product=OuterRef('pk'),
+                attribute__name='certificate_type',
+            ).values('value_text')[:1])
+        ).filter(seat_type__in=seat_types)
+        products = sorted(products, key=lambda product: seat_types.index(product.seat_type))
+        stock_records = {
+            stock_record.product_id: stock_record
+            for stock_record in StockRecord.objects.filter(product__in=products)
+        }
         return products, stock_records, course_run_metadata
 
-    def convert_catalog_response_to_offers(self, request, voucher, response):
-        offers = []
+    def get_course_seat_types(self, voucher):
+        """ Return the comma-separated list of seat types offered by the voucher. """
         benefit = voucher.best_offer.benefit
-        # default course_seat_types value to all paid seat types.
-        course_seat_types = 'verified,professional,credit'
         if benefit.range and benefit.range.course_seat_types:
-            course_seat_types = benefit.range.course_seat_types
+            return benefit.range.course_seat_types
+        # default course_seat_types value to all paid seat types.
+        return 'verified,professional,credit'
+
+    def get_cached_course_seat_types(self, voucher):
+        """ Return the comma-separated list of the voucher's seat types whose offers are cached.
+
+        Credit offers depend on the eligibility and the orders of the user, so they are not cached.
+        """
+        course_seat_types = self.get_course_seat_types(voucher).split(',')
+        return ','.join(seat_type for seat_type in course_seat_types if seat_type != 'credit')
+
+    def convert_catalog_response_to_offers(self, site, strategy, voucher, response, user=None,
+                                           course_seat_types=None):
+        """ Convert a page of catalog results into the offers of the voucher.
+
+        The user is only required for credit seats, whose offers depend on the eligibility and the orders of
+        the user. The offers are limited to the given seat types, which default to those of the voucher.
+        """
+        offers = []
+        benefit = voucher.best_offer.benefit
+        voucher_seat_types = self.get_course_seat_types(voucher)
+        course_seat_types = course_seat_types or voucher_seat_types
         multiple_credit_providers = False
         credit_provider_price = None
 
@@ -169,12 +208,15 @@ class VoucherViewSet(NonDestroyableModelViewSet):
         products, stock_records, course_run_metadata = self.retrieve_course_objects(
             response['results'], course_seat_types
         )
-        contains_verified_course = ('verified' in course_seat_types)
+        courses = Course.objects.in_bulk({product.course_id for product in products})
+        contains_verified_course = ('verified' in voucher_seat_types)
         for product in products:
             logger.info('[Voucher Offers] Constructing offer data. Product: [%s]', product.id)
+            stock_record = stock_records.get(product.id)
             # Omit unavailable seats from the offer results so that one seat does not cause an
             # error message for every seat in the query result.
-            if not request.strategy.fetch_for_product(product).availability.is_available_to_buy:
+            purchase_info = strategy.fetch_for_product(product, stockrecord=stock_record)
+            if not purchase_info.availability.is_available_to_buy:
                 logger.info('%s is unavailable to buy. Omitting it from the results.', product)
                 continue
 
@@ -183,9 +225,9 @@ class VoucherViewSet(NonDestroyableModelViewSet):
             if course_seat_types == 'credit' or product.attr.certificate_type == 'credit':
                 logger.info('[Voucher Offers] Constructing offer data for credit.')
                 # Omit credit seats for which the user is not eligible or which the user already bought.
-                if not request.user.is_eligible_for_credit(product.course_id, request.site.siteconfiguration):
+                if not user.is_eligible_for_credit(product.course_id, site.siteconfiguration):
                     continue
-                if Order.objects.filter(user=request.user, lines__product=product).exists():
+                if Order.objects.filter(user=user, lines__product=product).exists():
                     continue
                 credit_seats = Product.objects.filter(parent=product.parent, attributes__name='credit_provider')
 
@@ -194,18 +236,13 @@ class VoucherViewSet(NonDestroyableModelViewSet):
                     credit_provider_price = None
                 else:
                     multiple_credit_providers = False
-                    credit_provider_price = StockRecord.objects.get(product=product).price_excl_tax
+                    credit_provider_price = stock_record.price_excl_tax if stock_record else None
 
-            try:
-                stock_record = stock_records.get(product__id=product.id)
-            except StockRecord.DoesNotExist:
-                stock_record = None
+            if not stock_record:
                 logger.error('Stock Record for product %s not found.', product.id)
 
-            try:
-                course = Course.objects.get(id=course_id)
-            except Course.DoesNotExist:  # pragma: no cover
-                course = None
+            course = courses.get(course_id)
+            if not course:  # pragma: no cover
                 logger.error('Course %s not found.', course_id)
 
             if course_catalog_data and course and stock_record:
@@ -253,32 +290,153 @@ class VoucherViewSet(NonDestroyableModelViewSet):
         if not catalog_query and not enterprise_customer:
             return None, None
 
+        if not enterprise_catalog and not catalog_query:
+            logger.warning(
+                'User is trying to redeem Voucher %s, but no catalog information is configured!',
+                voucher.code
+            )
+            return [], None
+
+        page = {
+            'limit': request.GET.get('limit', DEFAULT_CATALOG_PAGE_SIZE),
+            'page': request.GET.get('page'),
+            'offset': request.GET.get('offset'),
+        }
+        offers, next_page = [], None
+        if self.get_cached_course_seat_types(voucher):
+            offers, next_page = self.get_cached_catalog_page_offers(
+                request.site, request.strategy, voucher, catalog_query, enterprise_catalog, page
+            )
+            if next_page and settings.VOUCHER_OFFERS_PREFETCH_NEXT_PAGE:
+                self.prefetch_next_catalog_page_offers(
+                    request.site, voucher, catalog_query, enterprise_catalog, page['limit'], next_page
+                )
+
+        # Credit offers depend on the eligibility and the orders of the user, so they are not cached. They
+        # follow the offers of the other seat types, as the seats are listed in the order of their seat types.
+        if 'credit' in self.get_course_seat_types(voucher).split(','):
+            credit_offers, next_page = self.get_catalog_page_offers(
+                request.site,
+                request.strategy,
+                voucher,
+                catalog_query,
+                enterprise_catalog,
+                page,
+                user=getattr(request, 'user', None),
+                course_seat_types='credit',
+            )
+            offers = offers + credit_offers
+        return offers, next_page
+
+    def get_catalog_page_offers(self, site, strategy, voucher, catalog_query, enterprise_catalog, page, user=None,
+                                course_seat_types=None):
+        """ Fetch a page of the voucher's catalog and convert it to offers.
+
+        Args:
+            site (Site): Site whose catalog is fetched.
+            strategy (Strategy): Strategy used to check the availability of the seats.
+            voucher (Voucher): Oscar Voucher for which the offers are returned.
+            catalog_query (str): Course catalog query of the voucher.
+            enterprise_catalog (str): UUID of the enterprise catalog of the voucher, used instead of the query.
+            page (dict): The limit, page and offset of the catalog page.
+            user (User): Requesting user, required for the offers of credit seats.
+            course_seat_types (str): Comma-separated list of the seat types of the offers, defaults to those of
+                the voucher.
+
+        Returns:
+            A list of offers and a link to the next page of the catalog.
+        """
         if enterprise_catalog:
             response = get_enterprise_catalog(
-                site=request.site,
+                site=site,
                 enterprise_catalog=enterprise_catalog,
-                limit=request.GET.get('limit', DEFAULT_CATALOG_PAGE_SIZE),
-                page=request.GET.get('page'),
+                limit=page['limit'],
+                page=page['page'],
             )
-        elif catalog_query:
+        else:
             response = get_catalog_course_runs(
-                site=request.site,
+                site=site,
                 query=catalog_query,
-                limit=request.GET.get('limit', DEFAULT_CATALOG_PAGE_SIZE),
-                offset=request.GET.get('offset'),
-            )
-        else:
-            logger.warning(
-                'User is trying to redeem Voucher %s, but no catalog information is configured!',
-                voucher.code
+                limit=page['limit'],
+                offset=page['offset'],
             )
-            return [], None
 
         next_page = response['next']
-        offers = self.convert_catalog_response_to_offers(request, voucher, response)
+        offers = self.convert_catalog_response_to_offers(
+            site, strategy, voucher, response, user=user, course_seat_types=course_seat_types
+        )
 
         return offers, next_page
 
+    def get_catalog_page_offers_cache_key(self, site, voucher, page):
+        return get_voucher_offers_cache_key(
+            site.domain, voucher.id, voucher.end_datetime, page['page'], page['offset'], page['limit']
+        )
+
+    def get_cached_catalog_page_offers(self, site, strategy, voucher, catalog_query, enterprise_catalog, page):
+        """ Return the offers of a page of the voucher's catalog from the cache, converting them on a miss. """
+        cache_key = self.get_catalog_page_offers_cache_key(site, voucher, page)
+        cached_response = TieredCache.get_cached_response(cache_key)
+        if cached_response.is_found:
+            return cached_response.value
+
+        offers, next_page = self.get_catalog_page_offers(
+            site,
+            strategy,
+            voucher,
+            catalog_query,
+            enterprise_catalog,
+            page,
+            course_seat_types=self.get_cached_course_seat_types(voucher),
+        )
+        TieredCache.set_all_tiers(cache_key, (offers, next_page), settings.VOUCHER_OFFERS_CACHE_TIMEOUT)
+        return offers, next_page
+
+    def prefetch_next_catalog_page_offers(self, site, voucher, catalog_query, enterprise_catalog, limit, next_page):
+        """ Convert and cache the offers of the next page of the voucher's catalog in a background thread.
+
+        Only one worker prefetches a given page at a time, and pages which are already cached are not prefetched.
+        The thread outlives the request, so it is only given plain values, from which it loads the site and the
+        voucher again.
+
+        Returns:
+            The started thread, or None if the page is not prefetched.
+        """
+        next_page_params = parse_qs(urlparse(next_page).query)
+        page = {
+            'limit': limit,
+            'page': next_page_params.get('page', [None])[0],
+            'offset': next_page_params.get('offset', [None])[0],
+        }
+        cache_key = self.get_catalog_page_offers_cache_key(site, voucher, page)
+        if TieredCache.get_cached_response(cache_key).is_found:
+            return None
+        lock_key = '{}.lock'.format(cache_key)
+        if not django_cache.add(lock_key, True, settings.VOUCHER_OFFERS_CACHE_TIMEOUT):
+            return None
+
+        thread = threading.Thread(
+            target=self.prefetch_catalog_page_offers,
+            args=(site.id, voucher.id, catalog_query, enterprise_catalog, page, lock_key),
+        )
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def prefetch_catalog_page_offers(self, site_id, voucher_id, catalog_query, enterprise_catalog, page, lock_key):
+        """ Convert and cache the offers of a page of a voucher's catalog, then release the prefetch lock. """
+        try:
+            site = Site.objects.select_related('siteconfiguration').get(id=site_id)
+            voucher = Voucher.objects.get(id=voucher_id)
+            self.get_cached_catalog_page_offers(
+                site, Selector().strategy(), voucher, catalog_query, enterprise_catalog, page
+            )
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Failed to prefetch the offers of voucher [%s] for page [%s].', voucher_id, page)
+        finally:
+            django_cache.delete(lock_key)
+            connection.close()
+
     def get_offers(self, request, voucher):
         """
         Get the course offers associated with the voucher.
@@ -1,13 +1,55 @@
 
 
 import newrelic.agent
+from django.utils.functional import SimpleLazyObject, empty
 from edx_django_utils import monitoring as monitoring_utils
 from oscar.apps.basket.middleware import BasketMiddleware as OscarBasketMiddleware
-from oscar.core.loading import get_model
+from oscar.core.loading import get_class, get_model
 
 from ecommerce.extensions.basket.utils import apply_offers_on_basket
 
 Basket = get_model('basket', 'basket')
+Selector = get_class('partner.strategy', 'Selector')
+
+selector = Selector()
+
+# Basket attributes whose values depend on the offers applied to the basket.
+OFFER_DEPENDENT_ATTRIBUTES = frozenset([
+    'all_lines',
+    'applied_offers',
+    'grouped_voucher_discounts',
+    'has_shipping_discounts',
+    'is_tax_known',
+    'num_items_with_discount',
+    'num_items_without_discount',
+    'offer_applications',
+    'offer_discounts',
+    'post_order_actions',
+    'shipping_discounts',
+    'voucher_discounts',
+])
+
+
+class LazyBasket(SimpleLazyObject):
+    """
+    Lazily loaded basket, which applies offers only when its lines or totals are read.
+
+    The basket is loaded from the database on first attribute access. Offers are applied
+    the first time an attribute depending on them is read, and again only if the offer
+    applications have been reset since (e.g. because a product was added).
+    """
+
+    def __init__(self, load_basket, apply_offers):
+        self.__dict__['_apply_offers'] = apply_offers
+        super(LazyBasket, self).__init__(load_basket)
+
+    def __getattr__(self, name):
+        if self._wrapped is empty:
+            self._setup()
+        if name in OFFER_DEPENDENT_ATTRIBUTES or name.startswith('total_'):
+            if not self._wrapped.has_offers_applied:
+                self._apply_offers(self._wrapped)
+        return getattr(self._wrapped, name)
 
 
 class BasketMiddleware(OscarBasketMiddleware):
@@ -18,6 +60,37 @@ class BasketMiddleware(OscarBasketMiddleware):
     rewritten in Django 1.11 style
     """
 
+    def __call__(self, request):
+        # Mirrors Oscar's BasketMiddleware, but defers applying offers until they are needed.
+        request.cookies_to_delete = []
+
+        strategy = selector.strategy(request=request, user=request.user)
+        request.strategy = strategy
+
+        # We lazily load the basket so use a private variable to hold the cached instance.
+        request._basket_cache = None  # pylint: disable=protected-access
+
+        def load_basket():
+            basket = self.get_basket(request)
+            basket.strategy = request.strategy
+            return basket
+
+        def apply_offers(basket):
+            basket.mark_offers_applied()
+            self.apply_offers_to_basket(request, basket)
+
+        def load_basket_hash():
+            basket = self.get_basket(request)
+            if basket.id:
+                return self.get_basket_hash(basket.id)
+            return None
+
+        request.basket = LazyBasket(load_basket, apply_offers)
+        request.basket_hash = SimpleLazyObject(load_basket_hash)
+
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
     def get_cookie_key(self, request):
         """
         Returns the cookie name to use for storing a cookie basket.
@@ -22,10 +22,27 @@ class Basket(AbstractBasket):
         'sites.Site', verbose_name=_("Site"), null=True, blank=True, default=None, on_delete=models.SET_NULL
     )
 
+    # Incremented whenever offer applications are reset, so that offers already applied
+    # to the current contents of the basket are not applied again within a request.
+    offers_version = 0
+    offers_applied_version = None
+
     @property
     def order_number(self):
         return OrderNumberGenerator().order_number(self)
 
+    @property
+    def has_offers_applied(self):
+        """ Whether offers have been applied since the offer applications were last reset. """
+        return self.offers_applied_version == self.offers_version
+
+    def mark_offers_applied(self):
+        self.offers_applied_version = self.offers_version
+
+    def reset_offer_applications(self):
+        super(Basket, self).reset_offer_applications()  # pylint: disable=bad-super-call
+        self.offers_version += 1
+
     @classmethod
     def create_basket(cls, site, user):
         """ Create a new basket for the given site and user. """
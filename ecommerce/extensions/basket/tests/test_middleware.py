@@ -5,12 +5,13 @@ from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.http import HttpResponse
 from django.test.client import RequestFactory
-from oscar.core.loading import get_model
-from oscar.test.factories import BasketFactory
+from oscar.core.loading import get_class, get_model
+from oscar.test.factories import BasketFactory, ProductFactory
 
 from ecommerce.extensions.basket import middleware
 from ecommerce.tests.testcases import TestCase
 
+Applicator = get_class('offer.applicator', 'Applicator')
 Basket = get_model('basket', 'Basket')
 
 
@@ -101,3 +102,44 @@ class BasketMiddlewareTests(TestCase):
         """ Verify the method returns a site-specific key. """
         expected = '{base}_{site_id}'.format(base=settings.OSCAR_BASKET_COOKIE_OPEN, site_id=self.site.id)
         self.assertEqual(self.middleware.get_cookie_key(self.request), expected)
+
+    def test_basket_loaded_lazily(self):
+        """ Verify the basket is not loaded, and offers are not applied, until the basket is used. """
+        request = RequestFactory().get('/')
+        request.user = self.create_user()
+        request.site = self.site
+        BasketFactory(owner=request.user, site=self.site)
+
+        with mock.patch.object(self.middleware, 'get_basket') as mock_get_basket:
+            self.middleware(request)
+            self.assertFalse(mock_get_basket.called)
+
+    def test_offers_applied_once_per_basket_version(self):
+        """ Verify offers are applied when totals are first read, and again only after the basket changes. """
+        self.request.user = self.create_user()
+        self.middleware(self.request)
+        product = ProductFactory(stockrecords__price_excl_tax=10)
+
+        with mock.patch.object(self.middleware, 'apply_offers_to_basket') as mock_apply_offers:
+            self.assertEqual(self.request.basket.site, self.site)
+            self.assertFalse(mock_apply_offers.called)
+
+            self.request.basket.add_product(product)
+            self.request.basket.total_excl_tax  # pylint: disable=pointless-statement
+            self.request.basket.all_lines()
+            self.assertEqual(mock_apply_offers.call_count, 1)
+
+            self.request.basket.add_product(product)
+            self.request.basket.total_excl_tax  # pylint: disable=pointless-statement
+            self.assertEqual(mock_apply_offers.call_count, 2)
+
+    def test_explicitly_applied_offers_not_reapplied(self):
+        """ Verify offers applied by a view are not applied again when the basket is read. """
+        self.request.user = self.create_user()
+        self.middleware(self.request)
+        self.request.basket.add_product(ProductFactory(stockrecords__price_excl_tax=10))
+
+        with mock.patch.object(self.middleware, 'apply_offers_to_basket') as mock_apply_offers:
+            Applicator().apply(self.request.basket, self.request.user, self.request)
+            self.request.basket.total_excl_tax  # pylint: disable=pointless-statement
+            self.assertFalse(mock_apply_offers.called)
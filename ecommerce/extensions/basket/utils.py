@@ -15,6 +15,7 @@ from django.utils.translation import ugettext_lazy as _
 from oscar.apps.basket.signals import voucher_addition
 from oscar.core.loading import get_class, get_model
 
+from ecommerce.core.reference_data import basket_attribute_types
 from ecommerce.core.url_utils import absolute_url
 from ecommerce.courses.utils import mode_for_product
 from ecommerce.extensions.analytics.utils import track_segment_event
@@ -29,7 +30,6 @@ from ecommerce.referrals.models import Referral
 Applicator = get_class('offer.applicator', 'Applicator')
 Basket = get_model('basket', 'Basket')
 BasketAttribute = get_model('basket', 'BasketAttribute')
-BasketAttributeType = get_model('basket', 'BasketAttributeType')
 BUNDLE = 'bundle_identifier'
 ORGANIZATION_ATTRIBUTE_TYPE = 'organization'
 ENTERPRISE_CATALOG_ATTRIBUTE_TYPE = 'enterprise_catalog_uuid'
@@ -368,7 +368,7 @@ def basket_add_organization_attribute(basket, request_data):
     purchaser = request_data.get(PURCHASER_BEHALF_ATTRIBUTE)
 
     if business_client:
-        organization_attribute, __ = BasketAttributeType.objects.get_or_create(name=ORGANIZATION_ATTRIBUTE_TYPE)
+        organization_attribute = basket_attribute_types.get_or_create(ORGANIZATION_ATTRIBUTE_TYPE)
         BasketAttribute.objects.get_or_create(
             basket=basket,
             attribute_type=organization_attribute,
@@ -376,7 +376,7 @@ def basket_add_organization_attribute(basket, request_data):
         )
         # Also add the 'purchaser' attribute to the carts of all business client purchases. This way we can track
         # how many people read/paid attention to the checkbox during purchases.
-        purchaser_attribute, __ = BasketAttributeType.objects.get_or_create(name=PURCHASER_BEHALF_ATTRIBUTE)
+        purchaser_attribute = basket_attribute_types.get_or_create(PURCHASER_BEHALF_ATTRIBUTE)
         BasketAttribute.objects.get_or_create(
             basket=basket,
             attribute_type=purchaser_attribute,
@@ -398,9 +398,7 @@ def basket_add_enterprise_catalog_attribute(basket, request_data):
     # Value of enterprise catalog UUID is being passed as `catalog` from
     # basket page
     enterprise_catalog_uuid = request_data.get('catalog') if request_data else None
-    enterprise_catalog_attribute, __ = BasketAttributeType.objects.get_or_create(
-        name=ENTERPRISE_CATALOG_ATTRIBUTE_TYPE
-    )
+    enterprise_catalog_attribute = basket_attribute_types.get_or_create(ENTERPRISE_CATALOG_ATTRIBUTE_TYPE)
     if enterprise_catalog_uuid:
         BasketAttribute.objects.update_or_create(
             basket=basket,
@@ -435,7 +433,7 @@ def _set_basket_bundle_status(bundle, basket):
     if bundle:
         BasketAttribute.objects.update_or_create(
             basket=basket,
-            attribute_type=BasketAttributeType.objects.get(name=BUNDLE),
+            attribute_type=basket_attribute_types.get(BUNDLE),
             defaults={'value_text': bundle}
         )
         basket.clear_vouchers()
@@ -485,7 +483,7 @@ def validate_voucher(voucher, user, basket, request_site):
     # Do not allow single course run coupons used on bundles.
     bundle_attribute = BasketAttribute.objects.filter(
         basket=basket,
-        attribute_type=BasketAttributeType.objects.get(name=BUNDLE)
+        attribute_type=basket_attribute_types.get(BUNDLE)
     )
     is_bundle_purchase = len(bundle_attribute) > 0
     voucher_program_uuid = voucher.best_offer.condition.program_uuid
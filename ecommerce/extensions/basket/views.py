@@ -30,6 +30,7 @@ from rest_framework.views import APIView
 from slumber.exceptions import SlumberBaseException
 
 from ecommerce.core.exceptions import SiteConfigurationError
+from ecommerce.core.reference_data import basket_attribute_types
 from ecommerce.core.url_utils import absolute_redirect, get_lms_course_about_url, get_lms_url
 from ecommerce.courses.utils import get_certificate_type_display_value, get_course_info_from_catalog
 from ecommerce.enterprise.utils import (
@@ -76,7 +77,6 @@ from ecommerce.extensions.payment.forms import PaymentForm
 
 Basket = get_model('basket', 'basket')
 BasketAttribute = get_model('basket', 'BasketAttribute')
-BasketAttributeType = get_model('basket', 'BasketAttributeType')
 ConditionalOffer = get_model('offer', 'ConditionalOffer')
 Benefit = get_model('offer', 'Benefit')
 logger = logging.getLogger(__name__)
@@ -504,7 +504,7 @@ class BasketAddItemsView(BasketLogicMixin, APIView):
         """
         BasketAttribute.objects.update_or_create(
             basket=basket,
-            attribute_type=BasketAttributeType.objects.get(name=EMAIL_OPT_IN_ATTRIBUTE),
+            attribute_type=basket_attribute_types.get(EMAIL_OPT_IN_ATTRIBUTE),
             defaults={'value_text': request.GET.get('email_opt_in') == 'true'},
         )
 
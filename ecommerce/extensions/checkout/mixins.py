@@ -11,6 +11,7 @@ from oscar.apps.checkout.mixins import OrderPlacementMixin
 from oscar.core.loading import get_class, get_model
 
 from ecommerce.core.models import BusinessClient
+from ecommerce.core.reference_data import basket_attribute_types, payment_event_types, source_types
 from ecommerce.extensions.analytics.utils import audit_log, track_segment_event
 from ecommerce.extensions.api import data as data_api
 from ecommerce.extensions.basket.constants import EMAIL_OPT_IN_ATTRIBUTE
@@ -34,9 +35,7 @@ OrderNumberGenerator = get_class('order.utils', 'OrderNumberGenerator')
 OrderTotalCalculator = get_class('checkout.calculators', 'OrderTotalCalculator')
 post_checkout = get_class('checkout.signals', 'post_checkout')
 PaymentEvent = get_model('order', 'PaymentEvent')
-PaymentEventType = get_model('order', 'PaymentEventType')
 Source = get_model('payment', 'Source')
-SourceType = get_model('payment', 'SourceType')
 
 
 class EdxOrderPlacementMixin(OrderPlacementMixin, metaclass=abc.ABCMeta):
@@ -134,7 +133,7 @@ class EdxOrderPlacementMixin(OrderPlacementMixin, metaclass=abc.ABCMeta):
     def record_payment(self, basket, handled_processor_response):
         self.emit_checkout_step_events(basket, handled_processor_response, self.payment_processor)
         track_segment_event(basket.site, basket.owner, 'Payment Info Entered', {'checkout_id': basket.order_number})
-        source_type, __ = SourceType.objects.get_or_create(name=self.payment_processor.NAME)
+        source_type = source_types.get_or_create(self.payment_processor.NAME)
         total = handled_processor_response.total
         reference = handled_processor_response.transaction_id
         source = Source(
@@ -146,7 +145,7 @@ class EdxOrderPlacementMixin(OrderPlacementMixin, metaclass=abc.ABCMeta):
             label=handled_processor_response.card_number,
             card_type=handled_processor_response.card_type
         )
-        event_type, __ = PaymentEventType.objects.get_or_create(name=PaymentEventTypeName.PAID)
+        event_type = payment_event_types.get_or_create(PaymentEventTypeName.PAID)
         payment_event = PaymentEvent(event_type=event_type, amount=total, reference=reference,
                                      processor_name=self.payment_processor.NAME)
         self.add_payment_source(source)
@@ -213,7 +212,7 @@ class EdxOrderPlacementMixin(OrderPlacementMixin, metaclass=abc.ABCMeta):
         try:
             email_opt_in = BasketAttribute.objects.get(
                 basket=order.basket,
-                attribute_type=BasketAttributeType.objects.get(name=EMAIL_OPT_IN_ATTRIBUTE),
+                attribute_type=basket_attribute_types.get(EMAIL_OPT_IN_ATTRIBUTE),
             ).value_text == 'True'
         except BasketAttribute.DoesNotExist:
             email_opt_in = False
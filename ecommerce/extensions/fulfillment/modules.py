@@ -9,13 +9,13 @@ import abc
 import datetime
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
 
 import requests
 import waffle
 from django.conf import settings
 from django.urls import reverse
-from edx_rest_api_client.client import EdxRestApiClient
 from oscar.core.loading import get_model
 from requests.exceptions import ConnectionError as ReqConnectionError  # pylint: disable=ungrouped-imports
 from requests.exceptions import Timeout
@@ -27,7 +27,9 @@ from ecommerce.core.constants import (
     HUBSPOT_FORMS_INTEGRATION_ENABLE,
     ISO_8601_FORMAT
 )
-from ecommerce.core.url_utils import get_lms_enrollment_api_url, get_lms_entitlement_api_url
+from ecommerce.core.http_clients import get_session
+from ecommerce.core.reference_data import basket_attribute_types, options
+from ecommerce.core.url_utils import get_lms_enrollment_api_url
 from ecommerce.courses.models import Course
 from ecommerce.courses.utils import mode_for_product
 from ecommerce.enterprise.conditions import BasketAttributeType
@@ -48,7 +50,6 @@ from ecommerce.notifications.notifications import send_notification
 
 BasketAttributeType = get_model('basket', 'BasketAttributeType')
 Benefit = get_model('offer', 'Benefit')
-Option = get_model('catalogue', 'Option')
 Product = get_model('catalogue', 'Product')
 Range = get_model('offer', 'Range')
 Voucher = get_model('voucher', 'Voucher')
@@ -189,9 +190,7 @@ class EnrollmentFulfillmentModule(EnterpriseDiscountMixin, BaseFulfillmentModule
             messages if the LMS user id cannot be found.
     """
 
-    def _post_to_enrollment_api(self, data, user, usage):
-        enrollment_api_url = get_lms_enrollment_api_url()
-        timeout = settings.ENROLLMENT_FULFILLMENT_TIMEOUT
+    def _get_enrollment_api_headers(self, user, usage):
         headers = {
             'Content-Type': 'application/json',
             'X-Edx-Api-Key': settings.EDX_API_KEY
@@ -205,7 +204,56 @@ class EnrollmentFulfillmentModule(EnterpriseDiscountMixin, BaseFulfillmentModule
         if ip:
             headers['X-Forwarded-For'] = ip
 
-        return requests.post(enrollment_api_url, data=json.dumps(data), headers=headers, timeout=timeout)
+        return headers
+
+    def _post_to_enrollment_api(self, data, user, usage):
+        enrollment_api_url = get_lms_enrollment_api_url()
+        timeout = settings.ENROLLMENT_FULFILLMENT_TIMEOUT
+        headers = self._get_enrollment_api_headers(user, usage)
+        session = get_session('enrollment')
+        return session.post(enrollment_api_url, data=json.dumps(data), headers=headers, timeout=timeout)
+
+    def _post_many_to_enrollment_api(self, data_list, user, usage):
+        """ Post several enrollments to the Enrollment API.
+
+        When ENROLLMENT_FULFILLMENT_CONCURRENCY is greater than one, the requests are sent in parallel over the
+        pooled enrollment session, with at most that many requests in flight. Otherwise they are sent one after
+        the other.
+
+        Arguments:
+            data_list (list): The POST data for each enrollment.
+            user (User): The user being enrolled.
+            usage (string): A description of why data is being posted to the enrollment API.
+
+        Returns:
+            list: For each item of data_list, in order, the response or the network error
+                (ConnectionError or Timeout) raised while posting it.
+        """
+        concurrency = min(settings.ENROLLMENT_FULFILLMENT_CONCURRENCY, len(data_list))
+        if concurrency <= 1:
+            results = []
+            for data in data_list:
+                try:
+                    results.append(self._post_to_enrollment_api(data, user=user, usage=usage))
+                except (ReqConnectionError, Timeout) as error:
+                    results.append(error)
+            return results
+
+        enrollment_api_url = get_lms_enrollment_api_url()
+        timeout = settings.ENROLLMENT_FULFILLMENT_TIMEOUT
+        # The headers depend on the user only, and may require the database, so they are built once here.
+        headers = self._get_enrollment_api_headers(user, usage)
+
+        session = get_session('enrollment')
+
+        def post(data):
+            try:
+                return session.post(enrollment_api_url, data=json.dumps(data), headers=headers, timeout=timeout)
+            except (ReqConnectionError, Timeout) as error:
+                return error
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(post, data_list))
 
     def _add_enterprise_data_to_enrollment_api_post(self, data, order):
         """ Augment enrollment api POST data with enterprise specific data.
@@ -286,6 +334,7 @@ class EnrollmentFulfillmentModule(EnterpriseDiscountMixin, BaseFulfillmentModule
 
             return order, lines
 
+        enrollments = []
         for line in lines:
             try:
                 mode = mode_for_product(line.product)
@@ -331,52 +380,64 @@ class EnrollmentFulfillmentModule(EnterpriseDiscountMixin, BaseFulfillmentModule
             try:
                 self._add_enterprise_data_to_enrollment_api_post(data, order)
                 self.update_orderline_with_enterprise_discount_metadata(order, line)
+            except (ReqConnectionError, Timeout) as error:
+                self._set_enrollment_error_status(order, line, error)
+                continue
 
-                # Post to the Enrollment API. The LMS will take care of posting a new EnterpriseCourseEnrollment to
-                # the Enterprise service if the user+course has a corresponding EnterpriseCustomerUser.
-                response = self._post_to_enrollment_api(data, user=order.user, usage='fulfill enrollment')
-
-                if response.status_code == status.HTTP_200_OK:
-                    line.set_status(LINE.COMPLETE)
-
-                    audit_log(
-                        'line_fulfilled',
-                        order_line_id=line.id,
-                        order_number=order.number,
-                        product_class=line.product.get_product_class().name,
-                        course_id=course_key,
-                        mode=mode,
-                        user_id=order.user.id,
-                        credit_provider=provider,
-                    )
-                else:
-                    try:
-                        data = response.json()
-                        reason = data.get('message')
-                    except Exception:  # pylint: disable=broad-except
-                        reason = '(No detail provided.)'
-
-                    logger.error(
-                        "Fulfillment of line [%d] on order [%s] failed with status code [%d]: %s",
-                        line.id, order.number, response.status_code, reason
-                    )
-                    order.notes.create(message=reason, note_type='Error')
-                    line.set_status(LINE.FULFILLMENT_SERVER_ERROR)
-            except ReqConnectionError:
-                logger.error(
-                    "Unable to fulfill line [%d] of order [%s] due to a network problem", line.id, order.number
+            enrollments.append((line, data, course_key, mode, provider))
+
+        # Post to the Enrollment API. The LMS will take care of posting a new EnterpriseCourseEnrollment to
+        # the Enterprise service if the user+course has a corresponding EnterpriseCustomerUser.
+        results = self._post_many_to_enrollment_api(
+            [data for __, data, __, __, __ in enrollments], user=order.user, usage='fulfill enrollment'
+        )
+
+        for (line, __, course_key, mode, provider), response in zip(enrollments, results):
+            if isinstance(response, Exception):
+                self._set_enrollment_error_status(order, line, response)
+            elif response.status_code == status.HTTP_200_OK:
+                line.set_status(LINE.COMPLETE)
+
+                audit_log(
+                    'line_fulfilled',
+                    order_line_id=line.id,
+                    order_number=order.number,
+                    product_class=line.product.get_product_class().name,
+                    course_id=course_key,
+                    mode=mode,
+                    user_id=order.user.id,
+                    credit_provider=provider,
                 )
-                order.notes.create(message='Fulfillment of order failed due to a network problem.', note_type='Error')
-                line.set_status(LINE.FULFILLMENT_NETWORK_ERROR)
-            except Timeout:
+            else:
+                try:
+                    reason = response.json().get('message')
+                except Exception:  # pylint: disable=broad-except
+                    reason = '(No detail provided.)'
+
                 logger.error(
-                    "Unable to fulfill line [%d] of order [%s] due to a request time out", line.id, order.number
+                    "Fulfillment of line [%d] on order [%s] failed with status code [%d]: %s",
+                    line.id, order.number, response.status_code, reason
                 )
-                order.notes.create(message='Fulfillment of order failed due to a request time out.', note_type='Error')
-                line.set_status(LINE.FULFILLMENT_TIMEOUT_ERROR)
+                order.notes.create(message=reason, note_type='Error')
+                line.set_status(LINE.FULFILLMENT_SERVER_ERROR)
         logger.info("Finished fulfilling 'Seat' product types for order [%s]", order.number)
         return order, lines
 
+    def _set_enrollment_error_status(self, order, line, error):
+        """ Record a network error or time out raised while fulfilling the line. """
+        if isinstance(error, ReqConnectionError):
+            logger.error(
+                "Unable to fulfill line [%d] of order [%s] due to a network problem", line.id, order.number
+            )
+            order.notes.create(message='Fulfillment of order failed due to a network problem.', note_type='Error')
+            line.set_status(LINE.FULFILLMENT_NETWORK_ERROR)
+        else:
+            logger.error(
+                "Unable to fulfill line [%d] of order [%s] due to a request time out", line.id, order.number
+            )
+            order.notes.create(message='Fulfillment of order failed due to a request time out.', note_type='Error')
+            line.set_status(LINE.FULFILLMENT_TIMEOUT_ERROR)
+
     def revoke_line(self, line):
         try:
             logger.info('Attempting to revoke fulfillment of Line [%d]...', line.id)
@@ -589,7 +650,7 @@ class EnrollmentCodeFulfillmentModule(BaseFulfillmentModule):
             # extract basket info needed to determine if purchase was made on behalf of an Enterprise
             basket_attrib_purchaser = BasketAttribute.objects.get(
                 basket=order.basket,
-                attribute_type=BasketAttributeType.objects.get(name=PURCHASER_BEHALF_ATTRIBUTE))
+                attribute_type=basket_attribute_types.get(PURCHASER_BEHALF_ATTRIBUTE))
             enterprise_purchase = basket_attrib_purchaser.value_text == "True"
         except (BasketAttribute.DoesNotExist, BasketAttributeType.DoesNotExist):
             logger.exception("Error occurred attempting to retrieve Basket Attribute '%s' from basket for order [%s]",
@@ -651,7 +712,7 @@ class EnrollmentCodeFulfillmentModule(BaseFulfillmentModule):
         try:
             organization = BasketAttribute.objects.get(
                 basket=order.basket,
-                attribute_type=BasketAttributeType.objects.get(name="organization"))
+                attribute_type=basket_attribute_types.get("organization"))
         except (BasketAttribute.DoesNotExist, BasketAttributeType.DoesNotExist):
             logger.exception("Error occurred attempting to retrieve Basket Attribute 'organization' from basket for "
                              "order [%s]", order.number)
@@ -811,12 +872,9 @@ class CourseEntitlementFulfillmentModule(EnterpriseDiscountMixin, BaseFulfillmen
             try:
                 self._create_enterprise_customer_user(order)
                 self.update_orderline_with_enterprise_discount_metadata(order, line)
-                entitlement_option = Option.objects.get(code='course_entitlement')
+                entitlement_option = options.get('course_entitlement')
 
-                entitlement_api_client = EdxRestApiClient(
-                    get_lms_entitlement_api_url(),
-                    jwt=order.site.siteconfiguration.access_token
-                )
+                entitlement_api_client = order.site.siteconfiguration.entitlement_api_client
 
                 # POST to the Entitlement API.
                 response = entitlement_api_client.entitlements.post(data)
@@ -853,13 +911,10 @@ class CourseEntitlementFulfillmentModule(EnterpriseDiscountMixin, BaseFulfillmen
             logger.info('Attempting to revoke fulfillment of Line [%d]...', line.id)
 
             UUID = line.product.attr.UUID
-            entitlement_option = Option.objects.get(code='course_entitlement')
+            entitlement_option = options.get('course_entitlement')
             course_entitlement_uuid = line.attributes.get(option=entitlement_option).value
 
-            entitlement_api_client = EdxRestApiClient(
-                get_lms_entitlement_api_url(),
-                jwt=line.order.site.siteconfiguration.access_token
-            )
+            entitlement_api_client = line.order.site.siteconfiguration.entitlement_api_client
 
             # DELETE to the Entitlement API.
             entitlement_api_client.entitlements(course_entitlement_uuid).delete()
@@ -1,9 +1,10 @@
 
 
 from django.dispatch import receiver
-from oscar.core.loading import get_class, get_model
+from oscar.core.loading import get_class
+
+from ecommerce.core.reference_data import shipping_event_types
 
-ShippingEventType = get_model('order', 'ShippingEventType')
 EventHandler = get_class('order.processing', 'EventHandler')
 post_checkout = get_class('checkout.signals', 'post_checkout')
 SHIPPING_EVENT_NAME = 'Shipped'
@@ -14,5 +15,5 @@ def post_checkout_callback(sender, order=None, **kwargs):  # pylint: disable=unu
     order_lines = order.lines.all()
     line_quantities = [line.quantity for line in order_lines]
 
-    shipping_event, __ = ShippingEventType.objects.get_or_create(name=SHIPPING_EVENT_NAME)
+    shipping_event = shipping_event_types.get_or_create(SHIPPING_EVENT_NAME)
     EventHandler().handle_shipping_event(order, shipping_event, order_lines, line_quantities, **kwargs)
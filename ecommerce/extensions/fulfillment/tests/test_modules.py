@@ -306,18 +306,67 @@ class EnrollmentFulfillmentModuleTests(
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_CONFIGURATION_ERROR, self.order.lines.all()[0].status)
 
-    @mock.patch('requests.post', mock.Mock(side_effect=ReqConnectionError))
+    @mock.patch('requests.Session.post', mock.Mock(side_effect=ReqConnectionError))
     def test_enrollment_module_network_error(self):
         """Test that lines receive a network error status if a fulfillment request experiences a network error."""
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_NETWORK_ERROR, self.order.lines.all()[0].status)
 
-    @mock.patch('requests.post', mock.Mock(side_effect=Timeout))
+    @mock.patch('requests.Session.post', mock.Mock(side_effect=Timeout))
     def test_enrollment_module_request_timeout(self):
         """Test that lines receive a timeout error status if a fulfillment request times out."""
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_TIMEOUT_ERROR, self.order.lines.all()[0].status)
 
+    def create_multi_seat_order(self):
+        """ Create an order with a seat in each of three courses. """
+        basket = factories.BasketFactory(owner=self.user, site=self.site)
+        for index in range(3):
+            course = CourseFactory(id='edX/DemoX/Course_{}'.format(index), partner=self.partner)
+            basket.add_product(course.create_or_update_seat(self.certificate_type, False, 100), 1)
+        return create_order(number=3, basket=basket, user=self.user)
+
+    @httpretty.activate
+    @override_settings(ENROLLMENT_FULFILLMENT_CONCURRENCY=4)
+    def test_enrollment_module_fulfill_concurrently(self):
+        """Test that all enrollments of an order are posted and every line is fulfilled in concurrent mode."""
+        order = self.create_multi_seat_order()
+        httpretty.register_uri(httpretty.POST, get_lms_enrollment_api_url(), status=200, body='{}', content_type=JSON)
+
+        with mock.patch('requests.post') as mock_post:
+            EnrollmentFulfillmentModule().fulfill_product(order, list(order.lines.all()))
+            self.assertFalse(mock_post.called)
+
+        self.assertEqual(
+            sorted(json.loads(request.body.decode('utf-8'))['course_details']['course_id']
+                   for request in httpretty.latest_requests()),
+            sorted(line.product.attr.course_key for line in order.lines.all())
+        )
+        self.assertTrue(all(line.status == LINE.COMPLETE for line in order.lines.all()))
+
+    @override_settings(ENROLLMENT_FULFILLMENT_CONCURRENCY=4)
+    def test_enrollment_module_concurrent_errors(self):
+        """Test that each line gets the status of its own request in concurrent mode."""
+        order = self.create_multi_seat_order()
+        lines = list(order.lines.all())
+        ok_response = mock.Mock(status_code=200)
+
+        def post(url, data, **kwargs):  # pylint: disable=unused-argument
+            course_id = json.loads(data)['course_details']['course_id']
+            if course_id == lines[0].product.attr.course_key:
+                raise Timeout
+            if course_id == lines[1].product.attr.course_key:
+                raise ReqConnectionError
+            return ok_response
+
+        with mock.patch('requests.Session.post', side_effect=post):
+            EnrollmentFulfillmentModule().fulfill_product(order, lines)
+
+        self.assertEqual(
+            [line.status for line in order.lines.order_by('id')],
+            [LINE.FULFILLMENT_TIMEOUT_ERROR, LINE.FULFILLMENT_NETWORK_ERROR, LINE.COMPLETE]
+        )
+
     @httpretty.activate
     @ddt.data(None, '{"message": "Oops!"}')
     def test_enrollment_module_server_error(self, body):
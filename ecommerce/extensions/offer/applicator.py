@@ -6,7 +6,10 @@ from itertools import chain
 from oscar.apps.offer.applicator import Applicator as OscarApplicator
 from oscar.core.loading import get_model
 
+from ecommerce.core.reference_data import basket_attribute_types
 from ecommerce.enterprise.api import get_enterprise_id_for_user
+from ecommerce.extensions.offer.catalog_query import prefetch_catalog_query_membership
+from ecommerce.extensions.offer.index import get_offer_index
 
 logger = logging.getLogger(__name__)
 BUNDLE = 'bundle_identifier'
@@ -37,7 +40,11 @@ class Applicator(OscarApplicator):
                 used in the case of a temporary basket which is not saved to the db, because
                 we get an error when trying to create the bundle_id BasketAttribute.
         """
+        # Mark the offers as applied first, so that reading the lines of a lazily loaded
+        # basket below does not apply them a second time.
+        basket.mark_offers_applied()
         offers = self.get_offers(basket, user, request, bundle_id)
+        prefetch_catalog_query_membership(basket, offers)
         self.apply_offers(basket, offers)
 
     def get_offers(self, basket, user=None, request=None, bundle_id=None):  # pylint: disable=arguments-differ
@@ -79,13 +86,7 @@ class Applicator(OscarApplicator):
 
         Excludes: Bundle and Enterprise offers.
         """
-        ConditionalOffer = get_model('offer', 'ConditionalOffer')
-        qs = ConditionalOffer.active.filter(
-            offer_type=ConditionalOffer.SITE,
-            condition__program_uuid__isnull=True,
-            condition__enterprise_customer_uuid__isnull=True,
-        )
-        return qs.select_related('condition', 'benefit')
+        return get_offer_index().get_site_offers()
 
     def _get_enterprise_offers(self, site, user):
         """
@@ -93,12 +94,7 @@ class Applicator(OscarApplicator):
         """
         enterprise_id = get_enterprise_id_for_user(site, user)
         if enterprise_id:
-            ConditionalOffer = get_model('offer', 'ConditionalOffer')
-            offers = ConditionalOffer.active.filter(
-                offer_type=ConditionalOffer.SITE,
-                condition__enterprise_customer_uuid=enterprise_id
-            )
-            return offers.select_related('condition', 'benefit')
+            return get_offer_index().get_enterprise_offers(enterprise_id)
 
         return []
 
@@ -113,18 +109,13 @@ class Applicator(OscarApplicator):
             list of Offer: List of all the offers applicable to the program.
         """
         BasketAttribute = get_model('basket', 'BasketAttribute')
-        BasketAttributeType = get_model('basket', 'BasketAttributeType')
-        ConditionalOffer = get_model('offer', 'ConditionalOffer')
 
         bundle_attributes = BasketAttribute.objects.filter(
             basket=basket,
-            attribute_type=BasketAttributeType.objects.get(name=BUNDLE)
+            attribute_type=basket_attribute_types.get(BUNDLE)
         )
         program_uuid = bundle_id if bundle_attributes.count() == 0 else bundle_attributes.first().value_text
         if program_uuid:
-            offers = ConditionalOffer.active.filter(
-                offer_type=ConditionalOffer.SITE, condition__program_uuid=program_uuid
-            )
-            return offers.select_related('condition', 'benefit')
+            return get_offer_index().get_program_offers(program_uuid)
 
         return []
@@ -0,0 +1,152 @@
+"""
+Batched resolution of catalog query membership for basket lines.
+
+Ranges defined by a Discovery catalog query need to know whether each course run
+or course in the basket matches the query. Results are cached per (query, course)
+pair. The helpers here look up all pairs needed for a basket with a single cache
+read and fetch the misses with one Discovery call per distinct query, instead of
+one lookup per line and one call per offer.
+"""
+
+
+import logging
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from edx_django_utils.cache import DEFAULT_REQUEST_CACHE
+
+from ecommerce.core.utils import get_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+def get_catalog_query_contains_cache_key(site_domain, partner_code, query, product_id):
+    return get_cache_key(
+        site_domain=site_domain,
+        partner_code=partner_code,
+        resource='catalog_query.contains',
+        course_id=product_id,
+        query=query
+    )
+
+
+def get_line_product_identifier(line):
+    """
+    Return the identifier used to check a line against a catalog query: the course run ID
+    for seats and the course UUID for entitlements.
+    """
+    if line.product.is_seat_product:
+        return line.product.course.id
+    return line.product.attr.UUID
+
+
+def get_cached_catalog_query_membership(cache_keys):
+    """
+    Look up cached membership results for many keys at once.
+
+    The request cache is checked first and the remaining keys are fetched from the
+    Django cache with a single get_many call. Django cache hits are copied into the
+    request cache.
+
+    Returns:
+        dict: Mapping of cache key to cached membership value, for keys that were found.
+    """
+    found = {}
+    missing = []
+    for cache_key in cache_keys:
+        cached_response = DEFAULT_REQUEST_CACHE.get_cached_response(cache_key)
+        if cached_response.is_found:
+            found[cache_key] = cached_response.value
+        else:
+            missing.append(cache_key)
+
+    if missing:
+        for cache_key, value in django_cache.get_many(missing).items():
+            DEFAULT_REQUEST_CACHE.set(cache_key, value)
+            found[cache_key] = value
+
+    return found
+
+
+def fetch_catalog_query_membership(site, query, course_run_ids, course_uuids):
+    """
+    Ask the Discovery Service whether the given course runs and courses match the query,
+    and cache the result for each identifier.
+
+    Returns:
+        dict: Mapping of identifier to membership (1 or 0).
+    """
+    partner_code = site.siteconfiguration.partner.short_code
+    response = site.siteconfiguration.discovery_api_client.catalog.query_contains.get(
+        course_run_ids=','.join(course_run_ids),
+        course_uuids=','.join(course_uuids),
+        query=query,
+        partner=partner_code
+    )
+
+    results = {}
+    to_cache = {}
+    for product_id in list(course_run_ids) + list(course_uuids):
+        # Convert to int, because this is what memcached will return, and the request cache should return
+        # the same value.
+        in_range = int(response[str(product_id)])
+        results[product_id] = in_range
+        cache_key = get_catalog_query_contains_cache_key(site.domain, partner_code, query, product_id)
+        DEFAULT_REQUEST_CACHE.set(cache_key, in_range)
+        to_cache[cache_key] = in_range
+
+    django_cache.set_many(to_cache, settings.COURSES_API_CACHE_TIMEOUT)
+    return results
+
+
+def prefetch_catalog_query_membership(basket, offers):
+    """
+    Resolve catalog query membership for every (query, line) pair needed by the offers.
+
+    All pairs are checked against the cache at once, and the misses are fetched from the
+    Discovery Service with one request per distinct query. Subsequent calls to
+    Benefit.get_applicable_lines for these offers are then served from the request cache.
+    Failures are logged and ignored here; they are surfaced when the benefit is evaluated.
+    """
+    queries = OrderedDict()
+    for offer in offers:
+        applicable_range = offer.benefit.range
+        if applicable_range and applicable_range.catalog_query is not None:
+            queries.setdefault(applicable_range.catalog_query, None)
+
+    if not queries:
+        return
+
+    lines = [
+        line for line in basket.all_lines()
+        if line.product.is_seat_product or line.product.is_course_entitlement_product
+    ]
+    if not lines:
+        return
+
+    site = basket.site
+    partner_code = site.siteconfiguration.partner.short_code
+    identifiers = [(line.product.is_seat_product, str(get_line_product_identifier(line))) for line in lines]
+
+    pairs = {}
+    for query in queries:
+        for is_course_run, product_id in identifiers:
+            cache_key = get_catalog_query_contains_cache_key(site.domain, partner_code, query, product_id)
+            pairs[cache_key] = (query, is_course_run, product_id)
+
+    cached = get_cached_catalog_query_membership(list(pairs))
+
+    uncached = OrderedDict()
+    for cache_key, (query, is_course_run, product_id) in pairs.items():
+        if cache_key not in cached:
+            course_run_ids, course_uuids = uncached.setdefault(query, ([], []))
+            (course_run_ids if is_course_run else course_uuids).append(product_id)
+
+    for query, (course_run_ids, course_uuids) in uncached.items():
+        try:
+            fetch_catalog_query_membership(site, query, course_run_ids, course_uuids)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception(
+                'Failed to prefetch catalog query membership for query [%s] and basket [%s].', query, basket.id
+            )
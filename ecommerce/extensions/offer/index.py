@@ -0,0 +1,193 @@
+"""
+Compiled index of site offers used by the Applicator.
+
+Site offers change rarely but are read on every basket request. Rather than
+querying for them on every request, the active site offers are loaded once,
+bucketed by the keys the Applicator filters on and kept both in process memory
+and in the shared cache. The index is versioned: saving or deleting an offer,
+condition or benefit bumps the version, and every process rebuilds its copy on
+next use.
+"""
+
+
+import copy
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from edx_django_utils.cache import TieredCache
+from oscar.core.loading import get_model
+
+from ecommerce.core.utils import get_cache_key
+
+logger = logging.getLogger(__name__)
+
+OFFER_INDEX_VERSION_CACHE_KEY = get_cache_key(resource='offer_index.version')
+
+_local_index = {'version': None, 'index': None}
+_local_index_lock = threading.Lock()
+
+
+class OfferIndex:
+    """
+    Active site offers bucketed by program and enterprise customer.
+
+    Each bucket is sorted by descending priority, matching the default ordering
+    of ConditionalOffer querysets.
+    """
+
+    def __init__(self, offers):
+        self.site_offers = []
+        self.program_offers = {}
+        self.enterprise_offers = {}
+
+        for offer in sorted(offers, key=lambda o: (-o.priority, o.pk)):
+            condition = offer.condition
+            # An offer with both a program and an enterprise condition is selected both for the
+            # program and for the enterprise customer, as the Applicator queries used to.
+            if condition.program_uuid:
+                self.program_offers.setdefault(str(condition.program_uuid), []).append(offer)
+            if condition.enterprise_customer_uuid:
+                self.enterprise_offers.setdefault(str(condition.enterprise_customer_uuid), []).append(offer)
+            if not condition.program_uuid and not condition.enterprise_customer_uuid:
+                self.site_offers.append(offer)
+
+    @classmethod
+    def build(cls):
+        """
+        Build an index from the database.
+
+        Offers that are open but not yet started (or already expired) are kept,
+        since their availability depends on the time of the request rather than
+        the time the index was built.
+        """
+        ConditionalOffer = get_model('offer', 'ConditionalOffer')
+        offers = ConditionalOffer.objects.filter(
+            offer_type=ConditionalOffer.SITE,
+            status=ConditionalOffer.OPEN,
+        ).select_related('condition', 'benefit')
+        return cls(list(offers))
+
+    def get_site_offers(self):
+        return _active_copies(self.site_offers)
+
+    def get_program_offers(self, program_uuid):
+        return _active_copies(self.program_offers.get(str(program_uuid), []))
+
+    def get_enterprise_offers(self, enterprise_customer_uuid):
+        return _active_copies(self.enterprise_offers.get(str(enterprise_customer_uuid), []))
+
+    def get_candidate_offers(self, site, program_uuid=None, enterprise_customer_uuid=None):
+        """
+        Return the indexed offers which the Applicator may select for a basket of the site.
+
+        This is a superset of the offers applied to the basket: the site offers are always included,
+        and so are the offers which are not active now. Offers of other sites or partners are left out.
+        The returned offers are shared, and must not be modified.
+        """
+        offers = list(self.site_offers)
+        if program_uuid:
+            offers += self.program_offers.get(str(program_uuid), [])
+        if enterprise_customer_uuid:
+            offers += self.enterprise_offers.get(str(enterprise_customer_uuid), [])
+
+        partner_id = site.siteconfiguration.partner_id
+        return [
+            offer for offer in offers
+            if offer.site_id in (None, site.id) and offer.partner_id in (None, partner_id)
+        ]
+
+
+def has_per_user_limits(offers):
+    """
+    Return whether any of the offers limits its applications or its discount per user.
+    """
+    return any(offer.max_user_applications or offer.max_user_discount for offer in offers)
+
+
+def has_global_limits(offers):
+    """
+    Return whether any of the offers limits its applications or its discount across all users.
+    """
+    return any(offer.max_global_applications or offer.max_discount for offer in offers)
+
+
+def _active_copies(offers):
+    """
+    Return copies of the offers that are active now.
+
+    Copies are returned so that callers (e.g. order placement recording offer usage)
+    cannot mutate the instances shared by every request served by this process.
+    """
+    now = timezone.now()
+    return [
+        copy.deepcopy(offer) for offer in offers
+        if (offer.start_datetime is None or offer.start_datetime <= now) and
+        (offer.end_datetime is None or offer.end_datetime >= now)
+    ]
+
+
+def _get_index_cache_key(version):
+    return get_cache_key(resource='offer_index', version=version)
+
+
+def get_offer_index():
+    """
+    Return the current offer index.
+
+    The version stamp is read from the shared cache. If this process already
+    holds the index for that version it is used directly; otherwise the index is
+    loaded from the shared cache, or rebuilt from the database and published.
+    """
+    version_response = TieredCache.get_cached_response(OFFER_INDEX_VERSION_CACHE_KEY)
+    version = version_response.value if version_response.is_found else None
+
+    if version and _local_index['version'] == version:
+        return _local_index['index']
+
+    with _local_index_lock:
+        index = None
+        if version:
+            index_response = TieredCache.get_cached_response(_get_index_cache_key(version))
+            if index_response.is_found:
+                index = index_response.value
+
+        if index is None:
+            if not version:
+                version = uuid.uuid4().hex
+                TieredCache.set_all_tiers(OFFER_INDEX_VERSION_CACHE_KEY, version, settings.OFFER_INDEX_CACHE_TIMEOUT)
+            index = OfferIndex.build()
+            TieredCache.set_all_tiers(_get_index_cache_key(version), index, settings.OFFER_INDEX_CACHE_TIMEOUT)
+            logger.info('Rebuilt offer index version [%s].', version)
+
+        _local_index['version'] = version
+        _local_index['index'] = index
+
+    return index
+
+
+def get_offer_index_version():
+    """
+    Return the version of the current offer index, for keying results computed from the indexed offers.
+    """
+    get_offer_index()
+    return _local_index['version']
+
+
+def _bump_version():
+    TieredCache.set_all_tiers(OFFER_INDEX_VERSION_CACHE_KEY, uuid.uuid4().hex, settings.OFFER_INDEX_CACHE_TIMEOUT)
+
+
+def invalidate_offer_index():
+    """
+    Mark the offer index as stale in every process.
+
+    The version is bumped immediately and again once the surrounding transaction
+    commits, so that an index rebuilt by another process before the commit does
+    not outlive the change.
+    """
+    _bump_version()
+    transaction.on_commit(_bump_version)
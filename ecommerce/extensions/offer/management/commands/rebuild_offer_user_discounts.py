@@ -0,0 +1,34 @@
+"""
+This command rebuilds the per user discount ledger of offers from the order history.
+"""
+
+
+import logging
+
+from django.core.management import BaseCommand
+from oscar.core.loading import get_model
+
+logger = logging.getLogger(__name__)
+OfferUserDiscount = get_model('offer', 'OfferUserDiscount')
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the discount consumed by each user through each offer from their complete and non-refunded orders.
+
+    The ledger is filled from the order history when it is migrated, this command repairs it if it drifts
+    from the order history.
+
+    Example:
+
+        ./manage.py rebuild_offer_user_discounts
+    """
+
+    help = 'Rebuild the per user discount ledger of offers from the order history.'
+
+    def handle(self, *args, **options):
+        created, updated, deleted = OfferUserDiscount.rebuild()
+        logger.info(
+            'Rebuilt the offer user discount ledger: [%d] entries created, [%d] updated and [%d] deleted.',
+            created, updated, deleted
+        )
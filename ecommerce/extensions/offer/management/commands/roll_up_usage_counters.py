@@ -0,0 +1,40 @@
+"""
+This command rolls up the sharded usage counters of offers and vouchers.
+"""
+
+
+import logging
+
+from django.core.management import BaseCommand
+from oscar.core.loading import get_model
+
+from ecommerce.extensions.offer.index import invalidate_offer_index
+
+logger = logging.getLogger(__name__)
+OfferUsageShard = get_model('offer', 'OfferUsageShard')
+VoucherUsageShard = get_model('voucher', 'VoucherUsageShard')
+
+
+class Command(BaseCommand):
+    """
+    Add the usage recorded in the usage shards of offers and vouchers to their usage fields.
+
+    This command should run periodically, the usage which is not rolled up yet is still counted
+    against the limits of offers and vouchers. Scheduling it is described in
+    docs/additional_features/maintain_ecommerce.rst.
+
+    Example:
+
+        ./manage.py roll_up_usage_counters
+    """
+
+    help = 'Roll up the sharded usage counters of offers and vouchers.'
+
+    def handle(self, *args, **options):
+        num_offers = OfferUsageShard.roll_up()
+        if num_offers:
+            # The offer index holds copies of the offers and their usage.
+            invalidate_offer_index()
+
+        num_vouchers = VoucherUsageShard.roll_up()
+        logger.info('Rolled up the usage of [%d] offers and [%d] vouchers.', num_offers, num_vouchers)
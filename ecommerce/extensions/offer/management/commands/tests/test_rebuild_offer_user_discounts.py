@@ -0,0 +1,39 @@
+
+
+from django.core.management import call_command
+from oscar.core.loading import get_model
+from oscar.test import factories
+from testfixtures import LogCapture
+
+from ecommerce.extensions.fulfillment.status import ORDER
+from ecommerce.extensions.test.factories import EnterpriseOfferFactory, create_order
+from ecommerce.tests.testcases import TestCase
+
+LOGGER_NAME = 'ecommerce.extensions.offer.management.commands.rebuild_offer_user_discounts'
+OfferUserDiscount = get_model('offer', 'OfferUserDiscount')
+
+
+class RebuildOfferUserDiscountsTests(TestCase):
+    """Tests for rebuild_offer_user_discounts management command."""
+
+    def test_rebuild_offer_user_discounts(self):
+        """Test that command rebuilds the ledger from the complete orders."""
+        user = self.create_user()
+        offer = EnterpriseOfferFactory()
+        for __ in range(2):
+            order = create_order(user=user, site=self.site)
+            factories.OrderDiscountFactory(order=order, offer_id=offer.id, amount=10)
+            order.status = ORDER.COMPLETE
+            order.save()
+
+        with LogCapture(LOGGER_NAME) as log:
+            call_command('rebuild_offer_user_discounts')
+            log.check(
+                (
+                    LOGGER_NAME,
+                    'INFO',
+                    'Rebuilt the offer user discount ledger: [1] entries created, [0] updated and [0] deleted.'
+                )
+            )
+
+        self.assertEqual(OfferUserDiscount.get_discount(offer, user), 20)
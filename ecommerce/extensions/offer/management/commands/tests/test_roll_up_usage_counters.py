@@ -0,0 +1,38 @@
+
+
+from decimal import Decimal
+
+from django.core.management import call_command
+from mock import patch
+from oscar.test import factories
+from testfixtures import LogCapture
+
+from ecommerce.tests.testcases import TestCase
+
+LOGGER_NAME = 'ecommerce.extensions.offer.management.commands.roll_up_usage_counters'
+
+
+class RollUpUsageCountersTests(TestCase):
+    """Tests for roll_up_usage_counters management command."""
+
+    def test_roll_up_usage_counters(self):
+        """Test that command rolls up the usage of offers and vouchers, and invalidates the offer index."""
+        offer = factories.ConditionalOfferFactory()
+        voucher = factories.VoucherFactory(code='ROLLUP')
+        offer.record_usage({'freq': 1, 'discount': Decimal(10)})
+        voucher.record_discount({'discount': Decimal(10)})
+
+        invalidate_offer_index_path = (
+            'ecommerce.extensions.offer.management.commands.roll_up_usage_counters.invalidate_offer_index'
+        )
+        with LogCapture(LOGGER_NAME) as log, patch(invalidate_offer_index_path) as mock_invalidate:
+            call_command('roll_up_usage_counters')
+            log.check(
+                (LOGGER_NAME, 'INFO', 'Rolled up the usage of [1] offers and [1] vouchers.')
+            )
+        mock_invalidate.assert_called_once_with()
+
+        offer.refresh_from_db()
+        voucher.refresh_from_db()
+        self.assertEqual(offer.num_orders, 1)
+        self.assertEqual(voucher.total_discount, Decimal(10))
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.28 on 2026-10-17 01:39
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offer', '0050_offeruserdiscount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferUsageShard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('num_applications', models.PositiveIntegerField(default=0)),
+                ('total_discount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('num_orders', models.PositiveIntegerField(default=0)),
+                ('offer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_shards', to='offer.ConditionalOffer')),
+            ],
+            options={
+                'unique_together': {('offer', 'shard')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+
+
+from django.db import migrations
+from django.db.models import F, Sum
+
+from ecommerce.extensions.fulfillment.status import ORDER
+from ecommerce.extensions.refund.status import REFUND
+
+BATCH_SIZE = 500
+
+
+def populate_offer_user_discounts(apps, schema_editor):
+    """
+    Fill the per user discount ledger of offers from the complete and non-refunded orders.
+
+    This is the same computation as OfferUserDiscount.rebuild, which cannot be used with the
+    historical models of a migration.
+    """
+    ConditionalOffer = apps.get_model('offer', 'ConditionalOffer')
+    OfferUserDiscount = apps.get_model('offer', 'OfferUserDiscount')
+    OrderDiscount = apps.get_model('order', 'OrderDiscount')
+
+    order_discounts = OrderDiscount.objects.filter(
+        order__status=ORDER.COMPLETE,
+        order__user__isnull=False,
+        offer_id__in=ConditionalOffer.objects.values('id'),
+    ).exclude(
+        order__refunds__status=REFUND.COMPLETE
+    ).values('offer_id', user_id=F('order__user_id')).order_by().annotate(amount=Sum('amount'))
+
+    entries = []
+    for order_discount in order_discounts.iterator():
+        entries.append(OfferUserDiscount(
+            offer_id=order_discount['offer_id'],
+            user_id=order_discount['user_id'],
+            discount=order_discount['amount'],
+        ))
+        if len(entries) == BATCH_SIZE:
+            OfferUserDiscount.objects.bulk_create(entries, ignore_conflicts=True)
+            entries = []
+    OfferUserDiscount.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offer', '0051_offerusageshard'),
+        ('order', '0025_manualenrollmentorderjob'),
+        ('refund', '0007_auto_20191115_2151'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_offer_user_discounts, migrations.RunPython.noop),
+    ]
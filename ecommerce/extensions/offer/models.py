@@ -2,13 +2,16 @@
 import datetime
 import logging
 import re
+from decimal import Decimal
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, F, OuterRef, Sum
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django_extensions.db.models import TimeStampedModel
 from edx_django_utils.cache import TieredCache
@@ -28,6 +31,13 @@ from slumber.exceptions import SlumberBaseException
 from threadlocals.threadlocals import get_current_request
 
 from ecommerce.core.utils import get_cache_key, log_message_and_raise_validation_error
+from ecommerce.extensions.fulfillment.status import ORDER
+from ecommerce.extensions.offer.catalog_query import (
+    fetch_catalog_query_membership,
+    get_cached_catalog_query_membership,
+    get_catalog_query_contains_cache_key,
+    get_line_product_identifier
+)
 from ecommerce.extensions.offer.constants import (
     EMAIL_TEMPLATE_TYPES,
     NUDGE_EMAIL_CYCLE,
@@ -40,11 +50,15 @@ from ecommerce.extensions.offer.constants import (
     OFFER_REDEEMED,
     SENDER_CATEGORY_TYPES
 )
+from ecommerce.extensions.offer.usage import AbstractUsageShard
 from ecommerce.extensions.offer.utils import format_assigned_offer_email
+from ecommerce.extensions.refund.status import REFUND
 
 OFFER_PRIORITY_ENTERPRISE = 10
 OFFER_PRIORITY_VOUCHER = 20
 OFFER_PRIORITY_MANUAL_ORDER = 100
+NUDGE_EMAIL_BULK_BATCH_SIZE = 500
+OFFER_USER_DISCOUNT_BATCH_SIZE = 500
 LIMIT = models.Q(app_label='offer', model='offerassignmentemailtemplates') | \
     models.Q(app_label='offer', model='codeassignmentnudgeemailtemplates')
 
@@ -93,29 +107,24 @@ class Benefit(AbstractBenefit):
         uncached_course_run_ids = []
         uncached_course_uuids = []
 
-        applicable_lines = lines
-        for line in applicable_lines:
-            if line.product.is_seat_product:
-                product_id = line.product.course.id
-            else:  # All lines passed to this method should either have a seat or an entitlement product
-                product_id = line.product.attr.UUID
-
-            cache_key = get_cache_key(
-                site_domain=domain,
-                partner_code=partner_code,
-                resource='catalog_query.contains',
-                course_id=product_id,
-                query=query
-            )
-            in_catalog_range_cached_response = TieredCache.get_cached_response(cache_key)
+        line_metadata = []
+        for line in lines:
+            product_id = get_line_product_identifier(line)
+            cache_key = get_catalog_query_contains_cache_key(domain, partner_code, query, product_id)
+            line_metadata.append({'id': product_id, 'cache_key': cache_key, 'line': line})
+
+        cached = get_cached_catalog_query_membership([metadata['cache_key'] for metadata in line_metadata])
 
-            if not in_catalog_range_cached_response.is_found:
-                if line.product.is_seat_product:
-                    uncached_course_run_ids.append({'id': product_id, 'cache_key': cache_key, 'line': line})
+        applicable_lines = []
+        for metadata in line_metadata:
+            if metadata['cache_key'] not in cached:
+                if metadata['line'].product.is_seat_product:
+                    uncached_course_run_ids.append(metadata)
                 else:
-                    uncached_course_uuids.append({'id': product_id, 'cache_key': cache_key, 'line': line})
-            elif not in_catalog_range_cached_response.value:
-                applicable_lines.remove(line)
+                    uncached_course_uuids.append(metadata)
+                applicable_lines.append(metadata['line'])
+            elif cached[metadata['cache_key']]:
+                applicable_lines.append(metadata['line'])
 
         return uncached_course_run_ids, uncached_course_uuids, applicable_lines
 
@@ -139,11 +148,11 @@ class Benefit(AbstractBenefit):
             if course_run_ids or course_uuids:
                 # Hit Discovery Service to determine if remaining courses and runs are in the range.
                 try:
-                    response = site.siteconfiguration.discovery_api_client.catalog.query_contains.get(
-                        course_run_ids=','.join([metadata['id'] for metadata in course_run_ids]),
-                        course_uuids=','.join([metadata['id'] for metadata in course_uuids]),
-                        query=query,
-                        partner=partner_code
+                    response = fetch_catalog_query_membership(
+                        site,
+                        query,
+                        [metadata['id'] for metadata in course_run_ids],
+                        [metadata['id'] for metadata in course_uuids],
                     )
                 except Exception as err:  # pylint: disable=bare-except
                     logger.exception(
@@ -154,17 +163,9 @@ class Benefit(AbstractBenefit):
                     )
                     raise Exception('Failed to contact Discovery Service to retrieve offer catalog_range data.')
 
-                # Cache range-state individually for each course or run identifier and remove lines not in the range.
+                # Remove lines not in the range.
                 for metadata in course_run_ids + course_uuids:
-                    in_range = response[str(metadata['id'])]
-
-                    # Convert to int, because this is what memcached will return, and the request cache should return
-                    # the same value.
-                    # Note: once the TieredCache is fixed to handle this case, we could remove this line.
-                    in_range = int(in_range)
-                    TieredCache.set_all_tiers(metadata['cache_key'], in_range, settings.COURSES_API_CACHE_TIMEOUT)
-
-                    if not in_range:
+                    if not response[metadata['id']]:
                         applicable_lines.remove(metadata['line'])
 
             return [(line.product.stockrecords.first().price_excl_tax, line) for line in applicable_lines]
@@ -354,6 +355,56 @@ class ConditionalOffer(AbstractConditionalOffer):
 
         return super(ConditionalOffer, self).is_condition_satisfied(basket)  # pylint: disable=bad-super-call
 
+    def record_usage(self, discount):
+        """
+        Record the usage in a shard of the offer, instead of the offer row which every order would lock.
+        """
+        OfferUsageShard.increment(
+            self, num_applications=discount['freq'], total_discount=discount['discount'], num_orders=1
+        )
+    record_usage.alters_data = True
+
+    def get_usage(self):
+        """
+        Return the num_applications, total_discount and num_orders of the offer, including the usage
+        which is not rolled up yet.
+        """
+        pending_usage = OfferUsageShard.get_pending_usage(self)
+        return {field: getattr(self, field) + pending_usage[field] for field in OfferUsageShard.COUNTER_FIELDS}
+
+    def get_max_applications(self, user=None):
+        """
+        In addition to Oscar's limits, count the usage which is not rolled up yet against the global limits.
+        """
+        max_applications = super(ConditionalOffer, self).get_max_applications(user)  # pylint: disable=bad-super-call
+        if not max_applications or not (self.max_discount or self.max_global_applications):
+            return max_applications
+
+        usage = self.get_usage()
+        if self.max_discount and usage['total_discount'] >= self.max_discount:
+            return 0
+        if self.max_global_applications:
+            max_applications = min(max_applications, max(0, self.max_global_applications - usage['num_applications']))
+        return max_applications
+
+
+class OfferUsageShard(AbstractUsageShard):
+    """
+    Usage of an offer recorded since it was last rolled up.
+
+    .. no_pii:
+    """
+    OWNER_FIELD = 'offer'
+    COUNTER_FIELDS = ('num_applications', 'total_discount', 'num_orders')
+
+    offer = models.ForeignKey('offer.ConditionalOffer', related_name='usage_shards', on_delete=models.CASCADE)
+    num_applications = models.PositiveIntegerField(default=0)
+    total_discount = models.DecimalField(decimal_places=2, max_digits=12, default=Decimal('0.00'))
+    num_orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('offer', 'shard')
+
 
 def validate_credit_seat_type(course_seat_types):
     if not isinstance(course_seat_types, str):
@@ -711,6 +762,114 @@ class OfferUsageEmail(TimeStampedModel):
         return record
 
 
+class OfferUserDiscount(TimeStampedModel):
+    """
+    Ledger of the discount a user consumed through an offer, over their complete and non-refunded orders.
+
+    Entries are updated when an order is completed and when it is refunded, so that the per user bookings
+    limit of an offer is checked by reading a single row. The rebuild_offer_user_discounts command rebuilds
+    the ledger from the order history.
+
+    .. no_pii:
+    """
+    offer = models.ForeignKey('offer.ConditionalOffer', related_name='user_discounts', on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='offer_discounts', on_delete=models.CASCADE)
+    discount = models.DecimalField(decimal_places=2, max_digits=12, default=Decimal('0.00'))
+
+    class Meta:
+        unique_together = ('offer', 'user')
+
+    def __str__(self):
+        return '{offer}-{user}'.format(offer=self.offer_id, user=self.user_id)
+
+    @classmethod
+    def get_discount(cls, offer, user):
+        """
+        Return the discount consumed by the user through the offer.
+        """
+        discount = cls.objects.filter(offer=offer, user=user).values_list('discount', flat=True).first()
+        return discount or Decimal('0.00')
+
+    @staticmethod
+    def _get_order_discounts(orders):
+        """
+        Return the total discount of the orders per offer and user, as dicts with offer_id, user_id and amount.
+        """
+        OrderDiscount = get_model('order', 'OrderDiscount')
+        return OrderDiscount.objects.filter(
+            order__in=orders,
+            order__user__isnull=False,
+            offer_id__in=ConditionalOffer.objects.values('id'),
+        ).values('offer_id', user_id=F('order__user_id')).order_by().annotate(amount=Sum('amount'))
+
+    @classmethod
+    def _update_for_orders(cls, orders, sign):
+        with transaction.atomic():
+            for order_discount in cls._get_order_discounts(orders):
+                entry, __ = cls.objects.get_or_create(
+                    offer_id=order_discount['offer_id'], user_id=order_discount['user_id']
+                )
+                cls.objects.filter(id=entry.id).update(
+                    discount=F('discount') + sign * order_discount['amount'],
+                    modified=timezone.now(),
+                )
+
+    @classmethod
+    def record_order(cls, order):
+        """
+        Add the discounts of a completed order to the ledger.
+        """
+        if order.status == ORDER.COMPLETE and not order.refunds.filter(status=REFUND.COMPLETE).exists():
+            cls._update_for_orders([order], 1)
+
+    @classmethod
+    def release_order(cls, order):
+        """
+        Remove the discounts of a refunded order from the ledger.
+        """
+        if order.status == ORDER.COMPLETE:
+            cls._update_for_orders([order], -1)
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Rebuild the ledger from the complete and non-refunded orders.
+
+        Returns:
+            tuple: Numbers of created, updated and deleted entries.
+        """
+        Order = get_model('order', 'Order')
+        Refund = get_model('refund', 'Refund')
+
+        orders = Order.objects.filter(status=ORDER.COMPLETE).annotate(
+            refunded=Exists(Refund.objects.filter(order=OuterRef('pk'), status=REFUND.COMPLETE))
+        ).filter(refunded=False).values('id')
+        discounts = {
+            (order_discount['offer_id'], order_discount['user_id']): order_discount['amount']
+            for order_discount in cls._get_order_discounts(orders)
+        }
+
+        updated = 0
+        stale_ids = []
+        with transaction.atomic():
+            for entry in cls.objects.select_for_update():
+                discount = discounts.pop((entry.offer_id, entry.user_id), None)
+                if discount is None:
+                    stale_ids.append(entry.id)
+                elif discount != entry.discount:
+                    entry.discount = discount
+                    entry.save(update_fields=['discount', 'modified'])
+                    updated += 1
+
+            cls.objects.filter(id__in=stale_ids).delete()
+            created = len(cls.objects.bulk_create([
+                cls(offer_id=offer_id, user_id=user_id, discount=discount)
+                for (offer_id, user_id), discount in discounts.items()
+            ], batch_size=OFFER_USER_DISCOUNT_BATCH_SIZE))
+
+        return created, updated, len(stale_ids)
+
+
 class CodeAssignmentNudgeEmailTemplates(AbstractBaseEmailTemplate):
     """
     This model keeps track of all the saved templates for nudge emails.
@@ -813,6 +972,52 @@ class CodeAssignmentNudgeEmails(TimeStampedModel):
                     user_email, code, email_type, base_enterprise_url,
                 )
 
+    @classmethod
+    def bulk_subscribe_nudge_emails(cls, code_email_pairs, base_enterprise_url=''):
+        """
+        Subscribe the nudge email cycle for many (code, user email) pairs at once.
+
+        Each template of the cycle is loaded once, existing subscriptions are looked up with one
+        query per batch of codes and the new ones are inserted with bulk_create.
+        """
+        code_email_pairs = list(dict.fromkeys(code_email_pairs))
+        codes = sorted({code for code, __ in code_email_pairs})
+        now_datetime = datetime.datetime.now()
+        nudge_emails = []
+        for days, email_type in NUDGE_EMAIL_CYCLE.items():
+            email_template = CodeAssignmentNudgeEmailTemplates.get_nudge_email_template(email_type=email_type)
+            if not email_template:
+                logger.warning(
+                    'Unable to create nudge emails for %d code assignments, email_type: %s, base_enterprise_url: %s',
+                    len(code_email_pairs), email_type, base_enterprise_url,
+                )
+                continue
+
+            existing_pairs = set()
+            for start in range(0, len(codes), NUDGE_EMAIL_BULK_BATCH_SIZE):
+                existing_pairs.update(cls.objects.filter(
+                    email_template=email_template,
+                    code__in=codes[start:start + NUDGE_EMAIL_BULK_BATCH_SIZE],
+                ).values_list('code', 'user_email'))
+
+            email_date = now_datetime + relativedelta(days=int(days))
+            nudge_emails.extend(
+                cls(
+                    code=code,
+                    user_email=user_email,
+                    email_template=email_template,
+                    email_date=email_date,
+                    options={'base_enterprise_url': base_enterprise_url},
+                )
+                for code, user_email in code_email_pairs if (code, user_email) not in existing_pairs
+            )
+
+        cls.objects.bulk_create(nudge_emails, batch_size=NUDGE_EMAIL_BULK_BATCH_SIZE)
+        logger.info(
+            'Created %d nudge emails for %d code assignments, base_enterprise_url: %s',
+            len(nudge_emails), len(code_email_pairs), base_enterprise_url,
+        )
+
     @classmethod
     def unsubscribe_from_nudging(cls, codes, user_emails):
         """
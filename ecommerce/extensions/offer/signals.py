@@ -0,0 +1,37 @@
+
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from oscar.core.loading import get_class, get_model
+
+from ecommerce.extensions.fulfillment.status import ORDER
+from ecommerce.extensions.offer.index import invalidate_offer_index
+
+Benefit = get_model('offer', 'Benefit')
+Condition = get_model('offer', 'Condition')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+OfferUserDiscount = get_model('offer', 'OfferUserDiscount')
+order_status_changed = get_class('order.signals', 'order_status_changed')
+
+
+@receiver(post_save, sender=ConditionalOffer, dispatch_uid='offer.conditional_offer_saved')
+@receiver(post_delete, sender=ConditionalOffer, dispatch_uid='offer.conditional_offer_deleted')
+@receiver(post_save, sender=Condition, dispatch_uid='offer.condition_saved')
+@receiver(post_delete, sender=Condition, dispatch_uid='offer.condition_deleted')
+@receiver(post_save, sender=Benefit, dispatch_uid='offer.benefit_saved')
+@receiver(post_delete, sender=Benefit, dispatch_uid='offer.benefit_deleted')
+def invalidate_offer_index_on_change(*_args, **_kwargs):
+    """
+    Changes to offers, conditions or benefits invalidate the compiled offer index
+    used by the Applicator.
+    """
+    invalidate_offer_index()
+
+
+@receiver(order_status_changed, dispatch_uid='offer.order_status_changed')
+def record_offer_user_discounts(sender, order=None, new_status=None, **kwargs):  # pylint: disable=unused-argument
+    """
+    Add the discounts of completed orders to the per user discount ledger.
+    """
+    if new_status == ORDER.COMPLETE:
+        OfferUserDiscount.record_order(order)
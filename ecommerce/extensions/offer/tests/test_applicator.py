@@ -86,7 +86,7 @@ class ApplicatorTests(TestCase):
                 enterprise_customer_uuid=None
             )
             ConditionalOfferFactory(condition=condition)
-        assert self.applicator.get_site_offers().count() == 3 + len(existing_offers)
+        assert len(self.applicator.get_site_offers()) == 3 + len(existing_offers)
 
     @ddt.data(
         (uuid4(), 2),
@@ -129,4 +129,4 @@ class ApplicatorTests(TestCase):
         if num_expected_offers == 0:
             assert not enterprise_offers
         else:
-            assert enterprise_offers.count() == num_expected_offers
+            assert len(enterprise_offers) == num_expected_offers
@@ -0,0 +1,80 @@
+
+
+import httpretty
+from oscar.core.loading import get_model
+from oscar.test import factories
+
+from ecommerce.coupons.tests.mixins import DiscoveryMockMixin
+from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
+from ecommerce.extensions.offer.catalog_query import prefetch_catalog_query_membership
+from ecommerce.tests.factories import UserFactory
+from ecommerce.tests.testcases import TestCase
+
+Range = get_model('offer', 'Range')
+
+
+class PrefetchCatalogQueryMembershipTests(DiscoveryTestMixin, DiscoveryMockMixin, TestCase):
+    """ Tests for prefetch_catalog_query_membership. """
+
+    def setUp(self):
+        super(PrefetchCatalogQueryMembershipTests, self).setUp()
+        self.user = UserFactory()
+        self.basket = factories.BasketFactory(site=self.site, owner=self.user)
+        self.entitlement = self.create_entitlement_product()
+        self.course, self.seat = self.create_course_and_seat()
+        self.basket.add_product(self.entitlement)
+        self.basket.add_product(self.seat)
+
+    def create_offer(self, query):
+        _range = factories.RangeFactory(course_seat_types=','.join(Range.ALLOWED_SEAT_TYPES[1:]), catalog_query=query)
+        return factories.ConditionalOfferFactory(benefit=factories.BenefitFactory(range=_range))
+
+    def mock_query_contains(self, query):
+        self.mock_catalog_query_contains_endpoint(
+            course_run_ids=[self.course.id], course_uuids=[self.entitlement.attr.UUID], absent_ids=[],
+            query=query, discovery_api_url=self.site_configuration.discovery_api_url
+        )
+
+    def get_query_contains_requests(self):
+        return [request for request in httpretty.latest_requests() if 'query_contains' in request.path]
+
+    @httpretty.activate
+    def test_prefetch_one_request_per_query(self):
+        """ Verify membership for all offers is fetched with one request per distinct query. """
+        offers = [self.create_offer('uuid:*'), self.create_offer('uuid:*'), self.create_offer('key:*')]
+        self.mock_access_token_response()
+        self.mock_query_contains('uuid:*')
+        self.mock_query_contains('key:*')
+
+        prefetch_catalog_query_membership(self.basket, offers)
+        self.assertEqual(len(self.get_query_contains_requests()), 2)
+
+        # Evaluating the benefits is now served from the cache.
+        httpretty.disable()
+        expected = [(line.product.stockrecords.first().price_excl_tax, line) for line in self.basket.all_lines()]
+        for offer in offers:
+            self.assertEqual(offer.benefit.get_applicable_lines(offer, self.basket), expected)
+
+    @httpretty.activate
+    def test_prefetch_skips_cached_pairs(self):
+        """ Verify no request is made when every pair is already cached. """
+        offer = self.create_offer('uuid:*')
+        self.mock_access_token_response()
+        self.mock_query_contains('uuid:*')
+
+        prefetch_catalog_query_membership(self.basket, [offer])
+        httpretty.reset()
+        prefetch_catalog_query_membership(self.basket, [offer])
+        self.assertEqual(self.get_query_contains_requests(), [])
+
+    def test_prefetch_failure_is_ignored(self):
+        """ Verify Discovery failures during prefetch are logged rather than raised. """
+        offer = self.create_offer('uuid:*')
+        with self.assertLogs('ecommerce.extensions.offer.catalog_query', level='ERROR'):
+            prefetch_catalog_query_membership(self.basket, [offer])
+
+    def test_prefetch_without_catalog_query_offers(self):
+        """ Verify nothing is fetched when no offer uses a catalog query range. """
+        offer = factories.ConditionalOfferFactory()
+        with self.assertNumQueries(0):
+            prefetch_catalog_query_membership(self.basket, [offer])
@@ -0,0 +1,179 @@
+
+
+import datetime
+from uuid import uuid4
+
+import ddt
+from django.utils import timezone
+from oscar.core.loading import get_model
+
+from ecommerce.extensions.offer.index import (
+    get_offer_index,
+    get_offer_index_version,
+    has_global_limits,
+    has_per_user_limits,
+    invalidate_offer_index
+)
+from ecommerce.extensions.test.factories import ConditionalOfferFactory, ConditionFactory, ProgramOfferFactory
+from ecommerce.tests.factories import PartnerFactory, SiteFactory
+from ecommerce.tests.testcases import TestCase
+
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+
+
+@ddt.ddt
+class OfferIndexTests(TestCase):
+    """ Tests for the compiled site offer index. """
+
+    def test_index_buckets(self):
+        """ Verify site, program and enterprise offers are indexed under their own keys. """
+        existing_site_offers = list(ConditionalOffer.active.filter(
+            offer_type=ConditionalOffer.SITE,
+            condition__program_uuid__isnull=True,
+            condition__enterprise_customer_uuid__isnull=True,
+        ))
+        site_offer = ConditionalOfferFactory()
+        program_offer = ProgramOfferFactory()
+        enterprise_uuid = uuid4()
+        enterprise_offer = ConditionalOfferFactory(
+            condition=ConditionFactory(program_uuid=None, enterprise_customer_uuid=enterprise_uuid)
+        )
+
+        index = get_offer_index()
+        self.assertEqual(
+            sorted(offer.id for offer in index.get_site_offers()),
+            sorted([site_offer.id] + [offer.id for offer in existing_site_offers])
+        )
+        self.assertEqual(
+            [offer.id for offer in index.get_program_offers(program_offer.condition.program_uuid)],
+            [program_offer.id]
+        )
+        self.assertEqual([offer.id for offer in index.get_enterprise_offers(enterprise_uuid)], [enterprise_offer.id])
+        self.assertEqual(index.get_enterprise_offers(uuid4()), [])
+
+    def test_program_and_enterprise_offer(self):
+        """ Verify an offer with both a program and an enterprise condition is indexed under both keys. """
+        enterprise_uuid = uuid4()
+        offer = ProgramOfferFactory(condition__enterprise_customer_uuid=enterprise_uuid)
+
+        index = get_offer_index()
+        program_offers = index.get_program_offers(offer.condition.program_uuid)
+        self.assertEqual([program_offer.id for program_offer in program_offers], [offer.id])
+        enterprise_offers = index.get_enterprise_offers(enterprise_uuid)
+        self.assertEqual([enterprise_offer.id for enterprise_offer in enterprise_offers], [offer.id])
+        self.assertNotIn(offer.id, [site_offer.id for site_offer in index.get_site_offers()])
+
+    def test_index_sorted_by_priority(self):
+        """ Verify indexed offers are ordered by descending priority. """
+        program_uuid = uuid4()
+        low = ProgramOfferFactory(condition__program_uuid=program_uuid, priority=1)
+        high = ProgramOfferFactory(condition__program_uuid=program_uuid, priority=10)
+
+        offers = get_offer_index().get_program_offers(program_uuid)
+        self.assertEqual([offer.id for offer in offers], [high.id, low.id])
+
+    def test_index_served_from_memory(self):
+        """ Verify an up-to-date index is served without querying the database. """
+        ProgramOfferFactory()
+        get_offer_index()
+
+        with self.assertNumQueries(0):
+            get_offer_index().get_site_offers()
+
+    def test_index_invalidated_on_save(self):
+        """ Verify saving or deleting an offer is reflected in the index. """
+        offer = ProgramOfferFactory()
+        program_uuid = offer.condition.program_uuid
+        self.assertEqual(len(get_offer_index().get_program_offers(program_uuid)), 1)
+
+        offer.status = ConditionalOffer.SUSPENDED
+        offer.save()
+        self.assertEqual(get_offer_index().get_program_offers(program_uuid), [])
+
+        offer.status = ConditionalOffer.OPEN
+        offer.save()
+        self.assertEqual(len(get_offer_index().get_program_offers(program_uuid)), 1)
+
+        offer.delete()
+        self.assertEqual(get_offer_index().get_program_offers(program_uuid), [])
+
+    def test_index_filters_by_date_at_read_time(self):
+        """ Verify offers outside their date range are excluded when read, not when indexed. """
+        now = timezone.now()
+        expired = ProgramOfferFactory(end_datetime=now - datetime.timedelta(days=1))
+        future = ProgramOfferFactory(start_datetime=now + datetime.timedelta(days=1))
+
+        index = get_offer_index()
+        self.assertEqual(index.get_program_offers(expired.condition.program_uuid), [])
+        self.assertEqual(index.get_program_offers(future.condition.program_uuid), [])
+
+    def test_index_returns_copies(self):
+        """ Verify mutating a returned offer does not affect the shared index. """
+        offer = ProgramOfferFactory(num_applications=0)
+        program_uuid = offer.condition.program_uuid
+
+        get_offer_index().get_program_offers(program_uuid)[0].num_applications = 5
+        self.assertEqual(get_offer_index().get_program_offers(program_uuid)[0].num_applications, 0)
+
+    def test_invalidate_offer_index(self):
+        """ Verify invalidation forces a rebuild of the index. """
+        offer = ProgramOfferFactory()
+        get_offer_index()
+
+        ConditionalOffer.objects.filter(id=offer.id).update(status=ConditionalOffer.SUSPENDED)
+        self.assertEqual(len(get_offer_index().get_program_offers(offer.condition.program_uuid)), 1)
+
+        invalidate_offer_index()
+        self.assertEqual(get_offer_index().get_program_offers(offer.condition.program_uuid), [])
+
+    def test_get_candidate_offers(self):
+        """ Verify the candidate offers of a site leave out the offers of other sites and partners. """
+        ConditionalOffer.objects.all().delete()
+        site_offer = ConditionalOfferFactory(offer_type=ConditionalOffer.SITE)
+        own_offer = ConditionalOfferFactory(
+            offer_type=ConditionalOffer.SITE, site=self.site, partner=self.partner
+        )
+        ConditionalOfferFactory(offer_type=ConditionalOffer.SITE, site=SiteFactory())
+        ConditionalOfferFactory(offer_type=ConditionalOffer.SITE, partner=PartnerFactory())
+        program_offer = ProgramOfferFactory(partner=self.partner)
+        enterprise_offer = ConditionalOfferFactory(
+            offer_type=ConditionalOffer.SITE, condition=ConditionFactory(enterprise_customer_uuid=uuid4())
+        )
+        invalidate_offer_index()
+        index = get_offer_index()
+
+        self.assertCountEqual(index.get_candidate_offers(self.site), [site_offer, own_offer])
+        self.assertCountEqual(
+            index.get_candidate_offers(
+                self.site,
+                program_uuid=program_offer.condition.program_uuid,
+                enterprise_customer_uuid=enterprise_offer.condition.enterprise_customer_uuid,
+            ),
+            [site_offer, own_offer, program_offer, enterprise_offer]
+        )
+
+    @ddt.data('max_user_applications', 'max_user_discount')
+    def test_has_per_user_limits(self, limit):
+        """ Verify whether any offer limits its applications or discount per user is detected. """
+        offer = ConditionalOfferFactory.build(max_user_applications=None, max_user_discount=None)
+        self.assertFalse(has_per_user_limits([offer]))
+
+        setattr(offer, limit, 1)
+        self.assertTrue(has_per_user_limits([offer]))
+
+    @ddt.data('max_global_applications', 'max_discount')
+    def test_has_global_limits(self, limit):
+        """ Verify whether any offer limits its applications or discount across users is detected. """
+        offer = ConditionalOfferFactory.build(max_global_applications=None, max_discount=None)
+        self.assertFalse(has_global_limits([offer]))
+
+        setattr(offer, limit, 1)
+        self.assertTrue(has_global_limits([offer]))
+
+    def test_get_offer_index_version(self):
+        """ Verify the version changes when the index is invalidated. """
+        version = get_offer_index_version()
+        self.assertEqual(get_offer_index_version(), version)
+
+        invalidate_offer_index()
+        self.assertNotEqual(get_offer_index_version(), version)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 
+from decimal import Decimal
 from uuid import uuid4
 
 import ddt
@@ -17,8 +18,14 @@ from slumber.exceptions import SlumberBaseException
 
 from ecommerce.coupons.tests.mixins import CouponMixin, DiscoveryMockMixin
 from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
+from ecommerce.extensions.fulfillment.status import ORDER
 from ecommerce.extensions.offer.constants import ASSIGN, DAY3, DAY10, DAY19, REMIND, REVOKE
-from ecommerce.extensions.test.factories import CodeAssignmentNudgeEmailTemplatesFactory
+from ecommerce.extensions.refund.tests.factories import RefundFactory
+from ecommerce.extensions.test.factories import (
+    CodeAssignmentNudgeEmailTemplatesFactory,
+    EnterpriseOfferFactory,
+    create_order
+)
 from ecommerce.tests.factories import UserFactory
 from ecommerce.tests.testcases import TestCase
 
@@ -29,6 +36,7 @@ OfferAssignmentEmailSentRecord = get_model('offer', 'OfferAssignmentEmailSentRec
 Range = get_model('offer', 'Range')
 CodeAssignmentNudgeEmails = get_model('offer', 'CodeAssignmentNudgeEmails')
 CodeAssignmentNudgeEmailTemplates = get_model('offer', 'CodeAssignmentNudgeEmailTemplates')
+OfferUserDiscount = get_model('offer', 'OfferUserDiscount')
 
 
 @ddt.ddt
@@ -661,3 +669,88 @@ class TestCodeAssignmentNudgeEmails(TestCase):
         assert not nudge_email.already_sent
         assert nudge_email.is_subscribed
         assert nudge_email.options['base_enterprise_url'] == ''
+
+    def test_bulk_subscribe_nudge_emails(self):
+        """
+        Verify the whole nudge email cycle is subscribed for each pair, skipping existing subscriptions.
+        """
+        CodeAssignmentNudgeEmails.subscribe_nudge_emails('foo@bar.com', 'CODE1')
+        code_email_pairs = [('CODE1', 'foo@bar.com'), ('CODE2', 'bar@foo.com'), ('CODE2', 'bar@foo.com')]
+
+        with self.assertNumQueries(7):
+            CodeAssignmentNudgeEmails.bulk_subscribe_nudge_emails(code_email_pairs, 'https://bears.party')
+
+        assert CodeAssignmentNudgeEmails.objects.filter(code='CODE1', user_email='foo@bar.com').count() == 3
+        new_nudge_emails = CodeAssignmentNudgeEmails.objects.filter(code='CODE2', user_email='bar@foo.com')
+        assert sorted(nudge_email.email_template.email_type for nudge_email in new_nudge_emails) == sorted(
+            [DAY3, DAY10, DAY19]
+        )
+        assert all(nudge_email.options['base_enterprise_url'] == 'https://bears.party'
+                   for nudge_email in new_nudge_emails)
+
+
+class OfferUserDiscountTests(TestCase):
+    """Tests for the OfferUserDiscount ledger."""
+
+    def setUp(self):
+        super(OfferUserDiscountTests, self).setUp()
+        self.user = UserFactory()
+        self.offer = EnterpriseOfferFactory(max_user_discount=100)
+
+    def create_order(self, amount, status=ORDER.COMPLETE):
+        """Place an order for the user with a discount from the offer, and move it to the given status."""
+        order = create_order(user=self.user, site=self.site)
+        factories.OrderDiscountFactory(order=order, offer_id=self.offer.id, amount=amount)
+        order.set_status(status)
+        return order
+
+    def assert_discount(self, expected):
+        self.assertEqual(OfferUserDiscount.get_discount(self.offer, self.user), Decimal(expected))
+
+    def test_get_discount_without_orders(self):
+        """Verify the consumed discount is zero when the user has no entry in the ledger."""
+        self.assert_discount(0)
+        self.assertFalse(OfferUserDiscount.objects.exists())
+
+    def test_record_order(self):
+        """Verify the discounts of orders are added to the ledger when the orders are completed."""
+        self.create_order(10)
+        self.create_order(15)
+        self.create_order(20, status=ORDER.FULFILLMENT_ERROR)
+        self.assert_discount(25)
+        self.assertEqual(OfferUserDiscount.objects.count(), 1)
+
+    def test_release_order(self):
+        """Verify the discounts of an order are removed from the ledger once, when it is first refunded."""
+        self.create_order(10)
+        order = self.create_order(15)
+
+        refund = RefundFactory(order=order, user=self.user)
+        self.assertTrue(refund.approve(revoke_fulfillment=False))
+        self.assert_discount(10)
+
+        refund = RefundFactory(order=order, user=self.user)
+        self.assertTrue(refund.approve(revoke_fulfillment=False))
+        self.assertTrue(refund.approve(revoke_fulfillment=False))
+        self.assert_discount(10)
+
+    def test_rebuild(self):
+        """Verify rebuilding the ledger creates, updates and deletes entries to match the order history."""
+        self.create_order(10)
+        refunded_order = self.create_order(15)
+        RefundFactory(order=refunded_order, user=self.user).approve(revoke_fulfillment=False)
+
+        other_user = UserFactory()
+        OfferUserDiscount.objects.update(discount=Decimal(50))
+        OfferUserDiscount.objects.create(offer=self.offer, user=other_user, discount=Decimal(5))
+        other_offer = EnterpriseOfferFactory()
+        order = create_order(user=self.user, site=self.site)
+        factories.OrderDiscountFactory(order=order, offer_id=other_offer.id, amount=30)
+        order.status = ORDER.COMPLETE
+        order.save()
+
+        self.assertEqual(OfferUserDiscount.rebuild(), (1, 1, 1))
+        self.assert_discount(10)
+        self.assertEqual(OfferUserDiscount.get_discount(other_offer, self.user), Decimal(30))
+        self.assertEqual(OfferUserDiscount.get_discount(self.offer, other_user), Decimal(0))
+        self.assertEqual(OfferUserDiscount.rebuild(), (0, 0, 0))
@@ -0,0 +1,163 @@
+
+
+from decimal import Decimal
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from oscar.core.loading import get_class, get_model
+from oscar.test import factories
+
+from ecommerce.extensions.test.factories import create_order
+from ecommerce.tests.factories import UserFactory
+from ecommerce.tests.testcases import TestCase
+
+Applicator = get_class('offer.applicator', 'Applicator')
+Benefit = get_model('offer', 'Benefit')
+Condition = get_model('offer', 'Condition')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+OfferUsageShard = get_model('offer', 'OfferUsageShard')
+Voucher = get_model('voucher', 'Voucher')
+VoucherUsageShard = get_model('voucher', 'VoucherUsageShard')
+
+
+class UsageShardTests(TestCase):
+    """ Tests for the sharded usage counters of offers and vouchers. """
+
+    def setUp(self):
+        super(UsageShardTests, self).setUp()
+        self.offer = factories.ConditionalOfferFactory(num_applications=2, total_discount=Decimal(20), num_orders=2)
+
+    def record_usage(self, times=1):
+        for __ in range(times):
+            self.offer.record_usage({'freq': 1, 'discount': Decimal(10)})
+
+    def test_record_usage(self):
+        """ Verify offer usage is recorded in the shards, and not on the offer. """
+        self.record_usage(times=20)
+
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.num_applications, 2)
+        self.assertEqual(
+            OfferUsageShard.get_pending_usage(self.offer),
+            {'num_applications': 20, 'total_discount': Decimal(200), 'num_orders': 20}
+        )
+        self.assertLessEqual(self.offer.usage_shards.count(), 8)
+        self.assertEqual(
+            self.offer.get_usage(),
+            {'num_applications': 22, 'total_discount': Decimal(220), 'num_orders': 22}
+        )
+
+    @override_settings(USAGE_COUNTER_SHARDS=1)
+    def test_record_usage_single_shard(self):
+        """ Verify usage is added to the existing shard. """
+        self.record_usage(times=3)
+        self.assertEqual(self.offer.usage_shards.get().num_applications, 3)
+
+    def test_roll_up(self):
+        """ Verify rolling up adds the usage of the shards to the offer, and deletes the shards. """
+        other_offer = factories.ConditionalOfferFactory()
+        self.record_usage(times=3)
+        other_offer.record_usage({'freq': 2, 'discount': Decimal(5)})
+
+        self.assertEqual(OfferUsageShard.roll_up(), 2)
+
+        self.assertFalse(OfferUsageShard.objects.exists())
+        self.offer.refresh_from_db()
+        self.assertEqual(
+            (self.offer.num_applications, self.offer.total_discount, self.offer.num_orders), (5, Decimal(50), 5)
+        )
+        other_offer.refresh_from_db()
+        self.assertEqual(
+            (other_offer.num_applications, other_offer.total_discount, other_offer.num_orders), (2, Decimal(5), 1)
+        )
+        self.assertEqual(OfferUsageShard.roll_up(), 0)
+
+    def test_annotate_pending_usage(self):
+        """ Verify the usage of annotated offers is read without querying their shards. """
+        other_offer = factories.ConditionalOfferFactory()
+        self.record_usage(times=2)
+
+        offers = OfferUsageShard.annotate_pending_usage(ConditionalOffer.objects.filter(
+            id__in=[self.offer.id, other_offer.id]
+        )).order_by('id')
+        with self.assertNumQueries(1):
+            usages = [offer.get_usage() for offer in offers]
+
+        self.assertEqual(usages, [
+            {'num_applications': 4, 'total_discount': Decimal(40), 'num_orders': 4},
+            {'num_applications': 0, 'total_discount': Decimal(0), 'num_orders': 0},
+        ])
+
+    def test_get_max_applications_counts_pending_usage(self):
+        """ Verify the global limits of an offer count the usage which is not rolled up yet. """
+        self.offer.max_global_applications = 5
+        self.offer.save()
+        self.assertEqual(self.offer.get_max_applications(), 3)
+
+        self.record_usage(times=2)
+        self.assertEqual(self.offer.get_max_applications(), 1)
+        self.assertTrue(self.offer.is_available())
+
+        self.record_usage()
+        self.assertEqual(self.offer.get_max_applications(), 0)
+        self.assertFalse(self.offer.is_available())
+
+    def test_get_max_applications_counts_pending_discount(self):
+        """ Verify the discount limit of an offer counts the discount which is not rolled up yet. """
+        self.offer.max_discount = Decimal(40)
+        self.offer.save()
+        self.record_usage()
+        self.assertTrue(self.offer.is_available())
+
+        self.record_usage()
+        self.assertFalse(self.offer.is_available())
+
+    def create_limited_offer(self, **limits):
+        product_range = factories.RangeFactory(includes_all_products=True)
+        return factories.ConditionalOfferFactory(
+            condition=factories.ConditionFactory(range=product_range, type=Condition.COUNT, value=1),
+            benefit=factories.BenefitFactory(range=product_range, type=Benefit.PERCENTAGE, value=10),
+            **limits
+        )
+
+    def apply_offer(self, offer):
+        basket = factories.create_basket(empty=True)
+        basket.add_product(factories.create_product(price=Decimal(100)))
+        with CaptureQueriesContext(connection) as queries:
+            Applicator().apply_offers(basket, [offer])
+        self.assertEqual(len(basket.offer_discounts), 1)
+        return len(queries)
+
+    def test_apply_offer_reads_pending_usage_once(self):
+        """ Verify applying an offer with global limits to a basket queries the shards of the offer once. """
+        self.apply_offer(self.create_limited_offer())
+        num_queries = self.apply_offer(self.create_limited_offer())
+
+        limited_offer = self.create_limited_offer(max_global_applications=10, max_discount=Decimal(1000))
+        # Recording usage makes the offer read its pending usage from the shards again.
+        limited_offer.record_usage({'freq': 1, 'discount': Decimal(10)})
+        basket = factories.create_basket(empty=True)
+        basket.add_product(factories.create_product(price=Decimal(100)))
+        with self.assertNumQueries(num_queries + 1):
+            Applicator().apply_offers(basket, [limited_offer])
+        self.assertEqual(len(basket.offer_discounts), 1)
+
+    def test_voucher_usage(self):
+        """ Verify voucher usage is recorded in the shards, and counted against the available slots. """
+        voucher = factories.VoucherFactory(code='SHARDED', usage=Voucher.MULTI_USE, num_orders=1)
+        user = UserFactory()
+        for __ in range(2):
+            voucher.record_usage(create_order(user=user, site=self.site), user)
+            voucher.record_discount({'discount': Decimal(10)})
+
+        voucher.refresh_from_db()
+        self.assertEqual(voucher.num_orders, 1)
+        self.assertEqual(voucher.applications.count(), 2)
+        self.assertEqual(voucher.get_usage(), {'num_orders': 3, 'total_discount': Decimal(20)})
+        self.assertEqual(voucher.calculate_available_slots(5, 1), 1)
+
+        self.assertEqual(VoucherUsageShard.roll_up(), 1)
+        voucher.refresh_from_db()
+        self.assertEqual((voucher.num_orders, voucher.total_discount), (3, Decimal(20)))
+        self.assertEqual(voucher.get_usage(), {'num_orders': 3, 'total_discount': Decimal(20)})
@@ -20,6 +20,7 @@ from ecommerce.extensions.offer.utils import (
     format_benefit_value,
     format_email,
     send_assigned_offer_email,
+    send_assigned_offer_emails,
     send_assigned_offer_reminder_email,
     send_revoked_offer_email
 )
@@ -161,6 +162,34 @@ class UtilTests(DiscoveryTestMixin, TestCase):
             base_enterprise_url,
         )
 
+    @mock.patch('ecommerce.extensions.offer.utils.OFFER_ASSIGNMENT_EMAIL_BATCH_SIZE', 2)
+    @mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email')
+    def test_send_assigned_offer_emails(self, mock_sailthru_task):
+        """ Test that the offer assignment emails are published in batches, one email task per assignment. """
+        assignments = [
+            {
+                'offer_assignment_id': offer_assignment_id,
+                'learner_email': 'learner{}@unknown.com'.format(offer_assignment_id),
+                'code': 'GIL7RUEOU7VHBH7Q',
+                'redemptions_remaining': 1,
+            }
+            for offer_assignment_id in range(3)
+        ]
+        send_assigned_offer_emails(
+            'subject', 'hi', 'bye', assignments, '2018-12-19', 'sender alias', 'https://bears.party'
+        )
+
+        self.assertEqual(mock_sailthru_task.app.producer_or_acquire.call_count, 2)
+        producer = mock_sailthru_task.app.producer_or_acquire.return_value.__enter__.return_value
+        self.assertEqual(mock_sailthru_task.apply_async.call_args_list, [
+            mock.call(
+                args=(assignment['learner_email'], assignment['offer_assignment_id'], 'subject', mock.ANY,
+                      'sender alias', None, 'https://bears.party'),
+                producer=producer
+            )
+            for assignment in assignments
+        ])
+
     @mock.patch('ecommerce.extensions.offer.utils.send_offer_assignment_email')
     @ddt.data(
         (
@@ -0,0 +1,136 @@
+"""
+Sharded usage counters of offers and vouchers.
+
+Recording the usage of an offer or voucher on its own row makes every order using a popular offer wait on
+the same row lock. Usage is instead added to one of USAGE_COUNTER_SHARDS rows per offer or voucher, picked at
+random, and periodically rolled up into the offer or voucher by the roll_up_usage_counters command. Limits are
+checked against the rolled up usage plus the pending usage of the shards.
+
+Usage must be read with the get_usage method of the offer or voucher, never from its usage fields, which miss the
+usage recorded since the last roll up. Querysets of many offers or vouchers are annotated with their pending
+usage by annotate_pending_usage, so that get_usage does not need a query per offer or voucher. Otherwise the
+pending usage is queried once per instance, and kept on it until the instance records usage, since limits are
+checked several times while a basket is priced.
+"""
+
+
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+# Attribute of an owner keeping its pending usage, with the rolled up usage it was read for.
+PENDING_USAGE_ATTRIBUTE = '_pending_usage'
+
+
+class AbstractUsageShard(models.Model):
+    """
+    Usage of an owner, an offer or a voucher, recorded since its last roll up.
+
+    Subclasses define a foreign key to the owner named OWNER_FIELD, and a field for each of COUNTER_FIELDS
+    which is also a field of the owner.
+    """
+    OWNER_FIELD = None
+    COUNTER_FIELDS = ()
+
+    shard = models.PositiveSmallIntegerField()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def increment(cls, owner, **amounts):
+        """
+        Add the amounts to the counters of a random shard of the owner.
+        """
+        lookup = {cls.OWNER_FIELD: owner, 'shard': random.randrange(settings.USAGE_COUNTER_SHARDS)}
+        updates = {field: F(field) + amount for field, amount in amounts.items()}
+        cls.clear_pending_usage(owner)
+
+        if cls.objects.filter(**lookup).update(**updates):
+            return
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(**lookup, **amounts)
+        except IntegrityError:
+            # Another order created the shard first.
+            cls.objects.filter(**lookup).update(**updates)
+
+    @staticmethod
+    def get_pending_field(field):
+        return 'pending_{}'.format(field)
+
+    @classmethod
+    def annotate_pending_usage(cls, owners):
+        """
+        Annotate a queryset of owners with their usage which is not rolled up yet, read by get_pending_usage.
+        """
+        annotations = {}
+        for field in cls.COUNTER_FIELDS:
+            pending_usage = cls.objects.filter(**{cls.OWNER_FIELD: OuterRef('pk')}).order_by().values(
+                cls.OWNER_FIELD
+            ).annotate(total=Sum(field)).values('total')
+            output_field = cls._meta.get_field(field)
+            annotations[cls.get_pending_field(field)] = Coalesce(
+                Subquery(pending_usage, output_field=output_field), Value(0), output_field=output_field
+            )
+        return owners.annotate(**annotations)
+
+    @classmethod
+    def get_pending_usage(cls, owner):
+        """
+        Return the usage of the owner which is not rolled up yet, as a dict keyed by counter field.
+
+        The usage annotated by annotate_pending_usage is used when present, instead of querying the shards.
+        Otherwise the shards are queried, and their usage is kept on the owner for the following calls, as long
+        as the rolled up usage of the owner does not change, e.g. when it is refreshed after a roll up.
+        """
+        if all(hasattr(owner, cls.get_pending_field(field)) for field in cls.COUNTER_FIELDS):
+            return {field: getattr(owner, cls.get_pending_field(field)) for field in cls.COUNTER_FIELDS}
+
+        rolled_up_usage = tuple(getattr(owner, field) for field in cls.COUNTER_FIELDS)
+        cached_usage = owner.__dict__.get(PENDING_USAGE_ATTRIBUTE)
+        if cached_usage and cached_usage[0] == rolled_up_usage:
+            return dict(cached_usage[1])
+
+        totals = cls.objects.filter(**{cls.OWNER_FIELD: owner}).aggregate(
+            **{field: Sum(field) for field in cls.COUNTER_FIELDS}
+        )
+        pending_usage = {field: totals[field] or 0 for field in cls.COUNTER_FIELDS}
+        owner.__dict__[PENDING_USAGE_ATTRIBUTE] = (rolled_up_usage, pending_usage)
+        return dict(pending_usage)
+
+    @classmethod
+    def clear_pending_usage(cls, owner):
+        """
+        Forget the usage kept on the owner, so that it is read from the shards again.
+        """
+        owner.__dict__.pop(PENDING_USAGE_ATTRIBUTE, None)
+        for field in cls.COUNTER_FIELDS:
+            owner.__dict__.pop(cls.get_pending_field(field), None)
+
+    @classmethod
+    def roll_up(cls):
+        """
+        Add the usage recorded in the shards to their owners, and delete the shards.
+
+        Returns:
+            int: Number of owners updated.
+        """
+        owner_model = cls._meta.get_field(cls.OWNER_FIELD).related_model
+        owner_id_field = '{}_id'.format(cls.OWNER_FIELD)
+        owner_ids = list(cls.objects.values_list(owner_id_field, flat=True).distinct().order_by())
+
+        for owner_id in owner_ids:
+            with transaction.atomic():
+                shards = list(cls.objects.select_for_update().filter(**{owner_id_field: owner_id}))
+                owner_model.objects.filter(id=owner_id).update(**{
+                    field: F(field) + sum(getattr(shard, field) for shard in shards)
+                    for field in cls.COUNTER_FIELDS
+                })
+                cls.objects.filter(id__in=[shard.id for shard in shards]).delete()
+
+        return len(owner_ids)
@@ -21,6 +21,9 @@ from ecommerce.extensions.offer.constants import OFFER_ASSIGNED
 
 logger = logging.getLogger(__name__)
 
+# Number of offer assignment email tasks published over a single broker connection.
+OFFER_ASSIGNMENT_EMAIL_BATCH_SIZE = 100
+
 
 def _remove_exponent_and_trailing_zeros(decimal):
     """
@@ -202,6 +205,68 @@ def send_assigned_offer_email(
                                       base_enterprise_url)
 
 
+def send_assigned_offer_emails(
+        subject,
+        greeting,
+        closing,
+        assignments,
+        code_expiration_date,
+        sender_alias,
+        base_enterprise_url=''):
+    """
+    Send the offer assignment email for many assignments at once.
+
+    The email tasks are published in batches of OFFER_ASSIGNMENT_EMAIL_BATCH_SIZE, each batch
+    over a single broker connection, instead of opening a connection per email. A failure to
+    publish one email is logged and does not prevent the others from being sent.
+
+    Arguments:
+        *subject*
+            The email subject
+        *greeting*
+            The email greeting (prefix)
+        *closing*
+            The email closing (suffix)
+        *assignments*
+            List of dicts with the offer_assignment_id, learner_email, code and
+            redemptions_remaining of each assignment.
+        *code_expiration_date*
+            Date till the codes are valid.
+    """
+    if settings.DEBUG:  # pragma: no cover
+        # Avoid breaking devstack when no such service is available.
+        logger.warning("Skipping Sailthru task 'send_offer_assignment_email' because DEBUG=true.")  # pragma: no cover
+        return  # pragma: no cover
+
+    for start in range(0, len(assignments), OFFER_ASSIGNMENT_EMAIL_BATCH_SIZE):
+        with send_offer_assignment_email.app.producer_or_acquire() as producer:
+            for assignment in assignments[start:start + OFFER_ASSIGNMENT_EMAIL_BATCH_SIZE]:
+                email_body = format_assigned_offer_email(
+                    greeting,
+                    closing,
+                    assignment['learner_email'],
+                    assignment['code'],
+                    assignment['redemptions_remaining'],
+                    code_expiration_date
+                )
+                try:
+                    send_offer_assignment_email.apply_async(
+                        args=(assignment['learner_email'], assignment['offer_assignment_id'], subject, email_body,
+                              sender_alias, None, base_enterprise_url),
+                        producer=producer
+                    )
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.exception(
+                        '[Offer Assignment] Email for offer_assignment_id: %d with subject %r, '
+                        'greeting %r and closing %r raised exception: %r',
+                        assignment['offer_assignment_id'],
+                        subject,
+                        greeting,
+                        closing,
+                        exc
+                    )
+
+
 def send_revoked_offer_email(
         subject,
         greeting,
@@ -0,0 +1,102 @@
+"""
+This command creates the orders of the pending bulk manual enrollment order jobs.
+"""
+
+
+import logging
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils.timezone import now
+from oscar.core.loading import get_model
+
+from ecommerce.extensions.order.manual_enrollment import (
+    MANUAL_ENROLLMENT_ORDER_CHUNK_SIZE,
+    BulkManualEnrollmentOrderCreator
+)
+
+logger = logging.getLogger(__name__)
+ManualEnrollmentOrderJob = get_model('order', 'ManualEnrollmentOrderJob')
+
+STALE_JOB_MINUTES = 60
+
+
+class Command(BaseCommand):
+    """
+    Create the orders of the pending jobs submitted to the bulk manual enrollment order endpoint.
+
+    Each job is claimed before it is processed, so that several instances of this command can run at once.
+    The number of processed enrollments is saved after every chunk, and the results once the job is completed.
+
+    A running job whose progress has not been saved for --stale-minutes was left behind by an instance which
+    stopped, and is processed again. Orders created before it stopped are found as existing ones.
+
+    Example:
+
+        ./manage.py process_manual_enrollment_order_jobs --chunk-size 200 --stale-minutes 60
+    """
+
+    help = 'Create the orders of the pending bulk manual enrollment order jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            action='store',
+            dest='chunk_size',
+            default=MANUAL_ENROLLMENT_ORDER_CHUNK_SIZE,
+            type=int,
+            help='Number of enrollments whose orders are created in a single transaction.'
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            action='store',
+            dest='stale_minutes',
+            default=STALE_JOB_MINUTES,
+            type=int,
+            help='Minutes after which a running job whose progress has not been saved is processed again.'
+        )
+
+    def handle(self, *args, **options):
+        self.reclaim_stale_jobs(options['stale_minutes'])
+
+        job_ids = ManualEnrollmentOrderJob.objects.filter(
+            status=ManualEnrollmentOrderJob.PENDING
+        ).order_by('created').values_list('id', flat=True)
+
+        for job_id in job_ids:
+            claimed = ManualEnrollmentOrderJob.objects.filter(
+                id=job_id, status=ManualEnrollmentOrderJob.PENDING
+            ).update(status=ManualEnrollmentOrderJob.RUNNING, modified=now())
+            if claimed:
+                self.process_job(ManualEnrollmentOrderJob.objects.get(id=job_id), options['chunk_size'])
+
+    def reclaim_stale_jobs(self, stale_minutes):
+        """
+        Mark the running jobs whose progress has not been saved for stale_minutes as pending again.
+        """
+        stale_jobs = ManualEnrollmentOrderJob.objects.filter(
+            status=ManualEnrollmentOrderJob.RUNNING, modified__lt=now() - timedelta(minutes=stale_minutes)
+        )
+        for job_id in stale_jobs.values_list('id', flat=True):
+            reclaimed = stale_jobs.filter(id=job_id).update(status=ManualEnrollmentOrderJob.PENDING, modified=now())
+            if reclaimed:
+                logger.warning('Reclaimed stale manual enrollment order job [%d].', job_id)
+
+    def process_job(self, job, chunk_size):
+        logger.info('Processing manual enrollment order job [%d] with [%d] enrollments.', job.id, len(job.enrollments))
+
+        def save_progress(num_processed):
+            ManualEnrollmentOrderJob.objects.filter(id=job.id).update(num_processed=num_processed, modified=now())
+
+        creator = BulkManualEnrollmentOrderCreator(job.site, job.requested_by, chunk_size=chunk_size)
+        try:
+            job.results = creator.create_orders(job.enrollments, on_progress=save_progress)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Failed to process manual enrollment order job [%d].', job.id)
+            job.refresh_from_db(fields=['num_processed'])
+            job.status = ManualEnrollmentOrderJob.FAILED
+        else:
+            job.num_processed = len(job.enrollments)
+            job.status = ManualEnrollmentOrderJob.COMPLETED
+            logger.info('Completed manual enrollment order job [%d].', job.id)
+        job.save()
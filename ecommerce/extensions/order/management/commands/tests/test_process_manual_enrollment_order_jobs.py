@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.utils.timezone import now
+from mock import patch
+from oscar.core.loading import get_model
+from testfixtures import LogCapture
+
+from ecommerce.tests.testcases import TestCase
+
+LOGGER_NAME = 'ecommerce.extensions.order.management.commands.process_manual_enrollment_order_jobs'
+CREATE_ORDERS = 'ecommerce.extensions.order.manual_enrollment.BulkManualEnrollmentOrderCreator.create_orders'
+ManualEnrollmentOrderJob = get_model('order', 'ManualEnrollmentOrderJob')
+
+
+class ProcessManualEnrollmentOrderJobsTests(TestCase):
+    """
+    Tests for `process_manual_enrollment_order_jobs` command.
+    """
+
+    def create_job(self, status=ManualEnrollmentOrderJob.PENDING):
+        return ManualEnrollmentOrderJob.objects.create(
+            site=self.site, requested_by=self.create_user(), enrollments=[{'username': 'ma'}], status=status
+        )
+
+    def test_process_pending_jobs(self):
+        """ Test that command processes the pending jobs only, saving their progress and results."""
+        job = self.create_job()
+        running_job = self.create_job(status=ManualEnrollmentOrderJob.RUNNING)
+        results = [{'username': 'ma', 'status': 'failure'}]
+
+        def create_orders(enrollments, on_progress):
+            on_progress(len(enrollments))
+            self.assertEqual(ManualEnrollmentOrderJob.objects.get(id=job.id).num_processed, 1)
+            return results
+
+        with patch(CREATE_ORDERS, side_effect=create_orders) as mock_create_orders:
+            call_command('process_manual_enrollment_order_jobs', chunk_size=10)
+        self.assertEqual(mock_create_orders.call_count, 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ManualEnrollmentOrderJob.COMPLETED)
+        self.assertEqual(job.results, results)
+        running_job.refresh_from_db()
+        self.assertEqual(running_job.status, ManualEnrollmentOrderJob.RUNNING)
+
+    def test_process_failed_job(self):
+        """ Test that command marks a job failed if its orders cannot be created."""
+        job = self.create_job()
+
+        with LogCapture(LOGGER_NAME) as log, patch(CREATE_ORDERS, side_effect=Exception):
+            call_command('process_manual_enrollment_order_jobs')
+            log.check_present(
+                (LOGGER_NAME, 'ERROR', 'Failed to process manual enrollment order job [{}].'.format(job.id))
+            )
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ManualEnrollmentOrderJob.FAILED)
+        self.assertIsNone(job.results)
+
+    def test_reclaim_stale_job(self):
+        """ Test that command processes again a running job whose progress has not been saved for too long."""
+        stale_job = self.create_job(status=ManualEnrollmentOrderJob.RUNNING)
+        ManualEnrollmentOrderJob.objects.filter(id=stale_job.id).update(modified=now() - timedelta(minutes=61))
+        running_job = self.create_job(status=ManualEnrollmentOrderJob.RUNNING)
+
+        with LogCapture(LOGGER_NAME) as log, patch(CREATE_ORDERS, return_value=[]) as mock_create_orders:
+            call_command('process_manual_enrollment_order_jobs', stale_minutes=60)
+            log.check_present(
+                (LOGGER_NAME, 'WARNING', 'Reclaimed stale manual enrollment order job [{}].'.format(stale_job.id))
+            )
+        self.assertEqual(mock_create_orders.call_count, 1)
+
+        stale_job.refresh_from_db()
+        self.assertEqual(stale_job.status, ManualEnrollmentOrderJob.COMPLETED)
+        running_job.refresh_from_db()
+        self.assertEqual(running_job.status, ManualEnrollmentOrderJob.RUNNING)
@@ -0,0 +1,514 @@
+"""
+Creation of orders for learners manually enrolled in courses they paid for outside of the ecommerce.
+"""
+import logging
+from contextlib import contextmanager
+from decimal import Decimal
+
+import crum
+import dateutil.parser
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.test import RequestFactory
+from django.urls import reverse
+from oscar.core.loading import get_class, get_model
+from requests.exceptions import ConnectionError, Timeout  # pylint: disable=redefined-builtin
+from slumber.exceptions import HttpServerError, SlumberBaseException
+
+from ecommerce.courses.models import Course
+from ecommerce.courses.utils import get_course_run_detail
+from ecommerce.enterprise.mixins import EnterpriseDiscountMixin
+from ecommerce.extensions.analytics.utils import audit_log
+from ecommerce.extensions.checkout.mixins import EdxOrderPlacementMixin
+from ecommerce.extensions.fulfillment.status import LINE, ORDER
+from ecommerce.extensions.offer.models import OFFER_PRIORITY_MANUAL_ORDER
+from ecommerce.extensions.order.benefits import ManualEnrollmentOrderDiscountBenefit
+from ecommerce.extensions.order.conditions import ManualEnrollmentOrderDiscountCondition
+from ecommerce.programs.custom import class_path
+
+logger = logging.getLogger(__name__)
+
+Applicator = get_class('offer.applicator', 'Applicator')
+Basket = get_model('basket', 'Basket')
+Benefit = get_model('offer', 'Benefit')
+Condition = get_model('offer', 'Condition')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+Order = get_model('order', 'Order')
+OrderLine = get_model('order', 'Line')
+Product = get_model('catalogue', 'Product')
+User = get_user_model()
+
+SUCCESS, FAILURE = 'success', 'failure'
+PAID_MODES = ('verified', 'professional')
+MANUAL_ENROLLMENT_ORDER_CHUNK_SIZE = 200
+
+
+def get_enrollment_data(enrollment):
+    """
+    Return parameters from incoming enrollment.
+
+    Required Parameters:
+        lms_user_id:  User's platform id.
+        learner_username:  User's username.
+        learner_email:  User's email.
+        course_run_key:  Course key.
+        mode: Course mode.
+
+    Optional Parameters:
+        discount_percentage: Discounted percentage for manual enrollment.
+        sales_force_id: Salesforce opportunity id.
+
+    Raises:
+        ValidationError: If any required parameter is not present in enrollment.
+    """
+    lms_user_id = enrollment.get('lms_user_id')
+    learner_username = enrollment.get('username')
+    learner_email = enrollment.get('email')
+    course_run_key = enrollment.get('course_run_key')
+    discount_percentage = enrollment.get('discount_percentage')
+    sales_force_id = enrollment.get('sales_force_id')
+    mode = enrollment.get('mode')
+    if not (lms_user_id and learner_username and learner_email and course_run_key and mode):
+        enrollment_parameters_state = [
+            ("'lms_user_id'", bool(lms_user_id)),
+            ("'username'", bool(learner_username)),
+            ("'email'", bool(learner_email)),
+            ("'course_run_key'", bool(course_run_key)),
+            ("'mode'", bool(mode)),
+        ]
+        missing_params = ', '.join(name for name, present in enrollment_parameters_state if not present)
+        logger.error(
+            '[Manual Order Creation Failure] Missing required enrollment data. Message: %s', missing_params
+        )
+        raise ValidationError('Missing required enrollment data: {}'.format(missing_params))
+
+    if mode not in PAID_MODES:
+        raise ValidationError('Course mode should be paid')
+
+    if discount_percentage is not None:
+        if not isinstance(discount_percentage, float) or (discount_percentage < 0.0 or discount_percentage > 100.0):
+            raise ValidationError('Discount percentage should be a float from 0 to 100.')
+    return lms_user_id, learner_username, learner_email, course_run_key, mode, discount_percentage, sales_force_id
+
+
+def get_or_create_discount_offer(enterprise_customer_name, enterprise_customer_uuid, sales_force_id):
+    """
+    Get or Create 100% discount offer for `Manual Enrollment Order`.
+    """
+    condition, _ = Condition.objects.get_or_create(
+        proxy_class=class_path(ManualEnrollmentOrderDiscountCondition),
+        enterprise_customer_uuid=enterprise_customer_uuid
+    )
+
+    if condition.enterprise_customer_name != enterprise_customer_name:
+        condition.enterprise_customer_name = enterprise_customer_name
+        condition.save()
+
+    benefit, _ = Benefit.objects.get_or_create(
+        proxy_class=class_path(ManualEnrollmentOrderDiscountBenefit),
+        value=100,
+        max_affected_items=1,
+    )
+
+    offer_kwargs = {
+        'offer_type': ConditionalOffer.USER,
+        'condition': condition,
+        'benefit': benefit,
+        'priority': OFFER_PRIORITY_MANUAL_ORDER,
+    }
+
+    offer, __ = ConditionalOffer.objects.get_or_create(
+        name='Manual Course Enrollment Order Offer for enterprise {}'.format(enterprise_customer_uuid),
+        defaults=offer_kwargs
+    )
+    if sales_force_id and offer.sales_force_id != sales_force_id:
+        offer.sales_force_id = sales_force_id
+        offer.save()
+
+    return offer
+
+
+@contextmanager
+def manual_enrollment_order_request(site, user):
+    """
+    Make a request of the manual course enrollment order endpoint the current request, as
+    ManualEnrollmentOrderDiscountCondition only applies to the orders of this endpoint.
+    """
+    current_request = crum.get_current_request()
+    request = RequestFactory().post(reverse('api:v2:manual-course-enrollment-order-list'))
+    request.site = site
+    request.user = user
+    crum.set_current_request(request)
+    try:
+        yield request
+    finally:
+        crum.set_current_request(current_request)
+
+
+class ManualEnrollmentRow:
+    """
+    An enrollment being processed by BulkManualEnrollmentOrderCreator, with its validated data and the user, seat
+    and course UUID resolved for it.
+    """
+
+    def __init__(self, index, enrollment):
+        self.index = index
+        self.enrollment = enrollment
+        (
+            self.lms_user_id,
+            self.username,
+            self.email,
+            self.course_run_key,
+            self.mode,
+            self.discount_percentage,
+            self.sales_force_id,
+        ) = get_enrollment_data(enrollment)
+        self.user = None
+        self.seat = None
+        self.course_uuid = None
+
+    def result(self, status, detail, new_order_created=None):
+        return dict(self.enrollment, status=status, detail=detail, new_order_created=new_order_created)
+
+
+class ManualEnrollmentOrderPlacementMixin(EdxOrderPlacementMixin, EnterpriseDiscountMixin):
+    """
+    Place the free orders of manual enrollments.
+
+    The learners are already enrolled, so orders are completed as soon as they are placed, instead of being
+    fulfilled by the post_checkout receivers.
+    """
+
+    def place_manual_enrollment_order(self, basket, discount_percentage, date_placed):
+        """
+        Place the order of a basket holding the seat of a manual enrollment, with its discount offer applied.
+        """
+        order = self.place_free_order(basket)
+        self._update_order_according_to_date_place(order, date_placed)
+        self._update_all_orderline_with_enterprise_discount(order, discount_percentage)
+        return order
+
+    def _update_all_orderline_with_enterprise_discount(self, order, discount_percentage):
+        """
+        Updates all order's lines with calculated discount metrics if applicable
+        """
+        if discount_percentage is None:
+            return
+
+        # update_orderline_with_enterprise_discount function expects Decimal object
+        discount_percentage = Decimal(discount_percentage)
+        for line in order.lines.all():
+            self.update_orderline_with_enterprise_discount_metadata(
+                order,
+                line,
+                discount_percentage=discount_percentage,
+                is_manual_order=True
+            )
+
+    def _update_order_according_to_date_place(self, order, date_placed):
+        """
+            This is a Single Time use functionality to created order records for old enrollments.
+            We will revert this PR after using it.
+        Args:
+            order: An Order object
+            date_placed: iso format datetime
+
+        Returns:
+            Nothing
+
+        """
+        if not date_placed:
+            return
+
+        date_placed = dateutil.parser.isoparse(date_placed)
+        order.date_placed = date_placed
+        order.save()
+
+        for line in order.lines.all():
+            old_stock = line.stockrecord.history.filter(history_date__lt=date_placed).order_by('-history_date').first()
+            stock_record = old_stock or line.stockrecord
+            price = stock_record.price_excl_tax or Decimal('0')
+            quantity = line.quantity
+            line.line_price_before_discounts_incl_tax = price * quantity
+            line.line_price_before_discounts_excl_tax = price * quantity
+            line.unit_price_incl_tax = price
+            line.unit_price_excl_tax = price
+            line.save()
+
+        logger.info('[Manual Order Back populate] Order completed. Order: %s', order.number,)
+
+    def handle_successful_order(self, order, request=None):  # pylint: disable=arguments-differ
+        """
+        Fulfill the order immediately.
+        """
+        for line in order.lines.all():
+            line.set_status(LINE.COMPLETE)
+
+        order.set_status(ORDER.COMPLETE)
+
+        audit_log(
+            'manual_order_fulfilled',
+            amount=order.total_excl_tax,
+            basket_id=order.basket.id,
+            currency=order.currency,
+            order_number=order.number,
+            user_id=order.user.id,
+            contains_coupon=order.contains_coupon
+        )
+
+        return order
+
+
+class BulkManualEnrollmentOrderCreator(ManualEnrollmentOrderPlacementMixin):
+    """
+    Create the orders of manual enrollments in chunks.
+
+    The learners, courses, seats, existing orders and discount offers of a chunk are resolved with a few queries,
+    in a single transaction. Each new order is then placed like the orders of ManualCourseEnrollmentOrderViewSet,
+    with the same order placement signals and completion, in a savepoint so that a failing order does not roll
+    back the others. A learner appears at most once per chunk, so that orders created earlier in the run are
+    found as existing ones.
+    """
+
+    def __init__(self, site, request_user, chunk_size=MANUAL_ENROLLMENT_ORDER_CHUNK_SIZE):
+        self.site = site
+        self.request_user = request_user
+        self.chunk_size = chunk_size
+        self.seats = {}
+        self.course_uuids = {}
+
+    def create_orders(self, enrollments, on_progress=None):
+        """
+        Create the orders of the enrollments.
+
+        Arguments:
+            enrollments (list): Enrollments in the format accepted by ManualCourseEnrollmentOrderViewSet.
+            on_progress (callable): Called with the number of processed enrollments after every chunk.
+
+        Returns:
+            list: The enrollments, in order, with the additional `status`, `detail` and `new_order_created`
+                fields returned by ManualCourseEnrollmentOrderViewSet.
+        """
+        logger.info(
+            '[Manual Order Creation] Bulk request received. Enrollments: %d, RequestUser: %s',
+            len(enrollments),
+            self.request_user.username,
+        )
+        results = [None] * len(enrollments)
+        rows = []
+        for index, enrollment in enumerate(enrollments):
+            try:
+                rows.append(ManualEnrollmentRow(index, enrollment))
+            except ValidationError as ex:
+                results[index] = dict(enrollment, status=FAILURE, detail=ex.message, new_order_created=None)
+
+        num_processed = len(enrollments) - len(rows)
+        for chunk in self._get_chunks(rows):
+            for index, result in self._create_chunk_orders(chunk).items():
+                results[index] = result
+            num_processed += len(chunk)
+            if on_progress:
+                on_progress(num_processed)
+
+        return results
+
+    def _get_chunks(self, rows):
+        """
+        Yield chunks of at most chunk_size rows, starting a new chunk when a learner is repeated.
+        """
+        chunk, usernames = [], set()
+        for row in rows:
+            if len(chunk) >= self.chunk_size or row.username in usernames:
+                yield chunk
+                chunk, usernames = [], set()
+            chunk.append(row)
+            usernames.add(row.username)
+        if chunk:
+            yield chunk
+
+    def _create_chunk_orders(self, chunk):
+        """
+        Create the orders of a chunk of rows, and return their results keyed by enrollment index.
+        """
+        results = {}
+        try:
+            with transaction.atomic():
+                self._set_learner_users(chunk)
+                rows = self._set_seats(chunk, results)
+                rows = self._update_existing_orders(rows, results)
+                self._create_new_orders(rows, results)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception(
+                '[Manual Order Creation Failure] Failed to place the orders of %d enrollments.', len(chunk)
+            )
+            for row in chunk:
+                if row.index not in results or results[row.index]['status'] == SUCCESS:
+                    results[row.index] = row.result(FAILURE, 'Failed to create free order')
+        return results
+
+    def _set_learner_users(self, chunk):
+        """
+        Set the users of the chunk's learners, creating the missing ones and updating the email and LMS user id of
+        the existing ones.
+        """
+        rows = {row.username: row for row in chunk}
+        users = {user.username: user for user in User.objects.filter(username__in=rows)}
+
+        updated_users = []
+        for username, user in users.items():
+            row = rows[username]
+            if (user.email, user.lms_user_id) != (row.email, row.lms_user_id):
+                user.email, user.lms_user_id = row.email, row.lms_user_id
+                updated_users.append(user)
+        User.objects.bulk_update(updated_users, ['email', 'lms_user_id'])
+
+        missing = [username for username in rows if username not in users]
+        User.objects.bulk_create([
+            User(username=username, email=rows[username].email, lms_user_id=rows[username].lms_user_id)
+            for username in missing
+        ])
+        users.update((user.username, user) for user in User.objects.filter(username__in=missing))
+
+        for row in chunk:
+            row.user = users[row.username]
+
+    def _get_seat(self, course, mode):
+        key = (course.id, mode)
+        if key not in self.seats:
+            self.seats[key] = course.seat_products.filter(
+                attributes__name='certificate_type',
+                attribute_values__value_text=mode
+            ).first()
+        return self.seats[key]
+
+    def _get_course_uuid(self, seat):
+        if seat.course_id not in self.course_uuids:
+            self.course_uuids[seat.course_id] = get_course_run_detail(self.site, seat.course_id)['course_uuid']
+        return self.course_uuids[seat.course_id]
+
+    def _set_seats(self, chunk, results):
+        """
+        Set the seats and course UUIDs of the chunk's rows, and return the rows for which both are found.
+        """
+        courses = Course.objects.in_bulk({row.course_run_key for row in chunk})
+        rows = []
+        for row in chunk:
+            course = courses.get(row.course_run_key)
+            if course is None:
+                results[row.index] = row.result(FAILURE, 'Course not found')
+                continue
+
+            row.seat = self._get_seat(course, row.mode)
+            try:
+                row.course_uuid = self._get_course_uuid(row.seat)
+            except (SlumberBaseException, ConnectionError, Timeout, HttpServerError, AttributeError) as ex:
+                logger.exception(
+                    "Could not access existing purchased line. User: %s, Site: %s, course_run_key: %s, message: %s",
+                    row.user,
+                    self.site,
+                    course.id,
+                    ex,
+                )
+                results[row.index] = row.result(FAILURE, 'Failed to create free order')
+                continue
+            rows.append(row)
+        return rows
+
+    def _update_existing_orders(self, rows, results):
+        """
+        Update the enterprise discount of the orders the learners already purchased the seats, or their course
+        entitlements, with, and return the rows without such an order.
+        """
+        user_ids = {}
+        for row in rows:
+            user_ids.setdefault((row.seat, row.course_uuid), set()).add(row.user.id)
+
+        existing_orders = {}
+        for (seat, course_uuid), seat_user_ids in user_ids.items():
+            products = Product.objects.filter(
+                Q(pk=seat.pk) | Q(attributes__code='UUID', attribute_values__value_text=course_uuid)
+            )
+            lines = OrderLine.objects.filter(
+                product__in=products, order__user_id__in=seat_user_ids, status=LINE.COMPLETE
+            ).select_related('order').order_by('id')
+            for line in lines:
+                existing_orders.setdefault((seat.id, line.order.user_id), line.order)
+
+        new_rows = []
+        for row in rows:
+            order = existing_orders.get((row.seat.id, row.user.id))
+            if order is None:
+                new_rows.append(row)
+                continue
+
+            self._update_all_orderline_with_enterprise_discount(order, row.discount_percentage)
+            results[row.index] = row.result(SUCCESS, order.number, new_order_created=False)
+        return new_rows
+
+    @staticmethod
+    def _get_discount_offers(rows):
+        """
+        Return the manual enrollment discount offers of the rows keyed by enterprise customer UUID.
+
+        As when orders are created one by one, the last enrollment of an enterprise customer sets its name, and the
+        last Salesforce opportunity id given is kept.
+        """
+        customers = {}
+        for row in rows:
+            enterprise_customer_uuid = row.enrollment.get('enterprise_customer_uuid')
+            __, sales_force_id = customers.get(enterprise_customer_uuid, (None, None))
+            customers[enterprise_customer_uuid] = (
+                row.enrollment.get('enterprise_customer_name'), row.sales_force_id or sales_force_id
+            )
+        return {
+            enterprise_customer_uuid: get_or_create_discount_offer(name, enterprise_customer_uuid, sales_force_id)
+            for enterprise_customer_uuid, (name, sales_force_id) in customers.items()
+        }
+
+    def _create_new_orders(self, rows, results):
+        """
+        Place the orders of the rows, as the manual course enrollment order endpoint does.
+        """
+        if not rows:
+            return
+
+        offers = self._get_discount_offers(rows)
+        with manual_enrollment_order_request(self.site, self.request_user):
+            for row in rows:
+                self._create_new_order(row, offers, results)
+
+    def _create_new_order(self, row, offers, results):
+        """
+        Place the order of a row, with the discount offer of its enterprise customer.
+        """
+        basket = Basket.create_basket(self.site, row.user)
+        basket.add_product(row.seat)
+        Applicator().apply_offers(basket, [offers[row.enrollment.get('enterprise_customer_uuid')]])
+        try:
+            with transaction.atomic():
+                order = self.place_manual_enrollment_order(
+                    basket, row.discount_percentage, row.enrollment.get('date_placed')
+                )
+        except Exception:  # pylint: disable=broad-except
+            logger.exception(
+                '[Manual Order Creation Failure] Failed to place the order. User: %s, Course: %s, Basket: %s, '
+                'Product: %s',
+                row.username,
+                row.course_run_key,
+                basket.id,
+                row.seat.id,
+            )
+            results[row.index] = row.result(FAILURE, 'Failed to create free order')
+            return
+
+        logger.info(
+            '[Manual Order Creation] Order completed. User: %s, Course: %s, Basket: %s, Order: %s, Product: %s',
+            row.username,
+            row.course_run_key,
+            basket.id,
+            order.number,
+            row.seat.id,
+        )
+        results[row.index] = row.result(SUCCESS, order.number, new_order_created=True)
@@ -1,10 +1,13 @@
 
 
 from config_models.models import ConfigurationModel
+from django.conf import settings
 from django.core.validators import FileExtensionValidator
 from django.db import models
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
+from django_extensions.db.models import TimeStampedModel
+from jsonfield import JSONField
 from oscar.apps.order.abstract_models import AbstractLine, AbstractOrder, AbstractOrderDiscount, AbstractPaymentEvent
 from simple_history.models import HistoricalRecords
 
@@ -56,6 +59,34 @@ class MarkOrdersStatusCompleteConfig(ConfigurationModel):
     )
 
 
+class ManualEnrollmentOrderJob(TimeStampedModel):
+    """
+    Bulk creation of manual enrollment orders, requested through ManualCourseEnrollmentOrderViewSet and processed
+    by the process_manual_enrollment_order_jobs command.
+
+    .. pii: The enrollments and results contain the username and email of every learner.
+    .. pii_types: username, email_address
+    .. pii_retirement: retained
+    """
+    PENDING, RUNNING, COMPLETED, FAILED = 'pending', 'running', 'completed', 'failed'
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (RUNNING, _('Running')),
+        (COMPLETED, _('Completed')),
+        (FAILED, _('Failed')),
+    )
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    site = models.ForeignKey('sites.Site', on_delete=models.CASCADE)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    enrollments = JSONField()
+    results = JSONField(null=True, blank=True)
+    num_processed = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return '{id}: {status}'.format(id=self.id, status=self.status)
+
+
 # If two models with the same name are declared within an app, Django will only use the first one.
 # noinspection PyUnresolvedReferences
 from oscar.apps.order.models import *  # noqa isort:skip pylint: disable=wildcard-import,unused-wildcard-import,wrong-import-position,wrong-import-order,ungrouped-imports
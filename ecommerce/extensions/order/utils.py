@@ -6,7 +6,6 @@ import logging
 import waffle
 from django.conf import settings
 from edx_django_utils.cache import TieredCache
-from edx_rest_api_client.client import EdxRestApiClient
 from edx_rest_api_client.exceptions import HttpNotFoundError
 from oscar.apps.order.utils import OrderCreator as OscarOrderCreator
 from oscar.core.loading import get_model
@@ -14,14 +13,13 @@ from requests.exceptions import ConnectionError as ReqConnectionError  # pylint:
 from requests.exceptions import ConnectTimeout
 from threadlocals.threadlocals import get_current_request
 
-from ecommerce.core.url_utils import get_lms_entitlement_api_url
+from ecommerce.core.reference_data import options
 from ecommerce.extensions.order.constants import DISABLE_REPEAT_ORDER_CHECK_SWITCH_NAME
 from ecommerce.extensions.refund.status import REFUND_LINE
 from ecommerce.referrals.models import Referral
 
 logger = logging.getLogger(__name__)
 
-Option = get_model('catalogue', 'Option')
 Order = get_model('order', 'Order')
 OrderLine = get_model('order', 'Line')
 RefundLine = get_model('refund', 'RefundLine')
@@ -147,8 +145,7 @@ class UserAlreadyPlacedOrder:
             bool: True if the entitlement is expired
 
         """
-        entitlement_api_client = EdxRestApiClient(get_lms_entitlement_api_url(),
-                                                  jwt=site.siteconfiguration.access_token)
+        entitlement_api_client = site.siteconfiguration.entitlement_api_client
         partner_short_code = site.siteconfiguration.partner.short_code
         key = 'course_entitlement_detail_{}{}'.format(entitlement_uuid, partner_short_code)
         entitlement_cached_response = TieredCache.get_cached_response(key)
@@ -186,7 +183,7 @@ class UserAlreadyPlacedOrder:
         if waffle.switch_is_active(DISABLE_REPEAT_ORDER_CHECK_SWITCH_NAME):
             return False
 
-        entitlement_option = Option.objects.get(code='course_entitlement')
+        entitlement_option = options.get('course_entitlement')
 
         orders_lines = OrderLine.objects.filter(product=product, order__user=user)
         for order_line in orders_lines:
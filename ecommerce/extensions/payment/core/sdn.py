@@ -5,6 +5,7 @@ import logging
 import re
 import string
 import unicodedata
+from collections import defaultdict
 from datetime import datetime, timezone
 from urllib.parse import urlencode
 
@@ -15,6 +16,7 @@ from django.contrib.auth import logout
 from oscar.core.loading import get_model
 from requests.exceptions import HTTPError, Timeout
 
+from ecommerce.core.http_clients import get_session
 from ecommerce.extensions.payment.exceptions import SDNFallbackDataEmptyError
 from ecommerce.extensions.payment.models import SDNCheckFailure, SDNFallbackData, SDNFallbackMetadata
 
@@ -24,6 +26,11 @@ BasketAttribute = get_model('basket', 'BasketAttribute')
 BasketAttributeType = get_model('basket', 'BasketAttributeType')
 
 COUNTRY_CODES = {country.alpha_2 for country in pycountry.countries}
+SDN_FALLBACK_SOURCE = 'Specially Designated Nationals (SDN) - Treasury Department'
+SDN_FALLBACK_TYPE = 'Individual'
+
+# The index for the current list, built at most once per process and list version.
+_sdn_fallback_index = None
 
 
 def checkSDN(request, name, city, country):
@@ -80,8 +87,9 @@ def checkSDNFallback(name, city, country):
     """
     Performs an SDN check against the SDNFallbackData
 
-    First, filter the SDNFallbackData records by source, type and country.
-    Then, compare the provided name/city against each record and return whether we find a match.
+    Only SDN individuals in the given country are considered. The provided name/city are
+    compared against each record using the in-memory SDNFallbackIndex, and the number of
+    matching records is returned.
     The check uses the following properties:
         1. Order of words doesn’t matter
         2. Number of times that a given word appears doesn’t matter
@@ -89,17 +97,87 @@ def checkSDNFallback(name, city, country):
         4. If a subset of words match, it still counts as a match
         5. Capitalization doesn’t matter
     """
-    hit_count = 0
-    records = SDNFallbackData.get_current_records_and_filter_by_source_and_type(
-        'Specially Designated Nationals (SDN) - Treasury Department', 'Individual'
-    )
-    records = records.filter(countries__contains=country)
-    processed_name, processed_city = process_text(name), process_text(city)
-    for record in records:
-        record_names, record_addresses = set(record.names.split()), set(record.addresses.split())
-        if (processed_name.issubset(record_names) and processed_city.issubset(record_addresses)):
-            hit_count = hit_count + 1
-    return hit_count
+    return get_sdn_fallback_index().count_matches(name, city, country)
+
+
+class SDNFallbackIndex:
+    """
+    Inverted index over the current SDNFallbackData records used by checkSDNFallback.
+
+    For each country, the index maps every name token and every address token to the ids
+    of the records containing it. A record matches when all name tokens and all city tokens
+    are among its tokens, so a check is an intersection of a few sets instead of a scan of
+    every record in the list.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.records_by_country = defaultdict(set)
+        self.names_by_country = defaultdict(lambda: defaultdict(set))
+        self.addresses_by_country = defaultdict(lambda: defaultdict(set))
+
+    @classmethod
+    def build(cls, metadata_entry):
+        """
+        Build the index from the SDN individuals imported with the given metadata entry.
+        """
+        index = cls((metadata_entry.id, metadata_entry.file_checksum))
+        records = SDNFallbackData.objects.filter(
+            sdn_fallback_metadata=metadata_entry,
+            source=SDN_FALLBACK_SOURCE,
+            sdn_type=SDN_FALLBACK_TYPE,
+        ).values_list('id', 'names', 'addresses', 'countries')
+
+        for record_id, names, addresses, countries in records.iterator():
+            names, addresses = names.split(), addresses.split()
+            for country in countries.split():
+                index.records_by_country[country].add(record_id)
+                for token in names:
+                    index.names_by_country[country][token].add(record_id)
+                for token in addresses:
+                    index.addresses_by_country[country][token].add(record_id)
+        return index
+
+    def count_matches(self, name, city, country):
+        """
+        Return the number of records in the country whose names contain every word of the
+        name and whose addresses contain every word of the city.
+        """
+        candidates = self.records_by_country.get(country)
+        if not candidates:
+            return 0
+
+        postings = []
+        for text, tokens_index in ((name, self.names_by_country[country]),
+                                   (city, self.addresses_by_country[country])):
+            for token in process_text(text):
+                record_ids = tokens_index.get(token)
+                if not record_ids:
+                    return 0
+                postings.append(record_ids)
+
+        # Intersecting the rarest tokens first keeps the intermediate sets small.
+        for record_ids in sorted(postings, key=len):
+            candidates = candidates & record_ids
+            if not candidates:
+                return 0
+        return len(candidates)
+
+
+def get_sdn_fallback_index():
+    """
+    Return the index for the current SDN fallback list, building it if this process has
+    not built it yet or a newer list has been imported since.
+
+    Raises:
+        SDNFallbackDataEmptyError: If no list has been imported yet.
+    """
+    global _sdn_fallback_index  # pylint: disable=global-statement
+    metadata_entry = SDNFallbackMetadata.get_current_metadata_entry()
+    index = _sdn_fallback_index
+    if index is None or index.version != (metadata_entry.id, metadata_entry.file_checksum):
+        index = _sdn_fallback_index = SDNFallbackIndex.build(metadata_entry)
+    return index
 
 
 class SDNClient:
@@ -142,7 +220,7 @@ class SDNClient:
         auth_header = {'Authorization': 'Bearer {}'.format(self.api_key)}
 
         try:
-            response = requests.get(
+            response = get_session('sdn').get(
                 sdn_check_url,
                 headers=auth_header,
                 timeout=settings.SDN_CHECK_REQUEST_TIMEOUT
@@ -309,4 +387,6 @@ def populate_sdn_fallback_data_and_metadata(sdn_csv_string):
         metadata_entry.import_timestamp = now
         metadata_entry.save()
         metadata_entry.swap_all_states()
+        # Build the index for the new list right away, so this process does not pay for it on the first check.
+        get_sdn_fallback_index()
     return metadata_entry
@@ -22,6 +22,7 @@ from ecommerce.extensions.payment.core.sdn import (
     checkSDN,
     checkSDNFallback,
     extract_country_information,
+    get_sdn_fallback_index,
     populate_sdn_fallback_data,
     populate_sdn_fallback_data_and_metadata,
     populate_sdn_fallback_metadata,
@@ -509,6 +510,39 @@ Port Andrewport, OR 39456, EE",,,,,,,,,,,,,,http://douglas.com/,Misty Johnson,CV
         sdn_fallback_hit_count = checkSDNFallback('Juan Cruz', 'North Kristinaport', 'SN')
         self.assertEqual(sdn_fallback_hit_count, 2)
 
+    def test_sdn_fallback_index_loaded_once(self):
+        """
+        Verify the fallback check is served from the index once it has been built for the current list.
+        """
+        # pylint: disable=line-too-long
+        csv_string = self.csv_header + """94734218,Specially Designated Nationals (SDN) - Treasury Department,96663868,Individual,material,Juan M. de la Cruz,Dr.,"17472 Christie Stream Apt. 976 North Kristinaport, HI 91033, SN",,,,,,,,,,,,,,https://www.juarez-collier.org/,Wendy Brock,DJ,1944-03-05,Faroe Islands,PK,http://richardson-richardson.org/,CI"""
+        # pylint: enable=line-too-long
+        populate_sdn_fallback_data_and_metadata(csv_string)
+        checkSDNFallback('Juan', 'Kristinaport', 'SN')
+
+        # Only the current metadata entry is looked up for each check, the records are not read again.
+        with self.assertNumQueries(2):
+            self.assertEqual(checkSDNFallback('Juan Cruz', 'North Kristinaport', 'SN'), 1)
+            self.assertEqual(checkSDNFallback('Juan Cruz', 'North Kristinaport', 'US'), 0)
+
+    def test_sdn_fallback_index_rebuilt_on_import(self):
+        """
+        Verify the index is rebuilt when a new list is imported.
+        """
+        # pylint: disable=line-too-long
+        csv_string = self.csv_header + """94734218,Specially Designated Nationals (SDN) - Treasury Department,96663868,Individual,material,Juan M. de la Cruz,Dr.,"17472 Christie Stream Apt. 976 North Kristinaport, HI 91033, SN",,,,,,,,,,,,,,https://www.juarez-collier.org/,Wendy Brock,DJ,1944-03-05,Faroe Islands,PK,http://richardson-richardson.org/,CI"""
+        # pylint: enable=line-too-long
+        populate_sdn_fallback_data_and_metadata(csv_string)
+        index = get_sdn_fallback_index()
+        self.assertEqual(checkSDNFallback('Sarah', 'Port Andrewport', 'EE'), 0)
+
+        # pylint: disable=line-too-long
+        populate_sdn_fallback_data_and_metadata(csv_string + """
+37539856,Specially Designated Nationals (SDN) - Treasury Department,55159852,Individual,hotel,Sarah Jones,Mrs.,"3699 Daniel Highway Port Andrewport, OR 39456, EE",,,,,,,,,,,,,,http://douglas.com/,Misty Johnson,CV,1998-02-15,Ukraine,BO,https://townsend.com/,TM""")
+        # pylint: enable=line-too-long
+        self.assertIsNot(get_sdn_fallback_index(), index)
+        self.assertEqual(checkSDNFallback('Sarah', 'Port Andrewport', 'EE'), 1)
+
 
 class SDNFallbackTestsWithoutSetup(TestCase):
     def test_SDNFallback_empty_data(self):
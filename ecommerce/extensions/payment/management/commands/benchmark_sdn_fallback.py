@@ -0,0 +1,127 @@
+
+
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ecommerce.extensions.payment.core.sdn import (
+    SDN_FALLBACK_SOURCE,
+    SDN_FALLBACK_TYPE,
+    SDNFallbackIndex,
+    populate_sdn_fallback_data_and_metadata,
+    process_text
+)
+from ecommerce.extensions.payment.models import SDNFallbackData, SDNFallbackMetadata
+
+logger = logging.getLogger(__name__)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = """Compare the SDN fallback check using the token index against a scan of the list.
+
+    Uses the current SDN fallback list. To benchmark against the full OFAC list, either run
+    populate_sdn_fallback_data_and_metadata first, or pass the downloaded consolidated CSV
+    with --csv (the import is rolled back afterwards).
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--csv',
+                            action='store',
+                            dest='csv',
+                            default=None,
+                            help='Path to a consolidated screening list CSV to import for the benchmark.')
+        parser.add_argument('--checks',
+                            action='store',
+                            dest='checks',
+                            type=int,
+                            default=1000,
+                            help='Number of fallback checks to run with each implementation.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['csv']:
+                    with open(options['csv'], encoding='utf-8') as csv_file:
+                        populate_sdn_fallback_data_and_metadata(csv_file.read())
+                self._benchmark(options['checks'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _benchmark(self, checks):
+        metadata_entry = SDNFallbackMetadata.get_current_metadata_entry()
+        records = list(self._get_records(metadata_entry))
+        self.stdout.write('Benchmarking {checks} checks against {count} SDN individuals.'.format(
+            checks=checks, count=len(records)
+        ))
+
+        start = time.time()
+        index = SDNFallbackIndex.build(metadata_entry)
+        self._report('Built the index', time.time() - start)
+
+        queries = self._generate_queries(records, checks)
+
+        start = time.time()
+        scan_hits = [self._scan(metadata_entry, *query) for query in queries]
+        self._report('Scan', time.time() - start, checks)
+
+        start = time.time()
+        index_hits = [index.count_matches(*query) for query in queries]
+        self._report('Index', time.time() - start, checks)
+
+        if scan_hits != index_hits:
+            self.stderr.write('The index and the scan returned different hit counts.')
+
+    def _get_records(self, metadata_entry):
+        return SDNFallbackData.objects.filter(
+            sdn_fallback_metadata=metadata_entry,
+            source=SDN_FALLBACK_SOURCE,
+            sdn_type=SDN_FALLBACK_TYPE,
+        ).exclude(countries='')
+
+    def _generate_queries(self, records, checks):
+        """
+        Return (name, city, country) tuples, half of them taken from listed individuals.
+        """
+        queries = []
+        for number in range(checks):
+            if records and number % 2 == 0:
+                record = random.choice(records)
+                names, addresses = record.names.split(), record.addresses.split()
+                queries.append((
+                    ' '.join(random.sample(names, min(2, len(names)))),
+                    ' '.join(random.sample(addresses, min(1, len(addresses)))),
+                    random.choice(record.countries.split()),
+                ))
+            else:
+                queries.append(('Jane Doe {}'.format(number), 'Springfield', 'US'))
+        return queries
+
+    def _scan(self, metadata_entry, name, city, country):
+        """
+        Check a single query by comparing it with every record listed in the country.
+        """
+        hit_count = 0
+        processed_name, processed_city = process_text(name) or set(), process_text(city) or set()
+        for record in self._get_records(metadata_entry).filter(countries__contains=country):
+            if (processed_name.issubset(set(record.names.split())) and
+                    processed_city.issubset(set(record.addresses.split()))):
+                hit_count += 1
+        return hit_count
+
+    def _report(self, action, elapsed, checks=None):
+        if checks:
+            message = '{action}: {checks} checks in {elapsed:.3f}s ({per_check:.3f}ms per check).'.format(
+                action=action, checks=checks, elapsed=elapsed, per_check=elapsed * 1000 / checks
+            )
+        else:
+            message = '{action} in {elapsed:.3f}s.'.format(action=action, elapsed=elapsed)
+        logger.info(message)
+        self.stdout.write(message)
@@ -0,0 +1,35 @@
+
+
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+
+from ecommerce.extensions.payment.models import SDNFallbackData, SDNFallbackMetadata
+from ecommerce.tests.testcases import TestCase
+
+# pylint: disable=line-too-long
+CSV = """_id,source,entity_number,type,programs,name,title,addresses,federal_register_notice,start_date,end_date,standard_order,license_requirement,license_policy,call_sign,vessel_type,gross_tonnage,gross_registered_tonnage,vessel_flag,vessel_owner,remarks,source_list_url,alt_names,citizenships,dates_of_birth,nationalities,places_of_birth,source_information_url,ids
+94734218,Specially Designated Nationals (SDN) - Treasury Department,96663868,Individual,material,Juan M. de la Cruz,Dr.,"17472 Christie Stream Apt. 976 North Kristinaport, HI 91033, SN",,,,,,,,,,,,,,https://www.juarez-collier.org/,Wendy Brock,DJ,1944-03-05,Faroe Islands,PK,http://richardson-richardson.org/,CI
+37539856,Specially Designated Nationals (SDN) - Treasury Department,55159852,Individual,hotel,Sarah Jones,Mrs.,"3699 Daniel Highway Port Andrewport, OR 39456, EE",,,,,,,,,,,,,,http://douglas.com/,Misty Johnson,CV,1998-02-15,Ukraine,BO,https://townsend.com/,TM"""
+# pylint: enable=line-too-long
+
+
+class BenchmarkSDNFallbackTests(TestCase):
+
+    def test_benchmark_with_csv(self):
+        """ Verify the benchmark compares both implementations and rolls back the imported list. """
+        out, err = StringIO(), StringIO()
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as csv_file:
+            csv_file.write(CSV)
+            csv_file.flush()
+            call_command(
+                'benchmark_sdn_fallback', '--csv={}'.format(csv_file.name), '--checks=10', stdout=out, stderr=err
+            )
+
+        self.assertIn('Benchmarking 10 checks against 2 SDN individuals.', out.getvalue())
+        self.assertIn('Scan: 10 checks', out.getvalue())
+        self.assertIn('Index: 10 checks', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+        self.assertFalse(SDNFallbackMetadata.objects.exists())
+        self.assertFalse(SDNFallbackData.objects.exists())
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0031_sdnfallbackdata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paypalwebprofile',
+            name='expires',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -45,6 +45,8 @@ class Source(AbstractSource):
 class PaypalWebProfile(models.Model):
     id = models.CharField(max_length=255, primary_key=True)
     name = models.CharField(max_length=255, unique=True)
+    # Temporary profiles are deleted by PayPal after some time. Null for permanent profiles.
+    expires = models.DateTimeField(null=True, blank=True)
 
 
 class PaypalProcessorConfiguration(SingletonModel):
@@ -241,6 +243,24 @@ class SDNFallbackMetadata(TimeStampedModel):
                 import_state
             )
 
+    @classmethod
+    def get_current_metadata_entry(cls):
+        """
+        Return the SDNFallbackMetadata entry in the 'Current' import state.
+
+        Raises:
+            SDNFallbackDataEmptyError: If no list has been imported yet.
+        """
+        try:
+            return cls.objects.get(import_state='Current')
+        # The 'get' relies on the manage command having been run. If it fails, tell engineer what's needed
+        except cls.DoesNotExist:
+            logger.warning(
+                "SDNFallback: SDNFallbackMetadata is empty! Run this: "
+                "./manage.py populate_sdn_fallback_data_and_metadata"
+            )
+            raise SDNFallbackDataEmptyError
+
 
 class SDNFallbackData(models.Model):
     """
@@ -276,15 +296,7 @@ class SDNFallbackData(models.Model):
         """
         Query the records that have 'Current' import state, and filter by source and sdn_type.
         """
-        try:
-            current_metadata = SDNFallbackMetadata.objects.get(import_state='Current')
-        # The 'get' relies on the manage command having been run. If it fails, tell engineer what's needed
-        except SDNFallbackMetadata.DoesNotExist:
-            logger.warning(
-                "SDNFallback: SDNFallbackMetadata is empty! Run this: "
-                "./manage.py populate_sdn_fallback_data_and_metadata"
-            )
-            raise SDNFallbackDataEmptyError
+        current_metadata = SDNFallbackMetadata.get_current_metadata_entry()
         query_params = {'source': source, 'sdn_fallback_metadata': current_metadata, 'sdn_type': sdn_type}
         return SDNFallbackData.objects.filter(**query_params)
 
@@ -1,8 +1,10 @@
 """ PayPal payment processing. """
 
 
+import datetime
 import logging
 import re
+import time
 import uuid
 from decimal import Decimal
 from urllib.parse import urljoin
@@ -10,12 +12,17 @@ from urllib.parse import urljoin
 import paypalrestsdk
 import waffle
 from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.db import IntegrityError, transaction
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import get_language
+from edx_django_utils.cache import TieredCache
 from oscar.apps.payment.exceptions import GatewayError
 
 from ecommerce.core.url_utils import get_ecommerce_url
+from ecommerce.core.utils import get_cache_key
 from ecommerce.extensions.payment.constants import PAYPAL_LOCALES
 from ecommerce.extensions.payment.models import PaypalProcessorConfiguration, PaypalWebProfile
 from ecommerce.extensions.payment.processors import BasePaymentProcessor, HandledProcessorResponse
@@ -23,6 +30,12 @@ from ecommerce.extensions.payment.utils import get_basket_program_uuid, middle_t
 
 logger = logging.getLogger(__name__)
 
+# PayPal deletes temporary web profiles three hours after they are created.
+TEMPORARY_WEB_PROFILE_LIFETIME = datetime.timedelta(hours=3)
+WEB_PROFILE_REFRESH_LOCK_TIMEOUT = 60  # Value is in seconds.
+WEB_PROFILE_WAIT_TIMEOUT = 10  # Value is in seconds.
+WEB_PROFILE_WAIT_INTERVAL = 0.25  # Value is in seconds.
+
 
 class Paypal(BasePaymentProcessor):
     """
@@ -106,6 +119,80 @@ class Paypal(BasePaymentProcessor):
             logger.warning("Creating PayPal WebProfile resulted in exception. Will continue without one.")
             return None
 
+    def get_web_profile_name(self, locale_code):
+        return 'temporary-{domain}-{locale_code}'.format(domain=self.site.domain, locale_code=locale_code)
+
+    def get_locale_web_profile_id(self, locale_code):
+        """
+        Return the id of a temporary Paypal WebProfile for the locale, shared by all payments on the site.
+
+        The profile id is read from the cache, then from the PaypalWebProfile table. A new profile is
+        only created when there is none, or when the current one is about to expire; in that case a
+        single request creates the replacement while concurrent requests keep using the current one,
+        or wait for the replacement if there is no current one.
+        """
+        cache_key = get_cache_key(site_domain=self.site.domain, resource='paypal_web_profile', locale_code=locale_code)
+        cached_response = TieredCache.get_cached_response(cache_key)
+        if cached_response.is_found:
+            return cached_response.value
+
+        now = timezone.now()
+        refresh_margin = datetime.timedelta(seconds=settings.PAYPAL_WEB_PROFILE_REFRESH_MARGIN)
+        name = self.get_web_profile_name(locale_code)
+        web_profile = PaypalWebProfile.objects.filter(name=name, expires__gt=now).first()
+        if web_profile and web_profile.expires - refresh_margin > now:
+            timeout = (web_profile.expires - refresh_margin - now).total_seconds()
+            TieredCache.set_all_tiers(cache_key, web_profile.id, int(timeout))
+            return web_profile.id
+
+        lock_key = '{}.lock'.format(cache_key)
+        is_locked = django_cache.add(lock_key, True, WEB_PROFILE_REFRESH_LOCK_TIMEOUT)
+        if not is_locked:
+            return web_profile.id if web_profile else self.wait_for_locale_web_profile_id(cache_key, lock_key)
+
+        try:
+            profile_id = self.create_temporary_web_profile(locale_code)
+            if profile_id is None:
+                return web_profile.id if web_profile else None
+
+            try:
+                with transaction.atomic():
+                    PaypalWebProfile.objects.filter(name=name).delete()
+                    PaypalWebProfile.objects.create(
+                        id=profile_id, name=name, expires=now + TEMPORARY_WEB_PROFILE_LIFETIME
+                    )
+            except IntegrityError:
+                # The lock expired, and another request stored its profile first.
+                existing_profile = PaypalWebProfile.objects.filter(name=name).first()
+                return existing_profile.id if existing_profile else profile_id
+            timeout = (TEMPORARY_WEB_PROFILE_LIFETIME - refresh_margin).total_seconds()
+            TieredCache.set_all_tiers(cache_key, profile_id, int(timeout))
+            return profile_id
+        finally:
+            if is_locked:
+                django_cache.delete(lock_key)
+
+    def wait_for_locale_web_profile_id(self, cache_key, lock_key):
+        """
+        Wait for the request holding the lock to cache the id of the web profile it creates.
+
+        Returns None, so that the payment continues without a web profile, if the lock is released
+        without an id being cached, or if the wait times out.
+        """
+        deadline = time.time() + WEB_PROFILE_WAIT_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(WEB_PROFILE_WAIT_INTERVAL)
+            cached_response = TieredCache.get_cached_response(cache_key)
+            if cached_response.is_found:
+                return cached_response.value
+            if django_cache.get(lock_key) is None:
+                break
+
+        logger.warning(
+            'PayPal web profile [%s] was not created by another request. Will continue without one.', cache_key
+        )
+        return None
+
     def get_courseid_title(self, line):
         """
         Get CourseID & Title from basket item
@@ -183,7 +270,7 @@ class Paypal(BasePaymentProcessor):
 
         if waffle.switch_is_active('create_and_set_webprofile'):
             locale_code = self.resolve_paypal_locale(request.COOKIES.get(settings.LANGUAGE_COOKIE_NAME))
-            web_profile_id = self.create_temporary_web_profile(locale_code)
+            web_profile_id = self.get_locale_web_profile_id(locale_code)
             if web_profile_id is not None:
                 data['experience_profile_id'] = web_profile_id
         else:
@@ -359,8 +446,8 @@ class Paypal(BasePaymentProcessor):
         Note (CCB): We mostly expect to have a single sale and transaction per payment. If we
         ever move to a split payment scenario, this will need to be updated.
         """
-        for transaction in payment.transactions:
-            for related_resource in transaction.related_resources:
+        for payment_transaction in payment.transactions:
+            for related_resource in payment_transaction.related_resources:
                 try:
                     return related_resource.sale
                 except Exception:  # pylint: disable=broad-except
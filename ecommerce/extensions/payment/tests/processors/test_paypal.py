@@ -2,6 +2,7 @@
 """Unit tests of Paypal payment processor implementation."""
 
 
+import datetime
 import json
 import logging
 from urllib.parse import urljoin
@@ -11,9 +12,12 @@ import mock
 import paypalrestsdk
 import responses
 from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
 from django.test import RequestFactory
 from django.urls import reverse
-from django.utils import translation
+from django.utils import timezone, translation
+from edx_django_utils.cache import TieredCache
 from factory.fuzzy import FuzzyInteger
 from oscar.apps.payment.exceptions import GatewayError
 from oscar.core.loading import get_model
@@ -21,6 +25,7 @@ from paypalrestsdk.resource import Resource  # pylint:disable=ungrouped-imports
 from testfixtures import LogCapture
 
 from ecommerce.core.tests import toggle_switch
+from ecommerce.core.utils import get_cache_key
 from ecommerce.extensions.checkout.utils import get_receipt_page_url
 from ecommerce.extensions.payment.models import PaypalWebProfile
 from ecommerce.extensions.payment.processors.paypal import Paypal
@@ -299,6 +304,86 @@ class PaypalTests(PaypalMixin, PaymentProcessorTestCaseMixin, TestCase):
         msg = 'Creating PayPal WebProfile resulted in exception. Will continue without one.'
         mock_logger.warning.assert_any_call(msg)
 
+    def mock_web_profile_creation(self, mock_web_profile, profile_ids):
+        mock_web_profile.side_effect = [
+            mock.Mock(id=profile_id, create=mock.Mock(return_value=True)) for profile_id in profile_ids
+        ]
+
+    @mock.patch('ecommerce.extensions.payment.processors.paypal.paypalrestsdk.WebProfile')
+    def test_locale_web_profile_reused(self, mock_web_profile):
+        """
+        Verify a temporary web profile is created once per locale and shared by later payments.
+        """
+        self.mock_web_profile_creation(mock_web_profile, ['profile-en', 'profile-es'])
+
+        self.assertEqual(self.processor.get_locale_web_profile_id('US'), 'profile-en')
+        self.assertEqual(self.processor.get_locale_web_profile_id('US'), 'profile-en')
+        self.assertEqual(self.processor.get_locale_web_profile_id('MX'), 'profile-es')
+        self.assertEqual(mock_web_profile.call_count, 2)
+
+        # The profile is also stored in the database, for when the cache is cleared.
+        TieredCache.dangerous_clear_all_tiers()
+        self.assertEqual(self.processor.get_locale_web_profile_id('US'), 'profile-en')
+        self.assertEqual(mock_web_profile.call_count, 2)
+        self.assertEqual(
+            PaypalWebProfile.objects.get(name=self.processor.get_web_profile_name('US')).id, 'profile-en'
+        )
+
+    @mock.patch('ecommerce.extensions.payment.processors.paypal.paypalrestsdk.WebProfile')
+    def test_locale_web_profile_refreshed(self, mock_web_profile):
+        """
+        Verify a web profile about to expire is replaced, unless another request is already replacing it.
+        """
+        self.mock_web_profile_creation(mock_web_profile, ['profile-new'])
+        name = self.processor.get_web_profile_name('US')
+        PaypalWebProfile.objects.create(
+            id='profile-old', name=name, expires=timezone.now() + datetime.timedelta(minutes=10)
+        )
+        lock_key = '{}.lock'.format(
+            get_cache_key(site_domain=self.site.domain, resource='paypal_web_profile', locale_code='US')
+        )
+
+        cache.add(lock_key, True)
+        self.assertEqual(self.processor.get_locale_web_profile_id('US'), 'profile-old')
+        mock_web_profile.assert_not_called()
+
+        cache.delete(lock_key)
+        self.assertEqual(self.processor.get_locale_web_profile_id('US'), 'profile-new')
+        self.assertEqual(PaypalWebProfile.objects.get(name=name).id, 'profile-new')
+
+    @mock.patch('ecommerce.extensions.payment.processors.paypal.time.sleep')
+    @mock.patch('ecommerce.extensions.payment.processors.paypal.paypalrestsdk.WebProfile')
+    def test_locale_web_profile_awaited(self, mock_web_profile, mock_sleep):
+        """
+        Verify a request waits for the web profile created by the request holding the lock, when there is none.
+        """
+        cache_key = get_cache_key(site_domain=self.site.domain, resource='paypal_web_profile', locale_code='US')
+        lock_key = '{}.lock'.format(cache_key)
+        cache.add(lock_key, True)
+
+        mock_sleep.side_effect = lambda __: TieredCache.set_all_tiers(cache_key, 'profile-other', 60)
+        self.assertEqual(self.processor.get_locale_web_profile_id('US'), 'profile-other')
+        mock_web_profile.assert_not_called()
+
+        # The request continues without a profile if the lock is released without a profile being cached.
+        TieredCache.dangerous_clear_all_tiers()
+        cache.add(lock_key, True)
+        mock_sleep.side_effect = lambda __: cache.delete(lock_key)
+        self.assertIsNone(self.processor.get_locale_web_profile_id('US'))
+        mock_web_profile.assert_not_called()
+
+    @mock.patch('ecommerce.extensions.payment.processors.paypal.paypalrestsdk.WebProfile')
+    def test_locale_web_profile_stored_concurrently(self, mock_web_profile):
+        """
+        Verify the web profile stored by a concurrent request is used if storing the new one fails.
+        """
+        self.mock_web_profile_creation(mock_web_profile, ['profile-new'])
+        name = self.processor.get_web_profile_name('US')
+        PaypalWebProfile.objects.create(id='profile-other', name=name, expires=timezone.now())
+
+        with mock.patch.object(PaypalWebProfile.objects, 'create', side_effect=IntegrityError):
+            self.assertEqual(self.processor.get_locale_web_profile_id('US'), 'profile-other')
+
     @ddt.unpack
     @ddt.data(
         ['zh', 'en', 'US'],
@@ -5,6 +5,7 @@ from django.utils.translation import ugettext_lazy as _
 from oscar.core.loading import get_model
 
 from ecommerce.core.constants import SEAT_PRODUCT_CLASS_NAME
+from ecommerce.core.reference_data import basket_attribute_types
 from ecommerce.extensions.analytics.utils import parse_tracking_context
 
 logger = logging.getLogger(__name__)
@@ -22,7 +23,7 @@ def get_basket_program_uuid(basket):
         string: The program UUID if the basket is associated with a bundled purchase, otherwise None.
     """
     try:
-        attribute_type = BasketAttributeType.objects.get(name='bundle_identifier')
+        attribute_type = basket_attribute_types.get('bundle_identifier')
     except BasketAttributeType.DoesNotExist:
         return None
     bundle_attributes = BasketAttribute.objects.filter(
@@ -22,6 +22,7 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from ecommerce.core.reference_data import basket_attribute_types
 from ecommerce.core.url_utils import absolute_redirect
 from ecommerce.extensions.api.serializers import OrderSerializer
 from ecommerce.extensions.basket.utils import (
@@ -50,7 +51,6 @@ logger = logging.getLogger(__name__)
 Applicator = get_class('offer.applicator', 'Applicator')
 Basket = get_model('basket', 'Basket')
 BasketAttribute = get_model('basket', 'BasketAttribute')
-BasketAttributeType = get_model('basket', 'BasketAttributeType')
 BillingAddress = get_model('order', 'BillingAddress')
 BUNDLE = 'bundle_identifier'
 Country = get_model('address', 'Country')
@@ -415,7 +415,7 @@ class CybersourceOrderCompletionView(EdxOrderPlacementMixin):
 
         bundle_attributes = BasketAttribute.objects.filter(
             basket=old_basket,
-            attribute_type=BasketAttributeType.objects.get(name=BUNDLE)
+            attribute_type=basket_attribute_types.get(BUNDLE)
         )
         bundle = bundle_attributes.first().value_text if bundle_attributes.count() > 0 else None
 
@@ -427,7 +427,7 @@ class CybersourceOrderCompletionView(EdxOrderPlacementMixin):
         if bundle:
             BasketAttribute.objects.update_or_create(
                 basket=new_basket,
-                attribute_type=BasketAttributeType.objects.get(name=BUNDLE),
+                attribute_type=basket_attribute_types.get(BUNDLE),
                 defaults={'value_text': bundle}
             )
 
@@ -2,9 +2,9 @@
 
 from oscar.core.loading import get_model
 
+from ecommerce.core.reference_data import options
 from ecommerce.extensions.fulfillment.status import ORDER
 
-Option = get_model('catalogue', 'Option')
 Refund = get_model('refund', 'Refund')
 RefundLine = get_model('refund', 'RefundLine')
 
@@ -52,7 +52,7 @@ def create_refunds_for_entitlement(order, entitlement_uuid):
     """
     refunds = []
 
-    entitlement_option = Option.objects.get(code='course_entitlement')
+    entitlement_option = options.get('course_entitlement')
 
     line = order.lines.get(refund_lines__id__isnull=True,
                            attributes__option=entitlement_option,
@@ -11,6 +11,7 @@ from oscar.core.loading import get_class, get_model
 from oscar.core.utils import get_default_currency
 from simple_history.models import HistoricalRecords
 
+from ecommerce.core.reference_data import payment_event_types
 from ecommerce.extensions.analytics.utils import audit_log
 from ecommerce.extensions.fulfillment.api import revoke_fulfillment_for_refund
 from ecommerce.extensions.order.constants import PaymentEventTypeName
@@ -20,8 +21,8 @@ from ecommerce.extensions.refund.status import REFUND, REFUND_LINE
 
 logger = logging.getLogger(__name__)
 
+OfferUserDiscount = get_model('offer', 'OfferUserDiscount')
 PaymentEvent = get_model('order', 'PaymentEvent')
-PaymentEventType = get_model('order', 'PaymentEventType')
 post_refund = get_class('refund.signals', 'post_refund')
 
 
@@ -169,7 +170,7 @@ class Refund(StatusMixin, TimeStampedModel):
             refund_reference_number = processor.issue_credit(self.order.number, self.order.basket, source.reference,
                                                              amount, self.currency)
             source.refund(amount, reference=refund_reference_number)
-            event_type, __ = PaymentEventType.objects.get_or_create(name=PaymentEventTypeName.REFUNDED)
+            event_type = payment_event_types.get_or_create(PaymentEventTypeName.REFUNDED)
             PaymentEvent.objects.create(
                 event_type=event_type,
                 order=self.order,
@@ -199,6 +200,11 @@ class Refund(StatusMixin, TimeStampedModel):
             logger.error('Unable to revoke fulfillment of all lines of Refund [%d].', self.id)
             self.set_status(REFUND.REVOCATION_ERROR)
 
+    def _release_offer_user_discounts(self):
+        """Remove the discounts of the order from the per user discount ledger, unless it was already refunded."""
+        if not self.order.refunds.filter(status=REFUND.COMPLETE).exclude(id=self.id).exists():
+            OfferUserDiscount.release_order(self.order)
+
     def approve(self, revoke_fulfillment=True):
         if self.status == REFUND.COMPLETE:
             logger.info('Refund [%d] has already been completed. No additional action is required to approve.', self.id)
@@ -226,6 +232,7 @@ class Refund(StatusMixin, TimeStampedModel):
                 refund_line.set_status(REFUND_LINE.COMPLETE)
 
         if self.status == REFUND.COMPLETE:
+            self._release_offer_user_discounts()
             post_refund.send_robust(sender=self.__class__, refund=self)
             return True
 
@@ -0,0 +1,71 @@
+
+
+import datetime
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from oscar.core.loading import get_model
+
+from ecommerce.extensions.voucher.utils import bulk_create_vouchers, generate_unique_voucher_codes
+
+logger = logging.getLogger(__name__)
+Voucher = get_model('voucher', 'Voucher')
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure voucher code generation and creation throughput in codes per second.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count',
+                            action='store',
+                            dest='count',
+                            type=int,
+                            default=10000,
+                            help='Number of voucher codes to generate.')
+        parser.add_argument('--commit',
+                            action='store_true',
+                            dest='commit',
+                            default=False,
+                            help='Keep the created vouchers instead of rolling them back.')
+
+    def handle(self, *args, **options):
+        count = options['count']
+
+        start = time.time()
+        generate_unique_voucher_codes(count, settings.VOUCHER_CODE_LENGTH)
+        self._report('Generated', count, time.time() - start)
+
+        now = timezone.now()
+        start = time.time()
+        try:
+            with transaction.atomic():
+                bulk_create_vouchers(
+                    end_datetime=now + datetime.timedelta(days=1),
+                    name='Voucher generation benchmark',
+                    quantity=count,
+                    start_datetime=now,
+                    voucher_type=Voucher.SINGLE_USE,
+                )
+                elapsed = time.time() - start
+                if not options['commit']:
+                    raise _Rollback()
+        except _Rollback:
+            pass
+
+        self._report('Created', count, elapsed)
+
+    def _report(self, action, count, elapsed):
+        rate = count / elapsed if elapsed else float('inf')
+        message = '{action} {count} voucher codes in {elapsed:.2f}s ({rate:.0f} codes/second).'.format(
+            action=action, count=count, elapsed=elapsed, rate=rate
+        )
+        logger.info(message)
+        self.stdout.write(message)
@@ -0,0 +1,26 @@
+
+
+from io import StringIO
+
+from django.core.management import call_command
+from oscar.core.loading import get_model
+
+from ecommerce.tests.testcases import TestCase
+
+Voucher = get_model('voucher', 'Voucher')
+
+
+class BenchmarkVoucherGenerationTests(TestCase):
+
+    def test_benchmark_rolls_back(self):
+        """ Verify the benchmark reports throughput and does not keep the vouchers. """
+        out = StringIO()
+        call_command('benchmark_voucher_generation', '--count=50', stdout=out)
+        self.assertIn('Generated 50 voucher codes', out.getvalue())
+        self.assertIn('Created 50 voucher codes', out.getvalue())
+        self.assertFalse(Voucher.objects.filter(name='Voucher generation benchmark').exists())
+
+    def test_benchmark_commit(self):
+        """ Verify the vouchers are kept when requested. """
+        call_command('benchmark_voucher_generation', '--count=5', '--commit', stdout=StringIO())
+        self.assertEqual(Voucher.objects.filter(name='Voucher generation benchmark').count(), 5)
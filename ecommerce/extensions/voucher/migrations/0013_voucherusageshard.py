@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-17 01:39
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voucher', '0012_voucher_is_public'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoucherUsageShard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('num_orders', models.PositiveIntegerField(default=0)),
+                ('total_discount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('voucher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_shards', to='voucher.Voucher')),
+            ],
+            options={
+                'unique_together': {('voucher', 'shard')},
+            },
+        ),
+    ]
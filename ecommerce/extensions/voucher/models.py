@@ -2,6 +2,7 @@
 
 import datetime
 import logging
+from decimal import Decimal
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
@@ -14,6 +15,7 @@ from simple_history.models import HistoricalRecords
 
 from ecommerce.core.utils import log_message_and_raise_validation_error
 from ecommerce.extensions.offer.constants import OFFER_ASSIGNMENT_REVOKED, OFFER_MAX_USES_DEFAULT, OFFER_REDEEMED
+from ecommerce.extensions.offer.usage import AbstractUsageShard
 
 logger = logging.getLogger(__name__)
 
@@ -93,6 +95,31 @@ class Voucher(AbstractVoucher):
                 'Failed to create Voucher. Voucher start and end datetime fields must be type datetime.'
             )
 
+    def record_usage(self, order, user):
+        """
+        Record a usage of the voucher in an order, counting it in a shard of the voucher instead of the voucher row.
+        """
+        if user.is_authenticated:
+            self.applications.create(voucher=self, order=order, user=user)
+        else:
+            self.applications.create(voucher=self, order=order)
+        VoucherUsageShard.increment(self, num_orders=1)
+    record_usage.alters_data = True
+
+    def record_discount(self, discount):
+        """
+        Record a discount given by the voucher in a shard of the voucher.
+        """
+        VoucherUsageShard.increment(self, total_discount=discount['discount'])
+    record_discount.alters_data = True
+
+    def get_usage(self):
+        """
+        Return the num_orders and total_discount of the voucher, including the usage which is not rolled up yet.
+        """
+        pending_usage = VoucherUsageShard.get_pending_usage(self)
+        return {field: getattr(self, field) + pending_usage[field] for field in VoucherUsageShard.COUNTER_FIELDS}
+
     @classmethod
     def does_exist(cls, code):
         try:
@@ -170,12 +197,30 @@ class Voucher(AbstractVoucher):
         """
         # If this a Single use or Multi use per customer voucher,
         # it must have no orders or existing assignments to be assigned.
+        num_orders = self.get_usage()['num_orders']
         if self.usage in (self.SINGLE_USE, self.MULTI_USE_PER_CUSTOMER):
-            if self.num_orders or num_assignments:
+            if num_orders or num_assignments:
                 return 0
             return max_global_applications or 1
         offer_max_uses = max_global_applications or OFFER_MAX_USES_DEFAULT
-        return offer_max_uses - (self.num_orders + num_assignments)
+        return offer_max_uses - (num_orders + num_assignments)
+
+
+class VoucherUsageShard(AbstractUsageShard):
+    """
+    Usage of a voucher recorded since it was last rolled up.
+
+    .. no_pii:
+    """
+    OWNER_FIELD = 'voucher'
+    COUNTER_FIELDS = ('num_orders', 'total_discount')
+
+    voucher = models.ForeignKey('voucher.Voucher', related_name='usage_shards', on_delete=models.CASCADE)
+    num_orders = models.PositiveIntegerField(default=0)
+    total_discount = models.DecimalField(decimal_places=2, max_digits=12, default=Decimal('0.00'))
+
+    class Meta:
+        unique_together = ('voucher', 'shard')
 
 
 class VoucherApplication(AbstractVoucherApplication):
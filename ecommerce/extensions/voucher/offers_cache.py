@@ -0,0 +1,64 @@
+"""
+Cache of the course offers listed for vouchers on the coupon landing page.
+
+Converting a page of catalog results into offers reads the courses, products and
+stock records of every course run on the page, so converted pages are cached per
+voucher, page and page size. The cached pages are versioned: saving or deleting an
+offer, condition, benefit, range, product or stock record bumps the version, and
+pages cached for an earlier version are no longer used.
+"""
+
+
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from edx_django_utils.cache import TieredCache
+
+from ecommerce.core.utils import get_cache_key
+
+VOUCHER_OFFERS_VERSION_CACHE_KEY = get_cache_key(resource='voucher_offers.version')
+
+
+def get_voucher_offers_version():
+    """
+    Return the current version of the cached voucher offers, creating one if none is cached.
+    """
+    version_response = TieredCache.get_cached_response(VOUCHER_OFFERS_VERSION_CACHE_KEY)
+    if version_response.is_found:
+        return version_response.value
+    return _bump_version()
+
+
+def get_voucher_offers_cache_key(site_domain, voucher_id, voucher_end_datetime, page, offset, limit):
+    """
+    Return the cache key of a page of the course offers of a voucher, for the current version.
+    """
+    return get_cache_key(
+        site_domain=site_domain,
+        resource='voucher_offers',
+        voucher_id=voucher_id,
+        voucher_end_datetime=voucher_end_datetime,
+        version=get_voucher_offers_version(),
+        page=page,
+        offset=offset,
+        limit=limit,
+    )
+
+
+def _bump_version():
+    version = uuid.uuid4().hex
+    TieredCache.set_all_tiers(VOUCHER_OFFERS_VERSION_CACHE_KEY, version, settings.VOUCHER_OFFERS_CACHE_TIMEOUT)
+    return version
+
+
+def invalidate_voucher_offers():
+    """
+    Mark the cached voucher offers as stale.
+
+    The version is bumped immediately and again once the surrounding transaction
+    commits, so that a page cached by another process before the commit does not
+    outlive the change.
+    """
+    _bump_version()
+    transaction.on_commit(_bump_version)
@@ -0,0 +1,51 @@
+
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from oscar.core.loading import get_model
+
+from ecommerce.courses.models import Course
+from ecommerce.extensions.voucher.offers_cache import invalidate_voucher_offers
+
+Benefit = get_model('offer', 'Benefit')
+Condition = get_model('offer', 'Condition')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+Product = get_model('catalogue', 'Product')
+Range = get_model('offer', 'Range')
+RangeProduct = get_model('offer', 'RangeProduct')
+StockRecord = get_model('partner', 'StockRecord')
+
+
+@receiver(post_save, sender=ConditionalOffer, dispatch_uid='voucher.offers.conditional_offer_saved')
+@receiver(post_delete, sender=ConditionalOffer, dispatch_uid='voucher.offers.conditional_offer_deleted')
+@receiver(post_save, sender=Condition, dispatch_uid='voucher.offers.condition_saved')
+@receiver(post_delete, sender=Condition, dispatch_uid='voucher.offers.condition_deleted')
+@receiver(post_save, sender=Benefit, dispatch_uid='voucher.offers.benefit_saved')
+@receiver(post_delete, sender=Benefit, dispatch_uid='voucher.offers.benefit_deleted')
+@receiver(post_save, sender=Range, dispatch_uid='voucher.offers.range_saved')
+@receiver(post_delete, sender=Range, dispatch_uid='voucher.offers.range_deleted')
+@receiver(post_save, sender=Course, dispatch_uid='voucher.offers.course_saved')
+@receiver(post_delete, sender=Course, dispatch_uid='voucher.offers.course_deleted')
+@receiver(post_save, sender=Product, dispatch_uid='voucher.offers.product_saved')
+@receiver(post_delete, sender=Product, dispatch_uid='voucher.offers.product_deleted')
+@receiver(post_save, sender=StockRecord, dispatch_uid='voucher.offers.stock_record_saved')
+@receiver(post_delete, sender=StockRecord, dispatch_uid='voucher.offers.stock_record_deleted')
+def invalidate_voucher_offers_on_change(*_args, **_kwargs):
+    """
+    Changes to offers, ranges, courses, seats or their prices invalidate the cached
+    course offers of vouchers.
+    """
+    invalidate_voucher_offers()
+
+
+@receiver(m2m_changed, sender=Range.included_products.through, dispatch_uid='voucher.offers.range_included_changed')
+@receiver(m2m_changed, sender=Range.excluded_products.through, dispatch_uid='voucher.offers.range_excluded_changed')
+@receiver(post_save, sender=RangeProduct, dispatch_uid='voucher.offers.range_product_saved')
+@receiver(post_delete, sender=RangeProduct, dispatch_uid='voucher.offers.range_product_deleted')
+def invalidate_voucher_offers_on_range_products_change(*_args, **_kwargs):
+    """
+    Adding products to or removing products from a range invalidates the cached
+    course offers of vouchers. Range.add_product and Range.remove_product save and
+    delete RangeProduct rows directly, without sending m2m_changed.
+    """
+    invalidate_voucher_offers()
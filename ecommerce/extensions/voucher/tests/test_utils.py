@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 
 
+import types
 import uuid
 
 import ddt
 import httpretty
+import mock
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils.translation import ugettext_lazy as _
 from factory.fuzzy import FuzzyText
 from oscar.templatetags.currency_filters import currency
@@ -35,8 +38,10 @@ from ecommerce.extensions.test.factories import create_order, prepare_voucher
 from ecommerce.extensions.voucher.utils import (
     create_vouchers,
     generate_coupon_report,
+    generate_unique_voucher_codes,
     get_voucher_and_products_from_code,
     get_voucher_discount_info,
+    stream_coupon_report,
     update_voucher_offer
 )
 from ecommerce.tests.factories import UserFactory
@@ -123,6 +128,12 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
             'voucher_type': Voucher.SINGLE_USE
         }
 
+    def create_vouchers_in_quantity(self, quantity):
+        """ Create the given number of vouchers from the test voucher data. """
+        data = dict(self.data)
+        data['quantity'] = quantity
+        return create_vouchers(**data)
+
     def create_benefits(self):
         """
         Create all Benefit permutations
@@ -289,6 +300,30 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
             voucher = create_vouchers(**self.data)
             self.assertTrue(Voucher.objects.filter(code__iexact=voucher[0].code).exists())
 
+    def test_generate_unique_voucher_codes(self):
+        """
+        Test that generated codes skip codes already used by vouchers and are checked in chunked queries.
+        """
+        existing_code = self.create_vouchers_in_quantity(1)[0].code
+        generated = iter([existing_code, 'AAAA', 'BBBB', 'AAAA', 'CCCC'])
+        with mock.patch(
+                'ecommerce.extensions.voucher.utils._generate_random_code', side_effect=lambda _: next(generated)
+        ):
+            with self.assertNumQueries(3):
+                codes = generate_unique_voucher_codes(3, VOUCHER_CODE_LENGTH, batch_size=2)
+        self.assertEqual(sorted(codes), ['AAAA', 'BBBB', 'CCCC'])
+
+    def test_create_vouchers_query_count(self):
+        """
+        Test that the number of queries needed to create vouchers does not grow with the quantity.
+        """
+        self.create_vouchers_in_quantity(1)
+        with self.assertNumQueries(14):
+            self.create_vouchers_in_quantity(5)
+        with self.assertNumQueries(14):
+            vouchers = self.create_vouchers_in_quantity(50)
+        self.assertEqual(len({voucher.code for voucher in vouchers}), 50)
+
     @override_settings(VOUCHER_CODE_LENGTH=0)
     def test_nonpositive_voucher_code_length(self):
         """
@@ -488,6 +523,39 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         self.assertNotIn('Course Seat Types', field_names)
         self.assertNotIn('Redeemed For Course ID', field_names)
 
+    def test_generate_coupon_report_query_count(self):
+        """ Verify the number of queries needed for the report does not grow with the number of vouchers. """
+        self.mock_course_api_response(course=self.course)
+        self.data.update({'benefit_type': Benefit.FIXED, 'voucher_type': Voucher.SINGLE_USE})
+
+        def add_and_use_vouchers(quantity, first_order_number):
+            vouchers = self.create_vouchers_in_quantity(quantity)
+            self.coupon_vouchers.first().vouchers.add(*vouchers)
+            for index, voucher in enumerate(vouchers[:2]):
+                self.use_voucher('TESTORDER{}'.format(first_order_number + index), voucher, UserFactory())
+
+        def count_report_queries():
+            with CaptureQueriesContext(connection) as context:
+                __, rows = stream_coupon_report(self.coupon_vouchers)
+                rows = list(rows)
+            return len(context.captured_queries), rows
+
+        add_and_use_vouchers(3, 1)
+        count_report_queries()
+        small_count, small_rows = count_report_queries()
+        add_and_use_vouchers(20, 10)
+        large_count, large_rows = count_report_queries()
+
+        self.assertEqual(len(large_rows) - len(small_rows), 22)
+        self.assertEqual(small_count, large_count)
+
+    def test_stream_coupon_report_is_lazy(self):
+        """ Verify voucher rows are only loaded when the report is iterated. """
+        field_names, rows = stream_coupon_report(self.coupon_vouchers)
+        self.assertIn('Code', field_names)
+        with self.assertNumQueries(0):
+            self.assertTrue(isinstance(rows, types.GeneratorType))
+
     def test_report_for_dynamic_coupon_with_fixed_benefit_type(self):
         """ Verify the coupon report contains correct data for coupon with fixed benefit type. """
         dynamic_coupon = self.create_coupon(
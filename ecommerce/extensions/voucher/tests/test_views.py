@@ -59,7 +59,7 @@ class CouponReportCSVViewTest(CouponMixin, DiscoveryTestMixin, LmsApiMockMixin,
         response = CouponReportCSVView().get(request, coupon_id=coupon.id)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.content.splitlines()), 7)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 7)
 
     @httpretty.activate
     def test_get_csv_report_for_specific_coupon(self):
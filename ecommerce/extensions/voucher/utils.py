@@ -6,11 +6,14 @@ import datetime
 import hashlib
 import logging
 import uuid
+from collections import defaultdict
 from decimal import Decimal, DecimalException
 
 import dateutil.parser
 import pytz
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
 from django.urls import reverse
 from django.utils.translation import ugettext_lazy as _
 from edx_django_utils.cache import TieredCache
@@ -39,6 +42,7 @@ Benefit = get_model('offer', 'Benefit')
 Condition = get_model('offer', 'Condition')
 ConditionalOffer = get_model('offer', 'ConditionalOffer')
 CouponVouchers = get_model('voucher', 'CouponVouchers')
+OfferUsageShard = get_model('offer', 'OfferUsageShard')
 Order = get_model('order', 'Order')
 Product = get_model('catalogue', 'Product')
 ProductCategory = get_model('catalogue', 'ProductCategory')
@@ -47,6 +51,15 @@ StockRecord = get_model('partner', 'StockRecord')
 Voucher = get_model('voucher', 'Voucher')
 VoucherApplication = get_model('voucher', 'VoucherApplication')
 VoucherOffer = get_model('voucher', 'Voucher_offers')
+VoucherUsageShard = get_model('voucher', 'VoucherUsageShard')
+
+VOUCHER_BULK_BATCH_SIZE = 500
+COUPON_REPORT_BATCH_SIZE = 500
+
+
+def _chunks(items, size):
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
 
 
 def _add_redemption_course_ids(new_row_to_append, header_row, redemption_course_ids):
@@ -195,8 +208,23 @@ def _get_info_for_coupon_report(coupon, voucher):
     return coupon_data
 
 
+def _get_best_offer(voucher):
+    """
+    Return the same offer as Voucher.best_offer, using voucher.offers.all() so that
+    prefetched offers and conditions are used instead of issuing new queries.
+    """
+    offers = list(voucher.offers.all())
+    for offer in offers:
+        if offer.condition.enterprise_customer_uuid:
+            return offer
+    for offer in offers:
+        if offer.condition.range_id is not None:
+            return offer
+    return min(offers, key=lambda offer: offer.date_created)
+
+
 def _get_voucher_info_for_coupon_report(voucher):
-    offer = voucher.best_offer
+    offer = _get_best_offer(voucher)
     status = _get_voucher_status(voucher, offer)
     path = '{path}?code={code}'.format(path=reverse('coupons:offer'), code=voucher.code)
     url = get_ecommerce_url(path)
@@ -206,10 +234,10 @@ def _get_voucher_info_for_coupon_report(voucher):
     # which don't have the max global applications limit set,
     # set the max_uses_count to 10000 which is the arbitrary limit Oscar sets:
     # https://github.com/django-oscar/django-oscar/blob/master/src/oscar/apps/offer/abstract_models.py#L253
-    redemption_count = offer.num_applications
+    redemption_count = offer.get_usage()['num_applications']
     if voucher.usage == Voucher.SINGLE_USE:
         max_uses_count = 1
-        redemption_count = voucher.num_orders
+        redemption_count = voucher.get_usage()['num_orders']
     elif voucher.usage != Voucher.SINGLE_USE and offer.max_global_applications is None:
         max_uses_count = OFFER_MAX_USES_DEFAULT
     else:
@@ -226,39 +254,33 @@ def _get_voucher_info_for_coupon_report(voucher):
     return coupon_data
 
 
-def _get_redemption_course_ids(voucher_application):
+def _get_redemption_course_ids(voucher_application, course_ids_by_product=None):
     """
     Return list of course ids where voucher is applied
     Args:
         voucher_application: voucher application object
+        course_ids_by_product (dict): Optional cache of course ids keyed by product id,
+            shared across applications to avoid reloading product attributes.
 
     Returns:
          list of course ids where voucher is applied.
     """
+    course_ids_by_product = {} if course_ids_by_product is None else course_ids_by_product
     redemption_course_ids = []
     for line in voucher_application.order.lines.all():
         if line.product:
-            if line.product.is_course_entitlement_product:
-                redemption_course_ids.append(line.product.attr.UUID)
-            else:
-                redemption_course_ids.append(line.product.course_id)
+            if line.product_id not in course_ids_by_product:
+                if line.product.is_course_entitlement_product:
+                    course_ids_by_product[line.product_id] = line.product.attr.UUID
+                else:
+                    course_ids_by_product[line.product_id] = line.product.course_id
+            redemption_course_ids.append(course_ids_by_product[line.product_id])
         else:
             redemption_course_ids.append('Unknown')
     return redemption_course_ids
 
 
-def generate_coupon_report(coupon_vouchers):
-    """
-    Generate coupon report data
-
-    Args:
-        coupon_vouchers (List[CouponVouchers]): List of coupon_vouchers the report should be generated for
-
-    Returns:
-        List[str]
-        List[dict]
-    """
-
+def _get_coupon_report_field_names(header_row):
     field_names = [
         _('Code'),
         _('Coupon Name'),
@@ -288,59 +310,126 @@ def generate_coupon_report(coupon_vouchers):
         _('Coupon Expiry Date'),
         _('Email Domains'),
     ]
-    rows = []
 
-    for coupon_voucher in coupon_vouchers:
-        coupon = coupon_voucher.coupon
-        client = Invoice.objects.get(order__lines__product=coupon).business_client.name
-        rows.append(_get_info_for_coupon_report(coupon, coupon_voucher.vouchers.first()))
-        rows[0][_('Client')] = client
+    if _('Program UUID') in header_row:
+        field_names.remove(_('Course ID'))
+        field_names.remove(_('Organization'))
+        field_names.remove(_('Catalog Query'))
+        field_names.remove(_('Course Seat Types'))
+        field_names.remove(_('Redeemed For Course ID'))
+    elif _('Catalog Query') in header_row:
+        field_names.remove(_('Course ID'))
+        field_names.remove(_('Organization'))
+        field_names.remove(_('Program UUID'))
+    else:
+        field_names.remove(_('Catalog Query'))
+        field_names.remove(_('Course Seat Types'))
+        field_names.remove(_('Redeemed For Course ID'))
+        field_names.remove(_('Redeemed For Course IDs'))
+        field_names.remove(_('Program UUID'))
 
-        for voucher in coupon_voucher.vouchers.all().prefetch_related('offers'):
-            row = _get_voucher_info_for_coupon_report(voucher)
+    return field_names
 
-            for item in (_('Order Number'), _('Redeemed By Username'),):
-                row[item] = ''
 
-            rows.append(row)
+def _iter_coupon_report_rows(coupon_vouchers, header_rows):
+    """
+    Yield the report rows for each coupon, loading vouchers and their redemptions in chunks.
 
-            if voucher.num_orders > 0:
-                voucher_applications = VoucherApplication.objects.filter(
-                    voucher=voucher).prefetch_related('user', 'order__lines')
+    Vouchers are loaded COUPON_REPORT_BATCH_SIZE at a time with their pending usage, and with
+    their offers, the pending usage of the offers and their conditions prefetched. The applications
+    for each chunk are fetched with a single query, so memory use and query count per chunk do not
+    depend on the size of the coupon.
+    """
+    course_ids_by_product = {}
+    offers_prefetch = Prefetch(
+        'offers', queryset=OfferUsageShard.annotate_pending_usage(ConditionalOffer.objects.all())
+    )
+
+    for coupon_voucher, header_row in zip(coupon_vouchers, header_rows):
+        yield header_row
 
+        voucher_ids = list(coupon_voucher.vouchers.order_by('id').values_list('id', flat=True))
+        for chunk in _chunks(voucher_ids, COUPON_REPORT_BATCH_SIZE):
+            vouchers = list(
+                VoucherUsageShard.annotate_pending_usage(Voucher.objects.filter(id__in=chunk)).order_by(
+                    'id'
+                ).prefetch_related(offers_prefetch, 'offers__condition')
+            )
+
+            applications_by_voucher = defaultdict(list)
+            redeemed_voucher_ids = [voucher.id for voucher in vouchers if voucher.get_usage()['num_orders'] > 0]
+            if redeemed_voucher_ids:
+                voucher_applications = VoucherApplication.objects.filter(
+                    voucher_id__in=redeemed_voucher_ids
+                ).select_related('user', 'order').prefetch_related(
+                    'order__lines__product__product_class', 'order__lines__product__parent__product_class'
+                )
                 for application in voucher_applications:
-                    redemption_course_ids = _get_redemption_course_ids(application)
-                    redemption_user_username = application.user.username
+                    applications_by_voucher[application.voucher_id].append(application)
+
+            for voucher in vouchers:
+                row = _get_voucher_info_for_coupon_report(voucher)
+
+                for item in (_('Order Number'), _('Redeemed By Username'),):
+                    row[item] = ''
+
+                yield row
+
+                for application in applications_by_voucher[voucher.id]:
+                    redemption_course_ids = _get_redemption_course_ids(application, course_ids_by_product)
 
                     new_row = row.copy()
-                    _add_redemption_course_ids(new_row, rows[0], redemption_course_ids)
+                    _add_redemption_course_ids(new_row, header_rows[0], redemption_course_ids)
                     new_row.update({
                         _('Status'): _('Redeemed'),
                         _('Order Number'): application.order.number,
-                        _('Redeemed By Username'): redemption_user_username,
+                        _('Redeemed By Username'): application.user.username,
                         _('Maximum Coupon Usage'): 1,
                         _('Redemption Count'): 1,
                     })
-                    rows.append(new_row)
+                    yield new_row
 
-    if _('Program UUID') in rows[0]:
-        field_names.remove(_('Course ID'))
-        field_names.remove(_('Organization'))
-        field_names.remove(_('Catalog Query'))
-        field_names.remove(_('Course Seat Types'))
-        field_names.remove(_('Redeemed For Course ID'))
-    elif _('Catalog Query') in rows[0]:
-        field_names.remove(_('Course ID'))
-        field_names.remove(_('Organization'))
-        field_names.remove(_('Program UUID'))
-    else:
-        field_names.remove(_('Catalog Query'))
-        field_names.remove(_('Course Seat Types'))
-        field_names.remove(_('Redeemed For Course ID'))
-        field_names.remove(_('Redeemed For Course IDs'))
-        field_names.remove(_('Program UUID'))
 
-    return field_names, rows
+def stream_coupon_report(coupon_vouchers):
+    """
+    Generate coupon report data lazily.
+
+    The coupon-level rows are computed up front, so errors such as a missing stock record
+    are raised before any row is produced. Voucher and redemption rows are generated on
+    demand.
+
+    Args:
+        coupon_vouchers (List[CouponVouchers]): List of coupon_vouchers the report should be generated for
+
+    Returns:
+        List[str]
+        Iterator[dict]
+    """
+    coupon_vouchers = list(coupon_vouchers)
+    header_rows = []
+    for coupon_voucher in coupon_vouchers:
+        coupon = coupon_voucher.coupon
+        header_row = _get_info_for_coupon_report(coupon, coupon_voucher.vouchers.first())
+        header_row[_('Client')] = Invoice.objects.get(order__lines__product=coupon).business_client.name
+        header_rows.append(header_row)
+
+    field_names = _get_coupon_report_field_names(header_rows[0])
+    return field_names, _iter_coupon_report_rows(coupon_vouchers, header_rows)
+
+
+def generate_coupon_report(coupon_vouchers):
+    """
+    Generate coupon report data
+
+    Args:
+        coupon_vouchers (List[CouponVouchers]): List of coupon_vouchers the report should be generated for
+
+    Returns:
+        List[str]
+        List[dict]
+    """
+    field_names, rows = stream_coupon_report(coupon_vouchers)
+    return field_names, list(rows)
 
 
 def generate_offer_name(coupon_id, benefit_type, benefit_value, offer_number=None, is_enterprise=False):
@@ -488,6 +577,12 @@ def get_or_create_enterprise_offer(
     return offer
 
 
+def _generate_random_code(length):
+    h = hashlib.sha256()
+    h.update(uuid.uuid4().bytes)
+    return base64.b32encode(h.digest())[0:length].decode('utf-8')
+
+
 def _generate_code_string(length):
     """
     Create a string of random characters of specified length
@@ -504,15 +599,53 @@ def _generate_code_string(length):
     if length < 1:
         raise ValueError("Voucher code length must be a positive number.")
 
-    h = hashlib.sha256()
-    h.update(uuid.uuid4().bytes)
-    voucher_code = base64.b32encode(h.digest())[0:length].decode('utf-8')
+    voucher_code = _generate_random_code(length)
     if Voucher.objects.filter(code__iexact=voucher_code).exists():
         return _generate_code_string(length)
 
     return voucher_code
 
 
+def generate_unique_voucher_codes(quantity, length, batch_size=VOUCHER_BULK_BATCH_SIZE):
+    """
+    Create a list of random voucher codes that are unique and not yet used by any voucher.
+
+    Candidate codes are generated in memory and checked for collisions against the database
+    in chunks, rather than with one query per code.
+
+    Args:
+        quantity (int): Number of codes to generate.
+        length (int): Length of each code.
+        batch_size (int): Maximum number of codes checked per query.
+
+    Raises:
+        ValueError raised if length is less than one.
+
+    Returns:
+        list of str
+    """
+    if length < 1:
+        raise ValueError("Voucher code length must be a positive number.")
+    if quantity > 32 ** length:
+        raise ValueError("Cannot generate {} unique voucher codes of length {}.".format(quantity, length))
+
+    codes = set()
+    while len(codes) < quantity:
+        candidates = set()
+        while len(candidates) < quantity - len(codes):
+            code = _generate_random_code(length)
+            if code not in codes:
+                candidates.add(code)
+
+        existing = set()
+        for chunk in _chunks(list(candidates), batch_size):
+            existing.update(Voucher.objects.filter(code__in=chunk).values_list('code', flat=True))
+
+        codes.update(candidates - existing)
+
+    return list(codes)
+
+
 def create_new_voucher(code, end_datetime, name, start_datetime, voucher_type):
     """
     Creates a voucher.
@@ -548,6 +681,53 @@ def create_new_voucher(code, end_datetime, name, start_datetime, voucher_type):
     return voucher
 
 
+def bulk_create_vouchers(end_datetime, name, quantity, start_datetime, voucher_type):
+    """
+    Creates vouchers with randomly generated codes using batched inserts.
+
+    Args:
+        end_datetime (datetime): Voucher end date.
+        name (str): Voucher name.
+        quantity (int): Number of vouchers to be created.
+        start_datetime (datetime): Voucher start date.
+        voucher_type (str): Voucher usage.
+
+    Returns:
+        List[Voucher], in the order their codes were generated.
+    """
+    if not isinstance(start_datetime, datetime.datetime):
+        start_datetime = dateutil.parser.parse(start_datetime)
+
+    if not isinstance(end_datetime, datetime.datetime):
+        end_datetime = dateutil.parser.parse(end_datetime)
+
+    codes = generate_unique_voucher_codes(quantity, settings.VOUCHER_CODE_LENGTH)
+    new_vouchers = []
+    for voucher_code in codes:
+        voucher = Voucher(
+            name=name[:128],
+            code=voucher_code,
+            usage=voucher_type,
+            start_datetime=start_datetime,
+            end_datetime=end_datetime,
+        )
+        voucher.clean()
+        new_vouchers.append(voucher)
+
+    with transaction.atomic():
+        Voucher.objects.bulk_create(new_vouchers, batch_size=VOUCHER_BULK_BATCH_SIZE)
+
+    # bulk_create does not set primary keys on every database backend (e.g. MySQL), so they are looked up by code.
+    if any(voucher.pk is None for voucher in new_vouchers):
+        ids_by_code = {}
+        for chunk in _chunks(codes, VOUCHER_BULK_BATCH_SIZE):
+            ids_by_code.update(Voucher.objects.filter(code__in=chunk).values_list('code', 'id'))
+        for voucher in new_vouchers:
+            voucher.pk = ids_by_code[voucher.code]
+
+    return new_vouchers
+
+
 def create_vouchers_and_attach_offers(
         code,
         end_datetime,
@@ -576,17 +756,23 @@ def create_vouchers_and_attach_offers(
     Returns:
         List[Voucher]
     """
-    vouchers = []
+    if code:
+        vouchers = [
+            create_new_voucher(
+                end_datetime=end_datetime,
+                start_datetime=start_datetime,
+                voucher_type=voucher_type,
+                code=code,
+                name=name
+            )
+            for __ in range(quantity)
+        ]
+    else:
+        vouchers = bulk_create_vouchers(end_datetime, name, quantity, start_datetime, voucher_type)
+
     voucher_offers = []
     enterprise_voucher_offers = []
-    for i in range(quantity):
-        voucher = create_new_voucher(
-            end_datetime=end_datetime,
-            start_datetime=start_datetime,
-            voucher_type=voucher_type,
-            code=code,
-            name=name
-        )
+    for i, voucher in enumerate(vouchers):
         voucher_offers.append(
             VoucherOffer(voucher=voucher, conditionaloffer=offers[i] if len(offers) > 1 else offers[0])
         )
@@ -597,10 +783,9 @@ def create_vouchers_and_attach_offers(
                     conditionaloffer=enterprise_offers[i] if len(enterprise_offers) > 1 else enterprise_offers[0]
                 )
             )
-        vouchers.append(voucher)
 
-    VoucherOffer.objects.bulk_create(voucher_offers)
-    VoucherOffer.objects.bulk_create(enterprise_voucher_offers)
+    VoucherOffer.objects.bulk_create(voucher_offers, batch_size=VOUCHER_BULK_BATCH_SIZE)
+    VoucherOffer.objects.bulk_create(enterprise_voucher_offers, batch_size=VOUCHER_BULK_BATCH_SIZE)
     return vouchers
 
 
@@ -3,14 +3,14 @@
 import csv
 import logging
 
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import View
 from oscar.core.loading import get_model
 
 from ecommerce.core.views import StaffOnlyMixin
-from ecommerce.extensions.voucher.utils import generate_coupon_report
+from ecommerce.extensions.voucher.utils import stream_coupon_report
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +20,13 @@ Product = get_model('catalogue', 'Product')
 StockRecord = get_model('partner', 'StockRecord')
 
 
+class Echo:
+    """File-like object that returns written values, so csv rows can be streamed."""
+
+    def write(self, value):
+        return value
+
+
 class CouponReportCSVView(StaffOnlyMixin, View):
     """Generates coupon report and returns it in CSV format."""
 
@@ -34,18 +41,19 @@ class CouponReportCSVView(StaffOnlyMixin, View):
         filename = "{}.csv".format(slugify(filename))
 
         try:
-            field_names, rows = generate_coupon_report(coupons_vouchers)
+            field_names, rows = stream_coupon_report(coupons_vouchers)
         except StockRecord.DoesNotExist:
             logger.exception(u'Failed to find StockRecord for Coupon [%d].', coupon.id)
             return HttpResponse(_('Failed to find a matching stock record for coupon, report download canceled.'),
                                 status=404)
 
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename={}'.format(filename)
+        writer = csv.DictWriter(Echo(), fieldnames=field_names)
 
-        writer = csv.DictWriter(response, fieldnames=field_names)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+        def stream():
+            yield writer.writeheader()
+            for row in rows:
+                yield writer.writerow(row)
 
+        response = StreamingHttpResponse(stream(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename={}'.format(filename)
         return response
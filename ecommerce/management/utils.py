@@ -6,6 +6,7 @@ from django.db.models import Q
 from oscar.apps.partner import strategy
 from oscar.core.loading import get_class, get_model
 
+from ecommerce.core.reference_data import shipping_event_types
 from ecommerce.extensions.checkout.mixins import EdxOrderPlacementMixin
 from ecommerce.extensions.payment.constants import CYBERSOURCE_CARD_TYPE_MAP
 from ecommerce.extensions.payment.helpers import get_processor_class_by_name
@@ -19,7 +20,6 @@ EventHandler = get_class('order.processing', 'EventHandler')
 NoShippingRequired = get_class('shipping.methods', 'NoShippingRequired')
 Order = get_model('order', 'Order')
 OrderTotalCalculator = get_class('checkout.calculators', 'OrderTotalCalculator')
-ShippingEventType = get_model('order', 'ShippingEventType')
 
 SHIPPING_EVENT_NAME = 'Shipped'
 
@@ -206,7 +206,7 @@ class FulfillFrozenBaskets(EdxOrderPlacementMixin):
             order_lines = order.lines.all()
             line_quantities = [line.quantity for line in order_lines]
 
-            shipping_event, __ = ShippingEventType.objects.get_or_create(name=SHIPPING_EVENT_NAME)
+            shipping_event = shipping_event_types.get_or_create(SHIPPING_EVENT_NAME)
             EventHandler().handle_shipping_event(order, shipping_event, order_lines, line_quantities)
 
             if order.is_fulfillable:
@@ -1,12 +1,77 @@
 
 
 import logging
+from collections import namedtuple
 
 from django.conf import settings
 from edx_django_utils.cache import TieredCache
 
 logger = logging.getLogger(__name__)
 
+ProgramCourse = namedtuple('ProgramCourse', ['uuid', 'run_keys', 'skus'])
+
+
+class ProgramIndex:
+    """ Compact index of the program data used to evaluate program offer conditions.
+
+    The index is built once from the program document, so that conditions look SKUs and course runs up in sets
+    rather than walking the document on every evaluation.
+
+    Attributes:
+        version (int): Version of the index format, part of its cache key.
+        uuid (str): Program UUID.
+        status (str): Program status.
+        applicable_seat_types (frozenset): Seat types, and entitlement modes, to which program offers apply.
+        courses (tuple): ProgramCourse, with its course run keys and applicable SKUs, of every course.
+        skus (frozenset): Applicable SKUs of all courses.
+        has_entitlements (bool): Whether any course of the program has an entitlement product.
+    """
+    VERSION = 1
+
+    def __init__(self, program):
+        self.version = self.VERSION
+        self.uuid = program['uuid']
+        self.status = program['status']
+        self.applicable_seat_types = frozenset(program['applicable_seat_types'])
+
+        courses = []
+        for course in program['courses']:
+            run_keys = frozenset(course_run['key'] for course_run in course['course_runs'])
+            skus = {
+                seat['sku']
+                for course_run in course['course_runs']
+                for seat in course_run['seats']
+                if seat['type'] in self.applicable_seat_types
+            }
+            skus.update(
+                entitlement['sku'] for entitlement in course['entitlements']
+                if entitlement['mode'].lower() in self.applicable_seat_types
+            )
+            courses.append(ProgramCourse(course['uuid'], run_keys, frozenset(skus)))
+
+        self.courses = tuple(courses)
+        self.skus = frozenset().union(*(course.skus for course in self.courses))
+        self.has_entitlements = any(course['entitlements'] for course in program['courses'])
+
+        self._course_positions_by_run_key = {}
+        self._course_positions_by_uuid = {}
+        for position, course in enumerate(self.courses):
+            self._course_positions_by_uuid.setdefault(course.uuid, []).append(position)
+            for run_key in course.run_keys:
+                self._course_positions_by_run_key.setdefault(run_key, []).append(position)
+
+    def get_owned_courses(self, enrollments, entitlements):
+        """ Returns the positions in `courses` of the courses the user is enrolled in, or entitled to, in an
+        applicable mode. """
+        owned = set()
+        for enrollment in enrollments:
+            if enrollment['mode'] in self.applicable_seat_types:
+                owned.update(self._course_positions_by_run_key.get(enrollment['course_details']['course_id'], ()))
+        for entitlement in entitlements:
+            if entitlement['mode'] in self.applicable_seat_types:
+                owned.update(self._course_positions_by_uuid.get(entitlement['course_uuid'], ()))
+        return owned
+
 
 class ProgramsApiClient:
     """ Client for the Programs API.
@@ -43,5 +108,45 @@ class ProgramsApiClient:
         program = self.client.programs(program_uuid).get()
 
         TieredCache.set_all_tiers(cache_key, program, self.cache_ttl)
+        self._cache_program_index(program_uuid, program)
         logging.info('Program [%s] was successfully retrieved and cached.', program_uuid)
         return program
+
+    def _get_program_index_cache_key(self, program_uuid):
+        return '{site_domain}-program-index-v{version}-{uuid}'.format(
+            site_domain=self.site_domain, version=ProgramIndex.VERSION, uuid=program_uuid
+        )
+
+    def _cache_program_index(self, program_uuid, program):
+        program_index = ProgramIndex(program)
+        TieredCache.set_all_tiers(self._get_program_index_cache_key(program_uuid), program_index, self.cache_ttl)
+        return program_index
+
+    def get_program_index(self, uuid):
+        """
+        Retrieve the index of a single program.
+
+        The index is cached along with the program, when the program is retrieved from the Programs API.
+
+        Args:
+            uuid (str|uuid): Program UUID.
+
+        Returns:
+            ProgramIndex
+        """
+        program_uuid = str(uuid)
+        program_index_cached_response = TieredCache.get_cached_response(
+            self._get_program_index_cache_key(program_uuid)
+        )
+        if program_index_cached_response.is_found:
+            return program_index_cached_response.value
+
+        program = self.get_program(program_uuid)
+
+        # Retrieving the program cached its index, unless the program itself was already cached.
+        program_index_cached_response = TieredCache.get_cached_response(
+            self._get_program_index_cache_key(program_uuid)
+        )
+        if program_index_cached_response.is_found:
+            return program_index_cached_response.value
+        return self._cache_program_index(program_uuid, program)
@@ -4,17 +4,17 @@ import logging
 import operator
 
 from django.conf import settings
-from edx_django_utils.cache import TieredCache
 from oscar.apps.offer import utils as oscar_utils
 from oscar.core.loading import get_model
 from requests.exceptions import ConnectionError as ReqConnectionError
 from requests.exceptions import Timeout
 from slumber.exceptions import HttpNotFoundError, SlumberBaseException
 
+from ecommerce.core.upstream_cache import get_upstream_response
 from ecommerce.core.utils import deprecated_traverse_pagination, get_cache_key
 from ecommerce.extensions.offer.decorators import check_condition_applicability
 from ecommerce.extensions.offer.mixins import SingleItemConsumptionConditionMixin
-from ecommerce.programs.utils import get_program
+from ecommerce.programs.utils import get_program_index
 
 Condition = get_model('offer', 'Condition')
 logger = logging.getLogger(__name__)
@@ -31,20 +31,8 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
 
     def _get_applicable_skus(self, site_configuration):
         """ SKUs to which this condition applies. """
-        program_skus = set()
-        program = get_program(self.program_uuid, site_configuration)
-        if program:
-            applicable_seat_types = program['applicable_seat_types']
-
-            for course in program['courses']:
-                for course_run in course['course_runs']:
-                    program_skus.update(
-                        {seat['sku'] for seat in course_run['seats'] if seat['type'] in applicable_seat_types}
-                    )
-                for entitlement in course['entitlements']:
-                    if entitlement['mode'].lower() in applicable_seat_types:
-                        program_skus.add(entitlement['sku'])
-        return program_skus
+        program_index = get_program_index(self.program_uuid, site_configuration)
+        return program_index.skus if program_index else frozenset()
 
     def _get_lms_resource_for_user(self, basket, resource_name, endpoint):
         cache_key = get_cache_key(
@@ -52,14 +40,12 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
             resource=resource_name,
             username=basket.owner.username,
         )
-        data_list_cached_response = TieredCache.get_cached_response(cache_key)
-        if data_list_cached_response.is_found:
-            return data_list_cached_response.value
 
         user = basket.owner.username
         try:
-            data_list = endpoint.get(user=user) or []
-            TieredCache.set_all_tiers(cache_key, data_list, settings.LMS_API_CACHE_TIMEOUT)
+            data_list = get_upstream_response(
+                cache_key, lambda: endpoint.get(user=user) or [], settings.LMS_API_CACHE_TIMEOUT
+            )
         except (ReqConnectionError, SlumberBaseException, Timeout) as exc:
             logger.error('Failed to retrieve %s : %s', resource_name, str(exc))
             data_list = []
@@ -92,15 +78,6 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
                     entitlements = response
         return enrollments, entitlements
 
-    def _has_entitlements(self, program):
-        """
-        Determines whether an entitlement product exists for any course in the program.
-        """
-        for course in program['courses']:
-            if course['entitlements']:
-                return True
-        return False
-
     @check_condition_applicability()
     def is_satisfied(self, offer, basket):  # pylint: disable=unused-argument
         """
@@ -115,25 +92,19 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
         """
         basket_skus = {line.stockrecord.partner_sku for line in basket.all_lines()}
         try:
-            program = get_program(self.program_uuid, basket.site.siteconfiguration)
+            program_index = get_program_index(self.program_uuid, basket.site.siteconfiguration)
         except (HttpNotFoundError, SlumberBaseException, Timeout):
             return False
 
-        if program and program['status'] == 'active':
-            applicable_seat_types = program['applicable_seat_types']
-        else:
+        if not program_index or program_index.status != 'active':
             return False
 
-        retrieve_entitlements = self._has_entitlements(program)
-        enrollments, entitlements = self._get_user_ownership_data(basket, retrieve_entitlements)
+        enrollments, entitlements = self._get_user_ownership_data(basket, program_index.has_entitlements)
+        owned_courses = program_index.get_owned_courses(enrollments, entitlements)
 
-        for course in program['courses']:
+        for position, course in enumerate(program_index.courses):
             # If the user is already enrolled in a course, we do not need to check their basket for it
-            if any(enrollment['course_details']['course_id'] in [run['key'] for run in course['course_runs']] and
-                   enrollment['mode'] in applicable_seat_types for enrollment in enrollments):
-                continue
-            if any(course['uuid'] == entitlement['course_uuid'] and
-                   entitlement['mode'] in applicable_seat_types for entitlement in entitlements):
+            if position in owned_courses:
                 continue
 
             # If the  basket has no SKUs left, but we still have courses over which
@@ -141,18 +112,10 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
             if not basket_skus:
                 return False
 
-            # Get all of the SKUs that can satisfy this course
-            skus = set()
-            for course_run in course['course_runs']:
-                skus.update({seat['sku'] for seat in course_run['seats'] if seat['type'] in applicable_seat_types})
-            for entitlement in course['entitlements']:
-                if entitlement['mode'].lower() in applicable_seat_types:
-                    skus.add(entitlement['sku'])
-
             # The lack of a difference in the set of SKUs in the basket and the course indicates that
             # that there is no intersection. Therefore, the basket contains no SKUs for the current course.
             # Because the user is also not enrolled in the course, it follows that the program condition is not met.
-            diff = basket_skus.difference(skus)
+            diff = basket_skus.difference(course.skus)
             if diff == basket_skus:
                 return False
 
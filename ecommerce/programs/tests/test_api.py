@@ -3,9 +3,10 @@
 import uuid
 
 import httpretty
+import mock
 from requests import ConnectionError as ReqConnectionError
 
-from ecommerce.programs.api import ProgramsApiClient
+from ecommerce.programs.api import ProgramIndex, ProgramsApiClient
 from ecommerce.programs.tests.mixins import ProgramTestMixin
 from ecommerce.tests.testcases import TestCase
 
@@ -37,3 +38,45 @@ class ProgramsApiClientTests(ProgramTestMixin, TestCase):
         self.client.site_domain = 'different-domain'
         with self.assertRaises(ReqConnectionError):
             self.client.get_program(program_uuid)
+
+    def test_get_program_index(self):
+        """ The index should be built once, when the program is retrieved, and cached along with it. """
+        program_uuid = uuid.uuid4()
+        data = self.mock_program_detail_endpoint(program_uuid, self.site_configuration.discovery_api_url)
+        build_index = ProgramIndex.__init__
+        with mock.patch.object(ProgramIndex, '__init__', autospec=True, side_effect=build_index) as mock_build_index:
+            program_index = self.client.get_program_index(program_uuid)
+            httpretty.disable()
+            self.assertEqual(self.client.get_program_index(program_uuid).skus, program_index.skus)
+        self.assertEqual(mock_build_index.call_count, 1)
+
+        self.assertEqual(program_index.version, ProgramIndex.VERSION)
+        self.assertEqual(program_index.status, 'active')
+        self.assertTrue(program_index.has_entitlements)
+        self.assertEqual(len(program_index.courses), len(data['courses']))
+        for program_course, course in zip(program_index.courses, data['courses']):
+            self.assertEqual(program_course.uuid, course['uuid'])
+            self.assertEqual(program_course.run_keys, {course_run['key'] for course_run in course['course_runs']})
+            expected_skus = {
+                seat['sku'] for course_run in course['course_runs'] for seat in course_run['seats']
+                if seat['type'] == 'verified'
+            }
+            expected_skus.add(course['entitlements'][0]['sku'])
+            self.assertEqual(program_course.skus, expected_skus)
+            self.assertLessEqual(program_course.skus, program_index.skus)
+
+    def test_get_owned_courses(self):
+        """ The courses the user is enrolled in, or entitled to, in an applicable mode should be returned. """
+        program_uuid = uuid.uuid4()
+        data = self.mock_program_detail_endpoint(program_uuid, self.site_configuration.discovery_api_url)
+        program_index = ProgramIndex(data)
+        courses = data['courses']
+        enrollments = [
+            {'mode': 'verified', 'course_details': {'course_id': courses[0]['course_runs'][1]['key']}},
+            {'mode': 'audit', 'course_details': {'course_id': courses[1]['course_runs'][0]['key']}},
+        ]
+        entitlements = [
+            {'mode': 'verified', 'course_uuid': courses[2]['uuid']},
+            {'mode': 'audit', 'course_uuid': courses[3]['uuid']},
+        ]
+        self.assertEqual(program_index.get_owned_courses(enrollments, entitlements), {0, 2})
@@ -11,6 +11,7 @@ from slumber.exceptions import HttpNotFoundError, SlumberBaseException
 from ecommerce.core.constants import COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME
 from ecommerce.courses.models import Course
 from ecommerce.extensions.test import factories
+from ecommerce.programs.api import ProgramIndex
 from ecommerce.programs.tests.mixins import ProgramTestMixin
 from ecommerce.tests.factories import ProductFactory, SiteConfigurationFactory, UserFactory
 from ecommerce.tests.testcases import TestCase
@@ -131,8 +132,8 @@ class ProgramCourseRunSeatsConditionTests(ProgramTestMixin, TestCase):
         # Verify the user enrollments are cached
         basket.site.siteconfiguration.enable_partial_program = True
         httpretty.disable()
-        with mock.patch('ecommerce.programs.conditions.get_program',
-                        return_value=program):
+        with mock.patch('ecommerce.programs.conditions.get_program_index',
+                        return_value=ProgramIndex(program)):
             self.assertTrue(self.condition.is_satisfied(offer, basket))
 
     @ddt.data(HttpNotFoundError, SlumberBaseException, Timeout)
@@ -142,7 +143,7 @@ class ProgramCourseRunSeatsConditionTests(ProgramTestMixin, TestCase):
         basket = BasketFactory(site=self.site, owner=UserFactory())
         basket.add_product(self.test_product)
 
-        with mock.patch('ecommerce.programs.conditions.get_program',
+        with mock.patch('ecommerce.programs.conditions.get_program_index',
                         side_effect=value):
             self.assertFalse(self.condition.is_satisfied(offer, basket))
 
@@ -239,8 +240,8 @@ class ProgramCourseRunSeatsConditionTests(ProgramTestMixin, TestCase):
         # Verify the user enrollments are cached
         basket.site.siteconfiguration.enable_partial_program = True
         httpretty.disable()
-        with mock.patch('ecommerce.programs.conditions.get_program',
-                        return_value=program):
+        with mock.patch('ecommerce.programs.conditions.get_program_index',
+                        return_value=ProgramIndex(program)):
             self.assertTrue(self.condition.is_satisfied(offer, basket))
 
     @httpretty.activate
@@ -39,3 +39,33 @@ def get_program(program_uuid, siteconfiguration):
         log.debug(msg)
 
     return response
+
+
+def get_program_index(program_uuid, siteconfiguration):
+    """
+    Returns the index of the program identified by the program_uuid, used to evaluate program offer conditions.
+
+    The index is built when the program data is retrieved from the Discovery Service, and cached along with it.
+
+    Args:
+        siteconfiguration (SiteConfiguration): Configuration containing the requisite parameters
+            to connect to the Discovery Service.
+
+        program_uuid (uuid): id to query the specified program
+
+    Returns:
+        ProgramIndex
+        None if not found or another error occurs
+    """
+    program_index = None
+    try:
+        client = ProgramsApiClient(siteconfiguration.discovery_api_client, siteconfiguration.site.domain)
+        program_index = client.get_program_index(str(program_uuid))
+    except HttpNotFoundError:
+        msg = 'No program data found for {}'.format(program_uuid)
+        log.debug(msg)
+    except (ReqConnectionError, SlumberBaseException, Timeout):
+        msg = 'Failed to retrieve program details for {}'.format(program_uuid)
+        log.debug(msg)
+
+    return program_index
@@ -267,10 +267,29 @@ CREDIT_PROVIDER_CACHE_TIMEOUT = 600
 
 # Anonymous User Calculate Cache timeout
 ANONYMOUS_BASKET_CALCULATE_CACHE_TIMEOUT = 3600  # Value is in seconds.
+# Calculate results shared by authenticated users of the same enterprise customer and email domain.
+AUTHENTICATED_BASKET_CALCULATE_CACHE_TIMEOUT = 300  # Value is in seconds.
 
 # LMS API settings used for fetching information from LMS
 LMS_API_CACHE_TIMEOUT = 30  # Value is in seconds.
 
+# Number of email addresses looked up per request to the LMS accounts API.
+LMS_ACCOUNTS_EMAIL_BATCH_SIZE = 50
+
+# Responses from upstream services (Discovery, LMS, Enterprise) fetched through ecommerce.core.upstream_cache.
+# Stale responses are kept this long after they expire, and served while another worker refreshes them.
+UPSTREAM_STALE_CACHE_TIMEOUT = 3600  # Value is in seconds.
+# 404 responses are remembered this long before the upstream service is asked again.
+UPSTREAM_NOT_FOUND_CACHE_TIMEOUT = 60  # Value is in seconds.
+# Maximum time a worker holds the lock for fetching a response, and others wait for it.
+UPSTREAM_FETCH_LOCK_TIMEOUT = 10  # Value is in seconds.
+
+# Access tokens of the sites' service users, fetched through ecommerce.core.access_tokens.
+# Tokens are refreshed in the background this long before they expire.
+ACCESS_TOKEN_REFRESH_MARGIN = 300  # Value is in seconds.
+# Maximum time a worker holds the lock for refreshing a token, and others wait for it.
+ACCESS_TOKEN_REFRESH_LOCK_TIMEOUT = 10  # Value is in seconds.
+
 # Add here custom payment processor urls. For instance:
 # EXTRA_PAYMENT_PROCESSOR_URLS = {
 #   "mycustompaymentprocessor": "ecommerce.payment.processors.mycustompaymentprocessor.urls"
@@ -280,8 +299,39 @@ EXTRA_PAYMENT_PROCESSOR_URLS = {}
 
 VOUCHER_CACHE_TIMEOUT = 10  # Value is in seconds.
 
+# Compiled site offer index used by the offer Applicator.
+OFFER_INDEX_CACHE_TIMEOUT = 86400  # Value is in seconds.
+
+# Course offers listed for a voucher on the coupon landing page, cached per voucher and catalog page.
+VOUCHER_OFFERS_CACHE_TIMEOUT = 300  # Value is in seconds.
+# Convert and cache the next catalog page of voucher offers in a background thread.
+VOUCHER_OFFERS_PREFETCH_NEXT_PAGE = True
+
+# Number of rows the usage counters of each offer and voucher are spread over, so that concurrent orders do not
+# wait on the same row. The counters are rolled up into the offers and vouchers by roll_up_usage_counters.
+USAGE_COUNTER_SHARDS = 8
+
 SDN_CHECK_REQUEST_TIMEOUT = 5  # Value is in seconds.
 
+# Timeouts (in seconds) and retry policies of the pooled sessions used to call other services, by service. The
+# 'default' entry applies to the services and keys not listed. Only idempotent requests are retried. Requests which
+# set their own timeout, such as those of ENROLLMENT_FULFILLMENT_TIMEOUT and SDN_CHECK_REQUEST_TIMEOUT, keep it.
+API_CLIENT_SERVICES = {
+    'default': {
+        'timeout': 5,
+        'retries': 2,
+        'backoff_factor': 0.1,
+    },
+    'discovery': {
+        'timeout': 10,
+    },
+}
+# Maximum number of kept-alive connections per host in each pooled session.
+API_CLIENT_POOL_MAXSIZE = 10
+
+# Temporary PayPal web profiles are replaced this long before they expire.
+PAYPAL_WEB_PROFILE_REFRESH_MARGIN = 1800  # Value is in seconds.
+
 # APP CONFIGURATION
 DJANGO_APPS = [
     'django.contrib.admin',
@@ -650,6 +700,9 @@ EDX_DRF_EXTENSIONS = {
 # created for the Enrollment code products.
 ENROLLMENT_CODE_EXIPRATION_DATE = datetime.datetime.now() + datetime.timedelta(weeks=520)
 ENROLLMENT_FULFILLMENT_TIMEOUT = 7
+# Maximum number of enrollment requests sent in parallel when fulfilling an order.
+# Set to 1 to send them one after the other.
+ENROLLMENT_FULFILLMENT_CONCURRENCY = 1
 
 # Affiliate cookie key
 AFFILIATE_COOKIE_KEY = 'affiliate_id'
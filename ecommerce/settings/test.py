@@ -183,6 +183,9 @@ ENTERPRISE_CATALOG_API_URL = urljoin(ENTERPRISE_CATALOG_SERVICE_URL, 'api/v1/')
 # Don't bother sending fake events to Segment. Doing so creates unnecessary threads.
 SEND_SEGMENT_EVENTS = False
 
+# Background threads do not see the data of the test transaction, so don't prefetch voucher offers in them.
+VOUCHER_OFFERS_PREFETCH_NEXT_PAGE = False
+
 # SPEED
 DEBUG = False
 TEMPLATE_DEBUG = False
@@ -0,0 +1,216 @@
+"""
+Helpers for benchmarking the database queries, wall time and memory used by hot request paths.
+
+Benchmarks are marked with `pytest.mark.benchmark` and excluded from the default test run. Run them with
+`make benchmark`, or:
+
+    pytest -m benchmark ecommerce/tests/benchmarks
+
+The number of queries of every benchmark is checked against the budget recorded for it in budgets.json.
+Query counts do not depend on the machine running the benchmarks, so the budgets are the counts measured
+when a benchmark was added or last optimized. Lower a budget when a change removes queries.
+
+Wall time and peak memory depend on the machine and its load. A budget may give generous ceilings for them,
+as wall_time_ms and peak_memory_kb, which only catch large regressions. Set BENCHMARK_REPORT to a file path
+to append the measurements to that file, one JSON object per line. Set BENCHMARK_BASELINE to the report of
+an earlier run on the same machine, for example on the main branch, to fail the benchmarks whose wall time
+or peak memory exceeds the baseline by more than BENCHMARK_TOLERANCE, a factor which defaults to 1.5.
+"""
+
+
+import json
+import logging
+import os
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+
+import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from oscar.core.loading import get_model
+from oscar.test.factories import RangeFactory
+
+from ecommerce.courses.models import Course
+from ecommerce.extensions.test.factories import ConditionalOfferFactory, prepare_voucher
+
+logger = logging.getLogger(__name__)
+StockRecord = get_model('partner', 'StockRecord')
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'budgets.json')
+
+# Number of timed calls, of which the median is recorded.
+TIMING_REPEAT = 5
+
+# Factor by which wall time and peak memory may exceed the baseline.
+DEFAULT_TOLERANCE = 1.5
+
+
+class BenchmarkResult(namedtuple('BenchmarkResult', ['queries', 'wall_time_ms', 'peak_memory_kb'])):
+    """ Measurements of a single benchmark. """
+
+
+def load_budgets():
+    with open(BUDGETS_PATH) as budgets_file:
+        return json.load(budgets_file)
+
+
+def load_baseline():
+    """ Return the measurements of the BENCHMARK_BASELINE report keyed by benchmark name, if it is set. """
+    baseline_path = os.environ.get('BENCHMARK_BASELINE')
+    if not baseline_path:
+        return {}
+
+    with open(baseline_path) as baseline_file:
+        results = [json.loads(line) for line in baseline_file if line.strip()]
+    # The last measurement of a benchmark wins, when the report was appended to by several runs.
+    return {result['name']: result for result in results}
+
+
+def measure(action, setup=None, repeat=TIMING_REPEAT):
+    """
+    Measure the queries, wall time and peak memory allocated by a call of `action`.
+
+    A first call warms up the caches and is not measured. The queries of the second call are counted, the median
+    wall time of the following `repeat` calls is recorded, and the peak memory is measured in a last call, since
+    tracing memory allocations slows it down.
+
+    Arguments:
+        action (callable): Function without arguments to measure.
+        setup (callable): Function without arguments called, and not measured, before each call of `action`.
+        repeat (int): Number of timed calls.
+
+    Returns:
+        BenchmarkResult
+    """
+    setup = setup or (lambda: None)
+
+    setup()
+    action()
+
+    setup()
+    with CaptureQueriesContext(connection) as queries:
+        action()
+    # The queries log is reset by the following requests, so count the queries now.
+    query_count = len(queries)
+
+    timings = []
+    for __ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - start)
+
+    setup()
+    tracemalloc.start()
+    try:
+        action()
+        __, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        queries=query_count,
+        wall_time_ms=round(statistics.median(timings) * 1000, 1),
+        peak_memory_kb=round(peak_memory / 1024, 1),
+    )
+
+
+class BenchmarkMixin:
+    """ Mixin for test cases benchmarking request paths against the budgets in budgets.json. """
+
+    def assert_within_budget(self, name, result):
+        """
+        Record the result of the named benchmark, and fail if it exceeds its budget, or if its wall time or peak
+        memory exceeds the baseline by more than the tolerance.
+        """
+        logger.info('Benchmark [%s]: %s', name, dict(result._asdict()))
+
+        report_path = os.environ.get('BENCHMARK_REPORT')
+        if report_path:
+            with open(report_path, 'a') as report_file:
+                report_file.write(json.dumps(dict(result._asdict(), name=name)) + '\n')
+
+        budget = load_budgets()[name]
+        exceeded = [
+            '{measurement} is {value}, budget is {budget}'.format(
+                measurement=measurement, value=getattr(result, measurement), budget=budget[measurement]
+            )
+            for measurement in BenchmarkResult._fields
+            if measurement in budget and getattr(result, measurement) > budget[measurement]
+        ]
+
+        baseline = load_baseline().get(name)
+        if baseline:
+            tolerance = float(os.environ.get('BENCHMARK_TOLERANCE', DEFAULT_TOLERANCE))
+            exceeded.extend(
+                '{measurement} is {value}, baseline is {baseline}'.format(
+                    measurement=measurement, value=getattr(result, measurement), baseline=baseline[measurement]
+                )
+                for measurement in ('wall_time_ms', 'peak_memory_kb')
+                if getattr(result, measurement) > baseline[measurement] * tolerance
+            )
+
+        if exceeded:
+            self.fail('Benchmark [{name}] exceeded its budget or baseline: {exceeded}.'.format(
+                name=name, exceeded='; '.join(exceeded)
+            ))
+
+    def benchmark(self, name, action, setup=None):
+        """ Measure `action` and check the result against the budget of the named benchmark. """
+        result = measure(action, setup=setup)
+        self.assert_within_budget(name, result)
+        return result
+
+    def call_endpoint(self, method, path, data=None, expected_status=200, **kwargs):
+        """ Make a request with the test client, and check its status so that a failing path is not benchmarked. """
+        response = getattr(self.client, method)(path, data, **kwargs)
+        self.assertEqual(response.status_code, expected_status)
+        return response
+
+    def seed_courses(self, count):
+        """ Create courses with audit and verified seats using the generate_courses command. """
+        courses = [
+            {
+                'organization': 'BenchX',
+                'number': 'Course{}'.format(index),
+                'run': '2020',
+                'partner': self.partner.short_code,
+                'fields': {'display_name': 'Benchmark Course {}'.format(index)},
+                'enrollment': {
+                    'audit': True,
+                    'verified': True,
+                    'honor': False,
+                    'professional_education': False,
+                    'no_id_verification': False,
+                    'credit': False,
+                    'credit_provider': None,
+                },
+            }
+            for index in range(count)
+        ]
+        with mock.patch.object(Course, 'publish_to_lms', return_value=None):
+            call_command('generate_courses', json.dumps({'courses': courses}))
+        return list(Course.objects.filter(id__startswith='course-v1:BenchX+').order_by('id'))
+
+    def seed_offers(self, count):
+        """ Create site offers which do not apply to the benchmarked baskets. """
+        return [ConditionalOfferFactory(name='Benchmark offer {}'.format(index)) for index in range(count)]
+
+    def seed_vouchers(self, products, count):
+        """ Create vouchers, each for one of the products. """
+        return [
+            prepare_voucher(
+                code='BENCH{}'.format(index),
+                _range=RangeFactory(products=[products[index % len(products)]]),
+                site=self.site
+            )[0]
+            for index in range(count)
+        ]
+
+    def seed_orders(self, product, count):
+        """ Create orders for the product using the create_fake_orders command. """
+        sku = StockRecord.objects.get(product=product).partner_sku
+        call_command('create_fake_orders', '--count={}'.format(count), '--sku={}'.format(sku))
@@ -0,0 +1,228 @@
+"""
+Benchmarks of the checkout hot paths. See ecommerce/tests/benchmarks/mixins.py for how to run them.
+"""
+
+
+import datetime
+import json
+from uuid import uuid4
+
+import httpretty
+import mock
+import pytest
+from compressor.cache import get_offline_manifest_filename
+from compressor.storage import default_storage as compressor_storage
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import rsa
+from CyberSource.rest import RESTResponse
+from django.urls import reverse
+from django.utils.timezone import now
+from jwt.algorithms import RSAAlgorithm
+from oscar.core.loading import get_class, get_model
+from oscar.test import factories
+
+from ecommerce.core.constants import ENTERPRISE_COUPON_ADMIN_ROLE, SYSTEM_ENTERPRISE_ADMIN_ROLE
+from ecommerce.core.models import EcommerceFeatureRole, EcommerceFeatureRoleAssignment
+from ecommerce.coupons.tests.mixins import CouponMixin, DiscoveryMockMixin
+from ecommerce.enterprise.tests.mixins import EnterpriseServiceMockMixin
+from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
+from ecommerce.extensions.offer.constants import VOUCHER_NOT_ASSIGNED
+from ecommerce.extensions.payment.core.sdn import SDNClient
+from ecommerce.extensions.payment.models import EnterpriseContractMetadata
+from ecommerce.extensions.payment.tests.mixins import CyberSourceRESTAPIMixin
+from ecommerce.extensions.test.factories import prepare_voucher
+from ecommerce.tests.benchmarks.mixins import BenchmarkMixin
+from ecommerce.tests.mixins import JwtMixin, LmsApiMockMixin
+from ecommerce.tests.testcases import TestCase
+
+Basket = get_model('basket', 'Basket')
+Benefit = get_model('offer', 'Benefit')
+Product = get_model('catalogue', 'Product')
+Voucher = get_model('voucher', 'Voucher')
+Selector = get_class('partner.strategy', 'Selector')
+
+# Amount of data seeded for the benchmarks.
+BENCHMARK_COURSES = 10
+BENCHMARK_OFFERS = 20
+BENCHMARK_VOUCHERS = 20
+BENCHMARK_ORDERS = 50
+BENCHMARK_ENTERPRISE_COUPONS = 10
+
+AUTHORIZED_PAYMENT_RESPONSE = {
+    'id': '6031827608526961004260',
+    'status': 'AUTHORIZED',
+    'client_reference_information': {'code': None},
+    'processor_information': {'approval_code': '307640', 'transaction_id': '380294307616695'},
+    'payment_information': {'tokenized_card': {'type': '001'}},
+    'order_information': {'amount_details': {'total_amount': '100.00', 'currency': 'USD'}},
+}
+
+
+@pytest.mark.benchmark
+class CheckoutBenchmarkTests(BenchmarkMixin, CyberSourceRESTAPIMixin, DiscoveryTestMixin, DiscoveryMockMixin,
+                             EnterpriseServiceMockMixin, LmsApiMockMixin, TestCase):
+    """ Benchmarks of the basket, payment and order endpoints. """
+
+    def setUp(self):
+        super(CheckoutBenchmarkTests, self).setUp()
+        # Upstream services are stubbed, and any request that is not fails rather than reaching the network.
+        httpretty.enable(allow_net_connect=False)
+        self.addCleanup(httpretty.reset)
+        self.addCleanup(httpretty.disable)
+        self.mock_access_token_response()
+
+        self.partner.default_site = self.site
+        self.partner.save()
+
+        self.courses = self.seed_courses(BENCHMARK_COURSES)
+        self.seed_offers(BENCHMARK_OFFERS)
+
+        seats = [course.seat_products.get(attribute_values__value_text='verified') for course in self.courses]
+        self.seed_vouchers(seats, BENCHMARK_VOUCHERS)
+
+        self.seat = seats[0]
+        self.sku = self.seat.stockrecords.first().partner_sku
+        self.seed_orders(self.seat, BENCHMARK_ORDERS)
+
+        for course in self.courses:
+            self.mock_course_run_detail_endpoint(course, discovery_api_url=self.site_configuration.discovery_api_url)
+        self.mock_enterprise_learner_api_for_learner_with_no_enterprise()
+
+        self.user = self.create_user(is_staff=True)
+        self.client.login(username=self.user.username, password=self.password)
+        self.mock_account_api(self.request, self.user.username, data={'is_active': True})
+        self.basket = self.create_basket()
+
+    def create_basket(self):
+        """ Return a new basket containing the benchmarked seat, replacing the user's open basket. """
+        Basket.objects.filter(owner=self.user, status=Basket.OPEN).update(status=Basket.MERGED)
+        basket = Basket.create_basket(self.site, self.user)
+        basket.add_product(self.seat)
+        return basket
+
+    def test_basket_summary(self):
+        # The page renders the compressed static assets, which `make static` builds before the tests run in CI.
+        if not compressor_storage.exists(get_offline_manifest_filename()):
+            self.skipTest('The static assets have not been compressed.')
+        self.benchmark('basket_summary', lambda: self.call_endpoint('get', reverse('basket:summary')))
+
+    def test_payment_api(self):
+        self.benchmark('payment_api', lambda: self.call_endpoint('get', reverse('bff:payment:v0:payment')))
+
+    def test_basket_calculate(self):
+        path = '{}?sku={}'.format(reverse('api:v2:baskets:calculate'), self.sku)
+        self.benchmark('basket_calculate', lambda: self.call_endpoint('get', path))
+
+    def test_voucher_add_api(self):
+        voucher, __ = prepare_voucher(
+            code='BENCHSEAT', _range=factories.RangeFactory(products=[self.seat]), usage=Voucher.MULTI_USE
+        )
+        self.benchmark(
+            'voucher_add_api',
+            lambda: self.call_endpoint('post', reverse('bff:payment:v0:addvoucher'), {'code': voucher.code}),
+            setup=self.basket.vouchers.clear,
+        )
+
+    def test_cybersource_authorize(self):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+        capture_context = {'flx': {'jwk': json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))}}
+        country = factories.CountryFactory(iso_3166_1_a2='US', printable_name='United States')
+        data = {
+            'first_name': 'Test',
+            'last_name': 'User',
+            'address_line1': '141 Portland Ave.',
+            'address_line2': 'Floor 9',
+            'city': 'Cambridge',
+            'state': 'MA',
+            'postal_code': '02139',
+            'country': country.iso_3166_1_a2,
+            'payment_token': 'payment-token',
+        }
+
+        def setup():
+            self.basket = self.create_basket()
+            data['basket'] = self.basket.id
+            response = dict(
+                AUTHORIZED_PAYMENT_RESPONSE, client_reference_information={'code': self.basket.order_number}
+            )
+            mock_request.return_value = mock.Mock(
+                spec=RESTResponse, resp=None, status=201, reason='CREATED',
+                data=self.convertToCybersourceWireFormat(json.dumps(response))
+            )
+
+        unexpired_capture_contexts = mock.patch(
+            'ecommerce.extensions.payment.processors.cybersource.CybersourceREST._unexpired_capture_contexts',
+            return_value=[({}, capture_context)]
+        )
+        with unexpired_capture_contexts, \
+                mock.patch.object(SDNClient, 'search', return_value={'total': 0}), \
+                mock.patch('CyberSource.api_client.ApiClient.request') as mock_request, \
+                mock.patch('ecommerce.extensions.payment.processors.cybersource.jwt') as mock_jwt:
+            mock_jwt.decode.return_value = {'data': {'number': 'xxxx xxxx xxxx 1111'}}
+            self.benchmark(
+                'cybersource_authorize',
+                lambda: self.call_endpoint('post', reverse('cybersource:authorize'), data, expected_status=201),
+                setup=setup,
+            )
+
+    def test_order_list(self):
+        self.benchmark('order_list', lambda: self.call_endpoint('get', reverse('api:v2:order-list')))
+
+
+@pytest.mark.benchmark
+class EnterpriseCouponBenchmarkTests(BenchmarkMixin, CouponMixin, DiscoveryTestMixin, JwtMixin, TestCase):
+    """ Benchmarks of the enterprise coupon endpoints of the admin portal. """
+
+    def setUp(self):
+        super(EnterpriseCouponBenchmarkTests, self).setUp()
+        self.user = self.create_user(is_staff=True)
+        self.client.login(username=self.user.username, password=self.password)
+
+        self.enterprise_id = str(uuid4())
+        EcommerceFeatureRoleAssignment.objects.create(
+            role=EcommerceFeatureRole.objects.get(name=ENTERPRISE_COUPON_ADMIN_ROLE),
+            user=self.user,
+            enterprise_id=self.enterprise_id
+        )
+        self.set_jwt_cookie(system_wide_role=SYSTEM_ENTERPRISE_ADMIN_ROLE, context=self.enterprise_id)
+
+        enterprise_customer = {'name': 'Benchmark Enterprise', 'enterprise_customer_uuid': self.enterprise_id}
+        with mock.patch('ecommerce.extensions.voucher.utils.get_enterprise_customer') as voucher_customer, \
+                mock.patch('ecommerce.extensions.api.v2.utils.get_enterprise_customer') as api_customer, \
+                mock.patch('ecommerce.extensions.api.v2.utils.send_mail'):
+            voucher_customer.return_value = api_customer.return_value = enterprise_customer
+            for index in range(BENCHMARK_ENTERPRISE_COUPONS):
+                self.create_enterprise_coupon('Benchmark coupon {}'.format(index))
+
+        self.coupon = Product.objects.get(title='Benchmark coupon 0')
+
+    def create_enterprise_coupon(self, title):
+        data = {
+            'benefit_type': Benefit.PERCENTAGE,
+            'benefit_value': 100,
+            'category': {'name': self.category.name},
+            'code': '',
+            'end_datetime': str(now() + datetime.timedelta(days=10)),
+            'price': 100,
+            'quantity': 10,
+            'start_datetime': str(now() - datetime.timedelta(days=10)),
+            'title': title,
+            'voucher_type': Voucher.SINGLE_USE,
+            'enterprise_customer': {'name': 'Benchmark Enterprise', 'id': self.enterprise_id},
+            'enterprise_customer_catalog': str(uuid4()),
+            'notify_email': 'admin@example.com',
+            'contract_discount_type': EnterpriseContractMetadata.PERCENTAGE,
+            'contract_discount_value': '12.35',
+        }
+        response = self.client.post(reverse('api:v2:enterprise-coupons-list'), json.dumps(data), 'application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_enterprise_coupon_overview(self):
+        path = reverse('api:v2:enterprise-coupons-overview', kwargs={'enterprise_id': self.enterprise_id})
+        self.benchmark('enterprise_coupon_overview', lambda: self.call_endpoint('get', path))
+
+    def test_enterprise_coupon_codes(self):
+        path = '{}?code_filter={}'.format(
+            reverse('api:v2:enterprise-coupons-codes', kwargs={'pk': self.coupon.id}), VOUCHER_NOT_ASSIGNED
+        )
+        self.benchmark('enterprise_coupon_codes', lambda: self.call_endpoint('get', path))
@@ -27,6 +27,7 @@ from threadlocals.threadlocals import set_thread_variable
 from waffle.models import Flag
 
 from ecommerce.core.constants import ALL_ACCESS_CONTEXT, SYSTEM_ENTERPRISE_ADMIN_ROLE, SYSTEM_ENTERPRISE_OPERATOR_ROLE
+from ecommerce.core.http_clients import clear_clients
 from ecommerce.core.url_utils import get_lms_url
 from ecommerce.courses.models import Course
 from ecommerce.courses.utils import mode_for_product
@@ -321,6 +322,9 @@ class SiteMixin:
     def setUp(self):
         super(SiteMixin, self).setUp()
 
+        # Discard the API clients and pooled connections of the previous tests' sites.
+        clear_clients()
+
         # Set the domain used for all test requests
         domain = 'testserver.fake'
         self.client = self.client_class(SERVER_NAME=domain)
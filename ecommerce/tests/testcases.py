@@ -7,6 +7,7 @@ from django.test import TransactionTestCase as DjangoTransactionTestCase
 from edx_django_utils.cache import TieredCache
 from oscar.test.factories import CategoryFactory
 
+from ecommerce.core.reference_data import clear_reference_data
 from ecommerce.tests.mixins import SiteMixin, TestServerUrlMixin, TestWaffleFlagMixin, UserMixin
 
 # When all unit tests are run, the catalog category table will sometimes be empty. However, if only a single test
@@ -22,10 +23,12 @@ class TieredCacheMixin:
 
     def setUp(self):
         TieredCache.dangerous_clear_all_tiers()
+        clear_reference_data()
         super(TieredCacheMixin, self).setUp()
 
     def tearDown(self):
         TieredCache.dangerous_clear_all_tiers()
+        clear_reference_data()
         super(TieredCacheMixin, self).tearDown()
 
 